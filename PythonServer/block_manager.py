@@ -10,9 +10,21 @@ It serves as the single source of truth for both:
 All block operations should go through this manager to ensure consistency.
 """
 
-from typing import Dict, List, Tuple, Optional
+from collections import Counter
+import copy
+from itertools import repeat
+from typing import Callable, Dict, Iterator, List, Tuple, Optional
 import math
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from .light_engine import LightEngine
+
 try:
     from .terrain_generator import TerrainGenerator
     TERRAIN_AVAILABLE = True
@@ -21,6 +33,123 @@ except ImportError:
     TerrainGenerator = None
 
 
+# Heightmap types kept per chunk: name -> protocol type ID. Both are computed
+# the same way, counting every non-air block. That is exact for WORLD_SURFACE;
+# vanilla's MOTION_BLOCKING also skips blocks without collision (flowers,
+# torches, ...). The server has no collision data, so in a column topped by
+# such a block the MOTION_BLOCKING height it sends is higher than vanilla's
+HEIGHTMAP_TYPES = {
+    'WORLD_SURFACE': 1,
+    'MOTION_BLOCKING': 4,
+}
+
+
+# Palette indices of a single-value section (shared, never modified)
+UNIFORM_INDICES = (0,) * 4096
+
+
+class ChunkSection:
+    """
+    Block state IDs of one 16x16x16 chunk section (index y * 256 + z * 16 + x).
+    
+    A uniform section (all air, all dirt, ...) is stored as its single value.
+    The first write of a different block upgrades it to a full 4096-entry
+    list; once writes make it uniform again it is downgraded back. The count
+    of every block state ID is kept alongside the list, so both checks are
+    O(1) per write.
+    """
+    __slots__ = ('value', 'blocks', 'counts')
+    
+    def __init__(self, value: int = 0):
+        """
+        Create a uniform section.
+        
+        Args:
+            value: Block state ID of every block in the section
+        """
+        self.value = value
+        self.blocks: Optional[List[int]] = None       # Full list, None while uniform
+        self.counts: Optional[Dict[int, int]] = None  # Block state ID -> count, None while uniform
+    
+    @classmethod
+    def from_blocks(cls, blocks: List[int]) -> 'ChunkSection':
+        """
+        Create a section from 4096 block state IDs (uniform if they are all equal).
+        
+        Args:
+            blocks: Block state IDs; kept (not copied) unless uniform
+        """
+        section = cls(blocks[0])
+        if blocks.count(blocks[0]) != len(blocks):
+            section.blocks = blocks
+            section.counts = dict(Counter(blocks))
+        return section
+    
+    @property
+    def is_uniform(self) -> bool:
+        """Whether every block in the section is the same."""
+        return self.blocks is None
+    
+    def __len__(self) -> int:
+        return 4096
+    
+    def __getitem__(self, idx: int) -> int:
+        if self.blocks is None:
+            return self.value
+        return self.blocks[idx]
+    
+    def __setitem__(self, idx: int, block_state_id: int) -> None:
+        blocks = self.blocks
+        if blocks is None:
+            if block_state_id == self.value:
+                return
+            # Upgrade to a full list
+            blocks = self.blocks = [self.value] * 4096
+            self.counts = {self.value: 4096}
+        
+        old = blocks[idx]
+        if old == block_state_id:
+            return
+        blocks[idx] = block_state_id
+        counts = self.counts
+        if counts[old] == 1:
+            del counts[old]
+        else:
+            counts[old] -= 1
+        counts[block_state_id] = counts.get(block_state_id, 0) + 1
+        
+        if len(counts) == 1:
+            # Uniform again: downgrade to the single value
+            self.value = block_state_id
+            self.blocks = None
+            self.counts = None
+    
+    def __iter__(self) -> Iterator[int]:
+        if self.blocks is None:
+            return repeat(self.value, 4096)
+        return iter(self.blocks)
+    
+    def count(self, block_state_id: int) -> int:
+        """Number of blocks with a block state ID."""
+        if self.blocks is None:
+            return 4096 if block_state_id == self.value else 0
+        return self.counts.get(block_state_id, 0)
+    
+    def copy(self) -> 'ChunkSection':
+        """Independent copy of the section."""
+        section = ChunkSection(self.value)
+        if self.blocks is not None:
+            section.blocks = list(self.blocks)
+            section.counts = dict(self.counts)
+        return section
+    
+    def block_ids(self) -> List[int]:
+        """Block state IDs present in the section (unordered)."""
+        if self.blocks is None:
+            return [self.value]
+        return list(self.counts)
+
+
 class BlockManager:
     """
     Centralized block data manager.
@@ -39,16 +168,36 @@ class BlockManager:
         
         Storage format:
         - Key: (chunk_x, chunk_z, section_y) tuple
-        - Value: List of 4096 block state IDs (16x16x16 section)
+        - Value: ChunkSection of 4096 block state IDs (16x16x16 section),
+          stored as a single value while uniform
         - Index calculation: y * 256 + z * 16 + x
         """
-        # Block data storage: {(chunk_x, chunk_z, section_y): [4096 block IDs]}
-        self.block_data: Dict[Tuple[int, int, int], List[int]] = {}
+        # Block data storage: {(chunk_x, chunk_z, section_y): ChunkSection}
+        self.block_data: Dict[Tuple[int, int, int], ChunkSection] = {}
         
         # Track blocks that have been modified (for cache invalidation)
         # Set of (x, y, z) world coordinates
         self.updated_blocks: set = set()
         
+        # Chunks with player modifications, as (chunk_x, chunk_z); these are
+        # never unloaded since there is no other copy of the changes
+        self.modified_chunks: set = set()
+        
+        # Modification version per chunk, bumped by set_block (chunks that were
+        # never modified are at version 0); keys the chunk packet cache
+        self.chunk_versions: Dict[Tuple[int, int], int] = {}
+        
+        # Encoded sections as sent in Chunk Data packets, per section key, and
+        # the sections changed since they were last encoded (set by set_block)
+        self.section_blobs: Dict[Tuple[int, int, int], bytes] = {}
+        self.dirty_sections: set = set()
+        
+        # Heightmaps per (chunk_x, chunk_z): heightmap type ID -> 256 heights
+        # (index z * 16 + x; height = y above the column's top block - min Y,
+        # 0 for an empty column), and their encoding (dropped on change)
+        self.heightmaps: Dict[Tuple[int, int], Dict[int, List[int]]] = {}
+        self.heightmap_blobs: Dict[Tuple[int, int], bytes] = {}
+        
         # Block state ID constants
         self.BLOCK_AIR = 0
         self.BLOCK_DIRT = 2105  # Brown wool (for testing)
@@ -58,6 +207,10 @@ class BlockManager:
         self.BLOCK_YELLOW_WOOL = 2097  # Yellow wool (sand)
         self.BLOCK_WATER = 86  # Water (full water block, level=0)
         
+        # Sky and block light, computed per chunk when first needed and kept
+        # up to date by set_block
+        self.light = LightEngine(self)
+        
         # Terrain generator (optional, for terrain generation)
         self.terrain_generator: Optional[TerrainGenerator] = None
         if TERRAIN_AVAILABLE:
@@ -85,11 +238,13 @@ class BlockManager:
             # Chunk not loaded, return air
             return self.BLOCK_AIR
         
-        # Get block from section data
+        # Get block from section data (a uniform section is a single value)
         block_data = self.block_data[key]
+        if block_data.blocks is None:
+            return block_data.value
         idx = self._calculate_block_index(local_x, local_y, local_z)
         if 0 <= idx < len(block_data):
-            return block_data[idx]
+            return block_data.blocks[idx]
         return self.BLOCK_AIR
     
     def set_block(self, x: int, y: int, z: int, block_state_id: int) -> bool:
@@ -110,9 +265,12 @@ class BlockManager:
         # Ensure chunk section is loaded
         key = (chunk_x, chunk_z, section_y)
         if key not in self.block_data:
-            # Load the chunk section first (lazy loading)
+            # Load the chunk section first (lazy loading); any light computed
+            # without it is recomputed when next needed
             block_data = self.generate_initial_chunk_section(chunk_x, chunk_z, section_y, ground_y=64)
             self.block_data[key] = block_data
+            self.light.forget_chunk(chunk_x, chunk_z)
+            self._drop_heightmaps(chunk_x, chunk_z)
         
         # Update the block
         block_data = self.block_data[key]
@@ -121,6 +279,17 @@ class BlockManager:
             block_data[idx] = block_state_id
             # Mark this block as updated for collision detection optimization
             self.updated_blocks.add((x, y, z))
+            self.modified_chunks.add((chunk_x, chunk_z))
+            self.dirty_sections.add(key)
+            self._update_heightmaps(x, y, z, block_state_id)
+            
+            # Relight; the change's light may reach into neighbouring chunks,
+            # whose encoded packets are then stale as well
+            changed_sections = self.light.block_changed(x, y, z, block_state_id)
+            changed_chunks = {(section[0], section[1]) for section in changed_sections}
+            changed_chunks.add((chunk_x, chunk_z))
+            for chunk in changed_chunks:
+                self.chunk_versions[chunk] = self.chunk_versions.get(chunk, 0) + 1
             return True
         return False
     
@@ -140,7 +309,7 @@ class BlockManager:
         return block_id != self.BLOCK_AIR
     
     def load_chunk(self, chunk_x: int, chunk_z: int, ground_y: int = 64, flat_world: bool = True,
-                   use_terrain: bool = False) -> None:
+                   use_terrain: bool = False, missing_only: bool = False) -> None:
         """
         Load a chunk by generating and storing all block sections.
         
@@ -153,12 +322,79 @@ class BlockManager:
             ground_y: Y coordinate of ground level (default 64)
             flat_world: If True, generate flat world (dirt at y=63, grass at y=64)
             use_terrain: If True, use terrain generation instead of flat world
+            missing_only: Only generate sections that are not stored yet
+                          (keeps modified sections of a shared chunk)
         """
         # Overworld has 24 sections (y=-64 to 320)
-        for section_idx in range(24):
-            block_data = self.generate_initial_chunk_section(chunk_x, chunk_z, section_idx, ground_y, flat_world, use_terrain)
-            key = (chunk_x, chunk_z, section_idx)
-            self.block_data[key] = block_data
+        section_ys = self.missing_sections(chunk_x, chunk_z) if missing_only else range(24)
+        sections = {
+            section_idx: self.generate_initial_chunk_section(chunk_x, chunk_z, section_idx, ground_y, flat_world, use_terrain)
+            for section_idx in section_ys
+        }
+        if not missing_only:
+            for section_idx in sections:
+                self.block_data.pop((chunk_x, chunk_z, section_idx), None)
+        self.store_sections(chunk_x, chunk_z, sections)
+        if (chunk_x, chunk_z) not in self.heightmaps:
+            self.heightmaps[(chunk_x, chunk_z)] = self._compute_heightmaps(chunk_x, chunk_z)
+    
+    def missing_sections(self, chunk_x: int, chunk_z: int) -> List[int]:
+        """
+        Section Y indices of a chunk that are not stored yet.
+        
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            
+        Returns:
+            Section Y indices (0-23), lowest first
+        """
+        return [section_y for section_y in range(24) if (chunk_x, chunk_z, section_y) not in self.block_data]
+    
+    def store_sections(self, chunk_x: int, chunk_z: int, sections: Dict[int, ChunkSection]) -> None:
+        """
+        Store generated sections of a chunk, skipping any stored meanwhile.
+        
+        Lets a caller generate sections (generate_initial_chunk_section only
+        reads its arguments) without holding the lock that guards the block
+        data, then store them under it; a section another thread stored (or
+        set_block lazily loaded and changed) in between is kept.
+        
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            sections: Section Y index -> generated section
+        """
+        generated = False
+        for section_y, section in sections.items():
+            key = (chunk_x, chunk_z, section_y)
+            if key in self.block_data:
+                continue
+            self.block_data[key] = section
+            self.dirty_sections.add(key)
+            generated = True
+        
+        # Light is computed from the new blocks when next needed
+        if generated:
+            self.light.forget_chunk(chunk_x, chunk_z)
+            self._drop_heightmaps(chunk_x, chunk_z)
+    
+    def chunk_version(self, chunk_x: int, chunk_z: int) -> int:
+        """
+        Modification version of a chunk.
+        
+        Increases every time set_block changes the chunk, so anything derived
+        from the chunk's blocks (e.g. an encoded chunk packet) is still valid
+        while the version is unchanged.
+        
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            
+        Returns:
+            Version number (0 for chunks that were never modified)
+        """
+        return self.chunk_versions.get((chunk_x, chunk_z), 0)
     
     def is_chunk_loaded(self, chunk_x: int, chunk_z: int) -> bool:
         """
@@ -178,7 +414,33 @@ class BlockManager:
                 return True
         return False
     
-    def get_chunk_section(self, chunk_x: int, chunk_z: int, section_y: int) -> Optional[List[int]]:
+    def unload_chunk(self, chunk_x: int, chunk_z: int) -> bool:
+        """
+        Drop the block data of an unmodified chunk.
+        
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            
+        Returns:
+            True if the chunk was unloaded, False if it was modified (kept)
+        """
+        if (chunk_x, chunk_z) in self.modified_chunks:
+            return False
+        for section_y in range(24):
+            key = (chunk_x, chunk_z, section_y)
+            self.block_data.pop(key, None)
+            self.section_blobs.pop(key, None)
+            self.dirty_sections.discard(key)
+        self.light.forget_chunk(chunk_x, chunk_z)
+        self._drop_heightmaps(chunk_x, chunk_z)
+        return True
+    
+    def loaded_chunk_count(self) -> int:
+        """Number of chunks with block data in memory."""
+        return len({(chunk_x, chunk_z) for chunk_x, chunk_z, _ in self.block_data})
+    
+    def get_chunk_section(self, chunk_x: int, chunk_z: int, section_y: int) -> Optional[ChunkSection]:
         """
         Get the block data for a specific chunk section.
         
@@ -188,7 +450,7 @@ class BlockManager:
             section_y: Section Y index (0-23, where section_y = (y + 64) // 16)
             
         Returns:
-            List of 4096 block state IDs, or None if section is not loaded
+            ChunkSection of 4096 block state IDs, or None if section is not loaded
         """
         key = (chunk_x, chunk_z, section_y)
         return self.block_data.get(key)
@@ -210,31 +472,262 @@ class BlockManager:
         Returns:
             Tuple of (block_count, palette, palette_indices)
             - block_count: Number of non-air blocks in section
-            - palette: List of unique block state IDs
-            - palette_indices: List of palette indices (one per block, 4096 total)
+            - palette: List of unique block state IDs (sorted)
+            - palette_indices: Palette index of every block (4096 total); a
+              NumPy array when NumPy is available, otherwise a list, and the
+              shared all-zero UNIFORM_INDICES for single-value sections
             
-        Returns (0, [0], [0]*4096) if section is not loaded (all air).
+        Returns (0, [0], UNIFORM_INDICES) if section is not loaded (all air).
         """
         block_data = self.get_chunk_section(chunk_x, chunk_z, section_y)
         if block_data is None:
             # Section not loaded, return all air
-            return (0, [self.BLOCK_AIR], [0] * 4096)
+            return (0, [self.BLOCK_AIR], UNIFORM_INDICES)
+        
+        if block_data.is_uniform:
+            # Single value: nothing to scan
+            block_count = 0 if block_data.value == self.BLOCK_AIR else len(block_data)
+            return (block_count, [block_data.value], UNIFORM_INDICES)
         
         # Count non-air blocks
-        block_count = sum(1 for block_id in block_data if block_id != self.BLOCK_AIR)
+        block_count = len(block_data) - block_data.count(self.BLOCK_AIR)
+        
+        if NUMPY_AVAILABLE:
+            # Sorted palette and every block's index into it in one pass
+            blocks = np.fromiter(block_data.blocks, dtype=np.int32, count=len(block_data))
+            palette, palette_indices = np.unique(blocks, return_inverse=True)
+            return (block_count, palette.tolist(), palette_indices.reshape(-1))
         
-        # Create palette (unique block state IDs)
-        unique_blocks = set(block_data)
-        palette = sorted(unique_blocks)  # Sort for consistency
+        # Create palette (unique block state IDs), sorted for consistency
+        palette = sorted(block_data.block_ids())
         
         # Map block_data to palette indices
-        palette_indices = [palette.index(block_id) for block_id in block_data]
+        palette_lookup = {block_id: index for index, block_id in enumerate(palette)}
+        palette_indices = [palette_lookup[block_id] for block_id in block_data.blocks]
         
         return (block_count, palette, palette_indices)
     
+    def get_encoded_section(self, chunk_x: int, chunk_z: int, section_y: int,
+                            encode: Callable[[int, List[int], List[int]], bytes]) -> bytes:
+        """
+        Get a chunk section encoded for the Chunk Data packet.
+        
+        The encoding is kept per section and only redone when the section was
+        changed (set_block) or regenerated since it was last encoded.
+        
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            section_y: Section Y index (0-23)
+            encode: Encodes get_chunk_section_for_protocol's result, called as
+                    encode(block_count, palette, palette_indices)
+            
+        Returns:
+            Encoded section bytes
+        """
+        key = (chunk_x, chunk_z, section_y)
+        blob = self.section_blobs.get(key)
+        if blob is None or key in self.dirty_sections:
+            blob = encode(*self.get_chunk_section_for_protocol(chunk_x, chunk_z, section_y))
+            if key in self.block_data:
+                self.section_blobs[key] = blob
+                self.dirty_sections.discard(key)
+        return blob
+    
+    def get_heightmaps(self, chunk_x: int, chunk_z: int) -> Dict[int, List[int]]:
+        """
+        Get a chunk's heightmaps, computing them from its blocks if needed.
+        
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            
+        Returns:
+            Heightmap type ID -> 256 heights (index z * 16 + x), each the
+            number of blocks from the bottom of the world to just above the
+            column's highest block (0 for an empty column)
+        """
+        heightmaps = self.heightmaps.get((chunk_x, chunk_z))
+        if heightmaps is None:
+            heightmaps = self._compute_heightmaps(chunk_x, chunk_z)
+            if self.is_chunk_loaded(chunk_x, chunk_z):
+                self.heightmaps[(chunk_x, chunk_z)] = heightmaps
+        return heightmaps
+    
+    def get_encoded_heightmaps(self, chunk_x: int, chunk_z: int,
+                               encode: Callable[[Dict[int, List[int]]], bytes]) -> bytes:
+        """
+        Get a chunk's heightmaps encoded for the Chunk Data packet.
+        
+        The encoding is kept per chunk and only redone after set_block
+        changed a height.
+        
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            encode: Encodes get_heightmaps' result, called as encode(heightmaps)
+            
+        Returns:
+            Encoded heightmaps bytes
+        """
+        blob = self.heightmap_blobs.get((chunk_x, chunk_z))
+        if blob is None:
+            blob = encode(self.get_heightmaps(chunk_x, chunk_z))
+            if (chunk_x, chunk_z) in self.heightmaps:
+                self.heightmap_blobs[(chunk_x, chunk_z)] = blob
+        return blob
+    
+    def snapshot_chunk(self, chunk_x: int, chunk_z: int) -> 'BlockManager':
+        """
+        Copy of one chunk's blocks, light and cached encodings.
+        
+        Lets a chunk packet be built without holding the lock that guards the
+        block data: the copy is a BlockManager holding only this chunk, and
+        the encodings and light computed while building from it are kept in
+        the copy until adopt_snapshot(). Cheap to take, since uniform
+        sections are a single value and encodings are shared bytes.
+        
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            
+        Returns:
+            BlockManager with copies of the chunk's data
+        """
+        chunk = (chunk_x, chunk_z)
+        keys = [(chunk_x, chunk_z, section_y) for section_y in range(24)]
+        
+        # Shallow copy for the constants and terrain generator; every
+        # container is replaced by one holding only this chunk
+        snapshot = copy.copy(self)
+        snapshot.snapshot_sources = {key: self.block_data[key] for key in keys if key in self.block_data}
+        snapshot.block_data = {key: section.copy() for key, section in snapshot.snapshot_sources.items()}
+        snapshot.updated_blocks = set()
+        snapshot.modified_chunks = {chunk} & self.modified_chunks
+        snapshot.chunk_versions = {chunk: self.chunk_version(chunk_x, chunk_z)}
+        snapshot.section_blobs = {key: self.section_blobs[key] for key in keys if key in self.section_blobs}
+        snapshot.dirty_sections = {key for key in keys if key in self.dirty_sections}
+        snapshot.heightmaps = {}
+        if chunk in self.heightmaps:
+            snapshot.heightmaps[chunk] = {type_id: list(heights) for type_id, heights in self.heightmaps[chunk].items()}
+        snapshot.heightmap_blobs = {chunk: self.heightmap_blobs[chunk]} if chunk in self.heightmap_blobs else {}
+        snapshot.light = self.light.snapshot_chunk(snapshot, chunk_x, chunk_z)
+        return snapshot
+    
+    def adopt_snapshot(self, snapshot: 'BlockManager', chunk_x: int, chunk_z: int) -> None:
+        """
+        Keep the encodings and light computed from a snapshot_chunk() copy.
+        
+        Only valid while the chunk is unchanged since the snapshot, so the
+        caller checks that chunk_version() is the same; a chunk that was
+        unloaded or regenerated meanwhile is detected here and skipped.
+        
+        Args:
+            snapshot: Copy returned by snapshot_chunk() for this chunk
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+        """
+        chunk = (chunk_x, chunk_z)
+        keys = [(chunk_x, chunk_z, section_y) for section_y in range(24)]
+        sources = snapshot.snapshot_sources
+        if any(self.block_data.get(key) is not sources.get(key) for key in keys):
+            return
+        
+        for key in keys:
+            blob = snapshot.section_blobs.get(key)
+            if blob is not None and key in sources and key not in snapshot.dirty_sections:
+                self.section_blobs[key] = blob
+                self.dirty_sections.discard(key)
+        
+        if chunk in snapshot.heightmaps:
+            if chunk not in self.heightmaps:
+                self.heightmaps[chunk] = snapshot.heightmaps[chunk]
+            if chunk in snapshot.heightmap_blobs:
+                self.heightmap_blobs.setdefault(chunk, snapshot.heightmap_blobs[chunk])
+        
+        self.light.adopt_chunk(snapshot.light, chunk_x, chunk_z)
+    
+    def _compute_heightmaps(self, chunk_x: int, chunk_z: int) -> Dict[int, List[int]]:
+        """
+        Compute a chunk's heightmaps from its section data, top section first.
+        
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            
+        Returns:
+            Heightmap type ID -> 256 heights (see get_heightmaps)
+        """
+        heights = [0] * 256
+        unresolved = set(range(256))
+        for section_y in range(23, -1, -1):
+            block_data = self.block_data.get((chunk_x, chunk_z, section_y))
+            if block_data is None or block_data.count(self.BLOCK_AIR) == len(block_data):
+                continue
+            if block_data.is_uniform:
+                # Entirely non-air: the section's top layer is every column's top
+                for column in unresolved:
+                    heights[column] = section_y * 16 + 16
+                unresolved.clear()
+            elif NUMPY_AVAILABLE:
+                solid = np.fromiter(block_data.blocks, dtype=np.int32, count=4096).reshape(16, 256) != self.BLOCK_AIR
+                has_block = solid.any(axis=0)
+                # Highest non-air layer of every column of the section
+                top_layer = 15 - np.argmax(solid[::-1], axis=0)
+                for column in [column for column in unresolved if has_block[column]]:
+                    heights[column] = section_y * 16 + int(top_layer[column]) + 1
+                    unresolved.discard(column)
+            else:
+                for column in list(unresolved):
+                    for local_y in range(15, -1, -1):
+                        if block_data[local_y * 256 + column] != self.BLOCK_AIR:
+                            heights[column] = section_y * 16 + local_y + 1
+                            unresolved.discard(column)
+                            break
+            if not unresolved:
+                break
+        return {type_id: list(heights) for type_id in HEIGHTMAP_TYPES.values()}
+    
+    def _update_heightmaps(self, x: int, y: int, z: int, block_state_id: int) -> None:
+        """
+        Update a chunk's heightmaps for one changed block, in O(column).
+        
+        Args:
+            x: World X coordinate
+            y: World Y coordinate
+            z: World Z coordinate
+            block_state_id: The block's new state ID
+        """
+        chunk_x, chunk_z = x >> 4, z >> 4
+        heightmaps = self.heightmaps.get((chunk_x, chunk_z))
+        if heightmaps is None:
+            return
+        column = (z & 15) * 16 + (x & 15)
+        height = y + 64 + 1  # Height with this block as the column's top
+        changed = False
+        for heights in heightmaps.values():
+            if block_state_id != self.BLOCK_AIR:
+                if height > heights[column]:
+                    heights[column] = height
+                    changed = True
+            elif height == heights[column]:
+                # The top block was removed: find the next one down
+                below = y - 1
+                while below >= -64 and self.get_block(x, below, z) == self.BLOCK_AIR:
+                    below -= 1
+                heights[column] = below + 64 + 1
+                changed = True
+        if changed:
+            self.heightmap_blobs.pop((chunk_x, chunk_z), None)
+    
+    def _drop_heightmaps(self, chunk_x: int, chunk_z: int) -> None:
+        """Drop a chunk's heightmaps (recomputed from its blocks when needed)."""
+        self.heightmaps.pop((chunk_x, chunk_z), None)
+        self.heightmap_blobs.pop((chunk_x, chunk_z), None)
+    
     def generate_initial_chunk_section(self, chunk_x: int, chunk_z: int, section_y: int, 
                                       ground_y: int = 64, flat_world: bool = True,
-                                      use_terrain: bool = False) -> List[int]:
+                                      use_terrain: bool = False) -> ChunkSection:
         """
         Generate initial block data for a chunk section (before any modifications).
         
@@ -250,16 +743,24 @@ class BlockManager:
             use_terrain: If True, use terrain generation instead of flat world
             
         Returns:
-            List of 4096 block state IDs for the section
+            ChunkSection of 4096 block state IDs for the section
         """
         section_y_min, section_y_max = self._get_section_y_range(section_y)
-        block_data = [self.BLOCK_AIR] * 4096  # 16x16x16 = 4096 blocks
         
         # Terrain generation mode
         if use_terrain and self.terrain_generator is not None:
             # Get height map for this chunk
             height_map = self.terrain_generator.generate_height_map(chunk_x, chunk_z)
             
+            # Sections entirely above the surface and sea level are air, and
+            # sections entirely below the dirt layer are stone
+            if section_y_min > max(map(max, height_map)) and section_y_min >= 64:
+                return ChunkSection(self.BLOCK_AIR)
+            if section_y_max < min(map(min, height_map)) - 3:
+                return ChunkSection(self.BLOCK_STONE)
+            
+            block_data = [self.BLOCK_AIR] * 4096  # 16x16x16 = 4096 blocks
+            
             # Fill blocks based on height map
             for y in range(16):
                 world_y = section_y_min + y
@@ -289,10 +790,13 @@ class BlockManager:
                             # Below dirt layer - stone
                             block_data[self._calculate_block_index(x, y, z)] = self.BLOCK_STONE
         
+            return ChunkSection.from_blocks(block_data)
+        
         # Flat world mode (original behavior)
-        elif flat_world and section_y_min <= ground_y <= section_y_max:
+        if flat_world and section_y_min <= ground_y <= section_y_max:
             # This section contains ground
             # Generate blocks: dirt at y=63, grass at y=64
+            block_data = [self.BLOCK_AIR] * 4096
             for y in range(16):
                 world_y = section_y_min + y
                 if world_y == ground_y - 1:  # Dirt layer (y=63)
@@ -305,11 +809,13 @@ class BlockManager:
                         for x in range(16):
                             idx = self._calculate_block_index(x, y, z)
                             block_data[idx] = self.BLOCK_GRASS_BLOCK
+            return ChunkSection.from_blocks(block_data)
         elif flat_world and section_y_min < ground_y - 1:
             # Section below ground - fill with dirt
-            block_data = [self.BLOCK_DIRT] * 4096
+            return ChunkSection(self.BLOCK_DIRT)
         
-        return block_data
+        # Anything else is air
+        return ChunkSection(self.BLOCK_AIR)
     
     def _get_surface_block(self, height_map: List[List[int]], x: int, z: int, 
                            surface_height: int, chunk_x: int, chunk_z: int) -> int:
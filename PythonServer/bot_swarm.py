@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Bot Swarm - Headless load generator for the Python server.
+
+Runs many simulated players from one process (one asyncio task per bot).
+Each bot goes through handshake → login → configuration (Known Packs) →
+play, answers keep-alives and teleports, streams Set Player Position along
+a scripted path and periodically breaks and places blocks.
+
+Reports connect latency, chunk-arrival latency, bytes/sec and server
+disconnects, so the player count at which the server falls over can be
+found by ramping --bots up.
+
+Usage:
+    python -m PythonServer.bot_swarm --bots 200 --ramp 10 --duration 60
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import struct
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from .minecraft_protocol import (
+    ConnectionState, ProtocolReader, ProtocolWriter, clientbound_id, serverbound_id
+)
+from .latency_stats import format_latency_summary
+from .protocol_client import ProtocolClient, build_handshake_body
+from .server_status import GAME_VERSION, PROTOCOL_VERSION
+
+
+# Clientbound packet IDs the bots react to
+LOGIN_DISCONNECT = clientbound_id(ConnectionState.LOGIN, 'minecraft:login_disconnect')
+LOGIN_SUCCESS = clientbound_id(ConnectionState.LOGIN, 'minecraft:login_finished')
+LOGIN_SET_COMPRESSION = clientbound_id(ConnectionState.LOGIN, 'minecraft:login_compression')
+CONFIG_DISCONNECT = clientbound_id(ConnectionState.CONFIGURATION, 'minecraft:disconnect')
+CONFIG_FINISH = clientbound_id(ConnectionState.CONFIGURATION, 'minecraft:finish_configuration')
+CONFIG_SELECT_KNOWN_PACKS = clientbound_id(ConnectionState.CONFIGURATION, 'minecraft:select_known_packs')
+PLAY_DISCONNECT = clientbound_id(ConnectionState.PLAY, 'minecraft:disconnect')
+PLAY_KEEP_ALIVE = clientbound_id(ConnectionState.PLAY, 'minecraft:keep_alive')
+PLAY_CHUNK_DATA = clientbound_id(ConnectionState.PLAY, 'minecraft:level_chunk_with_light')
+PLAY_SYNC_POSITION = clientbound_id(ConnectionState.PLAY, 'minecraft:player_position')
+
+# Serverbound packet IDs the bots send
+SB_LOGIN_START = serverbound_id(ConnectionState.LOGIN, 'minecraft:hello')
+SB_LOGIN_ACK = serverbound_id(ConnectionState.LOGIN, 'minecraft:login_acknowledged')
+SB_CLIENT_INFORMATION = serverbound_id(ConnectionState.CONFIGURATION, 'minecraft:client_information')
+SB_KNOWN_PACKS = serverbound_id(ConnectionState.CONFIGURATION, 'minecraft:select_known_packs')
+SB_FINISH_CONFIG_ACK = serverbound_id(ConnectionState.CONFIGURATION, 'minecraft:finish_configuration')
+SB_CONFIRM_TELEPORT = serverbound_id(ConnectionState.PLAY, 'minecraft:accept_teleportation')
+SB_KEEP_ALIVE = serverbound_id(ConnectionState.PLAY, 'minecraft:keep_alive')
+SB_SET_PLAYER_POSITION = serverbound_id(ConnectionState.PLAY, 'minecraft:move_player_pos')
+SB_PLAYER_ACTION = serverbound_id(ConnectionState.PLAY, 'minecraft:player_action')
+SB_USE_ITEM_ON = serverbound_id(ConnectionState.PLAY, 'minecraft:use_item_on')
+
+# Movement packets per second (one per client tick)
+MOVE_RATE = 20.0
+
+# Seconds a bot may spend getting from TCP connect to PLAY
+LOGIN_TIMEOUT = 30.0
+
+# Scripted paths
+PATHS = ('circle', 'line', 'random', 'idle')
+
+
+def _disconnect_reason(reader: ProtocolReader) -> str:
+    """Best-effort decode of a disconnect reason (JSON string or NBT string tag)."""
+    try:
+        data = reader.read_bytes(len(reader.data) - reader.offset)
+        if data[:1] == b'\x08':
+            length = struct.unpack('>H', data[1:3])[0]
+            return data[3:3 + length].decode('utf-8', 'replace')
+        return ProtocolReader(data).read_string()
+    except Exception:
+        return "<unparsed>"
+
+
+class SwarmStats:
+    """Metrics shared by all bots in the swarm."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.attempted = 0
+        self.in_play = 0
+        self.connect_latencies: List[float] = []
+        self.first_chunk_latencies: List[float] = []
+        self.chunk_latencies: List[float] = []
+        self.chunks_received = 0
+        self.keep_alives_answered = 0
+        self.blocks_broken = 0
+        self.blocks_placed = 0
+        self.disconnects: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.clients: List[ProtocolClient] = []
+
+    def record_disconnect(self, reason: str):
+        """Count a server-side disconnect (or connection failure) by reason."""
+        self.disconnects[reason] = self.disconnects.get(reason, 0) + 1
+
+    def totals(self):
+        """Total bytes sent/received (finished and live clients)."""
+        sent = self.bytes_sent + sum(c.bytes_sent for c in self.clients)
+        received = self.bytes_received + sum(c.bytes_received for c in self.clients)
+        return sent, received
+
+    def retire(self, client: ProtocolClient):
+        """Fold a finished client's byte counters into the totals."""
+        if client in self.clients:
+            self.clients.remove(client)
+            self.bytes_sent += client.bytes_sent
+            self.bytes_received += client.bytes_received
+
+
+class Bot:
+    """One simulated player."""
+
+    def __init__(self, index: int, host: str, port: int, stats: SwarmStats,
+                 path: str = 'circle', action_interval: float = 5.0):
+        """
+        Initialize a bot.
+
+        Args:
+            index: Bot number (used for its name and path phase)
+            host: Server host
+            port: Server port
+            stats: Shared swarm metrics
+            path: Movement script ('circle', 'line', 'random' or 'idle')
+            action_interval: Seconds between break/place actions (0 to disable)
+        """
+        self.index = index
+        self.name = f"Bot{index:04d}"
+        self.client = ProtocolClient(host, port)
+        self.stats = stats
+        self.path = path
+        self.action_interval = action_interval
+        self.rng = random.Random(index)
+
+        self.state = 'login'
+        self.play_started = 0.0
+        self.chunks = 0
+        self.sequence = 0
+        self.x, self.y, self.z = 0.5, 65.0, 0.5
+        self.origin = (0.5, 0.5)
+
+    async def run(self, duration: float):
+        """
+        Connect, play until the duration has elapsed, then disconnect.
+
+        Args:
+            duration: Seconds to stay connected after reaching PLAY
+        """
+        stats = self.stats
+        stats.attempted += 1
+        start = time.perf_counter()
+        try:
+            await self.client.connect()
+        except (OSError, asyncio.TimeoutError) as e:
+            stats.record_disconnect(f"connect failed: {type(e).__name__}")
+            return
+        stats.clients.append(self.client)
+
+        self.client.send_packet(0x00, build_handshake_body(self.client.host, self.client.port, 2, PROTOCOL_VERSION))
+        login = ProtocolWriter()
+        login.write_string(self.name, 16)
+        login.write_uuid(uuid.uuid3(uuid.NAMESPACE_OID, self.name))
+        self.client.send_packet(SB_LOGIN_START, login.to_bytes())
+
+        mover: Optional[asyncio.Task] = None
+        deadline = start + LOGIN_TIMEOUT
+        try:
+            while True:
+                try:
+                    packet_id, reader = await asyncio.wait_for(
+                        self.client.read_packet(), max(0.0, deadline - time.perf_counter())
+                    )
+                except asyncio.TimeoutError:
+                    if self.state != 'play':
+                        stats.record_disconnect(f"timed out before PLAY ({self.state})")
+                    break
+
+                reason = self._handle_packet(packet_id, reader, start)
+                if reason is not None:
+                    stats.record_disconnect(reason)
+                    break
+
+                if self.state == 'play' and mover is None:
+                    deadline = time.perf_counter() + duration
+                    mover = asyncio.create_task(self._move_loop())
+        except asyncio.IncompleteReadError:
+            stats.record_disconnect(f"connection closed by server ({self.state})")
+        except (ConnectionError, OSError) as e:
+            stats.record_disconnect(f"{type(e).__name__} ({self.state})")
+        except Exception as e:
+            stats.record_disconnect(f"client error: {type(e).__name__}: {e}")
+        finally:
+            if mover is not None:
+                mover.cancel()
+            if self.state == 'play':
+                stats.in_play -= 1
+            self.client.close()
+            stats.retire(self.client)
+
+    def _handle_packet(self, packet_id: int, reader: ProtocolReader, start: float) -> Optional[str]:
+        """
+        React to one clientbound packet.
+
+        Returns:
+            Disconnect reason if the server disconnected the bot, else None
+        """
+        client = self.client
+        if self.state == 'login':
+            if packet_id == LOGIN_SET_COMPRESSION:
+                client.compression_threshold = reader.read_varint()
+            elif packet_id == LOGIN_SUCCESS:
+                client.send_packet(SB_LOGIN_ACK)
+                info = ProtocolWriter()
+                info.write_string('en_us', 16)
+                info.write_byte(4)          # View distance
+                info.write_varint(0)        # Chat mode
+                info.write_bool(True)       # Chat colors
+                info.write_unsigned_byte(0x7F)
+                info.write_varint(1)        # Main hand
+                info.write_bool(False)      # Text filtering
+                info.write_bool(True)       # Server listings
+                info.write_varint(0)        # Particle status
+                client.send_packet(SB_CLIENT_INFORMATION, info.to_bytes())
+                self.state = 'configuration'
+            elif packet_id == LOGIN_DISCONNECT:
+                return f"login disconnect: {_disconnect_reason(reader)}"
+
+        elif self.state == 'configuration':
+            if packet_id == CONFIG_SELECT_KNOWN_PACKS:
+                packs = ProtocolWriter()
+                packs.write_varint(1)
+                packs.write_string('minecraft')
+                packs.write_string('core')
+                packs.write_string(GAME_VERSION)
+                client.send_packet(SB_KNOWN_PACKS, packs.to_bytes())
+            elif packet_id == CONFIG_FINISH:
+                client.send_packet(SB_FINISH_CONFIG_ACK)
+                self.state = 'play'
+                self.play_started = time.perf_counter()
+                self.stats.connect_latencies.append(self.play_started - start)
+                self.stats.in_play += 1
+            elif packet_id == CONFIG_DISCONNECT:
+                return f"configuration disconnect: {_disconnect_reason(reader)}"
+
+        else:
+            if packet_id == PLAY_KEEP_ALIVE:
+                client.send_packet(SB_KEEP_ALIVE, reader.read_bytes(8))
+                self.stats.keep_alives_answered += 1
+            elif packet_id == PLAY_CHUNK_DATA:
+                elapsed = time.perf_counter() - self.play_started
+                if self.chunks == 0:
+                    self.stats.first_chunk_latencies.append(elapsed)
+                self.chunks += 1
+                self.stats.chunks_received += 1
+                self.stats.chunk_latencies.append(elapsed)
+            elif packet_id == PLAY_SYNC_POSITION:
+                teleport_id = reader.read_varint()
+                self.x, self.y, self.z = reader.read_double(), reader.read_double(), reader.read_double()
+                self.origin = (self.x, self.z)
+                client.send_packet(SB_CONFIRM_TELEPORT, ProtocolWriter().write_varint(teleport_id).to_bytes())
+            elif packet_id == PLAY_DISCONNECT:
+                return f"play disconnect: {_disconnect_reason(reader)}"
+        return None
+
+    def _next_position(self, t: float):
+        """Advance the bot along its scripted path (t = seconds since PLAY)."""
+        ox, oz = self.origin
+        if self.path == 'circle':
+            radius = 8.0 + (self.index % 8)
+            angle = t * 0.5 + self.index
+            self.x = ox + radius * math.cos(angle)
+            self.z = oz + radius * math.sin(angle)
+        elif self.path == 'line':
+            # Walk away from spawn at sprint speed, crossing chunk borders
+            heading = (self.index * 2.399963) % (2 * math.pi)
+            self.x = ox + 5.6 * t * math.cos(heading)
+            self.z = oz + 5.6 * t * math.sin(heading)
+        elif self.path == 'random':
+            self.x += self.rng.uniform(-0.25, 0.25)
+            self.z += self.rng.uniform(-0.25, 0.25)
+
+    def _send_block_actions(self):
+        """Break the block under a nearby spot, then place one back."""
+        bx = int(math.floor(self.x)) + self.rng.randint(-2, 2)
+        bz = int(math.floor(self.z)) + self.rng.randint(-2, 2)
+        by = int(math.floor(self.y)) - 1
+
+        for status in (0, 2):  # Started digging, finished digging
+            self.sequence += 1
+            action = ProtocolWriter()
+            action.write_varint(status)
+            action.write_position(bx, by, bz)
+            action.write_byte(1)
+            action.write_varint(self.sequence)
+            self.client.send_packet(SB_PLAYER_ACTION, action.to_bytes())
+        self.stats.blocks_broken += 1
+
+        self.sequence += 1
+        use = ProtocolWriter()
+        use.write_varint(0)                 # Main hand
+        use.write_position(bx, by - 1, bz)  # Block below the hole
+        use.write_varint(1)                 # Top face
+        use.write_float(0.5)
+        use.write_float(1.0)
+        use.write_float(0.5)
+        use.write_bool(False)               # Inside block
+        use.write_bool(False)               # World border hit
+        use.write_varint(self.sequence)
+        self.client.send_packet(SB_USE_ITEM_ON, use.to_bytes())
+        self.stats.blocks_placed += 1
+
+    async def _move_loop(self):
+        """Stream movement at the client tick rate and do periodic block actions."""
+        interval = 1.0 / MOVE_RATE
+        next_action = time.perf_counter() + self.rng.uniform(0, self.action_interval or 1.0)
+        while True:
+            now = time.perf_counter()
+            if self.path != 'idle':
+                self._next_position(now - self.play_started)
+                self.client.send_packet(
+                    SB_SET_PLAYER_POSITION, struct.pack('>dddB', self.x, self.y, self.z, 0x01)
+                )
+            if self.action_interval > 0 and now >= next_action:
+                self._send_block_actions()
+                next_action = now + self.action_interval
+            await self.client.drain()
+            await asyncio.sleep(interval)
+
+
+def print_report(stats: SwarmStats, final: bool = False):
+    """Print a progress line, or the full report at the end of the run."""
+    elapsed = time.perf_counter() - stats.started
+    sent, received = stats.totals()
+    if not final:
+        print(f"  │  → {elapsed:6.1f}s  bots in play: {stats.in_play:4d}/{stats.attempted:<4d} "
+              f"chunks: {stats.chunks_received:6d}  "
+              f"in: {received / elapsed / 1024:8.1f} KiB/s  out: {sent / elapsed / 1024:7.1f} KiB/s  "
+              f"disconnects: {sum(stats.disconnects.values())}")
+        return
+
+    print(f"\n{'='*60}")
+    print("Bot Swarm Report")
+    print(f"{'='*60}")
+    print(f"  Bots started:          {stats.attempted}")
+    print(f"  Reached PLAY:          {len(stats.connect_latencies)}")
+    print(f"  Connect latency:       {format_latency_summary(stats.connect_latencies)}")
+    print(f"  First chunk latency:   {format_latency_summary(stats.first_chunk_latencies)}")
+    print(f"  Chunk arrival latency: {format_latency_summary(stats.chunk_latencies)}")
+    print(f"  Chunks received:       {stats.chunks_received}")
+    print(f"  Keep-alives answered:  {stats.keep_alives_answered}")
+    print(f"  Blocks broken/placed:  {stats.blocks_broken}/{stats.blocks_placed}")
+    print(f"  Bytes in:              {received} ({received / elapsed / 1024:.1f} KiB/s)")
+    print(f"  Bytes out:             {sent} ({sent / elapsed / 1024:.1f} KiB/s)")
+    print(f"  Disconnects:           {sum(stats.disconnects.values())}")
+    for reason, count in sorted(stats.disconnects.items(), key=lambda item: -item[1]):
+        print(f"    {count:5d} × {reason}")
+
+
+async def run_swarm(host: str, port: int, bots: int, ramp: float, duration: float,
+                    path: str, action_interval: float, report_interval: float = 5.0) -> SwarmStats:
+    """
+    Run a swarm of bots against a server.
+
+    Args:
+        host: Server host
+        port: Server port
+        bots: Number of bots
+        ramp: Bots started per second (0 to start all at once)
+        duration: Seconds each bot stays in PLAY
+        path: Movement script for every bot
+        action_interval: Seconds between break/place actions per bot
+        report_interval: Seconds between progress lines
+
+    Returns:
+        The collected metrics
+    """
+    stats = SwarmStats()
+    tasks = []
+
+    async def reporter():
+        while True:
+            await asyncio.sleep(report_interval)
+            print_report(stats)
+
+    report_task = asyncio.create_task(reporter())
+    try:
+        for i in range(bots):
+            bot = Bot(i, host, port, stats, path, action_interval)
+            tasks.append(asyncio.create_task(bot.run(duration)))
+            if ramp > 0:
+                await asyncio.sleep(1.0 / ramp)
+        await asyncio.gather(*tasks)
+    finally:
+        report_task.cancel()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless bot swarm load generator')
+    parser.add_argument('--host', default='127.0.0.1', help='Server host')
+    parser.add_argument('--port', type=int, default=25565, help='Server port')
+    parser.add_argument('--bots', type=int, default=50, help='Number of simulated players')
+    parser.add_argument('--ramp', type=float, default=10.0, help='Bots started per second (0 = all at once)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds each bot stays in PLAY')
+    parser.add_argument('--path', choices=PATHS, default='circle', help='Movement script')
+    parser.add_argument('--action-interval', type=float, default=5.0,
+                        help='Seconds between block break/place actions per bot (0 = never)')
+    parser.add_argument('--report-interval', type=float, default=5.0, help='Seconds between progress lines')
+    args = parser.parse_args()
+
+    print(f"{'='*60}")
+    print(f"Bot swarm: {args.bots} bot(s) → {args.host}:{args.port} "
+          f"(ramp {args.ramp}/s, {args.duration}s, path={args.path})")
+    print(f"{'='*60}")
+
+    try:
+        stats = asyncio.run(run_swarm(
+            args.host, args.port, args.bots, args.ramp, args.duration,
+            args.path, args.action_interval, args.report_interval
+        ))
+    except KeyboardInterrupt:
+        print("\n✗ Interrupted")
+        return
+    print_report(stats, final=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Capture Replay - Re-drive recorded sessions against a running server.
+
+Reads packet captures (see packet_capture.py), splits them into sessions
+(each serverbound Handshake starts one) and replays the serverbound packets
+with their original timing, scaled by a speed factor, or as fast as the
+server answers. One capture can be fanned out into N concurrent sessions.
+
+Clientbound responses are checked structurally: LOGIN and CONFIGURATION
+packets must arrive in the recorded order, and PLAY must produce every
+packet type seen in the capture. Packet contents (timestamps, entity/keep-alive/teleport
+IDs, chunk data) are not compared. Keep-alives and teleports are answered
+live instead of replaying the recorded IDs.
+
+Usage:
+    python -m PythonServer.capture_replay packet_logs/ --port 25565 --speed 4 --sessions 20
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple, Union, Iterable
+
+from .minecraft_protocol import (
+    ConnectionState, ProtocolReader, ProtocolWriter, clientbound_id, serverbound_id
+)
+from .packet_capture import iter_capture
+from .latency_stats import format_latency_summary
+from .protocol_client import ProtocolClient
+
+
+# Clientbound packet IDs the replayer reacts to
+LOGIN_SUCCESS = clientbound_id(ConnectionState.LOGIN, 'minecraft:login_finished')
+LOGIN_SET_COMPRESSION = clientbound_id(ConnectionState.LOGIN, 'minecraft:login_compression')
+CONFIG_FINISH = clientbound_id(ConnectionState.CONFIGURATION, 'minecraft:finish_configuration')
+CONFIG_SELECT_KNOWN_PACKS = clientbound_id(ConnectionState.CONFIGURATION, 'minecraft:select_known_packs')
+PLAY_KEEP_ALIVE = clientbound_id(ConnectionState.PLAY, 'minecraft:keep_alive')
+PLAY_SYNC_POSITION = clientbound_id(ConnectionState.PLAY, 'minecraft:player_position')
+
+# Serverbound packet IDs the replayer sends or rewrites
+SB_LOGIN_START = serverbound_id(ConnectionState.LOGIN, 'minecraft:hello')
+SB_LOGIN_ACK = serverbound_id(ConnectionState.LOGIN, 'minecraft:login_acknowledged')
+SB_KNOWN_PACKS = serverbound_id(ConnectionState.CONFIGURATION, 'minecraft:select_known_packs')
+SB_FINISH_CONFIG_ACK = serverbound_id(ConnectionState.CONFIGURATION, 'minecraft:finish_configuration')
+SB_CONFIRM_TELEPORT = serverbound_id(ConnectionState.PLAY, 'minecraft:accept_teleportation')
+SB_KEEP_ALIVE = serverbound_id(ConnectionState.PLAY, 'minecraft:keep_alive')
+
+# Serverbound packets that only make sense as replies to live server data;
+# they are dropped from the script and answered by the replayer instead
+REACTIVE_PACKETS = {
+    (ConnectionState.PLAY, SB_KEEP_ALIVE): PLAY_KEEP_ALIVE,
+    (ConnectionState.PLAY, SB_CONFIRM_TELEPORT): PLAY_SYNC_POSITION,
+}
+
+# Serverbound packets that must wait for a clientbound packet before being sent
+GATES = {
+    (ConnectionState.LOGIN, SB_LOGIN_ACK): (ConnectionState.LOGIN, LOGIN_SUCCESS),
+    (ConnectionState.CONFIGURATION, SB_KNOWN_PACKS): (ConnectionState.CONFIGURATION, CONFIG_SELECT_KNOWN_PACKS),
+    (ConnectionState.CONFIGURATION, SB_FINISH_CONFIG_ACK): (ConnectionState.CONFIGURATION, CONFIG_FINISH),
+}
+
+# States whose clientbound packets must match the capture in order
+ORDERED_STATES = (ConnectionState.LOGIN, ConnectionState.CONFIGURATION)
+
+# Seconds to wait for a gating packet before giving up on the session
+GATE_TIMEOUT = 10.0
+
+
+@dataclass
+class ReplayStep:
+    """One serverbound packet to send."""
+    offset: float                     # Seconds since the session's first packet
+    state: ConnectionState
+    packet_id: int
+    frame: bytes                      # Uncompressed packet including length prefix
+    expects: Set[int] = field(default_factory=set)  # Clientbound IDs the capture saw next
+
+
+@dataclass
+class CapturedSession:
+    """Serverbound script and recorded clientbound packets of one session."""
+    index: int
+    steps: List[ReplayStep] = field(default_factory=list)
+    clientbound: List[Tuple[ConnectionState, int]] = field(default_factory=list)
+    skipped: int = 0
+
+
+@dataclass
+class SessionResult:
+    """Outcome of replaying one session."""
+    session: int
+    copy: int
+    sent: int = 0
+    received: List[Tuple[ConnectionState, int]] = field(default_factory=list)
+    response_latencies: List[float] = field(default_factory=list)
+    connect_latency: Optional[float] = None
+    mismatches: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def _parse_timestamp(value: str) -> float:
+    """Capture timestamp (ISO format) to seconds."""
+    return datetime.fromisoformat(value).timestamp()
+
+
+def load_sessions(source: Union[str, Iterable[str]]) -> List[CapturedSession]:
+    """
+    Split a capture into sessions.
+
+    A serverbound Handshake starts a new session. Captures of concurrent
+    connections are interleaved in the capture file, so replay sessions are
+    only exact for captures taken with one client connected.
+
+    Args:
+        source: A capture file, a directory of captures, or a list of either
+
+    Returns:
+        Sessions in capture order
+    """
+    sessions: List[CapturedSession] = []
+    current: Optional[CapturedSession] = None
+    session_start = 0.0
+
+    for entry in iter_capture(source):
+        try:
+            state = ConnectionState[entry['state']]
+        except KeyError:
+            continue
+        packet_id = entry.get('packet_id')
+        if packet_id is None:
+            continue
+
+        if entry['direction'] == 'serverbound':
+            if state == ConnectionState.HANDSHAKING:
+                current = CapturedSession(index=len(sessions))
+                sessions.append(current)
+                session_start = _parse_timestamp(entry['timestamp'])
+            if current is None:
+                continue
+            if (state, packet_id) in REACTIVE_PACKETS:
+                continue
+            if not entry.get('packet_data_hex'):
+                current.skipped += 1
+                continue
+            current.steps.append(ReplayStep(
+                offset=_parse_timestamp(entry['timestamp']) - session_start,
+                state=state,
+                packet_id=packet_id,
+                frame=bytes.fromhex(entry['packet_data_hex'])
+            ))
+        elif current is not None:
+            if entry.get('packet_data_hex'):
+                # Trust the recorded bytes over the logged ID
+                reader = ProtocolReader(bytes.fromhex(entry['packet_data_hex']))
+                reader.read_varint()
+                packet_id = reader.read_varint()
+            current.clientbound.append((state, packet_id))
+            if current.steps:
+                current.steps[-1].expects.add(packet_id)
+
+    return [s for s in sessions if s.steps]
+
+
+def _rename_login_start(frame: bytes, suffix: str) -> bytes:
+    """Give a fanned-out session its own player name and UUID."""
+    reader = ProtocolReader(frame)
+    reader.read_varint()  # Length
+    reader.read_varint()  # Packet ID
+    name = reader.read_string(16)
+    name = (name[:16 - len(suffix)] + suffix)[:16]
+
+    body = ProtocolWriter()
+    body.write_varint(SB_LOGIN_START)
+    body.write_string(name, 16)
+    body.write_uuid(uuid.uuid4())
+    data = body.to_bytes()
+    return ProtocolWriter().write_varint(len(data)).write_bytes(data).to_bytes()
+
+
+def check_structure(expected: List[Tuple[ConnectionState, int]],
+                    received: List[Tuple[ConnectionState, int]]) -> List[str]:
+    """
+    Compare clientbound packets structurally.
+
+    LOGIN/CONFIGURATION packets must match in order; PLAY must include every
+    packet type in the capture (counts differ with timing and are not compared).
+
+    Returns:
+        Human-readable mismatch descriptions (empty if the responses match)
+    """
+    mismatches = []
+    for state in ORDERED_STATES:
+        want = [pid for s, pid in expected if s == state]
+        got = [pid for s, pid in received if s == state]
+        if want != got:
+            mismatches.append(
+                f"{state.name} order differs: expected {[hex(p) for p in want]}, got {[hex(p) for p in got]}"
+            )
+
+    # Extra PLAY packet types are not flagged: the server does not capture
+    # every packet it sends
+    want_play = {pid for s, pid in expected if s == ConnectionState.PLAY}
+    got_play = {pid for s, pid in received if s == ConnectionState.PLAY}
+    for pid in sorted(want_play - got_play):
+        mismatches.append(f"PLAY packet 0x{pid:02x} never received")
+    return mismatches
+
+
+class SessionReplayer:
+    """Replays one captured session over one connection."""
+
+    def __init__(self, session: CapturedSession, copy: int, host: str, port: int,
+                 speed: float, tail: float):
+        """
+        Initialize the replayer.
+
+        Args:
+            session: Captured session to replay
+            copy: Fan-out copy number (0 replays the session unchanged)
+            host: Server host
+            port: Server port
+            speed: Pacing factor (1.0 = original timing, 0 = as fast as possible)
+            tail: Seconds to keep reading after the last packet
+        """
+        self.session = session
+        self.copy = copy
+        self.client = ProtocolClient(host, port)
+        self.speed = speed
+        self.tail = tail
+        self.result = SessionResult(session=session.index, copy=copy)
+
+        self.recv_state = ConnectionState.HANDSHAKING
+        self.seen: Dict[Tuple[ConnectionState, int], asyncio.Event] = {}
+        self.pending: List[Tuple[Set[int], float]] = []
+
+    def _event(self, key: Tuple[ConnectionState, int]) -> asyncio.Event:
+        event = self.seen.get(key)
+        if event is None:
+            event = self.seen[key] = asyncio.Event()
+        return event
+
+    async def _read_loop(self):
+        """Read clientbound packets, answer reactive ones and time responses."""
+        client = self.client
+        while True:
+            packet_id, reader = await client.read_packet()
+            now = time.perf_counter()
+            state = self.recv_state
+            self.result.received.append((state, packet_id))
+
+            if state == ConnectionState.LOGIN and packet_id == LOGIN_SET_COMPRESSION:
+                client.compression_threshold = reader.read_varint()
+            elif state == ConnectionState.PLAY:
+                if packet_id == PLAY_KEEP_ALIVE:
+                    client.send_packet(SB_KEEP_ALIVE, reader.read_bytes(8))
+                elif packet_id == PLAY_SYNC_POSITION:
+                    client.send_packet(SB_CONFIRM_TELEPORT, ProtocolWriter().write_varint(reader.read_varint()).to_bytes())
+
+            # Response latency: first expected packet after each request
+            still_pending = []
+            for expects, sent_at in self.pending:
+                if packet_id in expects:
+                    self.result.response_latencies.append(now - sent_at)
+                else:
+                    still_pending.append((expects, sent_at))
+            self.pending = still_pending
+
+            self._event((state, packet_id)).set()
+
+    def _send(self, step: ReplayStep):
+        """Send one step and advance the client-side state machine."""
+        frame = step.frame
+        if step.state == ConnectionState.LOGIN and step.packet_id == SB_LOGIN_START and self.copy:
+            frame = _rename_login_start(frame, f"_{self.copy}")
+
+        self.client.send_frame(frame)
+        self.result.sent += 1
+        if step.expects:
+            self.pending.append((step.expects, time.perf_counter()))
+
+        if step.state == ConnectionState.HANDSHAKING:
+            intent = ProtocolReader(frame, len(frame) - 1).read_varint()
+            self.recv_state = ConnectionState.STATUS if intent == 1 else ConnectionState.LOGIN
+        elif step.state == ConnectionState.LOGIN and step.packet_id == SB_LOGIN_ACK:
+            self.recv_state = ConnectionState.CONFIGURATION
+        elif step.state == ConnectionState.CONFIGURATION and step.packet_id == SB_FINISH_CONFIG_ACK:
+            self.recv_state = ConnectionState.PLAY
+
+    async def run(self) -> SessionResult:
+        """Replay the session and check the responses."""
+        start = time.perf_counter()
+        try:
+            await self.client.connect()
+        except (OSError, asyncio.TimeoutError) as e:
+            self.result.error = f"connect failed: {type(e).__name__}"
+            return self.result
+
+        reader_task = asyncio.create_task(self._read_loop())
+        try:
+            for step in self.session.steps:
+                if self.speed > 0:
+                    delay = start + step.offset / self.speed - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                gate = GATES.get((step.state, step.packet_id))
+                if gate is not None:
+                    waiter = asyncio.ensure_future(self._event(gate).wait())
+                    done, _ = await asyncio.wait({waiter, reader_task}, timeout=GATE_TIMEOUT,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    if waiter not in done:
+                        waiter.cancel()
+                        if reader_task in done:
+                            raise reader_task.exception() or ConnectionError("connection closed")
+                        raise TimeoutError(f"no {gate[0].name} 0x{gate[1]:02x} from server")
+
+                if reader_task.done():
+                    raise reader_task.exception() or ConnectionError("connection closed")
+                self._send(step)
+                if step.state == ConnectionState.CONFIGURATION and step.packet_id == SB_FINISH_CONFIG_ACK:
+                    self.result.connect_latency = time.perf_counter() - start
+                await self.client.drain()
+
+            await asyncio.wait({reader_task}, timeout=self.tail)
+        except asyncio.IncompleteReadError:
+            self.result.error = f"connection closed by server ({self.recv_state.name})"
+        except Exception as e:
+            self.result.error = f"{type(e).__name__}: {e}"
+        finally:
+            if not reader_task.done():
+                reader_task.cancel()
+            elif not reader_task.cancelled() and self.result.error is None:
+                exc = reader_task.exception()
+                if exc is not None and not isinstance(exc, asyncio.IncompleteReadError):
+                    self.result.error = f"{type(exc).__name__}: {exc}"
+            self.client.close()
+
+        if self.session.steps and self.session.steps[0].state == ConnectionState.HANDSHAKING:
+            self.result.mismatches = check_structure(self.session.clientbound, self.result.received)
+        return self.result
+
+
+async def replay(sessions: List[CapturedSession], host: str, port: int, speed: float,
+                 copies: int, tail: float) -> List[SessionResult]:
+    """
+    Replay sessions, each fanned out into `copies` concurrent connections.
+
+    Returns:
+        One result per connection
+    """
+    tasks = [
+        SessionReplayer(session, copy, host, port, speed, tail).run()
+        for session in sessions
+        for copy in range(copies)
+    ]
+    return await asyncio.gather(*tasks)
+
+
+def print_report(results: List[SessionResult], elapsed: float):
+    """Print the replay summary."""
+    response = [v for r in results for v in r.response_latencies]
+    connect = [r.connect_latency for r in results if r.connect_latency is not None]
+    failed = [r for r in results if r.error]
+    mismatched = [r for r in results if r.mismatches]
+
+    print(f"\n{'='*60}")
+    print("Replay Report")
+    print(f"{'='*60}")
+    print(f"  Sessions replayed:     {len(results)} in {elapsed:.2f}s")
+    print(f"  Packets sent:          {sum(r.sent for r in results)}")
+    print(f"  Packets received:      {sum(len(r.received) for r in results)}")
+    print(f"  Response latency:      {format_latency_summary(response)}")
+    print(f"  Login → PLAY latency:  {format_latency_summary(connect)}")
+    print(f"  Errors:                {len(failed)}")
+    for r in failed[:10]:
+        print(f"  │  ✗ session {r.session} copy {r.copy}: {r.error}")
+    print(f"  Structural mismatches: {len(mismatched)}")
+    for r in mismatched[:10]:
+        for mismatch in r.mismatches[:5]:
+            print(f"  │  ✗ session {r.session} copy {r.copy}: {mismatch}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay packet captures against a running server')
+    parser.add_argument('capture', nargs='+', help='Capture file(s) or directory')
+    parser.add_argument('--host', default='127.0.0.1', help='Server host')
+    parser.add_argument('--port', type=int, default=25565, help='Server port')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Pacing factor: 1 = original timing, N = N× faster, 0 = max speed')
+    parser.add_argument('--max-speed', action='store_true', help='Send as fast as the server answers (same as --speed 0)')
+    parser.add_argument('--sessions', type=int, default=1, help='Concurrent copies of each captured session')
+    parser.add_argument('--session', type=int, action='append',
+                        help='Only replay this captured session index (repeatable)')
+    parser.add_argument('--tail', type=float, default=2.0, help='Seconds to keep reading after the last packet')
+    args = parser.parse_args()
+
+    speed = 0.0 if args.max_speed else args.speed
+    sessions = load_sessions(args.capture)
+    if args.session:
+        sessions = [s for s in sessions if s.index in args.session]
+    if not sessions:
+        print("✗ No replayable sessions found")
+        sys.exit(1)
+
+    print(f"{'='*60}")
+    print(f"Replaying {len(sessions)} session(s) × {args.sessions} → {args.host}:{args.port} "
+          f"({'max speed' if speed <= 0 else f'{speed:g}×'})")
+    print(f"{'='*60}")
+    for session in sessions:
+        skipped = f", {session.skipped} without data skipped" if session.skipped else ""
+        print(f"  │  → session {session.index}: {len(session.steps)} packet(s), "
+              f"{session.steps[-1].offset:.1f}s{skipped}")
+
+    start = time.perf_counter()
+    results = asyncio.run(replay(sessions, args.host, args.port, speed, args.sessions, args.tail))
+    print_report(results, time.perf_counter() - start)
+
+    if any(r.error or r.mismatches for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
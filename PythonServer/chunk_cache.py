@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Chunk Packet Cache - serialized Chunk Data packets shared by all players.
+
+Encoding a Chunk Data and Update Light packet is the most expensive thing
+the server does per chunk sent. The packet only depends on the chunk's
+blocks, so the bytes are cached per (chunk_x, chunk_z) together with the
+chunk's modification version (bumped by BlockManager.set_block). A chunk
+walking back into view, or a second player joining at spawn, reuses the
+cached bytes; a cached packet whose version is stale is rebuilt on the
+next request.
+
+Entries are evicted least-recently-used first once the cache exceeds its
+byte budget or entry limit.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+
+# Default limits: cached chunk packets are a few KiB to a few tens of KiB each
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 8192
+
+
+class ChunkPacketCache:
+    """LRU cache of chunk packets keyed by chunk coordinates and version."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes: Byte budget for all cached packets together
+            max_entries: Maximum number of cached chunks
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[int, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, chunk_x: int, chunk_z: int, version: int) -> Optional[bytes]:
+        """
+        Cached packet of a chunk at a version.
+
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            version: The chunk's current modification version
+
+        Returns:
+            Complete uncompressed packet, or None if missing or stale
+        """
+        key = (chunk_x, chunk_z)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, chunk_x: int, chunk_z: int, version: int, packet: bytes) -> None:
+        """
+        Cache a chunk's packet, replacing any older one.
+
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            version: The chunk version the packet was built from
+            packet: Complete uncompressed packet (including its length prefix)
+        """
+        key = (chunk_x, chunk_z)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old[1])
+            if len(packet) <= self.max_bytes:
+                self._entries[key] = (version, packet)
+                self.bytes += len(packet)
+                self._evict()
+
+    def get_or_build(self, chunk_x: int, chunk_z: int, version: int,
+                     build: Callable[[], bytes]) -> bytes:
+        """
+        Cached packet of a chunk, built (and cached) if missing or stale.
+
+        The caller must keep the chunk from changing between reading its
+        version and build() finishing.
+
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            version: The chunk's current modification version
+            build: Builds the packet for the chunk's current blocks
+
+        Returns:
+            Complete uncompressed packet (including its length prefix)
+        """
+        packet = self.get(chunk_x, chunk_z, version)
+        if packet is None:
+            packet = bytes(build())
+            self.put(chunk_x, chunk_z, version, packet)
+        return packet
+
+    def invalidate(self, chunk_x: int, chunk_z: int) -> None:
+        """Drop a chunk's cached packet."""
+        with self._lock:
+            entry = self._entries.pop((chunk_x, chunk_z), None)
+            if entry is not None:
+                self.bytes -= len(entry[1])
+
+    def clear(self) -> None:
+        """Drop every cached packet."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until within limits (lock held)."""
+        while self._entries and (self.bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            _, (_, packet) = self._entries.popitem(last=False)
+            self.bytes -= len(packet)
+            self.evictions += 1
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Configuration Bundle - the configuration-phase packets, built once.
+
+Every joining client receives the same Known Packs, Registry Data and
+Finish Configuration packets. They are built from extracted_data/ once at
+startup and kept as ready-to-write byte streams (one per compression
+threshold), so a join costs one send per stage instead of JSON parsing and
+packet building. The bundle is rebuilt only when one of its source files
+changes, detected by modification time.
+
+The bundle is only used from the event loop thread, so it has no locking.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .connection import compress_frame
+
+
+@dataclass
+class PreparedPacket:
+    """One prebuilt packet and what is logged about it."""
+    packet_id: int
+    name: str
+    frame: bytes              # Uncompressed packet including its length prefix
+    parsed_data: Any = None   # Logged with the packet capture
+
+
+class PacketStream:
+    """Packets that are always sent together, concatenated into one write."""
+
+    def __init__(self, packets: List[PreparedPacket]):
+        self.packets = packets
+        self._wire: Dict[int, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self.packets)
+
+    def wire(self, threshold: int) -> bytes:
+        """
+        The whole stream in the frame format for a compression threshold.
+
+        Args:
+            threshold: Active compression threshold (negative = uncompressed)
+
+        Returns:
+            Concatenated frames (built on first use, then cached)
+        """
+        data = self._wire.get(threshold)
+        if data is None:
+            if threshold < 0:
+                data = b''.join(packet.frame for packet in self.packets)
+            else:
+                data = b''.join(compress_frame(packet.frame, threshold) for packet in self.packets)
+            self._wire[threshold] = data
+        return data
+
+
+class ConfigurationBundle:
+    """Prebuilt configuration-phase packet streams, keyed by stage name."""
+
+    def __init__(self, source_files: Sequence[str],
+                 builder: Callable[[], Dict[str, List[PreparedPacket]]]):
+        """
+        Initialize the bundle (nothing is built until first use or prepare()).
+
+        Args:
+            source_files: Files the packets are built from; a change to any
+                          of their modification times triggers a rebuild
+            builder: Returns the packets of every stage, in send order
+        """
+        self.source_files = list(source_files)
+        self.builder = builder
+        self._stages: Optional[Dict[str, PacketStream]] = None
+        self._mtimes: Optional[Tuple] = None
+        self.builds = 0
+
+    def _source_mtimes(self) -> Tuple:
+        """Modification times of the source files (None for missing files)."""
+        mtimes = []
+        for path in self.source_files:
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def _current(self) -> Dict[str, PacketStream]:
+        """The stage streams, rebuilt first if a source file changed."""
+        mtimes = self._source_mtimes()
+        if self._stages is None or mtimes != self._mtimes:
+            self._stages = {stage: PacketStream(packets) for stage, packets in self.builder().items()}
+            self._mtimes = mtimes
+            self.builds += 1
+        return self._stages
+
+    def get(self, stage: str) -> PacketStream:
+        """
+        Packets of one stage.
+
+        Args:
+            stage: Stage name as returned by the builder
+
+        Returns:
+            The stage's PacketStream
+        """
+        return self._current()[stage]
+
+    def prepare(self, threshold: int) -> Dict[str, PacketStream]:
+        """
+        Build every stage and its wire form for a compression threshold now.
+
+        Args:
+            threshold: Compression threshold connections will use
+
+        Returns:
+            All stage streams by name
+        """
+        stages = self._current()
+        for stream in stages.values():
+            stream.wire(threshold)
+        return stages
@@ -0,0 +1,691 @@
+#!/usr/bin/env python3
+"""
+Client Connection - Per-Connection State and Non-Blocking I/O
+
+This module holds everything the server tracks for a single client socket:
+- Protocol state (handshaking, login, configuration, play)
+- Handshake flags and the player/world bound to the connection
+- Zero-copy framing of incoming packets (PacketFramer)
+- Protocol compression (Set Compression + zlib frame format)
+- A per-connection outbound queue that coalesces packets into one write
+  per flush; sends are non-blocking and safe to call from worker threads
+
+All connections are served by a single asyncio event loop, so an idle
+connection costs a few objects instead of an OS thread.
+"""
+
+import asyncio
+import collections
+import socket
+import threading
+import zlib
+from datetime import datetime
+from typing import Callable, Iterator, Optional, Tuple, Union
+
+from .minecraft_protocol import ConnectionState, PacketBuilder, encode_varint
+
+
+# Largest packet length the protocol allows (3-byte VarInt)
+MAX_PACKET_LENGTH = 2097151
+
+# Packets at least this large (uncompressed) are zlib-compressed once the
+# client has been sent Set Compression. Vanilla uses 256; -1 disables.
+DEFAULT_COMPRESSION_THRESHOLD = 256
+
+# zlib level for outgoing packets (vanilla uses the zlib default, 6)
+COMPRESSION_LEVEL = 6
+
+# Packets at least this large are compressed in the default executor instead
+# of on the event loop thread (zlib releases the GIL while deflating)
+OFFLOAD_COMPRESSION_SIZE = 16384
+
+# Outbound queue flush policy: queued packets are written together once per
+# tick (20 TPS), or immediately once this many bytes are waiting
+FLUSH_INTERVAL = 0.05
+FLUSH_SIZE = 65536
+
+# Outbound backpressure, measured as bytes queued plus bytes sitting in the
+# transport's buffer. Chunk streaming pauses above the high watermark and
+# resumes once the client has drained below the low watermark.
+OUTBOUND_HIGH_WATERMARK = 1024 * 1024
+OUTBOUND_LOW_WATERMARK = 256 * 1024
+
+# A client holding more than OUTBOUND_BUDGET bytes, or staying above the high
+# watermark for SLOW_CLIENT_TIMEOUT seconds, is disconnected
+OUTBOUND_BUDGET = 16 * 1024 * 1024
+SLOW_CLIENT_TIMEOUT = 30.0
+
+# Time a disconnected client gets to receive the Disconnect packet before the
+# socket is aborted
+DISCONNECT_GRACE = 1.0
+
+
+def _split_frame(frame) -> Tuple[int, int]:
+    """Return (length, body_start) for a length-prefixed frame."""
+    length = 0
+    shift = 0
+    pos = 0
+    while True:
+        byte = frame[pos]
+        pos += 1
+        length |= (byte & 0x7F) << shift
+        if (byte & 0x80) == 0:
+            return length, pos
+        shift += 7
+        if shift >= 21:
+            raise ValueError("Packet length VarInt too long")
+
+
+def compress_frame(packet: bytes, threshold: int) -> bytes:
+    """
+    Convert an uncompressed frame into the compressed frame format.
+
+    Compressed format: Packet Length, Data Length (0 if not compressed),
+    then the packet ID + payload, zlib-compressed when it is at least
+    threshold bytes long.
+
+    Args:
+        packet: Uncompressed packet including its VarInt length prefix
+                (as produced by PacketBuilder)
+        threshold: Negotiated compression threshold
+
+    Returns:
+        The same packet in compressed frame format
+    """
+    _, body_start = _split_frame(packet)
+    body = memoryview(packet)[body_start:]
+
+    if len(body) >= threshold:
+        data_length = encode_varint(len(body))
+        compressed = zlib.compress(body, COMPRESSION_LEVEL)
+        return encode_varint(len(data_length) + len(compressed)) + data_length + compressed
+
+    # Below threshold: Data Length 0 followed by the raw packet
+    return encode_varint(len(body) + 1) + b'\x00' + body
+
+
+def decompress_frame(frame, threshold: int) -> bytes:
+    """
+    Convert a compressed-format frame back into an uncompressed frame.
+
+    Args:
+        frame: Frame in compressed format (including Packet Length prefix)
+        threshold: Negotiated compression threshold
+
+    Returns:
+        Uncompressed packet including a VarInt length prefix, which is what
+        PacketParser.parse_packet expects
+
+    Raises:
+        ValueError: If the frame is malformed or inflates to the wrong size
+    """
+    _, pos = _split_frame(frame)
+
+    # Data Length (VarInt): uncompressed size, or 0 if sent uncompressed
+    data_length = 0
+    shift = 0
+    while True:
+        byte = frame[pos]
+        pos += 1
+        data_length |= (byte & 0x7F) << shift
+        if (byte & 0x80) == 0:
+            break
+        shift += 7
+        if shift >= 35:
+            raise ValueError("Data length VarInt too long")
+
+    if data_length == 0:
+        body = bytes(frame[pos:])
+    else:
+        if data_length < threshold or data_length > MAX_PACKET_LENGTH:
+            raise ValueError(f"Invalid compressed data length: {data_length}")
+        # Inflate at most data_length bytes, so a small payload cannot
+        # expand without bound before the size check
+        decompressor = zlib.decompressobj()
+        body = decompressor.decompress(frame[pos:], data_length)
+        if decompressor.unconsumed_tail or not decompressor.eof or len(body) != data_length:
+            raise ValueError(f"Compressed payload does not inflate to exactly {data_length} bytes")
+
+    return encode_varint(len(body)) + body
+
+
+class PacketFramer:
+    """
+    Splits a stream of bytes into length-prefixed packet frames.
+
+    Received bytes are written directly into a growable bytearray (via
+    socket.recv_into or asyncio's BufferedProtocol), and complete frames are
+    yielded as memoryview slices of that buffer - no per-packet copies.
+
+    Unread bytes are only moved to the front of the buffer when the free
+    space at the tail runs out, so a burst of small packets costs O(n) total
+    instead of re-slicing the whole buffer for every frame.
+
+    Frames yielded by frames() are views into the internal buffer and are only
+    valid until the next call to get_buffer(). Copy them (bytes(frame)) if
+    they need to outlive the current read.
+    """
+
+    def __init__(self, initial_size: int = 65536, min_free: int = 4096):
+        """
+        Initialize the framer.
+
+        Args:
+            initial_size: Initial buffer capacity in bytes
+            min_free: Minimum free tail space to offer for each receive
+        """
+        self._buffer = bytearray(initial_size)
+        self._start = 0  # First unread byte
+        self._end = 0    # One past the last received byte
+        self._min_free = min_free
+
+    def __len__(self) -> int:
+        """Number of received bytes not yet consumed as frames."""
+        return self._end - self._start
+
+    def get_buffer(self, size_hint: int = -1) -> memoryview:
+        """
+        Return a writable view of the free space at the end of the buffer.
+
+        Invalidates any frames previously yielded by frames().
+
+        Args:
+            size_hint: Minimum number of bytes the caller would like to write
+                       (-1 or 0 for no preference)
+
+        Returns:
+            memoryview to receive data into (pass to recv_into)
+        """
+        wanted = max(size_hint, self._min_free)
+
+        if self._start == self._end:
+            # Everything consumed - rewind for free
+            self._start = self._end = 0
+
+        if len(self._buffer) - self._end < wanted:
+            pending = self._end - self._start
+
+            if self._start > 0 and len(self._buffer) - pending >= wanted:
+                # Compact: move the partial frame to the front (same-size slice
+                # assignment, so no reallocation)
+                self._buffer[0:pending] = self._buffer[self._start:self._end]
+            else:
+                # Grow: allocate a larger buffer and copy only the pending bytes
+                new_size = len(self._buffer) * 2
+                while new_size - pending < wanted:
+                    new_size *= 2
+                new_buffer = bytearray(new_size)
+                new_buffer[0:pending] = self._buffer[self._start:self._end]
+                self._buffer = new_buffer
+
+            self._start = 0
+            self._end = pending
+
+        return memoryview(self._buffer)[self._end:]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        """
+        Record that nbytes were written into the view from get_buffer().
+
+        Args:
+            nbytes: Number of bytes received
+        """
+        self._end += nbytes
+
+    def feed(self, data: bytes) -> None:
+        """
+        Copy data into the buffer (for callers that already hold bytes).
+
+        Args:
+            data: Received bytes
+        """
+        self.get_buffer(len(data))[:len(data)] = data
+        self.buffer_updated(len(data))
+
+    def recv_into(self, sock: socket.socket) -> int:
+        """
+        Receive directly from a blocking socket into the buffer.
+
+        Args:
+            sock: Connected socket
+
+        Returns:
+            Number of bytes received (0 means the peer closed the connection)
+        """
+        nbytes = sock.recv_into(self.get_buffer())
+        self.buffer_updated(nbytes)
+        return nbytes
+
+    def frames(self) -> Iterator[memoryview]:
+        """
+        Yield every complete frame currently in the buffer.
+
+        Each frame includes its VarInt length prefix, which is what
+        PacketParser.parse_packet expects. Incomplete trailing data stays in
+        the buffer until more bytes arrive.
+
+        Yields:
+            memoryview of one complete frame
+
+        Raises:
+            ValueError: If a length prefix is malformed or too large
+        """
+        buffer = self._buffer
+        view = memoryview(buffer)
+
+        while True:
+            start = self._start
+            end = self._end
+
+            # Decode the length VarInt inline (at most 3 bytes)
+            length = 0
+            shift = 0
+            pos = start
+            while True:
+                if pos >= end:
+                    return  # Length prefix not fully received yet
+                byte = buffer[pos]
+                pos += 1
+                length |= (byte & 0x7F) << shift
+                if (byte & 0x80) == 0:
+                    break
+                shift += 7
+                if shift >= 21:
+                    raise ValueError("Packet length VarInt too long")
+
+            if length > MAX_PACKET_LENGTH:
+                raise ValueError(f"Invalid packet length: {length}")
+
+            frame_end = pos + length
+            if frame_end > end:
+                return  # Body not fully received yet
+
+            self._start = frame_end
+            yield view[start:frame_end]
+
+
+class ClientConnection:
+    """
+    A single client connection served by the asyncio event loop.
+
+    Packet handlers receive this object instead of a raw socket. It carries
+    the per-connection protocol state and exposes send(), which may be called
+    from the event loop or from background worker threads. Sent packets go
+    through a single outbound queue, so writes from different threads never
+    interleave within a packet.
+    """
+
+    def __init__(self, transport: asyncio.Transport):
+        """
+        Initialize a connection from an accepted asyncio transport.
+
+        Must be called from within the running event loop.
+
+        Args:
+            transport: Transport for the client socket
+        """
+        self.transport = transport
+        self.address: Tuple = transport.get_extra_info('peername')
+        self.loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self.closed = False
+
+        # Compression: threshold to offer during login, and the active one
+        # (-1 until Set Compression has been sent)
+        self.network_compression_threshold = DEFAULT_COMPRESSION_THRESHOLD
+        self.compression_threshold = -1
+
+        # Outbound queue: (packet bytes or in-flight compression Future, size).
+        # Shared with worker threads, so guarded by _outbound_lock.
+        self._outbound = collections.deque()
+        self._outbound_bytes = 0
+        self._outbound_lock = threading.Lock()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._wakeup_pending = False   # A worker already asked the loop to arm a flush
+        self._flush_requested = False  # A worker already asked for an immediate flush
+        self.packets_queued = 0
+        self.flush_count = 0
+
+        # Backpressure: set while the client is keeping up. Worker threads
+        # (chunk loader) wait on it before producing more bulk data.
+        self.writable = threading.Event()
+        self.writable.set()
+        self._slow_client_handle: Optional[asyncio.TimerHandle] = None
+        transport.set_write_buffer_limits(high=OUTBOUND_HIGH_WATERMARK, low=OUTBOUND_LOW_WATERMARK)
+
+        # Protocol state
+        self.connection_state = ConnectionState.HANDSHAKING
+        self.known_packs_sent = False
+        self.known_packs_received = False
+
+        # Player and world state (initialized when entering PLAY state)
+        self.player_uuid = None  # Set during login
+        self.player = None
+        self.world = None
+        self.chunk_loader = None
+        self.pending_chunk_change = None  # (old_chunk, new_chunk) for the next tick
+
+        # Set on close; stops per-connection workers such as the chunk loader
+        self.keep_alive_stop_event = threading.Event()
+        # Smoothed keep alive round trip (set by the keep alive scheduler)
+        self.latency_ms = None
+
+    def enable_compression(self, threshold: int) -> None:
+        """
+        Switch both directions to the compressed frame format.
+
+        Call right after sending Set Compression (which itself goes out
+        uncompressed).
+
+        Args:
+            threshold: Threshold that was sent to the client
+        """
+        self.compression_threshold = threshold
+
+    def decode_frame(self, frame: memoryview) -> Union[memoryview, bytes]:
+        """
+        Undo compression framing on a received frame, if enabled.
+
+        Args:
+            frame: Frame as received (including length prefix)
+
+        Returns:
+            Uncompressed frame including a length prefix
+        """
+        if self.compression_threshold < 0:
+            return frame
+        return decompress_frame(frame, self.compression_threshold)
+
+    def send(self, data: bytes) -> None:
+        """
+        Queue a packet on the connection's outbound queue without blocking.
+
+        Safe to call from worker threads (chunk loader, keep alive). Packets
+        are written in the order they were queued, coalesced into a single
+        transport write per flush (see flush()).
+
+        When compression is enabled the packet is compressed by the caller's
+        thread; large packets queued from the event loop thread are
+        compressed in the default executor instead, and the flush waits for
+        them so packet order is preserved.
+
+        Args:
+            data: Complete uncompressed packet bytes (including length prefix)
+        """
+        on_loop = threading.get_ident() == self._loop_thread_id
+        threshold = self.compression_threshold
+
+        if threshold < 0:
+            item = data
+        elif on_loop and len(data) >= OFFLOAD_COMPRESSION_SIZE:
+            item = self.loop.run_in_executor(None, compress_frame, data, threshold)
+            item.add_done_callback(lambda _: self.flush())
+        else:
+            item = compress_frame(data, threshold)
+
+        # Queued size (uncompressed size while compression is in flight)
+        size = len(data) if isinstance(item, asyncio.Future) else len(item)
+        self._enqueue(item, size, on_loop)
+
+    def send_prepared(self, data: bytes) -> None:
+        """
+        Queue bytes that are already in this connection's wire format.
+
+        Used for prebuilt packet streams (e.g. the configuration bundle),
+        which are framed, and compressed for the connection's threshold,
+        ahead of time; they are written as-is. Same threading rules as send().
+
+        Args:
+            data: One or more complete frames in the active frame format
+        """
+        on_loop = threading.get_ident() == self._loop_thread_id
+        self._enqueue(data, len(data), on_loop)
+
+    def prepare(self, data: bytes) -> bytes:
+        """
+        Convert a packet to this connection's wire format for send_prepared().
+
+        Compresses on the calling thread, so a worker can do it before taking
+        a lock the packet must be queued under.
+
+        Args:
+            data: Complete uncompressed packet bytes (including length prefix)
+
+        Returns:
+            The packet as a frame in the active frame format
+        """
+        threshold = self.compression_threshold
+        if threshold < 0:
+            return data
+        return compress_frame(data, threshold)
+
+    def _enqueue(self, item, size: int, on_loop: bool) -> None:
+        """Append an outbound item and arrange for the next flush."""
+        with self._outbound_lock:
+            self._outbound.append((item, size))
+            self._outbound_bytes += size
+            self.packets_queued += 1
+
+            if on_loop:
+                wake = None
+            elif self._outbound_bytes >= FLUSH_SIZE and not self._flush_requested:
+                # Size-triggered: flush as soon as the loop gets to it
+                self._flush_requested = True
+                wake = self.flush
+            elif not self._wakeup_pending:
+                # First packet since the last flush: arm the tick-aligned flush
+                self._wakeup_pending = True
+                wake = self._schedule_flush
+            else:
+                wake = None
+
+        if on_loop:
+            self._schedule_flush()
+        elif wake is not None:
+            try:
+                self.loop.call_soon_threadsafe(wake)
+            except RuntimeError:
+                # Event loop already closed (server shutting down)
+                pass
+
+    def _schedule_flush(self) -> None:
+        """Arm the next flush: now if the queue is large, else next tick."""
+        if self._outbound_bytes >= FLUSH_SIZE:
+            self.flush()
+        elif self._flush_handle is None and self._outbound:
+            self._flush_handle = self.loop.call_later(FLUSH_INTERVAL, self.flush)
+
+    def flush(self) -> None:
+        """
+        Write every queued packet to the transport in one call (loop thread only).
+
+        Stops at the first packet whose compression is still in flight; its
+        completion triggers the next flush.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch = []
+        with self._outbound_lock:
+            self._wakeup_pending = False
+            self._flush_requested = False
+            outbound = self._outbound
+            while outbound:
+                item, size = outbound[0]
+                if isinstance(item, asyncio.Future):
+                    if not item.done():
+                        break
+                    if item.cancelled() or item.exception() is not None:
+                        outbound.popleft()
+                        self._outbound_bytes -= size
+                        continue
+                    item = item.result()
+                outbound.popleft()
+                self._outbound_bytes -= size
+                batch.append(item)
+
+        if not batch or self.closed or self.transport.is_closing():
+            return
+
+        # One transport write (a single send syscall) for the whole batch
+        self.transport.writelines(batch)
+        self.flush_count += 1
+
+        self.check_backpressure()
+
+    def outbound_size(self) -> int:
+        """Bytes waiting to reach the client (queued + transport buffer)."""
+        return self._outbound_bytes + self.transport.get_write_buffer_size()
+
+    def check_backpressure(self) -> None:
+        """
+        Update the writable flag from the outbound size (loop thread only).
+
+        Pauses bulk producers above the high watermark, resumes them below
+        the low watermark, and disconnects clients that exceed the byte
+        budget or stay paused longer than SLOW_CLIENT_TIMEOUT.
+        """
+        if self.closed:
+            return
+
+        size = self.outbound_size()
+
+        if size > OUTBOUND_BUDGET:
+            print(f"  │  ✗ Client {self.address} exceeded outbound budget ({size} bytes queued)")
+            self.disconnect("Disconnected: not receiving data fast enough")
+            return
+
+        if self.writable.is_set():
+            if size > OUTBOUND_HIGH_WATERMARK:
+                self.writable.clear()
+                self._slow_client_handle = self.loop.call_later(
+                    SLOW_CLIENT_TIMEOUT, self._on_slow_client_timeout
+                )
+        elif size <= OUTBOUND_LOW_WATERMARK:
+            self.writable.set()
+            if self._slow_client_handle is not None:
+                self._slow_client_handle.cancel()
+                self._slow_client_handle = None
+
+    def _on_slow_client_timeout(self) -> None:
+        """Disconnect a client that stayed above the high watermark too long."""
+        self._slow_client_handle = None
+        if self.closed or self.writable.is_set():
+            return
+        print(f"  │  ✗ Client {self.address} above high watermark for {SLOW_CLIENT_TIMEOUT:.0f}s "
+              f"({self.outbound_size()} bytes queued)")
+        self.disconnect("Disconnected: not receiving data fast enough")
+
+    def disconnect(self, reason: str) -> None:
+        """
+        Send a Disconnect packet and close the connection (loop thread only).
+
+        The socket is aborted after DISCONNECT_GRACE seconds even if the
+        client never reads the packet.
+
+        Args:
+            reason: Reason shown to the player
+        """
+        if self.closed:
+            return
+        if self.connection_state in (ConnectionState.LOGIN, ConnectionState.CONFIGURATION,
+                                     ConnectionState.PLAY):
+            self.send(PacketBuilder.build_disconnect(reason, self.connection_state))
+        self.close()
+        self.loop.call_later(DISCONNECT_GRACE, self.transport.abort)
+
+    def close(self) -> None:
+        """Flush, close the connection and signal per-connection workers to stop."""
+        if self.closed:
+            return
+        if threading.get_ident() == self._loop_thread_id:
+            self.flush()
+        self.closed = True
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._slow_client_handle is not None:
+            self._slow_client_handle.cancel()
+            self._slow_client_handle = None
+        self.keep_alive_stop_event.set()
+        # Release anything waiting for the client to catch up
+        self.writable.set()
+        self.transport.close()
+
+
+class ClientProtocol(asyncio.BufferedProtocol):
+    """
+    asyncio protocol that receives straight into a PacketFramer.
+
+    The event loop calls get_buffer()/buffer_updated() around its own
+    recv_into, so received bytes land in the framer's buffer without an
+    intermediate bytes object. Each complete frame is passed to the packet
+    handler as a memoryview.
+    """
+
+    def __init__(self, packet_handler: Callable[[ClientConnection, memoryview], None],
+                 compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+                 close_handler: Optional[Callable[[ClientConnection], None]] = None):
+        """
+        Initialize the protocol.
+
+        Args:
+            packet_handler: Called as packet_handler(conn, frame) for every
+                            complete frame (frame includes the length prefix)
+            compression_threshold: Threshold to offer the client during login
+                                   (-1 to never enable compression)
+            close_handler: Called as close_handler(conn) once the connection
+                           has been lost
+        """
+        self.packet_handler = packet_handler
+        self.close_handler = close_handler
+        self.compression_threshold = compression_threshold
+        self.framer = PacketFramer()
+        self.conn: Optional[ClientConnection] = None
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.conn = ClientConnection(transport)
+        self.conn.network_compression_threshold = self.compression_threshold
+        print(f"\n{'='*60}")
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] New connection from {self.conn.address}")
+        print(f"{'='*60}\n")
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        return self.framer.get_buffer(sizehint)
+
+    def buffer_updated(self, nbytes: int) -> None:
+        self.framer.buffer_updated(nbytes)
+
+        try:
+            for frame in self.framer.frames():
+                self.packet_handler(self.conn, self.conn.decode_frame(frame))
+                if self.conn.closed:
+                    break
+
+            # Responses to everything received in this read go out together
+            self.conn.flush()
+        except Exception as e:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Error handling client: {e}")
+            import traceback
+            traceback.print_exc()
+            self.conn.close()
+
+    def pause_writing(self) -> None:
+        # Transport buffer crossed the high watermark
+        self.conn.check_backpressure()
+
+    def resume_writing(self) -> None:
+        # Transport buffer drained below the low watermark
+        self.conn.check_backpressure()
+
+    def eof_received(self) -> Optional[bool]:
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Connection closed by client")
+        return None  # Let the transport close itself
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        # Stops the keep alive and chunk loader threads (they watch the stop event)
+        self.conn.close()
+        if self.close_handler is not None:
+            self.close_handler(self.conn)
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Connection closed\n")
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Game Loop - the server's single authoritative 20 TPS tick.
+
+All world systems run from one loop on the asyncio event loop, in a fixed
+phase order registered by the server (entity physics, pickups, scheduled
+block updates, chunk streaming, outbound flush). Every tick records how many
+milliseconds each phase took into a ring buffer of recent ticks, so the
+50 ms budget can be inspected at runtime.
+
+When a tick overruns, the following ticks run back to back (with network
+I/O in between) to catch up; once the loop falls too far behind it skips
+the missed ticks instead, like vanilla's "Can't keep up!".
+"""
+
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .latency_stats import percentile
+
+
+# Ticks per second and the resulting tick length
+TICKS_PER_SECOND = 20
+TICK_INTERVAL = 1.0 / TICKS_PER_SECOND
+
+# Number of recent ticks kept for MSPT statistics (vanilla also keeps 100)
+TICK_HISTORY = 100
+
+# Ticks the loop may fall behind before skipping instead of catching up
+MAX_CATCH_UP_TICKS = 40
+
+
+class TickHistory:
+    """Ring buffer of per-tick and per-phase durations (milliseconds)."""
+
+    def __init__(self, phase_names: List[str], size: int = TICK_HISTORY):
+        """
+        Initialize the ring buffer.
+
+        Args:
+            phase_names: Names of the phases recorded every tick
+            size: Number of ticks kept
+        """
+        self.size = size
+        self.phase_names = list(phase_names)
+        self._ticks = [0] * size
+        self._totals = [0.0] * size
+        self._phases = [[0.0] * len(phase_names) for _ in range(size)]
+        self._next = 0
+        self._count = 0
+
+    def add_phase(self, name: str):
+        """Start recording a new phase (older ticks read 0 ms for it)."""
+        self.phase_names.append(name)
+        for row in self._phases:
+            row.append(0.0)
+
+    def record(self, tick: int, total_ms: float, phase_ms: List[float]):
+        """Store one tick, overwriting the oldest entry when full."""
+        index = self._next
+        self._ticks[index] = tick
+        self._totals[index] = total_ms
+        self._phases[index][:] = phase_ms
+        self._next = (index + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _indices(self, count: Optional[int] = None) -> List[int]:
+        """Ring indices of the most recent ticks, oldest first."""
+        count = self._count if count is None else min(count, self._count)
+        return [(self._next - count + i) % self.size for i in range(count)]
+
+    def recent(self, count: Optional[int] = None) -> List[dict]:
+        """
+        Recent ticks, oldest first.
+
+        Args:
+            count: Number of ticks (default: all kept)
+
+        Returns:
+            One dict per tick: {'tick', 'total_ms', 'phases': {name: ms}}
+        """
+        return [
+            {
+                'tick': self._ticks[i],
+                'total_ms': round(self._totals[i], 3),
+                'phases': {name: round(ms, 3) for name, ms in zip(self.phase_names, self._phases[i])},
+            }
+            for i in self._indices(count)
+        ]
+
+    def summary(self) -> dict:
+        """Mean/p50/p95/max MSPT over the buffer, and the mean per phase."""
+        indices = self._indices()
+        if not indices:
+            return {'ticks': 0, 'mspt_mean': 0.0, 'mspt_p50': 0.0, 'mspt_p95': 0.0, 'mspt_max': 0.0, 'phases': {}}
+        totals = sorted(self._totals[i] for i in indices)
+        phases = {
+            name: round(sum(self._phases[i][p] for i in indices) / len(indices), 3)
+            for p, name in enumerate(self.phase_names)
+        }
+        return {
+            'ticks': len(indices),
+            'mspt_mean': round(sum(totals) / len(totals), 3),
+            'mspt_p50': round(percentile(totals, 50), 3),
+            'mspt_p95': round(percentile(totals, 95), 3),
+            'mspt_max': round(totals[-1], 3),
+            'phases': phases,
+        }
+
+
+class GameLoop:
+    """Runs registered phases in order, TICKS_PER_SECOND times a second."""
+
+    def __init__(self, tick_interval: float = TICK_INTERVAL, history: int = TICK_HISTORY,
+                 max_catch_up_ticks: int = MAX_CATCH_UP_TICKS):
+        """
+        Initialize the loop (register phases, then call start()).
+
+        Args:
+            tick_interval: Seconds per tick
+            history: Number of recent ticks kept for statistics
+            max_catch_up_ticks: Ticks the loop may fall behind before skipping
+        """
+        self.tick_interval = tick_interval
+        self.max_catch_up_ticks = max_catch_up_ticks
+        self._phases: List[Tuple[str, Callable[[int], None]]] = []
+        self.history = TickHistory([], history)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._next_tick_at = 0.0
+
+        self.tick_count = 0
+        self.skipped_ticks = 0
+        self.phase_errors: Dict[str, int] = {}
+
+    def add_phase(self, name: str, func: Callable[[int], None]):
+        """
+        Append a phase; phases run in the order they were added.
+
+        Args:
+            name: Phase name used in the timing statistics
+            func: Called as func(tick_number) once per tick
+        """
+        self._phases.append((name, func))
+        self.history.add_phase(name)
+
+    @property
+    def running(self) -> bool:
+        return self._handle is not None
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Start ticking on the (running) event loop."""
+        if self._handle is not None:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._next_tick_at = time.monotonic() + self.tick_interval
+        self._handle = self._loop.call_later(self.tick_interval, self._run)
+
+    def stop(self):
+        """Stop ticking."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def run_tick(self) -> float:
+        """
+        Run every phase once and record the timings.
+
+        Returns:
+            Milliseconds the tick took
+        """
+        self.tick_count += 1
+        tick = self.tick_count
+        phase_ms = []
+        tick_start = time.perf_counter()
+        for name, func in self._phases:
+            phase_start = time.perf_counter()
+            try:
+                func(tick)
+            except Exception as e:
+                # One failing phase must not stop the loop
+                count = self.phase_errors.get(name, 0) + 1
+                self.phase_errors[name] = count
+                if count <= 3:
+                    print(f"  │  ✗ Error in tick phase '{name}': {e}")
+                    import traceback
+                    traceback.print_exc()
+            phase_ms.append((time.perf_counter() - phase_start) * 1000)
+        total_ms = (time.perf_counter() - tick_start) * 1000
+        self.history.record(tick, total_ms, phase_ms)
+        return total_ms
+
+    def _run(self):
+        """Event loop callback: run a due tick, catching up or skipping as needed."""
+        behind = int((time.monotonic() - self._next_tick_at) / self.tick_interval)
+        if behind > self.max_catch_up_ticks:
+            print(f"  │  ⚠ Can't keep up! Skipping {behind} tick(s) "
+                  f"({behind * self.tick_interval * 1000:.0f} ms behind)")
+            self.skipped_ticks += behind
+            self._next_tick_at += behind * self.tick_interval
+
+        self.run_tick()
+        self._next_tick_at += self.tick_interval
+        if self._handle is None:
+            return  # Stopped by a phase
+
+        # A late loop runs the next tick right away, but still lets pending
+        # network I/O in between catch-up ticks
+        self._handle = self._loop.call_later(max(0.0, self._next_tick_at - time.monotonic()), self._run)
+
+    def stats(self) -> dict:
+        """Runtime statistics: tick counts, MSPT summary and per-phase means."""
+        summary = self.history.summary()
+        target_tps = 1.0 / self.tick_interval
+        mean_seconds = summary['mspt_mean'] / 1000
+        summary.update({
+            'tick': self.tick_count,
+            'skipped_ticks': self.skipped_ticks,
+            # Ticks that take longer than the interval lower the achievable rate
+            'tps': round(min(target_tps, 1.0 / mean_seconds) if mean_seconds > 0 else target_tps, 2),
+            'phase_errors': dict(self.phase_errors),
+        })
+        return summary
+
+    def recent_ticks(self, count: Optional[int] = None) -> List[dict]:
+        """Timings of the most recent ticks, oldest first (see TickHistory.recent)."""
+        return self.history.recent(count)
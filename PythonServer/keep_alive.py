@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Keep Alive scheduler - one timer wheel for every PLAY connection.
+
+Instead of a sleeping thread per player, connections are placed in the
+slots of a hashed timer wheel that the event loop advances every tick.
+Each due connection is either sent a new Keep Alive, or, if its last one is
+still unanswered after the timeout (30 s, as in vanilla), disconnected.
+
+Responses are matched against the outstanding ID to measure round-trip
+time per player; recent samples feed a server-wide p50/p99 ping figure.
+"""
+
+import asyncio
+import math
+import time
+from typing import Callable, Dict, Optional
+
+from .connection import ClientConnection
+from .latency_stats import LatencyWindow
+from .minecraft_protocol import PacketBuilder
+
+
+# Seconds between Keep Alive packets
+KEEP_ALIVE_INTERVAL = 10.0
+
+# Seconds a Keep Alive may go unanswered before the client is disconnected
+KEEP_ALIVE_TIMEOUT = 30.0
+
+# Wheel resolution (seconds per slot) and number of slots
+WHEEL_TICK = 0.5
+WHEEL_SIZE = 128
+
+
+class KeepAliveState:
+    """Keep alive bookkeeping for one connection."""
+
+    __slots__ = ('conn', 'pending_id', 'sent_at', 'latency', 'last_rtt', 'due_tick', 'active')
+
+    def __init__(self, conn: ClientConnection):
+        self.conn = conn
+        self.pending_id: Optional[int] = None
+        self.sent_at = 0.0
+        self.latency: Optional[float] = None   # Smoothed RTT (seconds)
+        self.last_rtt: Optional[float] = None
+        self.due_tick = 0
+        self.active = True
+
+
+class KeepAliveScheduler:
+    """Sends keep-alives for all connections from one timer wheel on the event loop."""
+
+    def __init__(
+        self,
+        interval: float = KEEP_ALIVE_INTERVAL,
+        timeout: float = KEEP_ALIVE_TIMEOUT,
+        tick: float = WHEEL_TICK,
+        wheel_size: int = WHEEL_SIZE,
+        sender: Optional[Callable[[ClientConnection, int], None]] = None,
+        on_timeout: Optional[Callable[[ClientConnection], None]] = None
+    ):
+        """
+        Initialize the scheduler (call start() from the event loop).
+
+        Args:
+            interval: Seconds between Keep Alive packets
+            timeout: Seconds without a response before disconnecting
+            tick: Wheel resolution in seconds
+            wheel_size: Number of wheel slots
+            sender: Called as sender(conn, keep_alive_id) to send a Keep Alive
+                    (default: build and conn.send it)
+            on_timeout: Called with a connection that timed out
+                        (default: conn.disconnect("Timed out"))
+        """
+        self.interval = interval
+        self.timeout = timeout
+        self.tick = tick
+        self.sender = sender or self._default_sender
+        self.on_timeout = on_timeout or self._default_on_timeout
+
+        self._wheel = [[] for _ in range(wheel_size)]
+        self._entries: Dict[ClientConnection, KeepAliveState] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._started_at = 0.0
+        self._current_tick = 0
+
+        self.samples = LatencyWindow()
+        self.sent = 0
+        self.answered = 0
+        self.timeouts = 0
+
+    @staticmethod
+    def _default_sender(conn: ClientConnection, keep_alive_id: int):
+        conn.send(PacketBuilder.build_keep_alive(keep_alive_id))
+
+    @staticmethod
+    def _default_on_timeout(conn: ClientConnection):
+        conn.disconnect("Timed out")
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Start advancing the wheel on the (running) event loop."""
+        if self._handle is not None:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._started_at = time.monotonic()
+        self._current_tick = 0
+        self._handle = self._loop.call_later(self.tick, self._advance)
+
+    def stop(self):
+        """Stop the wheel (registered connections are kept)."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def register(self, conn: ClientConnection):
+        """
+        Start sending keep-alives to a connection (call on entering PLAY).
+
+        The first Keep Alive goes out on the next tick; must be called from
+        the event loop thread.
+        """
+        if conn in self._entries:
+            return
+        entry = KeepAliveState(conn)
+        self._entries[conn] = entry
+        self._schedule(entry, 0.0)
+
+    def unregister(self, conn: ClientConnection):
+        """Stop tracking a connection (its wheel slot is cleared lazily)."""
+        entry = self._entries.pop(conn, None)
+        if entry is not None:
+            entry.active = False
+
+    def handle_response(self, conn: ClientConnection, keep_alive_id: int) -> Optional[float]:
+        """
+        Match a Keep Alive response from a client.
+
+        Args:
+            conn: Connection the response arrived on
+            keep_alive_id: ID echoed by the client
+
+        Returns:
+            Round-trip time in seconds, or None if the ID was not outstanding
+        """
+        entry = self._entries.get(conn)
+        if entry is None or entry.pending_id != keep_alive_id:
+            return None
+
+        rtt = time.monotonic() - entry.sent_at
+        entry.pending_id = None
+        entry.last_rtt = rtt
+        # Same smoothing as vanilla: (3 * old + new) / 4
+        entry.latency = rtt if entry.latency is None else (entry.latency * 3 + rtt) / 4
+        conn.latency_ms = int(entry.latency * 1000)
+
+        self.samples.add(rtt)
+        self.answered += 1
+        return rtt
+
+    def latency(self, conn: ClientConnection) -> Optional[float]:
+        """Smoothed round-trip time of a connection in seconds (None until measured)."""
+        entry = self._entries.get(conn)
+        return entry.latency if entry is not None else None
+
+    def stats(self) -> dict:
+        """Server-wide keep alive figures (latencies in milliseconds)."""
+        p50, p99 = self.samples.percentiles(50, 99)
+        return {
+            'connections': len(self._entries),
+            'sent': self.sent,
+            'answered': self.answered,
+            'timeouts': self.timeouts,
+            'ping_p50_ms': round(p50 * 1000, 1),
+            'ping_p99_ms': round(p99 * 1000, 1),
+            'samples': len(self.samples),
+        }
+
+    def _schedule(self, entry: KeepAliveState, delay: float):
+        """Place an entry in the slot `delay` seconds from now."""
+        ticks = max(1, math.ceil(delay / self.tick))
+        entry.due_tick = self._current_tick + ticks
+        self._wheel[entry.due_tick % len(self._wheel)].append(entry)
+
+    def _advance(self):
+        """Process every tick that has elapsed since the last call."""
+        target = int((time.monotonic() - self._started_at) / self.tick)
+        while self._current_tick < target:
+            self._current_tick += 1
+            slot = self._wheel[self._current_tick % len(self._wheel)]
+            if not slot:
+                continue
+            # Entries further than one revolution away stay in the slot
+            due = [entry for entry in slot if entry.due_tick <= self._current_tick]
+            slot[:] = [entry for entry in slot if entry.due_tick > self._current_tick]
+            for entry in due:
+                if entry.active:
+                    self._fire(entry)
+
+        next_at = self._started_at + (self._current_tick + 1) * self.tick
+        self._handle = self._loop.call_later(max(0.0, next_at - time.monotonic()), self._advance)
+
+    def _fire(self, entry: KeepAliveState):
+        """Send a Keep Alive to a due connection, or time it out."""
+        conn = entry.conn
+        if conn.closed:
+            self.unregister(conn)
+            return
+
+        now = time.monotonic()
+        if entry.pending_id is not None:
+            waited = now - entry.sent_at
+            if waited >= self.timeout:
+                self.timeouts += 1
+                self.unregister(conn)
+                print(f"  │  ✗ Keep Alive timeout for {conn.address} ({waited:.1f}s without a response)")
+                self.on_timeout(conn)
+                return
+            # Still waiting: don't stack a second Keep Alive, check again later
+            self._schedule(entry, min(self.interval, self.timeout - waited))
+            return
+
+        # Milliseconds timestamp, like vanilla
+        keep_alive_id = int(time.time() * 1000)
+        entry.pending_id = keep_alive_id
+        entry.sent_at = now
+        try:
+            self.sender(conn, keep_alive_id)
+            self.sent += 1
+        except Exception as e:
+            print(f"  │  ✗ Error sending Keep Alive: {e}")
+        self._schedule(entry, self.interval)
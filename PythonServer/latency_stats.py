@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Latency statistics helpers shared by the server and the load-testing tools.
+"""
+
+from collections import deque
+from typing import Iterable, List
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+
+    Args:
+        sorted_values: Values in ascending order
+        pct: Percentile (0-100)
+
+    Returns:
+        The percentile value (0.0 for an empty list)
+    """
+    if not sorted_values:
+        return 0.0
+    rank = int(round(pct / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[min(max(rank, 0), len(sorted_values) - 1)]
+
+
+def format_latency_summary(values: Iterable[float]) -> str:
+    """Format p50/p95/p99/max of latencies given in seconds as milliseconds."""
+    ordered = sorted(values)
+    if not ordered:
+        return "n/a"
+    return (f"p50={percentile(ordered, 50) * 1000:.1f}ms "
+            f"p95={percentile(ordered, 95) * 1000:.1f}ms "
+            f"p99={percentile(ordered, 99) * 1000:.1f}ms "
+            f"max={ordered[-1] * 1000:.1f}ms (n={len(ordered)})")
+
+
+class LatencyWindow:
+    """The most recent N samples, with percentiles computed on demand."""
+
+    def __init__(self, size: int = 1024):
+        """
+        Initialize the window.
+
+        Args:
+            size: Number of samples kept (older samples are discarded)
+        """
+        self._samples = deque(maxlen=size)
+
+    def add(self, value: float):
+        """Record a sample."""
+        self._samples.append(value)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentiles(self, *pcts: float) -> List[float]:
+        """
+        Percentiles of the current window (one sort for all of them).
+
+        Args:
+            pcts: Percentiles to compute (0-100)
+
+        Returns:
+            One value per requested percentile
+        """
+        ordered = sorted(self._samples)
+        return [percentile(ordered, pct) for pct in pcts]
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+Light Engine - sky and block light for the chunks held by a BlockManager.
+
+Light is stored per chunk section as a nibble array in the protocol's
+layout (2048 bytes, 4096 values of 0-15, block index y*256 + z*16 + x,
+even indices in the low nibble), so sending light is a plain copy.
+Sections that are entirely dark are not stored.
+
+Initial light is computed per chunk when it is first needed: sky light
+falls straight down every column (NumPy cumulative sums over the whole
+chunk when available), then spreads sideways and under overhangs in a
+few vectorized relaxation passes limited to the rows where it can still
+change. Block changes are applied incrementally with the usual BFS
+queues: a removal pass clears the light that depended on the changed
+block, then an increase pass re-propagates from the remaining sources.
+Every section whose light changes is recorded so Update Light packets
+only carry those sections.
+
+Initial lighting is chunk-local: light does not spread into a chunk from
+its neighbours until a block change propagates across the border.
+"""
+
+from collections import deque
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+if TYPE_CHECKING:
+    from .block_manager import BlockManager
+
+
+MAX_LIGHT = 15
+SECTION_COUNT = 24
+MIN_Y = -64
+MAX_Y = MIN_Y + SECTION_COUNT * 16 - 1  # 319
+
+# Nibble array of a section that is fully lit (shared until written to)
+FULL_LIGHT = bytes([0xFF]) * 2048
+
+# The six neighbours, (dx, dy, dz); index 1 is straight down
+_DIRECTIONS = ((0, 1, 0), (0, -1, 0), (1, 0, 0), (-1, 0, 0), (0, 0, 1), (0, 0, -1))
+_DOWN = 1
+
+SectionKey = Tuple[int, int, int]
+
+
+def _lit_or_none(array: Optional[bytearray]) -> Optional[bytearray]:
+    """A nibble array, or None if it is missing or entirely dark."""
+    if array is None or array.count(0) == len(array):
+        return None
+    return array
+
+
+class LightEngine:
+    """
+    Sky and block light of the chunks of one BlockManager.
+
+    Opacity is 0 for air (sky light passes straight down without loss), 1 for
+    water and 15 (opaque) for every other block. Light entering a block
+    loses max(1, opacity) levels.
+    """
+
+    def __init__(self, block_manager: 'BlockManager', emission: Optional[Dict[int, int]] = None):
+        """
+        Initialize an engine with no lit chunks.
+
+        Args:
+            block_manager: Block data the light is computed from
+            emission: Light level emitted per block state ID (block light
+                      sources); none of the server's blocks emit light by default
+        """
+        self.block_manager = block_manager
+        self.emission: Dict[int, int] = dict(emission or {})
+        self.opacity: Dict[int, int] = {block_manager.BLOCK_AIR: 0, block_manager.BLOCK_WATER: 1}
+
+        # Nibble arrays per (chunk_x, chunk_z, section_y); missing = all dark
+        self.sky_light: Dict[SectionKey, bytearray] = {}
+        self.block_light: Dict[SectionKey, bytearray] = {}
+
+        # Chunks whose initial light has been computed, as (chunk_x, chunk_z)
+        self.lit_chunks: Set[Tuple[int, int]] = set()
+
+        # Sections whose light changed since take_changed_sections()
+        self.changed_sections: Set[SectionKey] = set()
+
+    # ------------------------------------------------------------------
+    # Chunk lifecycle
+    # ------------------------------------------------------------------
+
+    def ensure_chunk(self, chunk_x: int, chunk_z: int) -> None:
+        """Compute a chunk's initial light unless it is already lit."""
+        if (chunk_x, chunk_z) not in self.lit_chunks:
+            self.light_chunk(chunk_x, chunk_z)
+
+    def light_chunk(self, chunk_x: int, chunk_z: int) -> None:
+        """
+        (Re)compute a chunk's light from its current blocks.
+
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+        """
+        self.forget_chunk(chunk_x, chunk_z)
+        self.lit_chunks.add((chunk_x, chunk_z))
+
+        if NUMPY_AVAILABLE:
+            self._light_sky_numpy(chunk_x, chunk_z)
+        else:
+            self._light_sky_python(chunk_x, chunk_z)
+
+        if self.emission:
+            # Block light: flood from every light source in the chunk
+            queue = deque()
+            for section_y in range(SECTION_COUNT):
+                section = self.block_manager.get_chunk_section(chunk_x, chunk_z, section_y)
+                if section is None or not self.emission.keys() & set(section.block_ids()):
+                    continue
+                base_y = MIN_Y + section_y * 16
+                for idx, block_id in enumerate(section):
+                    level = self.emission.get(block_id, 0)
+                    if level:
+                        x = chunk_x * 16 + (idx & 15)
+                        y = base_y + (idx >> 8)
+                        z = chunk_z * 16 + ((idx >> 4) & 15)
+                        self._set(self.block_light, x, y, z, level)
+                        queue.append((x, y, z, level))
+            self._propagate_increase(queue, self.block_light, sky=False, chunk=(chunk_x, chunk_z))
+
+        # Initial light goes out with the chunk packet itself
+        self.changed_sections.difference_update(
+            [key for key in self.changed_sections if key[0] == chunk_x and key[1] == chunk_z]
+        )
+
+    def forget_chunk(self, chunk_x: int, chunk_z: int) -> None:
+        """Drop a chunk's light (it is recomputed when next needed)."""
+        self.lit_chunks.discard((chunk_x, chunk_z))
+        for section_y in range(SECTION_COUNT):
+            key = (chunk_x, chunk_z, section_y)
+            self.sky_light.pop(key, None)
+            self.block_light.pop(key, None)
+
+    def snapshot_chunk(self, block_manager: 'BlockManager', chunk_x: int, chunk_z: int) -> 'LightEngine':
+        """
+        Copy of one chunk's light, for a BlockManager.snapshot_chunk() copy.
+
+        Args:
+            block_manager: The snapshot the copy reads its blocks from
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+
+        Returns:
+            Engine holding only this chunk's light (unlit if it was unlit)
+        """
+        snapshot = LightEngine(block_manager, self.emission)
+        snapshot.opacity = self.opacity
+        if (chunk_x, chunk_z) in self.lit_chunks:
+            snapshot.lit_chunks.add((chunk_x, chunk_z))
+            for store, snapshot_store in ((self.sky_light, snapshot.sky_light),
+                                          (self.block_light, snapshot.block_light)):
+                for section_y in range(SECTION_COUNT):
+                    array = store.get((chunk_x, chunk_z, section_y))
+                    if array is not None:
+                        # FULL_LIGHT is immutable and stays shared
+                        snapshot_store[(chunk_x, chunk_z, section_y)] = \
+                            bytearray(array) if isinstance(array, bytearray) else array
+        return snapshot
+
+    def adopt_chunk(self, snapshot: 'LightEngine', chunk_x: int, chunk_z: int) -> None:
+        """
+        Keep a chunk's initial light computed by a snapshot_chunk() copy.
+
+        Only valid while the chunk's blocks are unchanged since the snapshot;
+        does nothing if the chunk was lit here meanwhile.
+
+        Args:
+            snapshot: Copy returned by snapshot_chunk() for this chunk
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+        """
+        if (chunk_x, chunk_z) in self.lit_chunks or (chunk_x, chunk_z) not in snapshot.lit_chunks:
+            return
+        self.forget_chunk(chunk_x, chunk_z)
+        self.lit_chunks.add((chunk_x, chunk_z))
+        for store, snapshot_store in ((self.sky_light, snapshot.sky_light),
+                                      (self.block_light, snapshot.block_light)):
+            for section_y in range(SECTION_COUNT):
+                array = snapshot_store.get((chunk_x, chunk_z, section_y))
+                if array is not None:
+                    store[(chunk_x, chunk_z, section_y)] = array
+
+    # ------------------------------------------------------------------
+    # Reading light
+    # ------------------------------------------------------------------
+
+    def get_sky_light(self, x: int, y: int, z: int) -> int:
+        """Sky light level at world coordinates (15 above the world, 0 below it)."""
+        if y > MAX_Y:
+            return MAX_LIGHT
+        if y < MIN_Y:
+            return 0
+        return self._get(self.sky_light, x, y, z)
+
+    def get_block_light(self, x: int, y: int, z: int) -> int:
+        """Block light level at world coordinates."""
+        if not MIN_Y <= y <= MAX_Y:
+            return 0
+        return self._get(self.block_light, x, y, z)
+
+    def section_light(self, chunk_x: int, chunk_z: int, section_ys) -> Tuple[Dict[int, Optional[bytes]], Dict[int, Optional[bytes]]]:
+        """
+        Light arrays of some sections of a chunk, lighting the chunk if needed.
+
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            section_ys: Section Y indices (0-23)
+
+        Returns:
+            (sky_light, block_light): section index -> 2048-byte nibble array,
+            or None for a section that is entirely dark
+        """
+        self.ensure_chunk(chunk_x, chunk_z)
+        sky = {}
+        block = {}
+        for section_y in section_ys:
+            key = (chunk_x, chunk_z, section_y)
+            sky[section_y] = _lit_or_none(self.sky_light.get(key))
+            block[section_y] = _lit_or_none(self.block_light.get(key))
+        return sky, block
+
+    def take_changed_sections(self) -> Set[SectionKey]:
+        """Sections whose light changed since the last call (and reset)."""
+        changed = self.changed_sections
+        self.changed_sections = set()
+        return changed
+
+    # ------------------------------------------------------------------
+    # Block changes
+    # ------------------------------------------------------------------
+
+    def block_changed(self, x: int, y: int, z: int, new_block_id: int) -> Set[SectionKey]:
+        """
+        Update light after the block at (x, y, z) changed.
+
+        Must be called after the BlockManager holds the new block. Does
+        nothing for chunks that are not lit yet (they are lit from their
+        current blocks when first needed).
+
+        Args:
+            x: World X coordinate
+            y: World Y coordinate
+            z: World Z coordinate
+            new_block_id: The block's new state ID
+
+        Returns:
+            Sections whose light changed (also added to changed_sections)
+        """
+        if (x >> 4, z >> 4) not in self.lit_chunks or not MIN_Y <= y <= MAX_Y:
+            return set()
+
+        pending = self.changed_sections
+        self.changed_sections = set()
+
+        for store, sky in ((self.sky_light, True), (self.block_light, False)):
+            # Clear the changed block's light and everything that depended on it,
+            # then re-propagate from the sources bordering the cleared area
+            level = self._get(store, x, y, z)
+            self._set(store, x, y, z, 0)
+            relight = self._propagate_decrease(deque([(x, y, z, level)]), store, sky)
+
+            # The neighbours (and the sky above the world) shine back into the block
+            get_level = self.get_sky_light if sky else self.get_block_light
+            for dx, dy, dz in _DIRECTIONS:
+                neighbour_level = get_level(x + dx, y + dy, z + dz)
+                if neighbour_level:
+                    relight.append((x + dx, y + dy, z + dz, neighbour_level))
+
+            emitted = 0 if sky else self.emission.get(new_block_id, 0)
+            if emitted:
+                self._set(store, x, y, z, emitted)
+                relight.append((x, y, z, emitted))
+
+            self._propagate_increase(relight, store, sky)
+
+        changed = self.changed_sections
+        pending |= changed
+        self.changed_sections = pending
+        return changed
+
+    # ------------------------------------------------------------------
+    # Propagation
+    # ------------------------------------------------------------------
+
+    def _block_opacity(self, x: int, y: int, z: int) -> int:
+        """Opacity of the block at world coordinates (15 = opaque)."""
+        return self.opacity.get(self.block_manager.get_block(x, y, z), MAX_LIGHT)
+
+    def _propagate_increase(self, queue: deque, store: Dict[SectionKey, bytearray], sky: bool,
+                            chunk: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Spread light outwards from queued (x, y, z, level) entries.
+
+        Args:
+            queue: Cells whose (already stored) light should spread
+            store: sky_light or block_light
+            sky: Whether this is sky light (falls straight down without loss)
+            chunk: Only spread within this chunk (initial lighting)
+        """
+        lit_chunks = self.lit_chunks
+        while queue:
+            x, y, z, level = queue.popleft()
+            if level <= 1:
+                continue
+            for direction, (dx, dy, dz) in enumerate(_DIRECTIONS):
+                nx, ny, nz = x + dx, y + dy, z + dz
+                if not MIN_Y <= ny <= MAX_Y:
+                    continue
+                chunk_key = (nx >> 4, nz >> 4)
+                if chunk_key not in lit_chunks or (chunk is not None and chunk_key != chunk):
+                    continue
+                opacity = self._block_opacity(nx, ny, nz)
+                if opacity >= MAX_LIGHT:
+                    continue
+                if sky and direction == _DOWN and level == MAX_LIGHT and opacity == 0:
+                    new_level = MAX_LIGHT
+                else:
+                    new_level = level - max(1, opacity)
+                if new_level > self._get(store, nx, ny, nz):
+                    self._set(store, nx, ny, nz, new_level)
+                    queue.append((nx, ny, nz, new_level))
+
+    def _propagate_decrease(self, queue: deque, store: Dict[SectionKey, bytearray], sky: bool) -> deque:
+        """
+        Clear the light that came from queued (x, y, z, former level) cells.
+
+        Args:
+            queue: Cells whose light was just cleared, with their former level
+            store: sky_light or block_light
+            sky: Whether this is sky light
+
+        Returns:
+            Queue of cells bordering the cleared area that still hold light
+            (or emit it) and must propagate it again
+        """
+        relight = deque()
+        lit_chunks = self.lit_chunks
+        while queue:
+            x, y, z, level = queue.popleft()
+            for direction, (dx, dy, dz) in enumerate(_DIRECTIONS):
+                nx, ny, nz = x + dx, y + dy, z + dz
+                if not MIN_Y <= ny <= MAX_Y or (nx >> 4, nz >> 4) not in lit_chunks:
+                    continue
+                neighbour_level = self._get(store, nx, ny, nz)
+                if not neighbour_level:
+                    continue
+                if neighbour_level < level or (sky and direction == _DOWN and level == MAX_LIGHT
+                                               and neighbour_level == MAX_LIGHT):
+                    # Lit from the cleared cell: clear it too
+                    self._set(store, nx, ny, nz, 0)
+                    queue.append((nx, ny, nz, neighbour_level))
+                    if not sky:
+                        emitted = self.emission.get(self.block_manager.get_block(nx, ny, nz), 0)
+                        if emitted:
+                            self._set(store, nx, ny, nz, emitted)
+                            relight.append((nx, ny, nz, emitted))
+                else:
+                    # Lit independently: spreads back into the cleared area
+                    relight.append((nx, ny, nz, neighbour_level))
+        return relight
+
+    def _get(self, store: Dict[SectionKey, bytearray], x: int, y: int, z: int) -> int:
+        """Stored light level at world coordinates (0 if not stored)."""
+        array = store.get((x >> 4, z >> 4, (y - MIN_Y) >> 4))
+        if array is None:
+            return 0
+        idx = ((y & 15) << 8) | ((z & 15) << 4) | (x & 15)
+        return (array[idx >> 1] >> ((idx & 1) << 2)) & 15
+
+    def _set(self, store: Dict[SectionKey, bytearray], x: int, y: int, z: int, level: int) -> None:
+        """Store a light level at world coordinates and record the section as changed."""
+        key = (x >> 4, z >> 4, (y - MIN_Y) >> 4)
+        array = store.get(key)
+        if array is None:
+            if not level:
+                return
+            array = store[key] = bytearray(2048)
+        elif not isinstance(array, bytearray):
+            # Shared FULL_LIGHT array: copy on first write
+            array = store[key] = bytearray(array)
+        idx = ((y & 15) << 8) | ((z & 15) << 4) | (x & 15)
+        shift = (idx & 1) << 2
+        array[idx >> 1] = (array[idx >> 1] & (0xF0 >> shift)) | (level << shift)
+        self.changed_sections.add(key)
+
+    # ------------------------------------------------------------------
+    # Initial sky light
+    # ------------------------------------------------------------------
+
+    def _light_sky_numpy(self, chunk_x: int, chunk_z: int) -> None:
+        """Initial sky light of a chunk with vectorized column and spread passes."""
+        block_manager = self.block_manager
+        blocks = np.empty(SECTION_COUNT * 4096, dtype=np.int32)
+        for section_y in range(SECTION_COUNT):
+            section = block_manager.get_chunk_section(chunk_x, chunk_z, section_y)
+            values = blocks[section_y * 4096:(section_y + 1) * 4096]
+            if section is None:
+                values[:] = block_manager.BLOCK_AIR
+            elif section.is_uniform:
+                values[:] = section.value
+            else:
+                values[:] = np.fromiter(section.blocks, dtype=np.int32, count=4096)
+        blocks = blocks.reshape(SECTION_COUNT * 16, 16, 16)
+
+        opacity = np.full(blocks.shape, MAX_LIGHT, dtype=np.int16)
+        for block_id, block_opacity in self.opacity.items():
+            opacity[blocks == block_id] = block_opacity
+
+        # Columns: light lost on the way down from above the world. The air
+        # at the top of a column keeps full light; below the first non-air
+        # block every block costs at least one level
+        loss = np.maximum(opacity, 1)[::-1]
+        open_sky = np.logical_and.accumulate(opacity[::-1] == 0, axis=0)
+        fallen = np.where(open_sky, 0, np.cumsum(loss, axis=0) - open_sky.sum(axis=0))[::-1]
+        light = MAX_LIGHT - np.minimum(fallen, MAX_LIGHT)
+
+        # Spread sideways/under overhangs: only transparent cells below full
+        # light can still gain light, so relax just the rows holding them
+        transparent = opacity < MAX_LIGHT
+        rows = np.flatnonzero(((light < MAX_LIGHT) & transparent).any(axis=(1, 2)))
+        if len(rows):
+            start = max(int(rows[0]) - 1, 0)
+            end = min(int(rows[-1]) + 2, len(light))
+            band = light[start:end]
+            band_transparent = transparent[start:end]
+            band_loss = np.maximum(opacity[start:end], 1)
+            for _ in range(MAX_LIGHT):
+                padded = np.pad(band, 1)
+                brightest = np.maximum.reduce([
+                    padded[2:, 1:-1, 1:-1], padded[:-2, 1:-1, 1:-1],
+                    padded[1:-1, 2:, 1:-1], padded[1:-1, :-2, 1:-1],
+                    padded[1:-1, 1:-1, 2:], padded[1:-1, 1:-1, :-2],
+                ])
+                spread = np.where(band_transparent, np.maximum(band, brightest - band_loss), 0)
+                if np.array_equal(spread, band):
+                    break
+                band = spread
+            light[start:end] = band
+
+        # Pack each section's values into nibbles (even index in the low nibble)
+        values = light.astype(np.uint8).reshape(SECTION_COUNT, 4096)
+        for section_y in range(SECTION_COUNT):
+            section = values[section_y]
+            if not section.any():
+                continue
+            if (section == MAX_LIGHT).all():
+                self.sky_light[(chunk_x, chunk_z, section_y)] = FULL_LIGHT
+                continue
+            self.sky_light[(chunk_x, chunk_z, section_y)] = bytearray(
+                (section[0::2] | (section[1::2] << 4)).tobytes()
+            )
+
+    def _light_sky_python(self, chunk_x: int, chunk_z: int) -> None:
+        """Initial sky light of a chunk: column by column, then BFS spread."""
+        block_manager = self.block_manager
+        sections = [block_manager.get_chunk_section(chunk_x, chunk_z, section_y)
+                    for section_y in range(SECTION_COUNT)]
+        opacity = self.opacity
+        base_x = chunk_x * 16
+        base_z = chunk_z * 16
+
+        # Columns, remembering the lowest fully lit cell of each
+        column_bottoms: List[int] = []
+        queue = deque()
+        for z in range(16):
+            for x in range(16):
+                level = MAX_LIGHT
+                bottom = MAX_Y + 1
+                for y in range(MAX_Y, MIN_Y - 1, -1):
+                    section = sections[(y - MIN_Y) >> 4]
+                    block_id = block_manager.BLOCK_AIR if section is None else \
+                        section[((y & 15) << 8) | (z << 4) | x]
+                    block_opacity = opacity.get(block_id, MAX_LIGHT)
+                    if block_opacity >= MAX_LIGHT:
+                        break
+                    if block_opacity or level < MAX_LIGHT:
+                        level -= max(1, block_opacity)
+                    if level <= 0:
+                        break
+                    self._set(self.sky_light, base_x + x, y, base_z + z, level)
+                    if level == MAX_LIGHT:
+                        bottom = y
+                    queue.append((base_x + x, y, base_z + z, level))
+                column_bottoms.append(bottom)
+
+        # Cells above every column's lowest full-light cell cannot gain light;
+        # everything else spreads
+        spread_below = max(column_bottoms)
+        self._propagate_increase(
+            deque(cell for cell in queue if cell[1] <= spread_below or cell[3] < MAX_LIGHT),
+            self.sky_light, sky=True, chunk=(chunk_x, chunk_z)
+        )
+
+        # Share the fully lit array between fully lit sections
+        for section_y in range(SECTION_COUNT):
+            key = (chunk_x, chunk_z, section_y)
+            if self.sky_light.get(key) == FULL_LIGHT:
+                self.sky_light[key] = FULL_LIGHT
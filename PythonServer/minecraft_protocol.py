@@ -8,9 +8,18 @@ import struct
 import uuid
 import zlib
 from enum import IntEnum
-from typing import Optional, Tuple, List, Dict, Any, TYPE_CHECKING
+from typing import Optional, Tuple, List, Dict, Any, Callable, TYPE_CHECKING
 from dataclasses import dataclass
 
+from .packet_schema import PACKET_IDS, compile_decoder
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
 if TYPE_CHECKING:
     from .block_manager import BlockManager
 
@@ -30,6 +39,38 @@ class PacketDirection(IntEnum):
     SERVERBOUND = 1  # Client -> Server
 
 
+# State names used by extracted_data/packets.json
+_STATE_KEYS = {
+    ConnectionState.HANDSHAKING: 'handshake',
+    ConnectionState.STATUS: 'status',
+    ConnectionState.LOGIN: 'login',
+    ConnectionState.CONFIGURATION: 'configuration',
+    ConnectionState.PLAY: 'play',
+}
+
+
+def clientbound_id(state: ConnectionState, name: str) -> int:
+    """
+    Packet ID of a clientbound packet in the current protocol version.
+    
+    Args:
+        state: Connection state the packet is sent in
+        name: Resource name from packets.json (e.g. "minecraft:keep_alive")
+    """
+    return PACKET_IDS.id(_STATE_KEYS[state], 'clientbound', name)
+
+
+def serverbound_id(state: ConnectionState, name: str) -> int:
+    """
+    Packet ID of a serverbound packet in the current protocol version.
+    
+    Args:
+        state: Connection state the packet is received in
+        name: Resource name from packets.json (e.g. "minecraft:keep_alive")
+    """
+    return PACKET_IDS.id(_STATE_KEYS[state], 'serverbound', name)
+
+
 @dataclass
 class HandshakePacket:
     """Handshake packet structure."""
@@ -39,6 +80,12 @@ class HandshakePacket:
     intent: int  # 1=Status, 2=Login, 3=Transfer
 
 
+@dataclass
+class PingRequestPacket:
+    """Ping Request packet structure (STATUS state)."""
+    payload: int  # Echoed back in Pong Response
+
+
 @dataclass
 class LoginStartPacket:
     """Login Start packet structure."""
@@ -139,24 +186,58 @@ class SetHeldItemPacket:
     slot: int  # Selected hotbar slot (0-8)
 
 
+@dataclass
+class UnknownPacket:
+    """A packet the server has no schema for (body left unread)."""
+    name: str  # Resource name from packets.json
+    length: int  # Body size in bytes
+
+
+# Precompiled big-endian layouts for the fixed-size field types
+_UNSIGNED_SHORT = struct.Struct('>H')
+_SHORT = struct.Struct('>h')
+_INT = struct.Struct('>i')
+_LONG = struct.Struct('>q')
+_UNSIGNED_LONG = struct.Struct('>Q')
+_FLOAT = struct.Struct('>f')
+_DOUBLE = struct.Struct('>d')
+
+# Fixed layouts of the movement packets (decoded with one read_struct call)
+_POSITION_LAYOUT = struct.Struct('>ddd')
+_POSITION_ROTATION_LAYOUT = struct.Struct('>dddff')
+_ROTATION_LAYOUT = struct.Struct('>ff')
+
+# Compiled Structs for read_struct() format strings
+_struct_cache: Dict[str, struct.Struct] = {}
+
+
 class ProtocolReader:
-    """Reads Minecraft protocol data types from bytes."""
+    """
+    Reads Minecraft protocol data types from bytes.
+    
+    data may be bytes, bytearray or a memoryview (e.g. a frame from
+    PacketFramer). The reader works on a memoryview of it, so fields are
+    decoded in place with struct.unpack_from instead of slicing out copies;
+    values that outlive the reader are returned as bytes.
+    """
     
     def __init__(self, data: bytes, offset: int = 0):
-        self.data = data
+        self.data = data if isinstance(data, memoryview) else memoryview(data)
         self.offset = offset
     
     def read_varint(self) -> int:
         """Read a VarInt from the current position."""
+        data = self.data
+        offset = self.offset
         result = 0
         shift = 0
         
         while True:
-            if self.offset >= len(self.data):
+            if offset >= len(data):
                 raise ValueError("Not enough data for VarInt")
             
-            byte = self.data[self.offset]
-            self.offset += 1
+            byte = data[offset]
+            offset += 1
             
             result |= (byte & 0x7F) << shift
             
@@ -167,6 +248,8 @@ class ProtocolReader:
             if shift >= 32:
                 raise ValueError("VarInt too long")
         
+        self.offset = offset
+        
         # Convert to signed integer (two's complement)
         if result & 0x80000000:
             result -= 0x100000000
@@ -179,40 +262,41 @@ class ProtocolReader:
         if length < 0 or length > max_length * 3:  # UTF-8 can be up to 3 bytes per char
             raise ValueError(f"Invalid string length: {length}")
         
-        if self.offset + length > len(self.data):
+        end = self.offset + length
+        if end > len(self.data):
             raise ValueError("Not enough data for string")
         
-        string_bytes = self.data[self.offset:self.offset + length]
-        self.offset += length
-        
-        return string_bytes.decode('utf-8')
+        # Decoding the memoryview slice avoids an intermediate bytes copy
+        value = str(self.data[self.offset:end], 'utf-8')
+        self.offset = end
+        return value
     
     def read_uuid(self) -> uuid.UUID:
         """Read a UUID (16 bytes, big-endian)."""
         if self.offset + 16 > len(self.data):
             raise ValueError("Not enough data for UUID")
         
-        uuid_bytes = self.data[self.offset:self.offset + 16]
-        self.offset += 16
-        
         # UUID is stored as big-endian
-        return uuid.UUID(bytes=uuid_bytes)
+        high = _UNSIGNED_LONG.unpack_from(self.data, self.offset)[0]
+        low = _UNSIGNED_LONG.unpack_from(self.data, self.offset + 8)[0]
+        self.offset += 16
+        return uuid.UUID(int=(high << 64) | low)
     
     def read_unsigned_short(self) -> int:
         """Read an unsigned short (2 bytes, big-endian)."""
-        if self.offset + 2 > len(self.data):
-            raise ValueError("Not enough data for unsigned short")
-        
-        value = struct.unpack('>H', self.data[self.offset:self.offset + 2])[0]
+        try:
+            value = _UNSIGNED_SHORT.unpack_from(self.data, self.offset)[0]
+        except struct.error:
+            raise ValueError("Not enough data for unsigned short") from None
         self.offset += 2
         return value
     
     def read_short(self) -> int:
         """Read a signed short (2 bytes, big-endian)."""
-        if self.offset + 2 > len(self.data):
-            raise ValueError("Not enough data for short")
-        
-        value = struct.unpack('>h', self.data[self.offset:self.offset + 2])[0]
+        try:
+            value = _SHORT.unpack_from(self.data, self.offset)[0]
+        except struct.error:
+            raise ValueError("Not enough data for short") from None
         self.offset += 2
         return value
     
@@ -234,52 +318,73 @@ class ProtocolReader:
         if self.offset + length > len(self.data):
             raise ValueError(f"Not enough data: need {length} bytes")
         
-        result = self.data[self.offset:self.offset + length]
+        result = self.data[self.offset:self.offset + length].tobytes()
         self.offset += length
         return result
     
     def read_int(self) -> int:
         """Read a signed 32-bit integer (4 bytes, big-endian)."""
-        if self.offset + 4 > len(self.data):
-            raise ValueError("Not enough data for int")
-        
-        value = struct.unpack('>i', self.data[self.offset:self.offset + 4])[0]
+        try:
+            value = _INT.unpack_from(self.data, self.offset)[0]
+        except struct.error:
+            raise ValueError("Not enough data for int") from None
         self.offset += 4
         return value
     
     def read_long(self) -> int:
         """Read a signed 64-bit integer (8 bytes, big-endian)."""
-        if self.offset + 8 > len(self.data):
-            raise ValueError("Not enough data for long")
-        
-        value = struct.unpack('>q', self.data[self.offset:self.offset + 8])[0]
+        try:
+            value = _LONG.unpack_from(self.data, self.offset)[0]
+        except struct.error:
+            raise ValueError("Not enough data for long") from None
         self.offset += 8
         return value
     
     def read_float(self) -> float:
         """Read a 32-bit float (4 bytes, big-endian)."""
-        if self.offset + 4 > len(self.data):
-            raise ValueError("Not enough data for float")
-        
-        value = struct.unpack('>f', self.data[self.offset:self.offset + 4])[0]
+        try:
+            value = _FLOAT.unpack_from(self.data, self.offset)[0]
+        except struct.error:
+            raise ValueError("Not enough data for float") from None
         self.offset += 4
         return value
     
     def read_double(self) -> float:
         """Read a 64-bit double (8 bytes, big-endian)."""
-        if self.offset + 8 > len(self.data):
-            raise ValueError("Not enough data for double")
-        
-        value = struct.unpack('>d', self.data[self.offset:self.offset + 8])[0]
+        try:
+            value = _DOUBLE.unpack_from(self.data, self.offset)[0]
+        except struct.error:
+            raise ValueError("Not enough data for double") from None
         self.offset += 8
         return value
     
+    def read_struct(self, fmt) -> tuple:
+        """
+        Read several fixed-size fields in one call.
+        
+        Args:
+            fmt: struct format string (big-endian, e.g. '>dddffB') or a
+                 precompiled struct.Struct; strings are compiled once and cached
+        
+        Returns:
+            Tuple of the decoded values
+        """
+        layout = fmt if isinstance(fmt, struct.Struct) else _struct_cache.get(fmt)
+        if layout is None:
+            layout = _struct_cache[fmt] = struct.Struct(fmt)
+        try:
+            values = layout.unpack_from(self.data, self.offset)
+        except struct.error:
+            raise ValueError(f"Not enough data for {layout.format}") from None
+        self.offset += layout.size
+        return values
+    
     def read_position(self) -> Tuple[int, int, int]:
         """Read a Position (64-bit: x=26 bits, z=26 bits, y=12 bits)."""
-        if self.offset + 8 > len(self.data):
-            raise ValueError("Not enough data for position")
-        
-        value = struct.unpack('>Q', self.data[self.offset:self.offset + 8])[0]
+        try:
+            value = _UNSIGNED_LONG.unpack_from(self.data, self.offset)[0]
+        except struct.error:
+            raise ValueError("Not enough data for position") from None
         self.offset += 8
         
         # Extract x (26 MSBs), z (26 middle), y (12 LSBs)
@@ -306,12 +411,215 @@ class ProtocolReader:
         return len(self.data) - self.offset
 
 
+# VarInt encodings of small values (counts, item IDs, most entity IDs), built once
+_VARINT_TABLE_SIZE = 4096
+
+
+def _encode_varint_slow(value: int) -> bytes:
+    """Encode a VarInt (negative values as 32-bit two's complement)."""
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+_VARINT_TABLE = [_encode_varint_slow(value) for value in range(_VARINT_TABLE_SIZE)]
+
+
+def encode_varint(value: int) -> bytes:
+    """Encode a VarInt as bytes (negative values as 32-bit two's complement)."""
+    if 0 <= value < _VARINT_TABLE_SIZE:
+        return _VARINT_TABLE[value]
+    return _encode_varint_slow(value)
+
+
+_LPVEC3_MAX_QUANTIZED = 32766.0
+
+
+def encode_lpvec3(x: float, y: float, z: float) -> bytes:
+    """
+    Encode an LpVec3 (low-precision velocity vector) using the new packed format.
+    
+    Format:
+    - If all coordinates are near zero (< 3.051944088384301e-5): single byte 0x00
+    - Otherwise: pack coordinates into 48-bit value with scale factor
+      - 2 bytes (little-endian) + 4 bytes (big-endian)
+      - If scale factor needs continuation, an additional VarInt
+    
+    Network order: [byte1, byte2, byte6, byte5, byte4, byte3]
+    """
+    # Check if all coordinates are near zero
+    max_coordinate = max(abs(x), abs(y), abs(z))
+    if max_coordinate < 3.051944088384301e-5:
+        return b'\x00'
+    
+    # Calculate scale factor
+    max_coordinate_i = int(max_coordinate)
+    scale_factor = max_coordinate_i + 1 if max_coordinate > float(max_coordinate_i) else max_coordinate_i
+    
+    # Check if scale factor needs continuation (if it doesn't fit in 2 bits)
+    need_continuation = (scale_factor & 3) != scale_factor
+    
+    # Pack scale factor into lower 2 bits, with continuation flag in bit 2
+    packed_scale = (scale_factor & 3) | (4 if need_continuation else 0)
+    
+    # Pack coordinates (normalize by scale factor first), each into 15 bits:
+    # round((value * 0.5 + 0.5) * _LPVEC3_MAX_QUANTIZED)
+    scale_factor_d = float(scale_factor)
+    packed_x = int(round((x / scale_factor_d * 0.5 + 0.5) * _LPVEC3_MAX_QUANTIZED)) << 3
+    packed_y = int(round((y / scale_factor_d * 0.5 + 0.5) * _LPVEC3_MAX_QUANTIZED)) << 18
+    packed_z = int(round((z / scale_factor_d * 0.5 + 0.5) * _LPVEC3_MAX_QUANTIZED)) << 33
+    
+    # Combine all packed values into 48-bit integer
+    packed = packed_z | packed_y | packed_x | packed_scale
+    
+    # First 2 bytes little-endian, last 4 bytes big-endian
+    encoded = (packed & 0xFFFF).to_bytes(2, 'little') + ((packed >> 16) & 0xFFFFFFFF).to_bytes(4, 'big')
+    
+    # If scale factor needs continuation, append an additional VarInt
+    if need_continuation:
+        encoded += encode_varint(int(scale_factor >> 2))
+    
+    return encoded
+
+
+# Block states PalettedContainer: an indirect palette has at most 8 bits per
+# entry (256 values); beyond that the direct format stores block state IDs,
+# with ceil(log2(number of block states)) bits (under 2^15 in 1.21.10)
+MAX_INDIRECT_BLOCK_PALETTE = 256
+DIRECT_BLOCK_BITS = 15
+
+
+def pack_data_array(entries, bits_per_entry: int) -> bytes:
+    """
+    Pack entries into the big-endian longs of a PalettedContainer or heightmap.
+    
+    The first entry of each long goes in its least significant bits and no
+    entry spans two longs. Uses NumPy (vectorized shifts and ORs over the
+    whole array) when available.
+    
+    Args:
+        entries: Sequence (or NumPy array) of non-negative integers
+        bits_per_entry: Bits per entry (values are masked to this width)
+    
+    Returns:
+        The longs as bytes (8 bytes per long, no length prefix)
+    """
+    entries_per_long = 64 // bits_per_entry
+    count = len(entries)
+    num_longs = (count + entries_per_long - 1) // entries_per_long
+    mask = (1 << bits_per_entry) - 1
+    
+    if NUMPY_AVAILABLE:
+        padded = np.zeros(num_longs * entries_per_long, dtype=np.uint64)
+        padded[:count] = entries
+        padded &= np.uint64(mask)
+        shifts = np.arange(entries_per_long, dtype=np.uint64) * np.uint64(bits_per_entry)
+        longs = np.bitwise_or.reduce(padded.reshape(num_longs, entries_per_long) << shifts, axis=1)
+        return longs.astype('>u8').tobytes()
+    
+    longs = []
+    for start in range(0, count, entries_per_long):
+        long_value = 0
+        for entry_idx, entry_value in enumerate(entries[start:start + entries_per_long]):
+            long_value |= (entry_value & mask) << (entry_idx * bits_per_entry)
+        longs.append(long_value)
+    return struct.pack(f'>{num_longs}Q', *longs)
+
+
+# Bytes reserved for a length prefix written after its contents: a 3-byte
+# VarInt covers every length up to the protocol's packet limit (2^21 - 1)
+LENGTH_PREFIX_RESERVE = 3
+MAX_RESERVED_LENGTH = (1 << (7 * LENGTH_PREFIX_RESERVE)) - 1
+
+
 class ProtocolWriter:
-    """Writes Minecraft protocol data types to bytes."""
+    """
+    Writes Minecraft protocol data types to bytes.
+    
+    Length prefixes whose value is only known after the contents are written
+    (the frame length, the chunk data size) are handled by reserving space
+    up front (reserve_length / fill_length) instead of writing the contents
+    to a second writer and copying them behind the prefix.
+    """
     
     def __init__(self):
         self.data = bytearray()
     
+    @classmethod
+    def for_packet(cls, packet_id: int) -> 'ProtocolWriter':
+        """
+        Start an outgoing packet: reserve the frame length and write the ID.
+        
+        Finish it with finish_packet().
+        
+        Args:
+            packet_id: Packet ID (VarInt)
+        """
+        writer = cls()
+        writer.reserve_length()
+        writer.write_varint(packet_id)
+        return writer
+    
+    def finish_packet(self) -> bytearray:
+        """
+        Fill in the frame length reserved by for_packet() and return the frame.
+        
+        The body is not copied: the VarInt is written into the tail of the
+        reserved bytes and the unused head is deleted, which bytearray does
+        in constant time. The writer must not be used afterwards.
+        
+        Returns:
+            Uncompressed packet including its VarInt length prefix
+        """
+        self.fill_length(0)
+        return self.data
+    
+    def reserve_length(self) -> int:
+        """
+        Reserve space for a VarInt length prefix of the bytes that follow.
+        
+        Returns:
+            Mark to pass to fill_length() once the contents are written
+        """
+        mark = len(self.data)
+        self.data.extend(b'\x00' * LENGTH_PREFIX_RESERVE)
+        return mark
+    
+    def fill_length(self, mark: int) -> 'ProtocolWriter':
+        """
+        Write the length of everything after a reserve_length() mark into its space.
+        
+        Args:
+            mark: Value returned by reserve_length()
+        """
+        data = self.data
+        start = mark + LENGTH_PREFIX_RESERVE
+        length = len(data) - start
+        if length > MAX_RESERVED_LENGTH:
+            raise ValueError(f"Length-prefixed data too long: {length} bytes")
+        
+        # Encode into the end of the reserved bytes
+        prefix = bytearray()
+        while True:
+            byte = length & 0x7F
+            length >>= 7
+            if length:
+                prefix.append(byte | 0x80)
+            else:
+                prefix.append(byte)
+                break
+        data[start - len(prefix):start] = prefix
+        
+        # Drop the unused reserved bytes (at the front this is just a pointer bump)
+        unused = LENGTH_PREFIX_RESERVE - len(prefix)
+        if unused:
+            del data[mark:mark + unused]
+        return self
+    
     def write_varlong(self, value: int) -> 'ProtocolWriter':
         """Write a VarLong (variable-length long, up to 10 bytes)."""
         # Similar to VarInt but for 64-bit values
@@ -460,81 +768,8 @@ class ProtocolWriter:
         return self.write_string(value, 32767)
     
     def write_lpvec3(self, x: float, y: float, z: float) -> 'ProtocolWriter':
-        """
-        Write an LpVec3 (low-precision velocity vector) using the new packed format.
-        
-        Format:
-        - If all coordinates are near zero (< 3.051944088384301e-5): write single byte 0x00
-        - Otherwise: pack coordinates into 48-bit value with scale factor
-          - Write 2 bytes (little-endian) + 4 bytes (big-endian)
-          - If scale factor needs continuation, write additional VarInt
-        
-        Network order: [byte1, byte2, byte6, byte5, byte4, byte3]
-        """
-        MAX_QUANTIZED_VALUE = 32766.0
-        
-        def pack(value):
-            """Pack a normalized value (-1.0 to 1.0) into 15 bits."""
-            return int(round((value * 0.5 + 0.5) * MAX_QUANTIZED_VALUE))
-        
-        # Check if all coordinates are near zero
-        max_coordinate = max(abs(x), abs(y), abs(z))
-        if max_coordinate < 3.051944088384301e-5:
-            self.write_byte(0)
-            return self
-        
-        # Calculate scale factor
-        max_coordinate_i = int(max_coordinate)
-        scale_factor = max_coordinate_i + 1 if max_coordinate > float(max_coordinate_i) else max_coordinate_i
-        
-        # Check if scale factor needs continuation (if it doesn't fit in 2 bits)
-        need_continuation = (scale_factor & 3) != scale_factor
-        
-        # Pack scale factor into lower 2 bits, with continuation flag in bit 2
-        packed_scale = (scale_factor & 3) | (4 if need_continuation else 0)
-        
-        # Pack coordinates (normalize by scale factor first)
-        scale_factor_d = float(scale_factor)
-        packed_x = pack(x / scale_factor_d) << 3
-        packed_y = pack(y / scale_factor_d) << 18
-        packed_z = pack(z / scale_factor_d) << 33
-        
-        # Combine all packed values into 48-bit integer
-        packed = packed_z | packed_y | packed_x | packed_scale
-        
-        # Extract individual bytes (as unsigned 0-255)
-        byte1_u = packed & 0xFF
-        byte2_u = (packed >> 8) & 0xFF
-        byte3_u = (packed >> 16) & 0xFF
-        byte4_u = (packed >> 24) & 0xFF
-        byte5_u = (packed >> 32) & 0xFF
-        byte6_u = (packed >> 40) & 0xFF
-        
-        # Convert unsigned bytes (0-255) to signed bytes (-128 to 127)
-        # Values >= 128 become negative: 128 -> -128, 255 -> -1
-        byte1 = byte1_u if byte1_u < 128 else byte1_u - 256
-        byte2 = byte2_u if byte2_u < 128 else byte2_u - 256
-        
-        # Write in network order: first 2 bytes little-endian, last 4 bytes big-endian
-        # Order: [byte1, byte2, byte6, byte5, byte4, byte3]
-        self.write_byte(byte1)
-        self.write_byte(byte2)
-        # Write last 4 bytes as big-endian: byte6, byte5, byte4, byte3
-        # Convert to signed bytes for write_byte, or write directly as bytes
-        byte3 = byte3_u if byte3_u < 128 else byte3_u - 256
-        byte4 = byte4_u if byte4_u < 128 else byte4_u - 256
-        byte5 = byte5_u if byte5_u < 128 else byte5_u - 256
-        byte6 = byte6_u if byte6_u < 128 else byte6_u - 256
-        # Write as 4 bytes in big-endian order
-        self.write_byte(byte6)
-        self.write_byte(byte5)
-        self.write_byte(byte4)
-        self.write_byte(byte3)
-        
-        # If scale factor needs continuation, write additional VarInt
-        if need_continuation:
-            self.write_varint(int(scale_factor >> 2))
-        
+        """Write an LpVec3 (low-precision velocity vector, see encode_lpvec3)."""
+        self.data.extend(encode_lpvec3(x, y, z))
         return self
     
     def write_angle(self, angle: float) -> 'ProtocolWriter':
@@ -555,6 +790,102 @@ class ProtocolWriter:
         return len(self.data)
 
 
+class PacketType:
+    """
+    Registry entry for one serverbound packet.
+    
+    Attributes:
+        state: Connection state the packet belongs to
+        packet_id: Packet ID within that state
+        resource_name: Name in packets.json (e.g. "minecraft:keep_alive")
+        name: Human-readable name (used for logging)
+        parser: Function that reads the packet body from a ProtocolReader
+                (None for packets without a body or not parsed yet)
+        handler: Function that handles the parsed packet, attached by the
+                 server with PacketRegistry.handler()
+    """
+    
+    __slots__ = ('state', 'packet_id', 'resource_name', 'name', 'parser', 'handler')
+    
+    def __init__(self, state: ConnectionState, packet_id: int, resource_name: str, name: str,
+                 parser: Optional[Callable[[ProtocolReader], Any]] = None):
+        self.state = state
+        self.packet_id = packet_id
+        self.resource_name = resource_name
+        self.name = name
+        self.parser = parser
+        self.handler: Optional[Callable] = None
+    
+    def __repr__(self) -> str:
+        return f"PacketType({self.state.name}, 0x{self.packet_id:02x}, {self.name!r})"
+
+
+class PacketRegistry:
+    """
+    Table of serverbound packets keyed by (ConnectionState, packet_id).
+    
+    One lookup gives a packet's parser, log name and handler, replacing
+    if/elif chains over the connection state and packet ID.
+    """
+    
+    def __init__(self):
+        self._packets: Dict[Tuple[ConnectionState, int], PacketType] = {}
+    
+    def register(self, state: ConnectionState, resource_name: str, name: str,
+                 parser: Optional[Callable[[ProtocolReader], Any]] = None) -> PacketType:
+        """
+        Register a packet type under the ID packets.json gives it.
+        
+        Args:
+            state: Connection state
+            resource_name: Packet name in packets.json (e.g. "minecraft:keep_alive")
+            name: Human-readable packet name
+            parser: Body parser (None if the packet has no parsed form)
+        
+        Returns:
+            The registered PacketType
+        """
+        packet_id = serverbound_id(state, resource_name)
+        key = (state, packet_id)
+        if key in self._packets:
+            raise ValueError(f"Packet 0x{packet_id:02x} already registered for {state.name}")
+        packet_type = PacketType(state, packet_id, resource_name, name, parser)
+        self._packets[key] = packet_type
+        return packet_type
+    
+    def get(self, state: ConnectionState, packet_id: int) -> Optional[PacketType]:
+        """Look up a packet type, or None if it is not registered."""
+        return self._packets.get((state, packet_id))
+    
+    def handler(self, state: ConnectionState, resource_name: str) -> Callable:
+        """
+        Decorator that attaches a handler to a registered packet type.
+        
+        Usage:
+            @SERVERBOUND_PACKETS.handler(ConnectionState.PLAY, 'minecraft:keep_alive')
+            def handle_keep_alive(conn, parsed_packet): ...
+        """
+        packet_type = self._packets.get((state, serverbound_id(state, resource_name)))
+        if packet_type is None:
+            raise KeyError(f"Packet {resource_name} is not registered for {state.name}")
+        
+        def decorator(func: Callable) -> Callable:
+            packet_type.handler = func
+            return func
+        
+        return decorator
+    
+    def __iter__(self):
+        return iter(self._packets.values())
+    
+    def __len__(self) -> int:
+        return len(self._packets)
+
+
+# Serverbound packets known to the server (populated below PacketParser)
+SERVERBOUND_PACKETS = PacketRegistry()
+
+
 class PacketParser:
     """Parses Minecraft protocol packets."""
     
@@ -571,159 +902,12 @@ class PacketParser:
         packet_id = reader.read_varint()
         
         # Parse based on state and packet ID
-        if state == ConnectionState.HANDSHAKING:
-            if packet_id == 0:  # Handshake
-                return packet_id, PacketParser._parse_handshake(reader)
-        
-        elif state == ConnectionState.LOGIN:
-            if packet_id == 0:  # Login Start
-                return packet_id, PacketParser._parse_login_start(reader)
-            elif packet_id == 3:  # Login Acknowledged
-                return packet_id, None  # Empty packet
-        
-        elif state == ConnectionState.CONFIGURATION:
-            if packet_id == 0:  # Client Information
-                return packet_id, PacketParser._parse_client_information(reader)
-            elif packet_id == 2:  # Plugin Message (Configuration)
-                # Parse channel and data
-                channel = reader.read_string()
-                # Read remaining bytes
-                remaining_length = reader.remaining()
-                data = reader.read_bytes(remaining_length) if remaining_length > 0 else b""
-                return packet_id, {"channel": channel, "data": data}
-            elif packet_id == 3:  # Acknowledge Finish Configuration
-                return packet_id, None  # Empty packet
-            elif packet_id == 0x07:  # Serverbound Known Packs
-                return packet_id, PacketParser._parse_known_packs(reader)
-        
-        elif state == ConnectionState.PLAY:
-            if packet_id == 0x1D:  # Set Player Position
-                return packet_id, PacketParser._parse_set_player_position(reader)
-            elif packet_id == 0x1E:  # Set Player Position and Rotation
-                return packet_id, PacketParser._parse_set_player_position_and_rotation(reader)
-            elif packet_id == 0x1F:  # Set Player Rotation
-                return packet_id, PacketParser._parse_set_player_rotation(reader)
-            elif packet_id == 0x1B:  # Serverbound Keep Alive
-                return packet_id, PacketParser._parse_keep_alive(reader)
-            elif packet_id == 0x28:  # Player Action
-                return packet_id, PacketParser._parse_player_action(reader)
-            elif packet_id == 0x11:  # Click Container
-                return packet_id, PacketParser._parse_click_container(reader)
-            elif packet_id == 0x3F:  # Use Item On
-                return packet_id, PacketParser._parse_use_item_on(reader)
-            elif packet_id == 0x34:  # Set Held Item (serverbound)
-                return packet_id, PacketParser._parse_set_held_item(reader)
-        
-        # Unknown packet
-        return packet_id, None
-    
-    @staticmethod
-    def _parse_handshake(reader: ProtocolReader) -> HandshakePacket:
-        """Parse a Handshake packet."""
-        protocol_version = reader.read_varint()
-        server_address = reader.read_string(255)
-        server_port = reader.read_unsigned_short()
-        intent = reader.read_varint()
-        
-        return HandshakePacket(
-            protocol_version=protocol_version,
-            server_address=server_address,
-            server_port=server_port,
-            intent=intent
-        )
-    
-    @staticmethod
-    def _parse_login_start(reader: ProtocolReader) -> LoginStartPacket:
-        """Parse a Login Start packet."""
-        username = reader.read_string(16)
-        player_uuid = reader.read_uuid()
-        
-        return LoginStartPacket(
-            username=username,
-            player_uuid=player_uuid
-        )
-    
-    @staticmethod
-    def _parse_client_information(reader: ProtocolReader) -> ClientInformationPacket:
-        """Parse a Client Information packet (Configuration state)."""
-        locale = reader.read_string(16)
-        view_distance = reader.read_byte()  # Byte (signed)
-        chat_mode = reader.read_varint()
-        chat_colors = reader.read_bool()  # Boolean
-        displayed_skin_parts = reader.read_byte()  # Unsigned Byte (but we read as byte)
-        main_hand = reader.read_varint()
-        enable_text_filtering = reader.read_bool()  # Boolean
-        allow_server_listings = reader.read_bool()  # Boolean
-        
-        return ClientInformationPacket(
-            locale=locale,
-            view_distance=view_distance,
-            chat_mode=chat_mode,
-            chat_colors=chat_colors,
-            displayed_skin_parts=displayed_skin_parts,
-            main_hand=main_hand,
-            enable_text_filtering=enable_text_filtering,
-            allow_server_listings=allow_server_listings
-        )
-    
-    @staticmethod
-    def _parse_known_packs(reader: ProtocolReader) -> List[Tuple[str, str, str]]:
-        """Parse a Serverbound Known Packs packet."""
-        packs = []
-        num_packs = reader.read_varint()
-        for _ in range(num_packs):
-            namespace = reader.read_string(32767)
-            pack_id = reader.read_string(32767)
-            version = reader.read_string(32767)
-            packs.append((namespace, pack_id, version))
-        return packs
-    
-    @staticmethod
-    def _parse_set_player_position(reader: ProtocolReader) -> SetPlayerPositionPacket:
-        """Parse a Set Player Position packet (0x1D)."""
-        x = reader.read_double()
-        y = reader.read_double()
-        z = reader.read_double()
-        
-        return SetPlayerPositionPacket(x=x, y=y, z=z)
-    
-    @staticmethod
-    def _parse_set_player_position_and_rotation(reader: ProtocolReader) -> SetPlayerPositionAndRotationPacket:
-        """Parse a Set Player Position and Rotation packet (0x1E)."""
-        x = reader.read_double()
-        y = reader.read_double()
-        z = reader.read_double()
-        yaw = reader.read_float()
-        pitch = reader.read_float()
+        packet_type = SERVERBOUND_PACKETS.get(state, packet_id)
+        if packet_type is None or packet_type.parser is None:
+            # Unknown packet, or a packet without a body
+            return packet_id, None
         
-        return SetPlayerPositionAndRotationPacket(x=x, y=y, z=z, yaw=yaw, pitch=pitch)
-    
-    @staticmethod
-    def _parse_set_player_rotation(reader: ProtocolReader) -> SetPlayerRotationPacket:
-        """Parse a Set Player Rotation packet (0x1F)."""
-        yaw = reader.read_float()
-        pitch = reader.read_float()
-        return SetPlayerRotationPacket(yaw=yaw, pitch=pitch)
-    
-    @staticmethod
-    def _parse_keep_alive(reader: ProtocolReader) -> KeepAlivePacket:
-        """Parse a Serverbound Keep Alive packet (0x1B)."""
-        keep_alive_id = reader.read_long()
-        return KeepAlivePacket(keep_alive_id=keep_alive_id)
-    
-    @staticmethod
-    def _parse_player_action(reader: ProtocolReader) -> PlayerActionPacket:
-        """Parse a Player Action packet (0x28)."""
-        status = reader.read_varint()
-        location = reader.read_position()
-        face = reader.read_byte()
-        sequence = reader.read_varint()
-        return PlayerActionPacket(
-            status=status,
-            location=location,
-            face=face,
-            sequence=sequence
-        )
+        return packet_id, packet_type.parser(reader)
     
     @staticmethod
     def _read_hashed_slot(reader: ProtocolReader) -> Tuple[int, int]:
@@ -751,80 +935,339 @@ class PacketParser:
             component_type = reader.read_varint()  # Component type
         
         return (item_id, item_count)
+
+
+def _plugin_message(channel: str, data: bytes) -> Dict[str, Any]:
+    """Parsed form of a Plugin Message."""
+    return {"channel": channel, "data": data}
+
+
+def _known_packs(packs: List[Tuple[str, str, str]]) -> List[Tuple[str, str, str]]:
+    """Parsed form of Serverbound Known Packs: the (namespace, id, version) list."""
+    return packs
+
+
+def _click_container(window_id: int, state_id: int, slot: int, button: int, mode: int,
+                     changed_slots: List[Tuple[int, Tuple[int, int]]],
+                     carried_item: Tuple[int, int]) -> ClickContainerPacket:
+    """Parsed form of Click Container, with changed slots flattened to (slot, item_id, count)."""
+    return ClickContainerPacket(
+        window_id=window_id,
+        state_id=state_id,
+        slot=slot,
+        button=button,
+        mode=mode,
+        changed_slots=[(slot_number, item[0], item[1]) for slot_number, item in changed_slots],
+        carried_item=carried_item
+    )
+
+
+# Serverbound packet schemas: (state, resource name, display name, body fields, factory).
+# IDs come from packets.json; fields a handler does not use (e.g. the on-ground
+# flags after a movement packet) are left unread. Packets without fields have
+# no parsed form.
+SERVERBOUND_SCHEMA = [
+    # Handshaking
+    (ConnectionState.HANDSHAKING, 'minecraft:intention', "Handshake",
+     [('protocol_version', 'varint'), ('server_address', ('string', 255)),
+      ('server_port', 'unsigned_short'), ('intent', 'varint')], HandshakePacket),
+    
+    # Status
+    (ConnectionState.STATUS, 'minecraft:status_request', "Status Request", [], None),
+    (ConnectionState.STATUS, 'minecraft:ping_request', "Ping Request",
+     [('payload', 'long')], PingRequestPacket),
+    
+    # Login
+    (ConnectionState.LOGIN, 'minecraft:hello', "Login Start",
+     [('username', ('string', 16)), ('player_uuid', 'uuid')], LoginStartPacket),
+    (ConnectionState.LOGIN, 'minecraft:login_acknowledged', "Login Acknowledged", [], None),
+    
+    # Configuration
+    (ConnectionState.CONFIGURATION, 'minecraft:client_information', "Client Information",
+     [('locale', ('string', 16)), ('view_distance', 'unsigned_byte'), ('chat_mode', 'varint'),
+      ('chat_colors', 'bool'), ('displayed_skin_parts', 'unsigned_byte'), ('main_hand', 'varint'),
+      ('enable_text_filtering', 'bool'), ('allow_server_listings', 'bool')], ClientInformationPacket),
+    (ConnectionState.CONFIGURATION, 'minecraft:custom_payload', "Plugin Message",
+     [('channel', 'string'), ('data', 'rest')], _plugin_message),
+    (ConnectionState.CONFIGURATION, 'minecraft:finish_configuration', "Acknowledge Finish Configuration", [], None),
+    (ConnectionState.CONFIGURATION, 'minecraft:select_known_packs', "Serverbound Known Packs",
+     [('packs', ('array', (('string', 32767), ('string', 32767), ('string', 32767))))], _known_packs),
+    
+    # Play
+    (ConnectionState.PLAY, 'minecraft:accept_teleportation', "Confirm Teleport", [], None),
+    (ConnectionState.PLAY, 'minecraft:client_tick_end', "Client Tick End", [], None),
+    (ConnectionState.PLAY, 'minecraft:container_click', "Click Container",
+     [('window_id', 'varint'), ('state_id', 'varint'), ('slot', 'short'), ('button', 'unsigned_byte'),
+      ('mode', 'varint'), ('changed_slots', ('array', ('short', 'hashed_slot'))),
+      ('carried_item', 'hashed_slot')], _click_container),
+    (ConnectionState.PLAY, 'minecraft:keep_alive', "Keep Alive Response",
+     [('keep_alive_id', 'long')], KeepAlivePacket),
+    (ConnectionState.PLAY, 'minecraft:move_player_pos', "Set Player Position",
+     [('x', 'double'), ('y', 'double'), ('z', 'double')], SetPlayerPositionPacket),
+    (ConnectionState.PLAY, 'minecraft:move_player_pos_rot', "Set Player Position and Rotation",
+     [('x', 'double'), ('y', 'double'), ('z', 'double'), ('yaw', 'float'), ('pitch', 'float')],
+     SetPlayerPositionAndRotationPacket),
+    (ConnectionState.PLAY, 'minecraft:move_player_rot', "Set Player Rotation",
+     [('yaw', 'float'), ('pitch', 'float')], SetPlayerRotationPacket),
+    (ConnectionState.PLAY, 'minecraft:player_action', "Player Action",
+     [('status', 'varint'), ('location', 'position'), ('face', 'unsigned_byte'), ('sequence', 'varint')],
+     PlayerActionPacket),
+    (ConnectionState.PLAY, 'minecraft:set_carried_item', "Set Held Item",
+     [('slot', 'short')], SetHeldItemPacket),
+    (ConnectionState.PLAY, 'minecraft:use_item_on', "Use Item On",
+     [('hand', 'varint'), ('location', 'position'), ('face', 'varint'), ('cursor_x', 'float'),
+      ('cursor_y', 'float'), ('cursor_z', 'float'), ('inside_block', 'bool'),
+      ('world_border_hit', 'bool'), ('sequence', 'varint')], UseItemOnPacket),
+]
+
+_SCHEMA_READERS = {'hashed_slot': PacketParser._read_hashed_slot}
+
+for _state, _resource_name, _name, _fields, _factory in SERVERBOUND_SCHEMA:
+    _parser = compile_decoder(_name, _fields, _factory, _SCHEMA_READERS) if _factory is not None else None
+    SERVERBOUND_PACKETS.register(_state, _resource_name, _name, _parser)
+
+
+def _unknown_packet_parser(resource_name: str) -> Callable[[ProtocolReader], UnknownPacket]:
+    """Parser for a packet without a schema: records its name and body size only."""
+    def parse(reader: ProtocolReader) -> UnknownPacket:
+        return UnknownPacket(resource_name, reader.remaining())
+    return parse
+
+
+# Every other serverbound packet of the protocol version gets a name and a cheap parser
+for _state, _state_key in _STATE_KEYS.items():
+    for _resource_name in PACKET_IDS.names(_state_key, 'serverbound'):
+        if SERVERBOUND_PACKETS.get(_state, serverbound_id(_state, _resource_name)) is None:
+            SERVERBOUND_PACKETS.register(_state, _resource_name, _resource_name,
+                                         _unknown_packet_parser(_resource_name))
+
+
+# Fixed-width template fields: struct code and the expression converting the value
+_TEMPLATE_FIXED_FIELDS = {
+    'byte': ('b', '{}'),
+    'unsigned_byte': ('B', '{}'),
+    'bool': ('?', '{}'),
+    'short': ('h', '{}'),
+    'unsigned_short': ('H', '{}'),
+    'int': ('i', '{}'),
+    'long': ('q', '{}'),
+    'float': ('f', '{}'),
+    'double': ('d', '{}'),
+    'uuid': ('16s', '{}.bytes'),
+    'angle': ('B', 'int(({} % 360.0) / 360.0 * 256) & 0xFF'),
+    'position': ('Q', '_pack_position({})'),  # Packed (x, y, z) tuple
+}
+
+# Variable-length template fields: encoder expression and number of values consumed
+_TEMPLATE_VARIABLE_FIELDS = {
+    'varint': ('_encode_varint({})', 1),
+    'string': ('_encode_string({})', 1),
+    'lpvec3': ('_encode_lpvec3({}, {}, {})', 3),
+    'slot': ('_encode_slot({}, {})', 2),  # (item_id, count)
+}
+
+
+def _encode_string(value: str) -> bytes:
+    """Encode a length-prefixed UTF-8 string (see ProtocolWriter.write_string)."""
+    encoded = value.encode('utf-8')
+    if len(encoded) > 32767 * 3:
+        raise ValueError(f"String too long: {len(encoded)} bytes")
+    return encode_varint(len(encoded)) + encoded
+
+
+def _pack_position(position: Tuple[int, int, int]) -> int:
+    """Pack an (x, y, z) block position into a Position long (see ProtocolWriter.write_position)."""
+    x, y, z = position
+    return ((x & 0x3FFFFFF) << 38) | ((z & 0x3FFFFFF) << 12) | (y & 0xFFF)
+
+
+def _encode_slot(item_id: int, count: int) -> bytes:
+    """Encode a Slot without components (see PacketBuilder._write_slot)."""
+    if count > 0:
+        return encode_varint(count) + encode_varint(item_id) + b'\x00\x00'
+    return encode_varint(count)
+
+
+class PacketTemplate:
+    """
+    A clientbound packet layout compiled once and filled in per call.
     
-    @staticmethod
-    def _parse_click_container(reader: ProtocolReader) -> ClickContainerPacket:
-        """Parse Click Container packet (0x11, serverbound)."""
-        window_id = reader.read_varint()
-        state_id = reader.read_varint()
-        slot = reader.read_short()
-        button = reader.read_byte()
-        mode = reader.read_varint()
-        
-        # Array of changed slots
-        changed_slots_count = reader.read_varint()
-        changed_slots = []
-        for _ in range(changed_slots_count):
-            slot_number = reader.read_short()
-            item_id, count = PacketParser._read_hashed_slot(reader)
-            changed_slots.append((slot_number, item_id, count))
-        
-        # Carried item
-        carried_item = PacketParser._read_hashed_slot(reader)
-        
-        return ClickContainerPacket(
-            window_id=window_id,
-            state_id=state_id,
-            slot=slot,
-            button=button,
-            mode=mode,
-            changed_slots=changed_slots,
-            carried_item=carried_item
-        )
+    The layout is a list of field kinds ('varint', 'double', 'uuid', 'angle',
+    'lpvec3', 'slot', ...) or constant bytes. It is compiled into one
+    straight-line function: runs of constants are merged into one bytes
+    object and runs of fixed-width fields into one precompiled Struct, so a
+    build is a few pack/encode calls and a single join instead of a
+    ProtocolWriter call per field.
     
-    @staticmethod
-    def _parse_use_item_on(reader: ProtocolReader) -> UseItemOnPacket:
-        """Parse Use Item On packet (0x3F, serverbound)."""
-        hand = reader.read_varint()
-        location = reader.read_position()
-        face = reader.read_varint()
-        cursor_x = reader.read_float()
-        cursor_y = reader.read_float()
-        cursor_z = reader.read_float()
-        inside_block = reader.read_bool()
-        world_border_hit = reader.read_bool()
-        sequence = reader.read_varint()
-        
-        return UseItemOnPacket(
-            hand=hand,
-            location=location,
-            face=face,
-            cursor_x=cursor_x,
-            cursor_y=cursor_y,
-            cursor_z=cursor_z,
-            inside_block=inside_block,
-            world_border_hit=world_border_hit,
-            sequence=sequence
+    Output is identical to building the same fields with ProtocolWriter.
+    """
+    
+    def __init__(self, name: str, packet_id: int, fields: List[Any]):
+        """
+        Compile a template.
+        
+        Args:
+            name: Packet name (used in the generated function's name)
+            packet_id: Packet ID
+            fields: Field kinds in wire order; bytes entries are written as-is
+        """
+        self.name = name
+        self.packet_id = packet_id
+        self.fields = list(fields)
+        self.build = self._compile()
+    
+    @classmethod
+    def clientbound(cls, state: ConnectionState, resource_name: str, name: str,
+                    fields: List[Any]) -> 'PacketTemplate':
+        """
+        Compile a template for a packet identified by its packets.json name.
+        
+        Args:
+            state: Connection state the packet is sent in
+            resource_name: Packet name in packets.json (e.g. "minecraft:keep_alive")
+            name: Human-readable packet name
+            fields: Field kinds in wire order
+        """
+        return cls(name, clientbound_id(state, resource_name), fields)
+    
+    def _compile(self) -> Callable[..., bytes]:
+        """Generate the build function for the layout."""
+        namespace = {
+            'struct': struct,
+            '_encode_varint': encode_varint,
+            '_encode_lpvec3': encode_lpvec3,
+            '_encode_slot': _encode_slot,
+            '_encode_string': _encode_string,
+            '_pack_position': _pack_position,
+        }
+        parts = []
+        args = []
+        constant = bytearray(encode_varint(self.packet_id))
+        fixed_format = ''
+        fixed_values = []
+        
+        def flush_constant():
+            if constant:
+                name = f'_c{len(namespace)}'
+                namespace[name] = bytes(constant)
+                parts.append(name)
+                constant.clear()
+        
+        def flush_fixed():
+            nonlocal fixed_format
+            if fixed_format:
+                name = f'_s{len(namespace)}'
+                namespace[name] = struct.Struct('>' + fixed_format)
+                parts.append(f"{name}.pack({', '.join(fixed_values)})")
+                fixed_format = ''
+                fixed_values.clear()
+        
+        for field in self.fields:
+            if isinstance(field, (bytes, bytearray)):
+                flush_fixed()
+                constant.extend(field)
+            elif field in _TEMPLATE_FIXED_FIELDS:
+                flush_constant()
+                code, expression = _TEMPLATE_FIXED_FIELDS[field]
+                arg = f'v{len(args)}'
+                args.append(arg)
+                fixed_format += code
+                fixed_values.append(expression.format(arg))
+            elif field in _TEMPLATE_VARIABLE_FIELDS:
+                flush_constant()
+                flush_fixed()
+                expression, arity = _TEMPLATE_VARIABLE_FIELDS[field]
+                field_args = [f'v{len(args) + i}' for i in range(arity)]
+                args.extend(field_args)
+                parts.append(expression.format(*field_args))
+            else:
+                raise ValueError(f"Unknown template field: {field!r}")
+        flush_constant()
+        flush_fixed()
+        
+        self.arity = len(args)
+        function_name = 'build_' + ''.join(c if c.isalnum() else '_' for c in self.name.lower())
+        source = (
+            f"def {function_name}({', '.join(args)}):\n"
+            f"    body = b''.join(({', '.join(parts)},))\n"
+            f"    return _encode_varint(len(body)) + body\n"
         )
+        exec(compile(source, f'<packet template {self.name}>', 'exec'), namespace)
+        return namespace[function_name]
     
-    @staticmethod
-    def _parse_set_held_item(reader: ProtocolReader) -> SetHeldItemPacket:
-        """Parse Set Held Item packet (0x34, serverbound)."""
-        slot = reader.read_short()
-        return SetHeldItemPacket(slot=slot)
+    def build_many(self, rows) -> List[bytes]:
+        """
+        Build one packet per row of field values.
+        
+        Args:
+            rows: Iterable of value tuples, in the order build() takes them
+        
+        Returns:
+            Complete packets (each with its length prefix), in row order
+        """
+        build = self.build
+        return [build(*row) for row in rows]
+
+
+# Templates of the per-entity packets sent in bulk when items drop and are collected.
+# Spawn Entity: entity ID, UUID, type, x, y, z, velocity (LpVec3), pitch, yaw,
+# then Head Yaw and Data (always 0) depending on the entity kind
+SPAWN_ENTITY_TEMPLATES = {
+    (is_living, has_data): PacketTemplate.clientbound(
+        ConnectionState.PLAY, 'minecraft:add_entity', "Spawn Entity",
+        ['varint', 'uuid', 'varint', 'double', 'double', 'double', 'lpvec3', 'angle', 'angle']
+        + (['angle'] if is_living else []) + ([b'\x00'] if has_data else [])
+    )
+    for is_living in (False, True)
+    for has_data in (False, True)
+}
+
+# Set Entity Metadata with only the item stack (index 8, type 7 = Slot): entity ID, item ID, count
+ITEM_METADATA_TEMPLATE = PacketTemplate.clientbound(
+    ConnectionState.PLAY, 'minecraft:set_entity_data', "Set Entity Metadata (item)",
+    ['varint', b'\x08\x07', 'slot', b'\xff'])
+
+# Pickup Item: collected entity ID, collector entity ID, count
+PICKUP_ITEM_TEMPLATE = PacketTemplate.clientbound(
+    ConnectionState.PLAY, 'minecraft:take_item_entity', "Pickup Item", ['varint', 'varint', 'varint'])
+
+# Remove Entities with a single entity: entity ID
+REMOVE_ENTITY_TEMPLATE = PacketTemplate.clientbound(
+    ConnectionState.PLAY, 'minecraft:remove_entities', "Remove Entity", [b'\x01', 'varint'])
+
+# Set Container Slot: window ID, state ID, slot index, item ID, count
+SET_CONTAINER_SLOT_TEMPLATE = PacketTemplate.clientbound(
+    ConnectionState.PLAY, 'minecraft:container_set_slot', "Set Container Slot",
+    ['varint', 'varint', 'short', 'slot'])
+
+# Fixed-layout packets built by PacketBuilder
+STATUS_RESPONSE_TEMPLATE = PacketTemplate.clientbound(
+    ConnectionState.STATUS, 'minecraft:status_response', "Status Response", ['string'])
+PONG_RESPONSE_TEMPLATE = PacketTemplate.clientbound(
+    ConnectionState.STATUS, 'minecraft:pong_response', "Pong Response", ['long'])
+SET_COMPRESSION_TEMPLATE = PacketTemplate.clientbound(
+    ConnectionState.LOGIN, 'minecraft:login_compression', "Set Compression", ['varint'])
+FINISH_CONFIGURATION_TEMPLATE = PacketTemplate.clientbound(
+    ConnectionState.CONFIGURATION, 'minecraft:finish_configuration', "Finish Configuration", [])
+UPDATE_TIME_TEMPLATE = PacketTemplate.clientbound(
+    ConnectionState.PLAY, 'minecraft:set_time', "Update Time", ['long', 'long', 'bool'])
+GAME_EVENT_TEMPLATE = PacketTemplate.clientbound(
+    ConnectionState.PLAY, 'minecraft:game_event', "Game Event", ['unsigned_byte', 'float'])
+SET_CENTER_CHUNK_TEMPLATE = PacketTemplate.clientbound(
+    ConnectionState.PLAY, 'minecraft:set_chunk_cache_center', "Set Center Chunk", ['varint', 'varint'])
+KEEP_ALIVE_TEMPLATE = PacketTemplate.clientbound(
+    ConnectionState.PLAY, 'minecraft:keep_alive', "Keep Alive", ['long'])
+BLOCK_UPDATE_TEMPLATE = PacketTemplate.clientbound(
+    ConnectionState.PLAY, 'minecraft:block_update', "Block Update", ['position', 'varint'])
 
 
 class PacketBuilder:
     """Builds Minecraft protocol packets."""
     
     @staticmethod
-    def build_login_success(profile: GameProfile) -> bytes:
+    def build_login_success(profile: GameProfile) -> bytearray:
         """Build a Login Success packet."""
-        writer = ProtocolWriter()
-        
-        # Write packet ID first (we'll prepend length later)
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x02)  # Login Success packet ID
+        packet_writer = ProtocolWriter.for_packet(clientbound_id(ConnectionState.LOGIN, 'minecraft:login_finished'))
         
         # Write Game Profile
         packet_writer.write_uuid(profile.uuid)
@@ -833,45 +1276,78 @@ class PacketBuilder:
         # Write properties array (empty for offline mode)
         packet_writer.write_varint(0)  # Empty array
         
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
+        return packet_writer.finish_packet()
+    
+    @staticmethod
+    def build_status_response(json_response: str) -> bytes:
+        """
+        Build a Status Response packet (STATUS state, packet ID 0x00).
         
-        return final_writer.to_bytes()
+        Args:
+            json_response: Serialized server list ping JSON
+        """
+        return STATUS_RESPONSE_TEMPLATE.build(json_response)
     
     @staticmethod
-    def build_disconnect(reason: str) -> bytes:
-        """Build a Disconnect packet (login state)."""
-        # For now, just a simple JSON string
-        # In full implementation, this should be a proper JSON Text Component
-        writer = ProtocolWriter()
+    def build_pong_response(payload: int) -> bytes:
+        """
+        Build a Pong Response packet (STATUS state, packet ID 0x01).
+        
+        Args:
+            payload: Payload from the client's Ping Request
+        """
+        return PONG_RESPONSE_TEMPLATE.build(payload)
+    
+    @staticmethod
+    def build_set_compression(threshold: int) -> bytes:
+        """
+        Build a Set Compression packet (login state).
         
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x00)  # Disconnect packet ID
-        packet_writer.write_string(f'{{"text":"{reason}"}}', 32767)
+        Must be sent before Login Success; every packet after it (in both
+        directions) uses the compressed frame format.
         
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
+        Args:
+            threshold: Minimum uncompressed packet size that gets zlib-compressed
+                       (negative disables compression)
+        """
+        return SET_COMPRESSION_TEMPLATE.build(threshold)
+    
+    @staticmethod
+    def build_disconnect(reason: str, state: ConnectionState = ConnectionState.LOGIN) -> bytearray:
+        """
+        Build a Disconnect packet.
+        
+        Login state sends the reason as a JSON Text Component string.
+        Configuration and PLAY state send it as an NBT Text Component
+        (a plain string tag is a valid text component).
+        
+        Args:
+            reason: Plain-text reason shown to the player
+            state: Connection state the client is in (LOGIN, CONFIGURATION or PLAY)
+        """
+        if state == ConnectionState.LOGIN:
+            # For now, just a simple JSON string
+            # In full implementation, this should be a proper JSON Text Component
+            packet_writer = ProtocolWriter.for_packet(clientbound_id(ConnectionState.LOGIN, 'minecraft:login_disconnect'))
+            packet_writer.write_string(f'{{"text":"{reason}"}}', 32767)
+        else:
+            if state == ConnectionState.CONFIGURATION:
+                packet_writer = ProtocolWriter.for_packet(clientbound_id(ConnectionState.CONFIGURATION, 'minecraft:disconnect'))
+            else:
+                packet_writer = ProtocolWriter.for_packet(clientbound_id(ConnectionState.PLAY, 'minecraft:disconnect'))
+            
+            # Network NBT: String tag (0x08), no name, unsigned short length + UTF-8
+            reason_bytes = reason.encode('utf-8')
+            packet_writer.write_byte(0x08)
+            packet_writer.write_unsigned_short(len(reason_bytes))
+            packet_writer.write_bytes(reason_bytes)
         
-        return final_writer.to_bytes()
+        return packet_writer.finish_packet()
     
     @staticmethod
     def build_finish_configuration() -> bytes:
         """Build a Finish Configuration packet (Configuration state)."""
-        # Finish Configuration is packet ID 0x03 with no fields
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x03)  # Finish Configuration packet ID
-        
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
-        
-        return final_writer.to_bytes()
+        return FINISH_CONFIGURATION_TEMPLATE.build()
     
     @staticmethod
     def build_login_play(
@@ -895,13 +1371,12 @@ class PacketBuilder:
         portal_cooldown: int = 0,
         sea_level: int = 63,
         enforces_secure_chat: bool = False
-    ) -> bytes:
+    ) -> bytearray:
         """
         Build a Login (play) packet (PLAY state).
         This is the first packet sent after entering PLAY state.
         """
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x30)  # Login (play) packet ID
+        packet_writer = ProtocolWriter.for_packet(clientbound_id(ConnectionState.PLAY, 'minecraft:login'))
         
         # Entity ID
         packet_writer.write_int(entity_id)
@@ -974,19 +1449,13 @@ class PacketBuilder:
         # Enforces Secure Chat
         packet_writer.write_bool(enforces_secure_chat)
         
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
-        
-        return final_writer.to_bytes()
+        return packet_writer.finish_packet()
     
     @staticmethod
     def build_registry_data(
         registry_id: str,
         entries: List[Tuple[str, Optional[bytes]]] = None
-    ) -> bytes:
+    ) -> bytearray:
         """
         Build a Registry Data packet (Configuration state).
         
@@ -998,8 +1467,7 @@ class PacketBuilder:
         if entries is None:
             entries = []
         
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x07)  # Registry Data packet ID
+        packet_writer = ProtocolWriter.for_packet(clientbound_id(ConnectionState.CONFIGURATION, 'minecraft:registry_data'))
         
         # Registry ID
         packet_writer.write_identifier(registry_id)
@@ -1020,16 +1488,10 @@ class PacketBuilder:
             else:
                 packet_writer.write_bool(False)  # Omit NBT data
         
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
-        
-        return final_writer.to_bytes()
+        return packet_writer.finish_packet()
     
     @staticmethod
-    def build_known_packs(packs: List[Tuple[str, str, str]] = None) -> bytes:
+    def build_known_packs(packs: List[Tuple[str, str, str]] = None) -> bytearray:
         """
         Build a Clientbound Known Packs packet (Configuration state).
         
@@ -1040,8 +1502,7 @@ class PacketBuilder:
         if packs is None:
             packs = [("minecraft", "core", "1.21.10")]
         
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x0E)  # Clientbound Known Packs packet ID
+        packet_writer = ProtocolWriter.for_packet(clientbound_id(ConnectionState.CONFIGURATION, 'minecraft:select_known_packs'))
         
         # Known Packs array
         packet_writer.write_varint(len(packs))
@@ -1050,13 +1511,7 @@ class PacketBuilder:
             packet_writer.write_string(pack_id, 32767)
             packet_writer.write_string(version, 32767)
         
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
-        
-        return final_writer.to_bytes()
+        return packet_writer.finish_packet()
     
     @staticmethod
     def build_synchronize_player_position(
@@ -1067,13 +1522,12 @@ class PacketBuilder:
         pitch: float = 0.0,
         flags: int = 0,  # 0 = all absolute
         teleport_id: int = 0
-    ) -> bytes:
+    ) -> bytearray:
         """
         Build a Synchronize Player Position packet (PLAY state).
         Sets the player's spawn position.
         """
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x46)  # Synchronize Player Position packet ID
+        packet_writer = ProtocolWriter.for_packet(clientbound_id(ConnectionState.PLAY, 'minecraft:player_position'))
         
         # Teleport ID
         packet_writer.write_varint(teleport_id)
@@ -1095,13 +1549,7 @@ class PacketBuilder:
         # Flags (Int) - 0 = all absolute
         packet_writer.write_int(flags)
         
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
-        
-        return final_writer.to_bytes()
+        return packet_writer.finish_packet()
     
     @staticmethod
     def build_update_time(
@@ -1113,25 +1561,7 @@ class PacketBuilder:
         Build an Update Time packet (PLAY state).
         Sets the world time.
         """
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x6F)  # Update Time packet ID
-        
-        # World Age (Long)
-        packet_writer.write_long(world_age)
-        
-        # Time of Day (Long)
-        packet_writer.write_long(time_of_day)
-        
-        # Time of Day Increasing (Boolean)
-        packet_writer.write_bool(time_increasing)
-        
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
-        
-        return final_writer.to_bytes()
+        return UPDATE_TIME_TEMPLATE.build(world_age, time_of_day, time_increasing)
     
     @staticmethod
     def build_game_event(
@@ -1142,22 +1572,7 @@ class PacketBuilder:
         Build a Game Event packet (PLAY state).
         Event 13 is required for the client to spawn after receiving chunks.
         """
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x26)  # Game Event packet ID
-        
-        # Event (Unsigned Byte)
-        packet_writer.write_byte(event)
-        
-        # Value (Float)
-        packet_writer.write_float(value)
-        
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
-        
-        return final_writer.to_bytes()
+        return GAME_EVENT_TEMPLATE.build(event, value)
     
     @staticmethod
     def build_set_center_chunk(chunk_x: int, chunk_z: int) -> bytes:
@@ -1169,22 +1584,7 @@ class PacketBuilder:
             chunk_x: Chunk X coordinate (VarInt)
             chunk_z: Chunk Z coordinate (VarInt)
         """
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x5C)  # Set Center Chunk packet ID
-        
-        # Chunk X (VarInt)
-        packet_writer.write_varint(chunk_x)
-        
-        # Chunk Z (VarInt)
-        packet_writer.write_varint(chunk_z)
-        
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
-        
-        return final_writer.to_bytes()
+        return SET_CENTER_CHUNK_TEMPLATE.build(chunk_x, chunk_z)
     
     @staticmethod
     def build_keep_alive(keep_alive_id: int) -> bytes:
@@ -1195,19 +1595,7 @@ class PacketBuilder:
         Args:
             keep_alive_id: Unique ID for this keep alive (typically timestamp in milliseconds)
         """
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x2B)  # Keep Alive packet ID (clientbound)
-        
-        # Keep Alive ID (Long)
-        packet_writer.write_long(keep_alive_id)
-        
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
-        
-        return final_writer.to_bytes()
+        return KEEP_ALIVE_TEMPLATE.build(keep_alive_id)
     
     @staticmethod
     def build_destroy_entities(entity_ids: list) -> bytes:
@@ -1218,8 +1606,10 @@ class PacketBuilder:
         Args:
             entity_ids: List of entity IDs to destroy
         """
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x4B)  # Remove Entities packet ID (0x4B in 1.21.10, not 0x1A)
+        if len(entity_ids) == 1:
+            return REMOVE_ENTITY_TEMPLATE.build(entity_ids[0])
+        
+        packet_writer = ProtocolWriter.for_packet(clientbound_id(ConnectionState.PLAY, 'minecraft:remove_entities'))
         
         # Count (VarInt)
         packet_writer.write_varint(len(entity_ids))
@@ -1228,13 +1618,7 @@ class PacketBuilder:
         for entity_id in entity_ids:
             packet_writer.write_varint(entity_id)
         
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
-        
-        return final_writer.to_bytes()
+        return packet_writer.finish_packet()
     
     @staticmethod
     def build_pickup_item(
@@ -1251,25 +1635,7 @@ class PacketBuilder:
             collector_entity_id: Entity ID of the player/entity collecting (usually player ID 1)
             pickup_count: Number of items in the stack being collected
         """
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x7A)  # Pickup Item packet ID
-        
-        # Collected Entity ID (VarInt)
-        packet_writer.write_varint(collected_entity_id)
-        
-        # Collector Entity ID (VarInt)
-        packet_writer.write_varint(collector_entity_id)
-        
-        # Pickup Item Count (VarInt)
-        packet_writer.write_varint(pickup_count)
-        
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
-        
-        return final_writer.to_bytes()
+        return PICKUP_ITEM_TEMPLATE.build(collected_entity_id, collector_entity_id, pickup_count)
     
     @staticmethod
     def build_set_container_slot(window_id: int, state_id: int, slot: int, item_id: int, count: int) -> bytes:
@@ -1284,30 +1650,11 @@ class PacketBuilder:
             item_id: Item ID (0 for empty slot)
             count: Item count (0 for empty slot)
         """
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x14)  # Set Container Slot packet ID
-        
-        # Window ID (VarInt)
-        packet_writer.write_varint(window_id)
-        
-        # State ID (VarInt)
-        packet_writer.write_varint(state_id)
-        
         # Slot (Short)
         if slot < -32768 or slot > 32767:
             raise ValueError(f"Slot index out of range: {slot}")
-        packet_writer.write_short(slot)
-        
-        # Slot Data (Slot)
-        PacketBuilder._write_slot(packet_writer, item_id, count)
-        
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
         
-        return final_writer.to_bytes()
+        return SET_CONTAINER_SLOT_TEMPLATE.build(window_id, state_id, slot, item_id, count)
     
     @staticmethod
     def build_block_update(x: int, y: int, z: int, block_state_id: int) -> bytes:
@@ -1321,22 +1668,7 @@ class PacketBuilder:
             z: Block Z coordinate
             block_state_id: New block state ID (0 for air)
         """
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x08)  # Block Update packet ID
-        
-        # Location (Position)
-        packet_writer.write_position(x, y, z)
-        
-        # Block ID (VarInt)
-        packet_writer.write_varint(block_state_id)
-        
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
-        
-        return final_writer.to_bytes()
+        return BLOCK_UPDATE_TEMPLATE.build((x, y, z), block_state_id)
     
     @staticmethod
     def _write_slot(writer: ProtocolWriter, item_id: int, count: int = 1):
@@ -1396,56 +1728,20 @@ class PacketBuilder:
             via Entity Metadata (index 8, Slot type) after spawning.
             Item entities are NOT living entities, so Head Yaw should be omitted.
         """
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x01)  # Spawn Entity packet ID
-        
-        # Entity ID
-        packet_writer.write_varint(entity_id)
-        
-        # Entity UUID
-        packet_writer.write_uuid(entity_uuid)
-        
-        # Type
-        packet_writer.write_varint(entity_type)
-        
-        # Position
-        packet_writer.write_double(x)
-        packet_writer.write_double(y)
-        packet_writer.write_double(z)
-        
-        # Velocity (LpVec3)
-        packet_writer.write_lpvec3(velocity_x, velocity_y, velocity_z)
-        
-        # Pitch, Yaw (Angle) - always included
-        packet_writer.write_angle(pitch)
-        packet_writer.write_angle(yaw)
-        
-        # Head Yaw (Angle) - only for living entities
-        # According to protocol: "Head Yaw: Only used by living entities"
-        if is_living_entity:
-            packet_writer.write_angle(head_yaw)
-        
-        # Data - meaning depends on entity type
-        # For item entities, Data is 0 (item stack is set via Entity Metadata)
-        # According to Object data documentation, item entities are not listed,
-        # which may mean the Data field should be omitted for them
-        # For now, we'll include it for all entity types unless explicitly told not to
-        if has_data_field:
-            packet_writer.write_varint(0)
-        
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
-        
-        return final_writer.to_bytes()
+        # Head Yaw is only present for living entities; Data (0 for item
+        # entities, whose stack is set via Entity Metadata) only if the type uses it
+        template = SPAWN_ENTITY_TEMPLATES[(bool(is_living_entity), bool(has_data_field))]
+        return template.build(
+            entity_id, entity_uuid, entity_type, x, y, z,
+            velocity_x, velocity_y, velocity_z, pitch, yaw,
+            *((head_yaw,) if is_living_entity else ())
+        )
     
     @staticmethod
     def build_set_entity_metadata(
         entity_id: int,
         metadata: List[Tuple[int, int, any]]  # List of (index, type, value) tuples
-    ) -> bytes:
+    ) -> bytearray:
         """
         Build a Set Entity Metadata packet (PLAY state, packet ID 0x61).
         
@@ -1459,8 +1755,7 @@ class PacketBuilder:
                      21: Cat Variant, 22: Wolf Variant, 23: Frog Variant, 24: Optional Global Position,
                      25: Painting Variant, 26: Sniffer State, 27: Vector3, 28: Quaternion
         """
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x61)  # Set Entity Metadata packet ID
+        packet_writer = ProtocolWriter.for_packet(clientbound_id(ConnectionState.PLAY, 'minecraft:set_entity_data'))
         
         # Entity ID
         packet_writer.write_varint(entity_id)
@@ -1493,13 +1788,22 @@ class PacketBuilder:
         # End marker (0xFF, written as unsigned byte)
         packet_writer.write_unsigned_byte(0xFF)  # End of metadata array
         
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
+        return packet_writer.finish_packet()
+    
+    @staticmethod
+    def build_item_entity_metadata(entity_id: int, item_id: int, count: int) -> bytes:
+        """
+        Build a Set Entity Metadata packet carrying only an item entity's stack.
+        
+        Same bytes as build_set_entity_metadata(entity_id, [(8, 7, (item_id, count))]),
+        from a precompiled template.
         
-        return final_writer.to_bytes()
+        Args:
+            entity_id: Item entity ID
+            item_id: Item ID
+            count: Stack size
+        """
+        return ITEM_METADATA_TEMPLATE.build(entity_id, item_id, count)
     
     @staticmethod
     def _write_paletted_container_indirect(
@@ -1515,7 +1819,8 @@ class PacketBuilder:
             writer: ProtocolWriter to write to
             bits_per_entry: Bits per entry (4-8 for blocks, 1-3 for biomes)
             palette: List of global palette IDs
-            data_array: List of palette indices (4096 for blocks, 64 for biomes)
+            data_array: Palette indices (4096 for blocks, 64 for biomes), as a
+                        list or NumPy array
         """
         # Bits per entry
         writer.write_byte(bits_per_entry)
@@ -1527,40 +1832,166 @@ class PacketBuilder:
         for palette_id in palette:
             writer.write_varint(palette_id)
         
-        # Data array: Pack entries into longs
-        # Number of entries per long
-        entries_per_long = 64 // bits_per_entry
+        # Data array: entries packed into longs, first entry in the least significant bits
+        writer.write_bytes(pack_data_array(data_array, bits_per_entry))
+    
+    @staticmethod
+    def encode_chunk_section(block_count: int, palette: List[int], palette_indices: List[int]) -> bytes:
+        """
+        Encode one chunk section as it appears in a Chunk Data packet.
         
-        # Number of longs needed
-        num_entries = len(data_array)
-        num_longs = (num_entries + entries_per_long - 1) // entries_per_long
+        Block count, block states PalettedContainer and biomes PalettedContainer,
+        in the form returned by BlockManager.get_chunk_section_for_protocol.
         
-        # Pack data into longs
-        # Entries are packed with first entry at least significant bits
-        # Long is written in big-endian, so LSB of first entry ends up in last byte
-        for long_idx in range(num_longs):
-            long_value = 0
-            for entry_idx in range(entries_per_long):
-                data_idx = long_idx * entries_per_long + entry_idx
-                if data_idx < num_entries:
-                    # Pack entry into long
-                    # First entry goes at bit 0 (LSB), second at bit bits_per_entry, etc.
-                    entry_value = data_array[data_idx]
-                    # Mask to ensure we only use the bits we need
-                    entry_value &= (1 << bits_per_entry) - 1
-                    # Shift to correct bit position (first entry at bit 0)
-                    bit_offset = entry_idx * bits_per_entry
-                    long_value |= (entry_value << bit_offset)
+        Args:
+            block_count: Number of non-air blocks in the section
+            palette: Sorted unique block state IDs
+            palette_indices: Palette index of every block (4096 entries)
+            
+        Returns:
+            Encoded section bytes
+        """
+        writer = ProtocolWriter()
+        
+        # Write block count
+        writer.write_short(block_count)
+        
+        # Determine bits per entry based on palette size
+        if len(palette) == 1:
+            # Single-value palette (0 bits per entry)
+            writer.write_byte(0)
+            writer.write_varint(palette[0])
+        elif len(palette) > MAX_INDIRECT_BLOCK_PALETTE:
+            # Too many values for an indirect palette (at most 8 bits per
+            # entry): the data array holds the block state IDs themselves
+            if NUMPY_AVAILABLE:
+                block_states = np.asarray(palette, dtype=np.uint64)[np.asarray(palette_indices)]
+            else:
+                block_states = [palette[index] for index in palette_indices]
+            writer.write_byte(DIRECT_BLOCK_BITS)
+            writer.write_bytes(pack_data_array(block_states, DIRECT_BLOCK_BITS))
+        else:
+            # Multiple values - use indirect palette
+            # Calculate bits per entry (need at least ceil(log2(palette_size)))
+            bits_per_entry = max(4, (len(palette) - 1).bit_length())
+            
+            # Write block states PalettedContainer (Indirect)
+            PacketBuilder._write_paletted_container_indirect(
+                writer,
+                bits_per_entry=bits_per_entry,
+                palette=palette,
+                data_array=palette_indices
+            )
+        
+        # Biomes: Single-value palette (plains = 0)
+        writer.write_byte(0)  # 0 bits per entry
+        writer.write_varint(0)  # Biome ID 0 = plains
+        
+        return writer.to_bytes()
+    
+    @staticmethod
+    def _write_light_data(
+        writer: 'ProtocolWriter',
+        sky_light: Dict[int, Optional[bytes]],
+        block_light: Dict[int, Optional[bytes]]
+    ):
+        """
+        Write the Light Data shared by Chunk Data and Update Light packets.
+        
+        Sections missing from a mapping are left out of both its masks (the
+        client keeps what it has); sections mapped to None are sent as empty.
+        
+        Args:
+            writer: ProtocolWriter to write to
+            sky_light: Section index (0-23) -> 2048-byte nibble array, or None if dark
+            block_light: Section index (0-23) -> 2048-byte nibble array, or None if dark
+        """
+        # BitSets have one bit per section plus one below and one above the
+        # world (bit = section index + 1): 24 + 2 = 26 bits for the overworld
+        num_light_bits = 24 + 2
+        
+        masks = []
+        for light in (sky_light, block_light):
+            mask = [False] * num_light_bits
+            empty_mask = [False] * num_light_bits
+            for section_idx, array in light.items():
+                if array is None:
+                    empty_mask[section_idx + 1] = True
+                else:
+                    mask[section_idx + 1] = True
+            masks.append((mask, empty_mask))
+        
+        # Sky Light Mask, Block Light Mask, Empty Sky Light Mask, Empty Block Light Mask
+        writer.write_bitset(masks[0][0])
+        writer.write_bitset(masks[1][0])
+        writer.write_bitset(masks[0][1])
+        writer.write_bitset(masks[1][1])
+        
+        # Sky Light Arrays, then Block Light Arrays: one 2048-byte array
+        # (4096 nibbles) per set mask bit, in section order
+        for light in (sky_light, block_light):
+            arrays = [light[section_idx] for section_idx in sorted(light) if light[section_idx] is not None]
+            writer.write_varint(len(arrays))
+            for array in arrays:
+                writer.write_varint(len(array))
+                writer.write_bytes(array)
+    
+    @staticmethod
+    def build_light_update(
+        chunk_x: int,
+        chunk_z: int,
+        sky_light: Dict[int, Optional[bytes]],
+        block_light: Dict[int, Optional[bytes]]
+    ) -> bytearray:
+        """
+        Build an Update Light packet (PLAY state) for some sections of a chunk.
+        
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            sky_light: Changed sections' sky light (see _write_light_data)
+            block_light: Changed sections' block light (see _write_light_data)
+        """
+        packet_writer = ProtocolWriter.for_packet(clientbound_id(ConnectionState.PLAY, 'minecraft:light_update'))
+        packet_writer.write_varint(chunk_x)
+        packet_writer.write_varint(chunk_z)
+        PacketBuilder._write_light_data(packet_writer, sky_light, block_light)
+        return packet_writer.finish_packet()
+    
+    @staticmethod
+    def encode_heightmaps(heightmaps: Dict[int, List[int]]) -> bytes:
+        """
+        Encode the heightmaps of a Chunk Data packet.
+        
+        Format: Prefixed Array of Heightmap, each a Type (VarInt) and its Data
+        (Prefixed Array of Long). Bits per entry = ceil(log2(world_height + 1));
+        overworld: -64 to 320 = 384 blocks, so ceil(log2(385)) = 9.
+        
+        Args:
+            heightmaps: Heightmap type ID -> 256 heights (index z * 16 + x),
+                        as returned by BlockManager.get_heightmaps
             
-            # Write long (big-endian) - struct.pack('>Q') handles byte order
-            writer.write_long(long_value)
+        Returns:
+            Encoded heightmaps bytes
+        """
+        writer = ProtocolWriter()
+        writer.write_varint(len(heightmaps))
+        
+        heightmap_bits_per_entry = 9
+        entries_per_long = 64 // heightmap_bits_per_entry  # 7 entries per long
+        for heightmap_type, heights in heightmaps.items():
+            writer.write_varint(heightmap_type)
+            writer.write_varint((len(heights) + entries_per_long - 1) // entries_per_long)
+            writer.write_bytes(pack_data_array(heights, heightmap_bits_per_entry))
+        
+        return writer.to_bytes()
     
     @staticmethod
     def build_chunk_data(
         chunk_x: int,
         chunk_z: int,
         block_manager: 'BlockManager'
-    ) -> bytes:
+    ) -> bytearray:
         """
         Build a Chunk Data and Update Light packet (PLAY state).
         
@@ -1574,69 +2005,21 @@ class PacketBuilder:
         # Phase 3: Block state IDs no longer needed here (BlockManager handles them)
         # Keeping for reference if needed elsewhere
         
-        packet_writer = ProtocolWriter()
-        packet_writer.write_varint(0x2C)  # Chunk Data and Update Light packet ID
+        packet_writer = ProtocolWriter.for_packet(clientbound_id(ConnectionState.PLAY, 'minecraft:level_chunk_with_light'))
         
         # Chunk coordinates
         packet_writer.write_int(chunk_x)
         packet_writer.write_int(chunk_z)
         
-        # Heightmaps: Generate MOTION_BLOCKING heightmap
-        # Calculate heightmap from BlockManager/terrain generator data
-        # Heightmap format: Prefixed Array of Heightmap
-        # Each heightmap: Type (VarInt) + Data (Prefixed Array of Long)
-        # Bits per entry = ceil(log2(world_height + 1))
-        # Overworld: -64 to 320 = 384 blocks, so bits_per_entry = ceil(log2(385)) = 9
-        
-        # Check if terrain generation is enabled
-        use_terrain = (block_manager.terrain_generator is not None)
-        
-        # Send MOTION_BLOCKING heightmap (Type = 4)
-        packet_writer.write_varint(1)  # Number of heightmaps
-        
-        # Heightmap Type: MOTION_BLOCKING = 4
-        packet_writer.write_varint(4)
-        
-        # Heightmap Data: 256 entries (16x16 columns)
-        # Packed into longs using 9 bits per entry
-        # Ordering: x increases fastest, then z (same as block data ordering)
-        heightmap_bits_per_entry = 9
-        heightmap_entries = []
-        
-        if use_terrain:
-            # Use terrain generator's height map
-            height_map = block_manager.terrain_generator.generate_height_map(chunk_x, chunk_z)
-            for z in range(16):
-                for x in range(16):
-                    heightmap_entries.append(height_map[z][x])
-        else:
-            # Flat world: all columns at ground level (y=64)
-            ground_y = 64
-            for z in range(16):
-                for x in range(16):
-                    heightmap_entries.append(ground_y)
-        
-        # Pack into longs (same format as Data Array) - must be done for both terrain and flat world
-        entries_per_long = 64 // heightmap_bits_per_entry  # 7 entries per long
-        num_longs = (256 + entries_per_long - 1) // entries_per_long
+        # Heightmaps (WORLD_SURFACE and MOTION_BLOCKING), kept up to date and
+        # encoded by the BlockManager
+        packet_writer.write_bytes(
+            block_manager.get_encoded_heightmaps(chunk_x, chunk_z, PacketBuilder.encode_heightmaps)
+        )
         
-        # Write length (number of longs)
-        packet_writer.write_varint(num_longs)
-        
-        # Pack heightmap data
-        for long_idx in range(num_longs):
-            long_value = 0
-            for entry_idx in range(entries_per_long):
-                data_idx = long_idx * entries_per_long + entry_idx
-                if data_idx < 256:
-                    entry_value = heightmap_entries[data_idx]
-                    bit_offset = entry_idx * heightmap_bits_per_entry
-                    entry_value &= (1 << heightmap_bits_per_entry) - 1
-                    long_value |= (entry_value << bit_offset)
-            packet_writer.write_long(long_value)
-        
-        # Generate chunk sections
-        chunk_data_writer = ProtocolWriter()
+        # Generate chunk sections straight into the packet: Data is a
+        # Prefixed Array of Byte whose length is filled in afterwards
+        chunk_data_mark = packet_writer.reserve_length()
         
         # Overworld has 24 sections (y=-64 to 320)
         # Each section is 16 blocks tall
@@ -1649,190 +2032,26 @@ class PacketBuilder:
         # ...
         # Section 23: y=304 to 319
         
+        # Phase 3: Use BlockManager (required) - single source of truth.
+        # Sections are kept encoded there; only sections changed since
+        # their last encoding are palettized and packed again
         for section_idx in range(24):
-            section_y_min = -64 + (section_idx * 16)
-            section_y_max = section_y_min + 15
-            
-            # Phase 3: Use BlockManager (required) - single source of truth
-            block_count, palette, palette_indices = \
-                block_manager.get_chunk_section_for_protocol(chunk_x, chunk_z, section_idx)
-            
-            # Write block count
-            chunk_data_writer.write_short(block_count)
-            
-            # Determine bits per entry based on palette size
-            if len(palette) == 1:
-                # Single-value palette (0 bits per entry)
-                chunk_data_writer.write_byte(0)
-                chunk_data_writer.write_varint(palette[0])
-            else:
-                # Multiple values - use indirect palette
-                # Calculate bits per entry (need at least ceil(log2(palette_size)))
-                bits_per_entry = max(4, (len(palette) - 1).bit_length())
-                if bits_per_entry > 8:
-                    bits_per_entry = 8  # Cap at 8 bits
-                
-                # Write block states PalettedContainer (Indirect)
-                PacketBuilder._write_paletted_container_indirect(
-                    chunk_data_writer,
-                    bits_per_entry=bits_per_entry,
-                    palette=palette,
-                    data_array=palette_indices
-                )
-            
-            # Biomes: Single-value palette (plains = 0)
-            chunk_data_writer.write_byte(0)  # 0 bits per entry
-            chunk_data_writer.write_varint(0)  # Biome ID 0 = plains
-        
-        # Get the chunk data (uncompressed)
-        chunk_data_raw = chunk_data_writer.to_bytes()
+            packet_writer.write_bytes(
+                block_manager.get_encoded_section(chunk_x, chunk_z, section_idx, PacketBuilder.encode_chunk_section)
+            )
         
-        # Write Data as Prefixed Array of Byte (VarInt length + bytes)
-        packet_writer.write_varint(len(chunk_data_raw))
-        packet_writer.write_bytes(chunk_data_raw)
+        # Data length (VarInt) in front of the section data
+        packet_writer.fill_length(chunk_data_mark)
         
         # Block Entities: Empty
         packet_writer.write_varint(0)
         
-        # Light Data
-        # BitSet format: VarInt (number of longs) + Array of Long
-        # For overworld: 24 sections + 2 extra = 26 bits total
-        num_sections = 24
-        num_light_bits = num_sections + 2  # 26 bits
-        
-        # Calculate which sections need sky light (sections at/above ground)
-        sky_light_mask_bits = [False] * num_light_bits
-        sky_light_sections = []  # Track which sections we're sending data for
-        
-        if use_terrain:
-            # For terrain: sections that need sky light include those with exposed blocks
-            # We need to send light data for sections from min height to max height (and above)
-            # because blocks in valleys (at min height) are still exposed to sky
-            min_height = min(heightmap_entries) if heightmap_entries else 64
-            max_height = max(heightmap_entries) if heightmap_entries else 64
-            # Start from section containing minimum height (valleys need sky light too)
-            min_section = (min_height + 64) // 16  # Section containing min height
-            for section_idx in range(min_section, num_sections):
-                # Bit index: section_idx + 1 (because bit 0 is for section below world)
-                bit_idx = section_idx + 1
-                if bit_idx < num_light_bits:
-                    sky_light_mask_bits[bit_idx] = True
-                    sky_light_sections.append(section_idx)
-        else:
-            # Flat world: sections that need sky light: from ground section upward
-            ground_y = 64
-            ground_section = (ground_y + 64) // 16  # Section containing ground_y
-            for section_idx in range(ground_section, num_sections):
-                # Bit index: section_idx + 1 (because bit 0 is for section below world)
-                bit_idx = section_idx + 1
-                if bit_idx < num_light_bits:
-                    sky_light_mask_bits[bit_idx] = True
-                    sky_light_sections.append(section_idx)
-        
-        # Write Sky Light Mask (BitSet)
-        packet_writer.write_bitset(sky_light_mask_bits)
-        
-        # Block Light Mask: Empty (no block light sources)
-        packet_writer.write_bitset([False] * num_light_bits)
-        
-        # Empty Sky Light Mask: Sections that have all-zero sky light
-        # Only mark sections as empty if they're truly below all terrain (deep underground)
-        # Don't mark sections as empty just because they're below max height - 
-        # blocks in valleys might still be exposed to sky
-        empty_sky_light_mask_bits = [False] * num_light_bits
-        if use_terrain:
-            # For terrain: only mark sections as empty if they're well below the minimum height
-            # This ensures valleys and lower terrain still get proper sky light
-            min_height = min(heightmap_entries) if heightmap_entries else 64
-            # Only mark sections that are at least 16 blocks below the minimum height as empty
-            # This gives a buffer so we don't accidentally mark sections with exposed blocks
-            empty_threshold = min_height - 16
-            empty_section = (empty_threshold + 64) // 16
-            for section_idx in range(empty_section):
-                bit_idx = section_idx + 1
-                if bit_idx < num_light_bits:
-                    empty_sky_light_mask_bits[bit_idx] = True
-        else:
-            # Flat world: sections below ground have no sky light
-            ground_y = 64
-            ground_section = (ground_y + 64) // 16
-            for section_idx in range(ground_section):
-                bit_idx = section_idx + 1
-                if bit_idx < num_light_bits:
-                    empty_sky_light_mask_bits[bit_idx] = True
-        packet_writer.write_bitset(empty_sky_light_mask_bits)
-        
-        # Empty Block Light Mask: All sections (no block light)
-        packet_writer.write_bitset([True] * num_light_bits)
-        
-        # Sky Light Arrays: One array per bit set in sky light mask
-        # Each array is 2048 bytes = 4096 light values (4 bits each, 0-15)
-        # Light values: 15 = full brightness, 0 = no light
-        packet_writer.write_varint(len(sky_light_sections))
-        
-        for section_idx in sky_light_sections:
-            section_y_min = -64 + (section_idx * 16)
-            section_y_max = section_y_min + 15
-            
-            # Generate light array (4096 values = 16x16x16 blocks)
-            light_array = bytearray(2048)  # 2048 bytes = 4096 nibbles
-            
-            for y in range(16):
-                world_y = section_y_min + y
-                for z in range(16):
-                    for x in range(16):
-                        # Calculate index in 4096-element array
-                        block_idx = y * 256 + z * 16 + x
-                        
-                        # Calculate byte and nibble index
-                        byte_idx = block_idx // 2
-                        is_high_nibble = (block_idx % 2) == 0
-                        
-                        # Determine light value based on height map
-                        # Sky light propagates downward from surface, decreasing by 1 per block
-                        if use_terrain:
-                            # Get height at this (x, z) position from height map
-                            height_at_pos = heightmap_entries[z * 16 + x]
-                            if world_y >= height_at_pos:
-                                # Above or at surface: full sky light
-                                light_value = 15
-                            else:
-                                # Below surface: light decreases by 1 per block downward
-                                # Distance from surface
-                                distance_below = height_at_pos - world_y
-                                # Light level = 15 - distance, clamped to 0-15
-                                light_value = max(0, 15 - distance_below)
-                        else:
-                            # Flat world
-                            ground_y = 64
-                            if world_y >= ground_y:
-                                # Above or at ground: full sky light
-                                light_value = 15
-                            else:
-                                # Below ground: light decreases by 1 per block downward
-                                distance_below = ground_y - world_y
-                                light_value = max(0, 15 - distance_below)
-                        
-                        # Pack into byte (high nibble first, then low nibble)
-                        if is_high_nibble:
-                            light_array[byte_idx] = (light_value << 4) & 0xF0
-                        else:
-                            light_array[byte_idx] |= light_value & 0x0F
-            
-            # Write array length (2048) and data
-            packet_writer.write_varint(2048)
-            packet_writer.write_bytes(bytes(light_array))
-        
-        # Block Light Arrays: Empty (no block light)
-        packet_writer.write_varint(0)
-        
-        # Build final packet with length prefix
-        packet_data = packet_writer.to_bytes()
-        final_writer = ProtocolWriter()
-        final_writer.write_varint(len(packet_data))
-        final_writer.write_bytes(packet_data)
+        # Light Data from the BlockManager's light engine (the chunk is lit on
+        # first use), every section of the chunk
+        sky_light, block_light = block_manager.light.section_light(chunk_x, chunk_z, range(24))
+        PacketBuilder._write_light_data(packet_writer, sky_light, block_light)
         
-        return final_writer.to_bytes()
+        return packet_writer.finish_packet()
 
 
 # Example usage and testing
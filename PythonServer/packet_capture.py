@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Packet Capture - Append-Only Packet Logging for Test Case Generation
+
+Packets are recorded into a bounded in-memory queue and written by a single
+background thread as NDJSON (one JSON object per line), so logging a packet
+costs the caller a queue put instead of a rewrite of the whole log file.
+
+Features:
+- Bounded queue: when the writer falls behind, new records are dropped (and
+  counted) instead of blocking connection handling
+- Size/time-based rotation of capture files
+- Per-direction and per-packet-type sampling
+- Reader API (iter_capture/load_capture) yielding the same entry dicts as the
+  old JSON-array logs, and export_json() to produce that format
+"""
+
+import dataclasses
+import glob
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .minecraft_protocol import ConnectionState
+
+
+# File name prefix for capture files (rotation appends a sequence number)
+CAPTURE_PREFIX = 'packet_capture'
+
+# Sentinel telling the writer thread to finish
+_STOP = object()
+
+
+def _serialize_value(value: Any) -> Any:
+    """Convert a parsed value into something JSON can store."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (int, float, bool, str, type(None))):
+        return value
+    if isinstance(value, tuple):
+        # Handle tuples (like in Known Packs)
+        return [_serialize_value(item) for item in value]
+    return str(value)
+
+
+def serialize_parsed_data(parsed_data: Any) -> Any:
+    """
+    Convert a parsed packet (dataclass, dict or list) to JSON-compatible data.
+
+    Args:
+        parsed_data: Parsed packet object
+
+    Returns:
+        JSON-compatible representation
+    """
+    if parsed_data is None:
+        return None
+    if dataclasses.is_dataclass(parsed_data):
+        return {k: _serialize_value(v) for k, v in parsed_data.__dict__.items()}
+    if isinstance(parsed_data, dict):
+        return {k: _serialize_value(v) for k, v in parsed_data.items()}
+    if isinstance(parsed_data, list):
+        return [_serialize_value(item) for item in parsed_data]
+    return str(parsed_data)
+
+
+class PacketCapture:
+    """
+    Background-flushed, append-only packet capture.
+
+    record() may be called from any thread (event loop, chunk loader, keep
+    alive); only the writer thread touches the capture files.
+    """
+
+    def __init__(
+        self,
+        log_dir: str,
+        max_queue: int = 10000,
+        max_file_bytes: int = 64 * 1024 * 1024,
+        max_file_seconds: float = 3600.0,
+        flush_interval: float = 0.5,
+        direction_sample_rates: Optional[Dict[str, float]] = None,
+        packet_sample_rates: Optional[Dict[Tuple[str, int], float]] = None,
+        omit_hex_over: Optional[int] = None
+    ):
+        """
+        Initialize the capture (call start() to begin writing).
+
+        Args:
+            log_dir: Directory for capture files
+            max_queue: Maximum number of records waiting to be written
+            max_file_bytes: Rotate to a new file once the current one reaches this size
+            max_file_seconds: Rotate to a new file once the current one is this old
+            flush_interval: Maximum time records wait before being written
+            direction_sample_rates: Fraction of packets to keep per direction
+                                    ("serverbound"/"clientbound"), default 1.0
+            packet_sample_rates: Fraction to keep per (state name, packet_id),
+                                 e.g. {("PLAY", 0x1D): 0.05}; applied on top
+                                 of the direction rate
+            omit_hex_over: Packets larger than this many bytes are recorded
+                           without their hex dump (None to keep all)
+        """
+        self.log_dir = log_dir
+        self.max_file_bytes = max_file_bytes
+        self.max_file_seconds = max_file_seconds
+        self.flush_interval = flush_interval
+        self.direction_sample_rates = dict(direction_sample_rates or {})
+        self.packet_sample_rates = dict(packet_sample_rates or {})
+        self.omit_hex_over = omit_hex_over
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._file_path: Optional[str] = None
+        self._file_bytes = 0
+        self._file_opened_at = 0.0
+        self._file_sequence = 0
+        self._session = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+        # Statistics
+        self.recorded = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.written = 0
+
+    @property
+    def current_file(self) -> Optional[str]:
+        """Path of the capture file currently being written."""
+        return self._file_path
+
+    def start(self):
+        """Start the background writer thread."""
+        if self._thread is not None:
+            return
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True, name="packet-capture")
+        self._thread.start()
+
+    def close(self, timeout: float = 5.0):
+        """Write out queued records and stop the writer thread."""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def should_capture(self, direction: str, state: ConnectionState, packet_id: Optional[int]) -> bool:
+        """
+        Apply the sampling filters.
+
+        Cheap enough to call before building a record, so packets that are
+        sampled out cost almost nothing.
+        """
+        rate = self.direction_sample_rates.get(direction, 1.0)
+        if packet_id is not None and self.packet_sample_rates:
+            rate *= self.packet_sample_rates.get((state.name, packet_id), 1.0)
+        if rate >= 1.0:
+            return True
+        if rate > 0.0 and random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+    def record(
+        self,
+        direction: str,
+        connection_state: ConnectionState,
+        packet_id: Optional[int],
+        packet_data: bytes,
+        parsed_data: Optional[Any] = None,
+        packet_name: Optional[str] = None,
+        omit_hex: bool = False
+    ) -> bool:
+        """
+        Queue a packet for capture without blocking.
+
+        Args:
+            direction: "serverbound" or "clientbound"
+            connection_state: Connection state the packet was sent in
+            packet_id: Packet ID (None if unknown)
+            packet_data: Raw packet bytes (including length prefix); copied,
+                         so memoryview frames are safe to pass
+            parsed_data: Parsed packet object (serialized by the writer thread)
+            packet_name: Human-readable packet name
+            omit_hex: Record the packet without its hex dump
+
+        Returns:
+            True if queued, False if sampled out or dropped (queue full)
+        """
+        if not self.should_capture(direction, connection_state, packet_id):
+            return False
+
+        if omit_hex or (self.omit_hex_over is not None and len(packet_data) > self.omit_hex_over):
+            data = None
+        else:
+            data = bytes(packet_data)
+
+        item = (
+            datetime.now().isoformat(), direction, connection_state.name, packet_id,
+            packet_name, len(packet_data), data, parsed_data
+        )
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.recorded += 1
+        return True
+
+    @staticmethod
+    def _build_entry(item: tuple) -> Dict[str, Any]:
+        """Build the log entry dict (same fields as the old JSON logs)."""
+        timestamp, direction, state, packet_id, packet_name, length, data, parsed_data = item
+        entry = {
+            'timestamp': timestamp,
+            'direction': direction,
+            'state': state,
+            'packet_id': packet_id,
+            'packet_id_hex': f'0x{packet_id:02x}' if packet_id is not None else None,
+            'packet_name': packet_name,
+            'packet_length': length,
+            'packet_data_hex': data.hex() if data is not None else None,
+            'packet_data_base64': None,  # Can add if needed
+        }
+        if data is None:
+            entry['packet_data_hex_omitted'] = True
+            entry['packet_data_hex_note'] = 'Omitted due to large size'
+        if parsed_data is not None:
+            entry['parsed_data'] = serialize_parsed_data(parsed_data)
+        return entry
+
+    def _open_next_file(self):
+        """Close the current capture file and start a new one."""
+        if self._file is not None:
+            self._file.close()
+        self._file_sequence += 1
+        self._file_path = os.path.join(
+            self.log_dir, f'{CAPTURE_PREFIX}_{self._session}_{self._file_sequence:03d}.ndjson'
+        )
+        self._file = open(self._file_path, 'a', encoding='utf-8')
+        self._file_bytes = self._file.tell()
+        self._file_opened_at = time.monotonic()
+
+    def _writer_loop(self):
+        """Background thread: batch queued records into the capture file."""
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            # Drain whatever else is already queued into one write
+            batch = []
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if not batch:
+                continue
+
+            try:
+                lines = ''.join(
+                    json.dumps(self._build_entry(entry), separators=(',', ':')) + '\n'
+                    for entry in batch
+                )
+
+                if (self._file is None or
+                        self._file_bytes >= self.max_file_bytes or
+                        time.monotonic() - self._file_opened_at >= self.max_file_seconds):
+                    self._open_next_file()
+
+                self._file.write(lines)
+                self._file.flush()
+                self._file_bytes += len(lines)
+                self.written += len(batch)
+            except Exception as e:
+                print(f"  │  ⚠ Warning: Could not write packet capture: {e}")
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _capture_files(source: Union[str, Iterable[str]]) -> List[str]:
+    """Expand a file, directory or list of paths into capture files in order."""
+    if isinstance(source, str):
+        if os.path.isdir(source):
+            files = glob.glob(os.path.join(source, '*.ndjson'))
+            files += glob.glob(os.path.join(source, '*.json'))
+            return sorted(files)
+        return [source]
+    files = []
+    for path in source:
+        files.extend(_capture_files(path))
+    return files
+
+
+def iter_capture(source: Union[str, Iterable[str]]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield packet log entries from capture files.
+
+    Reads NDJSON captures as well as the older JSON-array logs, so existing
+    test-generation tooling can consume either.
+
+    Args:
+        source: A capture file, a directory of captures, or a list of either
+
+    Yields:
+        Entry dicts (timestamp, direction, state, packet_id, packet_name, ...)
+    """
+    for path in _capture_files(source):
+        if path.endswith('.ndjson'):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # Truncated last line (capture still being written)
+                        break
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                try:
+                    entries = json.load(f)
+                except (json.JSONDecodeError, ValueError):
+                    continue
+            yield from entries
+
+
+def load_capture(source: Union[str, Iterable[str]]) -> List[Dict[str, Any]]:
+    """Load all entries from capture files into a list (see iter_capture)."""
+    return list(iter_capture(source))
+
+
+def export_json(source: Union[str, Iterable[str]], output_path: str) -> int:
+    """
+    Write captures as a single JSON array (the format of the old packet logs).
+
+    Args:
+        source: A capture file, a directory of captures, or a list of either
+        output_path: Path of the JSON file to write
+
+    Returns:
+        Number of entries written
+    """
+    entries = load_capture(source)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, indent=2)
+    return len(entries)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        print("Usage: python -m PythonServer.packet_capture <capture file or dir> <output.json>")
+        sys.exit(1)
+
+    count = export_json(sys.argv[1], sys.argv[2])
+    print(f"✓ Exported {count} packet(s) to {sys.argv[2]}")
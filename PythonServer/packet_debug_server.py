@@ -4,14 +4,14 @@ Enhanced TCP server for debugging Minecraft protocol packets.
 Listens on port 25565 and prints both raw hex and parsed packet data.
 """
 
-import socket
+import asyncio
 import threading
 import queue
 import json
 import os
 from datetime import datetime
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from .minecraft_protocol import (
     PacketParser, ConnectionState,
     HandshakePacket, LoginStartPacket,
@@ -24,16 +24,29 @@ from .minecraft_protocol import (
     ClickContainerPacket,
     UseItemOnPacket,
     SetHeldItemPacket,
-    PacketBuilder, GameProfile
+    PingRequestPacket,
+    PacketBuilder, GameProfile,
+    SERVERBOUND_PACKETS, clientbound_id,
+    PICKUP_ITEM_TEMPLATE, SET_CONTAINER_SLOT_TEMPLATE,
+    SPAWN_ENTITY_TEMPLATES, ITEM_METADATA_TEMPLATE
 )
 import uuid
 import time
 import threading
 import threading
+import functools
+import heapq
 import math
 import random
 from .web_server import run_web_server
 from .block_manager import BlockManager
+from .connection import ClientConnection, ClientProtocol, DEFAULT_COMPRESSION_THRESHOLD
+from .server_status import StatusResponder
+from .packet_capture import PacketCapture
+from .keep_alive import KeepAliveScheduler
+from .game_loop import GameLoop
+from .configuration_bundle import ConfigurationBundle, PacketStream, PreparedPacket
+from .chunk_cache import ChunkPacketCache
 
 def read_varint(data, offset=0):
     """Read a VarInt from the data starting at offset."""
@@ -143,20 +156,19 @@ class ChunkManager:
 class ChunkLoader:
     """Background thread for asynchronous chunk loading."""
     
-    def __init__(self, client_socket: socket.socket, player, stop_event: threading.Event):
+    def __init__(self, connection: ClientConnection, player, stop_event: threading.Event):
         """
         Initialize chunk loader.
         
         Args:
-            client_socket: Socket to send chunks to (must be thread-safe)
+            connection: Client connection to send chunks to (send() is thread-safe)
             player: Player instance for tracking loaded chunks
             stop_event: Event to signal when to stop
         """
-        self.client_socket = client_socket
+        self.connection = connection
         self.player = player
         self.stop_event = stop_event
         self.chunk_queue = queue.Queue()
-        self.socket_lock = threading.Lock()  # Lock for thread-safe socket operations
         self.thread = None
     
     def start(self):
@@ -221,33 +233,48 @@ class ChunkLoader:
             if self.stop_event.is_set():
                 break
             
+            # Backpressure: hold streaming while this client's outbound buffer
+            # is above the high watermark (resumes below the low watermark)
+            if not self.connection.writable.is_set():
+                print(f"  │  ⚠ [Chunk Loader] Client not keeping up, pausing chunk streaming...")
+                while not self.connection.writable.wait(timeout=0.5):
+                    if self.stop_event.is_set():
+                        break
+                if self.stop_event.is_set():
+                    break
+            
             try:
-                # Phase 1 & 2: Load chunk into BlockManager first, then generate packet from it
-                block_manager = None
-                if hasattr(self.player, 'world') and self.player.world:
-                    # Load chunk into BlockManager first
-                    self.player.world.load_chunk_blocks(chunk_x, chunk_z, ground_y=64)
-                    block_manager = self.player.world.block_manager
+                world = self.player.world
+                # Register as a viewer (loading the shared chunk if nobody has it
+                # yet), so every later block change is broadcast to this player
+                world.acquire_chunk(chunk_x, chunk_z, self.player.uuid)
+                if self.stop_event.is_set():
+                    # Disconnected meanwhile; its chunks were already released
+                    world.release_chunk(chunk_x, chunk_z, self.player.uuid)
+                    break
                 
-                # Phase 3: Generate packet from BlockManager (required)
-                chunk_data = PacketBuilder.build_chunk_data(
-                    chunk_x=chunk_x,
-                    chunk_z=chunk_z,
-                    block_manager=block_manager
-                )
+                # The packet is built (and compressed) without the chunk lock,
+                # which the game loop takes for every block change. It is only
+                # queued if no change reached the chunk meanwhile; otherwise
+                # the change's broadcast may already be queued ahead of it, so
+                # it is rebuilt
+                while True:
+                    version, chunk_data = world.get_chunk_packet(chunk_x, chunk_z)
+                    frame = self.connection.prepare(chunk_data)
+                    with world.chunk_lock:
+                        if world.block_manager.chunk_version(chunk_x, chunk_z) == version:
+                            self.connection.send_prepared(frame)
+                            break
                 
-                # Thread-safe socket send
-                with self.socket_lock:
-                    # Log clientbound packet (ChunkLoader only runs in PLAY state)
-                    log_packet_to_file(
-                        direction="clientbound",
-                        connection_state=ConnectionState.PLAY,
-                        packet_id=0x2C,  # Chunk Data and Update Light packet ID
-                        packet_data=chunk_data,
-                        parsed_data={"chunk_x": chunk_x, "chunk_z": chunk_z},
-                        packet_name=f"Chunk Data ({chunk_x}, {chunk_z})"
-                    )
-                    self.client_socket.sendall(chunk_data)
+                # Log clientbound packet (ChunkLoader only runs in PLAY state)
+                log_packet_to_file(
+                    direction="clientbound",
+                    connection_state=ConnectionState.PLAY,
+                    packet_id=clientbound_id(ConnectionState.PLAY, 'minecraft:level_chunk_with_light'),
+                    packet_data=chunk_data,
+                    parsed_data={"chunk_x": chunk_x, "chunk_z": chunk_z},
+                    packet_name=f"Chunk Data ({chunk_x}, {chunk_z})"
+                )
                 
                 self.player.mark_chunk_loaded(chunk_x, chunk_z)
                 chunks_sent += 1
@@ -264,27 +291,29 @@ class ChunkLoader:
                     chunk_x=center_chunk[0],
                     chunk_z=center_chunk[1]
                 )
-                with self.socket_lock:
-                    # Log clientbound packet (ChunkLoader only runs in PLAY state)
-                    log_packet_to_file(
-                        direction="clientbound",
-                        connection_state=ConnectionState.PLAY,
-                        packet_id=0x4B,  # Set Center Chunk packet ID
-                        packet_data=center_chunk_packet,
-                        parsed_data={"chunk_x": center_chunk[0], "chunk_z": center_chunk[1]},
-                        packet_name="Set Center Chunk"
-                    )
-                    self.client_socket.sendall(center_chunk_packet)
+                # Log clientbound packet (ChunkLoader only runs in PLAY state)
+                log_packet_to_file(
+                    direction="clientbound",
+                    connection_state=ConnectionState.PLAY,
+                    packet_id=clientbound_id(ConnectionState.PLAY, 'minecraft:set_chunk_cache_center'),
+                    packet_data=center_chunk_packet,
+                    parsed_data={"chunk_x": center_chunk[0], "chunk_z": center_chunk[1]},
+                    packet_name="Set Center Chunk"
+                )
+                self.connection.send(center_chunk_packet)
                 print(f"  │  ✓ [Chunk Loader] Set Center Chunk sent after loading chunks")
             except Exception as e:
                 print(f"  │  ✗ [Chunk Loader] Error sending Set Center Chunk: {e}")
         
-        print(f"  │  ✓ [Chunk Loader] Loaded {chunks_sent} chunk(s)")
+        cache = self.player.world.chunk_packets
+        print(f"  │  ✓ [Chunk Loader] Loaded {chunks_sent} chunk(s) "
+              f"(packet cache: {cache.hits} hits, {cache.misses} misses, {len(cache)} cached)")
     
     def _unload_chunks(self, chunks: list):
-        """Unload chunks (just mark them as unloaded)."""
+        """Unload chunks (the world frees them once no player views them)."""
         for chunk_x, chunk_z in chunks:
             self.player.mark_chunk_unloaded(chunk_x, chunk_z)
+            self.player.world.release_chunk(chunk_x, chunk_z, self.player.uuid)
         print(f"  │  ✓ [Chunk Loader] Unloaded {len(chunks)} chunk(s)")
     
     def wait_for_completion(self, timeout: float = None):
@@ -316,7 +345,7 @@ class Player:
     Encapsulates all player-specific state including position, rotation, and inventory.
     """
     
-    def __init__(self, player_uuid: uuid.UUID, view_distance: int = 10, world=None):
+    def __init__(self, player_uuid: uuid.UUID, view_distance: int = 10, world=None, entity_id: int = 1):
         """
         Initialize a player.
         
@@ -324,8 +353,10 @@ class Player:
             player_uuid: Unique identifier for the player
             view_distance: Server view distance for this player
             world: Reference to the World instance (for chunk loading and block storage)
+            entity_id: The player's entity ID (sent in Login (play))
         """
         self.uuid = player_uuid
+        self.entity_id = entity_id
         self.world = world  # Reference to world for storing block data
         
         # Position and rotation
@@ -557,7 +588,7 @@ class World:
         self.players: Dict[uuid.UUID, Player] = {}  # Dictionary of player UUID -> Player instance
         
         # Entity management
-        self.next_entity_id = 1000  # Start entity IDs at 1000 (player is usually 1)
+        self.next_entity_id = 1000  # Entity IDs for players and items, unique within the world
         self.item_entities: Dict[int, ItemEntity] = {}  # Track all item entities: entity_id -> ItemEntity
         
         # BlockManager - single source of truth for block data
@@ -572,12 +603,26 @@ class World:
         # Key: entity_id -> { 'blocks_checked': set of (x,y,z), 'result': bool, 'position': (x,y,z), 'velocity': (vx,vy,vz), 'gravity_disabled': bool }
         self.entity_collision_cache: Dict[int, dict] = {}
         
-        # Entity update thread - continuously updates entities at 20 TPS
-        self.entity_update_stop_event = threading.Event()
-        self.entity_update_pause_event = threading.Event()  # Pause automatic updates
-        self.entity_update_pause_event.set()  # Start unpaused
-        self.entity_update_thread = threading.Thread(target=self._entity_update_worker, daemon=True)
-        self.entity_update_thread.start()
+        # Entities are updated by the server's game loop (see game_loop.py);
+        # the lock serializes its ticks with manual steps from the web server
+        self.entity_updates_paused = False  # Pause automatic updates
+        self.tick_lock = threading.RLock()
+        
+        # Chunk residency: (chunk_x, chunk_z) -> UUIDs of players viewing it.
+        # A chunk's blocks stay loaded while anyone views it (or it was modified).
+        # The lock also orders chunk sends against block changes, so a player
+        # never receives a chunk that is missing a change broadcast before it.
+        self.chunk_viewers: Dict[Tuple[int, int], set] = {}
+        self.chunk_lock = threading.RLock()
+        
+        # Encoded Chunk Data packets shared by all players (see chunk_cache.py)
+        self.chunk_packets = ChunkPacketCache()
+        
+        # Scheduled block updates: heap of (due_tick, sequence, (x, y, z), callback)
+        self.current_tick = 0
+        self.scheduled_block_updates: list = []
+        self._block_update_sequence = 0
+        self.block_update_lock = threading.Lock()  # Updates may be scheduled from any thread
     
     def add_player(self, player: Player):
         """Add a player to the world."""
@@ -595,12 +640,24 @@ class World:
         """Get all players in the world."""
         return list(self.players.values())
     
+    def allocate_entity_id(self) -> int:
+        """Reserve a new entity ID (for a player or an item entity)."""
+        entity_id = self.next_entity_id
+        self.next_entity_id += 1
+        return entity_id
+    
     def update_item_entities(self, delta_time: float = 0.05):
         """
         Update item entity positions based on velocity and gravity.
         Should be called periodically (e.g., every tick).
         Uses fixed delta_time for consistent tick-based physics at 20 TPS.
         
+        Runs under the chunk lock, since it reads blocks that the chunk
+        loaders and block changes use at the same time. Entities in chunks
+        nobody is viewing are left frozen: their blocks may not be loaded,
+        and loading them here would keep them resident with no viewer to
+        release them.
+        
         Args:
             delta_time: Time step in seconds (default 0.05 = 1 tick at 20 TPS)
         """
@@ -609,165 +666,162 @@ class World:
         
         current_time = time.time()
         
-        for entity_id, item_entity in list(self.item_entities.items()):
-            # Initialize last_update_time if this is the first update
-            if item_entity.last_update_time == 0.0:
-                item_entity.last_update_time = current_time
-            
-            # Use fixed delta_time for consistent tick-based physics
-            # This ensures entities update at exactly 20 TPS
-            step_delta = delta_time
-            
-            # Check if gravity should be disabled for this entity (frozen due to collision)
-            cache = self.entity_collision_cache.get(entity_id)
-            gravity_disabled = cache is not None and cache.get('gravity_disabled', False)
-            
-            # Update velocity (apply gravity and drag)
-            # Only apply gravity if not disabled (entity is not frozen)
-            if not gravity_disabled:
-                item_entity.velocity_y += GRAVITY  # Gravity is per tick, no scaling needed
-            item_entity.velocity_x *= DRAG
-            item_entity.velocity_y *= DRAG
-            item_entity.velocity_z *= DRAG
-            
-            # Check for horizontal collisions before moving (prevent moving into blocks)
-            entity_x_floor = int(item_entity.x)
-            entity_y_floor = int(item_entity.y)
-            entity_z_floor = int(item_entity.z)
-            
-            # Ensure chunk is loaded (lazy loading for collision detection)
-            chunk_x = entity_x_floor // 16
-            chunk_z = entity_z_floor // 16
-            # Phase 2: Use BlockManager to check if chunk is loaded
-            chunk_loaded = self.block_manager.is_chunk_loaded(chunk_x, chunk_z)
-            if not chunk_loaded:
-                # Chunk not loaded yet, load it now
-                # load_chunk_blocks() wrapper will delegate to block_manager AND update old block_data
-                self.load_chunk_blocks(chunk_x, chunk_z, ground_y=64)
-            
-            # Check horizontal movement in X direction
-            if item_entity.velocity_x != 0:
+        with self.chunk_lock:
+            for entity_id, item_entity in list(self.item_entities.items()):
+                # Skip entities in chunks nobody views (their blocks may not be loaded)
+                chunk_x = int(math.floor(item_entity.x)) >> 4
+                chunk_z = int(math.floor(item_entity.z)) >> 4
+                if (chunk_x, chunk_z) not in self.chunk_viewers:
+                    continue
+                
+                # Initialize last_update_time if this is the first update
+                if item_entity.last_update_time == 0.0:
+                    item_entity.last_update_time = current_time
+                
+                # Use fixed delta_time for consistent tick-based physics
+                # This ensures entities update at exactly 20 TPS
+                step_delta = delta_time
+                
+                # Check if gravity should be disabled for this entity (frozen due to collision)
+                cache = self.entity_collision_cache.get(entity_id)
+                gravity_disabled = cache is not None and cache.get('gravity_disabled', False)
+                
+                # Update velocity (apply gravity and drag)
+                # Only apply gravity if not disabled (entity is not frozen)
+                if not gravity_disabled:
+                    item_entity.velocity_y += GRAVITY  # Gravity is per tick, no scaling needed
+                item_entity.velocity_x *= DRAG
+                item_entity.velocity_y *= DRAG
+                item_entity.velocity_z *= DRAG
+                
+                # Check for horizontal collisions before moving (prevent moving into blocks)
+                entity_x_floor = int(item_entity.x)
+                entity_y_floor = int(item_entity.y)
+                entity_z_floor = int(item_entity.z)
+                
+                # Check horizontal movement in X direction
+                if item_entity.velocity_x != 0:
+                    next_x = item_entity.x + item_entity.velocity_x * 1.0
+                    next_x_floor = int(next_x)
+                    # Check if entity would move into a block horizontally
+                    if next_x_floor != entity_x_floor:
+                        check_x = next_x_floor
+                        # Check block at entity's Y level and one block above (entity might be pushed up)
+                        if self.is_block_solid(check_x, entity_y_floor, entity_z_floor) or \
+                           self.is_block_solid(check_x, entity_y_floor + 1, entity_z_floor):
+                            # Blocked - stop horizontal movement
+                            item_entity.velocity_x = 0.0
+                            # Push entity back to the edge of the current block to prevent getting stuck
+                            if item_entity.velocity_x > 0:  # Was moving positive
+                                item_entity.x = float(entity_x_floor + 1) - 0.01
+                            else:  # Was moving negative
+                                item_entity.x = float(entity_x_floor) + 0.01
+                
+                # Check horizontal movement in Z direction
+                if item_entity.velocity_z != 0:
+                    next_z = item_entity.z + item_entity.velocity_z * 1.0
+                    next_z_floor = int(next_z)
+                    # Check if entity would move into a block horizontally
+                    if next_z_floor != entity_z_floor:
+                        check_z = next_z_floor
+                        # Check block at entity's Y level and one block above (entity might be pushed up)
+                        if self.is_block_solid(entity_x_floor, entity_y_floor, check_z) or \
+                           self.is_block_solid(entity_x_floor, entity_y_floor + 1, check_z):
+                            # Blocked - stop horizontal movement
+                            item_entity.velocity_z = 0.0
+                            # Push entity back to the edge of the current block to prevent getting stuck
+                            if item_entity.velocity_z > 0:  # Was moving positive
+                                item_entity.z = float(entity_z_floor + 1) - 0.01
+                            else:  # Was moving negative
+                                item_entity.z = float(entity_z_floor) + 0.01
+                
+                # Store position before movement for collision detection
+                old_x = item_entity.x
+                old_y = item_entity.y
+                old_z = item_entity.z
+                
+                # Calculate where entity would be after movement
                 next_x = item_entity.x + item_entity.velocity_x * 1.0
-                next_x_floor = int(next_x)
-                # Check if entity would move into a block horizontally
-                if next_x_floor != entity_x_floor:
-                    check_x = next_x_floor
-                    # Check block at entity's Y level and one block above (entity might be pushed up)
-                    if self.is_block_solid(check_x, entity_y_floor, entity_z_floor) or \
-                       self.is_block_solid(check_x, entity_y_floor + 1, entity_z_floor):
-                        # Blocked - stop horizontal movement
-                        item_entity.velocity_x = 0.0
-                        # Push entity back to the edge of the current block to prevent getting stuck
-                        if item_entity.velocity_x > 0:  # Was moving positive
-                            item_entity.x = float(entity_x_floor + 1) - 0.01
-                        else:  # Was moving negative
-                            item_entity.x = float(entity_x_floor) + 0.01
-            
-            # Check horizontal movement in Z direction
-            if item_entity.velocity_z != 0:
+                next_y = item_entity.y + item_entity.velocity_y * 1.0
                 next_z = item_entity.z + item_entity.velocity_z * 1.0
-                next_z_floor = int(next_z)
-                # Check if entity would move into a block horizontally
-                if next_z_floor != entity_z_floor:
-                    check_z = next_z_floor
-                    # Check block at entity's Y level and one block above (entity might be pushed up)
-                    if self.is_block_solid(entity_x_floor, entity_y_floor, check_z) or \
-                       self.is_block_solid(entity_x_floor, entity_y_floor + 1, check_z):
-                        # Blocked - stop horizontal movement
-                        item_entity.velocity_z = 0.0
-                        # Push entity back to the edge of the current block to prevent getting stuck
-                        if item_entity.velocity_z > 0:  # Was moving positive
-                            item_entity.z = float(entity_z_floor + 1) - 0.01
-                        else:  # Was moving negative
-                            item_entity.z = float(entity_z_floor) + 0.01
-            
-            # Store position before movement for collision detection
-            old_x = item_entity.x
-            old_y = item_entity.y
-            old_z = item_entity.z
-            
-            # Calculate where entity would be after movement
-            next_x = item_entity.x + item_entity.velocity_x * 1.0
-            next_y = item_entity.y + item_entity.velocity_y * 1.0
-            next_z = item_entity.z + item_entity.velocity_z * 1.0
-            
-            # Check if we can use cached collision result
-            current_position = (old_x, old_y, old_z)
-            current_velocity = (item_entity.velocity_x, item_entity.velocity_y, item_entity.velocity_z)
-            cache = self.entity_collision_cache.get(entity_id)
-            
-            needs_recheck = True
-            intersecting_solid_block = False
-            
-            if cache is not None:
-                # Check if entity has moved
-                position_changed = (abs(cache['position'][0] - old_x) > 1e-6 or
-                                  abs(cache['position'][1] - old_y) > 1e-6 or
-                                  abs(cache['position'][2] - old_z) > 1e-6)
-                velocity_changed = (abs(cache['velocity'][0] - item_entity.velocity_x) > 1e-6 or
-                                  abs(cache['velocity'][1] - item_entity.velocity_y) > 1e-6 or
-                                  abs(cache['velocity'][2] - item_entity.velocity_z) > 1e-6)
                 
-                # Check if any of the previously checked blocks have been updated
-                # Phase 4: Use BlockManager's updated_blocks
-                blocks_updated = False
-                if cache['blocks_checked']:
-                    updated_blocks = self.block_manager.get_updated_blocks()
-                    blocks_updated = bool(cache['blocks_checked'] & updated_blocks)
+                # Check if we can use cached collision result
+                current_position = (old_x, old_y, old_z)
+                current_velocity = (item_entity.velocity_x, item_entity.velocity_y, item_entity.velocity_z)
+                cache = self.entity_collision_cache.get(entity_id)
                 
-                # If blocks were updated, re-enable gravity (entity might be able to fall now)
-                if blocks_updated and cache.get('gravity_disabled', False):
-                    cache['gravity_disabled'] = False
+                needs_recheck = True
+                intersecting_solid_block = False
                 
-                # Can use cache if entity hasn't moved, velocity hasn't changed, and no blocks updated
-                if not position_changed and not velocity_changed and not blocks_updated:
-                    needs_recheck = False
-                    intersecting_solid_block = cache['result']
-            
-            if needs_recheck:
-                # Check if the line segment from current position to next position intersects any solid block
-                # Use the optimized line traversal method
-                line_start = (old_x, old_y, old_z)
-                line_end = (next_x, next_y, next_z)
-                intersecting_solid_block, debug_info = self.check_line_intersects_solid_block(
-                    line_start, line_end, return_debug=True
-                )
-            
-            if intersecting_solid_block:
-                # Entity would be intersecting a solid block - stop all movement
-                # (Just detecting, not pushing out yet)
-                item_entity.velocity_x = 0.0
-                item_entity.velocity_y = 0.0
-                item_entity.velocity_z = 0.0
-                # Don't update position - keep it at old position
+                if cache is not None:
+                    # Check if entity has moved
+                    position_changed = (abs(cache['position'][0] - old_x) > 1e-6 or
+                                      abs(cache['position'][1] - old_y) > 1e-6 or
+                                      abs(cache['position'][2] - old_z) > 1e-6)
+                    velocity_changed = (abs(cache['velocity'][0] - item_entity.velocity_x) > 1e-6 or
+                                      abs(cache['velocity'][1] - item_entity.velocity_y) > 1e-6 or
+                                      abs(cache['velocity'][2] - item_entity.velocity_z) > 1e-6)
+                    
+                    # Check if any of the previously checked blocks have been updated
+                    # Phase 4: Use BlockManager's updated_blocks
+                    blocks_updated = False
+                    if cache['blocks_checked']:
+                        updated_blocks = self.block_manager.get_updated_blocks()
+                        blocks_updated = bool(cache['blocks_checked'] & updated_blocks)
+                    
+                    # If blocks were updated, re-enable gravity (entity might be able to fall now)
+                    if blocks_updated and cache.get('gravity_disabled', False):
+                        cache['gravity_disabled'] = False
+                    
+                    # Can use cache if entity hasn't moved, velocity hasn't changed, and no blocks updated
+                    if not position_changed and not velocity_changed and not blocks_updated:
+                        needs_recheck = False
+                        intersecting_solid_block = cache['result']
+                
+                if needs_recheck:
+                    # Check if the line segment from current position to next position intersects any solid block
+                    # Use the optimized line traversal method
+                    line_start = (old_x, old_y, old_z)
+                    line_end = (next_x, next_y, next_z)
+                    intersecting_solid_block, debug_info = self.check_line_intersects_solid_block(
+                        line_start, line_end, return_debug=True
+                    )
                 
-                # Entity is now at rest - cache the collision result and disable gravity
-                if needs_recheck and debug_info:
-                    blocks_checked = set()
-                    if debug_info.get('blocks_checked'):
-                        blocks_checked = {tuple(block['pos']) for block in debug_info['blocks_checked']}
+                if intersecting_solid_block:
+                    # Entity would be intersecting a solid block - stop all movement
+                    # (Just detecting, not pushing out yet)
+                    item_entity.velocity_x = 0.0
+                    item_entity.velocity_y = 0.0
+                    item_entity.velocity_z = 0.0
+                    # Don't update position - keep it at old position
                     
-                    self.entity_collision_cache[entity_id] = {
-                        'blocks_checked': blocks_checked,
-                        'result': intersecting_solid_block,
-                        'position': current_position,
-                        'velocity': (0.0, 0.0, 0.0),  # Entity is at rest
-                        'gravity_disabled': True  # Disable gravity while frozen
-                    }
-            else:
-                # No collision - update position
-                item_entity.x = next_x
-                item_entity.y = next_y
-                item_entity.z = next_z
+                    # Entity is now at rest - cache the collision result and disable gravity
+                    if needs_recheck and debug_info:
+                        blocks_checked = set()
+                        if debug_info.get('blocks_checked'):
+                            blocks_checked = {tuple(block['pos']) for block in debug_info['blocks_checked']}
+                        
+                        self.entity_collision_cache[entity_id] = {
+                            'blocks_checked': blocks_checked,
+                            'result': intersecting_solid_block,
+                            'position': current_position,
+                            'velocity': (0.0, 0.0, 0.0),  # Entity is at rest
+                            'gravity_disabled': True  # Disable gravity while frozen
+                        }
+                else:
+                    # No collision - update position
+                    item_entity.x = next_x
+                    item_entity.y = next_y
+                    item_entity.z = next_z
+                    
+                    # Entity is moving - clear cache (don't cache while moving)
+                    self.entity_collision_cache.pop(entity_id, None)
                 
-                # Entity is moving - clear cache (don't cache while moving)
-                self.entity_collision_cache.pop(entity_id, None)
+                item_entity.last_update_time = current_time
             
-            item_entity.last_update_time = current_time
-        
-        # Clear updated blocks set after processing all entities (they've all been checked)
-        # Phase 4: Use BlockManager's updated_blocks
-        self.block_manager.clear_updated_blocks()
+            # Clear updated blocks set after processing all entities (they've all been checked)
+            # Phase 4: Use BlockManager's updated_blocks
+            self.block_manager.clear_updated_blocks()
     
     def get_block_at(self, x: int, y: int, z: int) -> int:
         """
@@ -1022,7 +1076,8 @@ class World:
         # Delegate directly to BlockManager
         return self.block_manager.is_block_solid(x, y, z)  # 0 = air, anything else is solid
     
-    def load_chunk_blocks(self, chunk_x: int, chunk_z: int, ground_y: int = 64, use_terrain: Optional[bool] = None):
+    def load_chunk_blocks(self, chunk_x: int, chunk_z: int, ground_y: int = 64, use_terrain: Optional[bool] = None,
+                          missing_only: bool = False):
         """
         Generate and store block data for all sections in a chunk.
         This should be called when a chunk is loaded.
@@ -1036,13 +1091,107 @@ class World:
             ground_y: Y coordinate of ground level (default 64)
             use_terrain: If True, use terrain generation instead of flat world.
                         If None, uses self.use_terrain_generation (set in __init__)
+            missing_only: Only generate sections that are not stored yet
         """
         # Use instance setting if not explicitly provided
         if use_terrain is None:
             use_terrain = getattr(self, 'use_terrain_generation', False)
         
         # Delegate to BlockManager
-        self.block_manager.load_chunk(chunk_x, chunk_z, ground_y, flat_world=not use_terrain, use_terrain=use_terrain)
+        self.block_manager.load_chunk(chunk_x, chunk_z, ground_y, flat_world=not use_terrain, use_terrain=use_terrain,
+                                      missing_only=missing_only)
+    
+    def acquire_chunk(self, chunk_x: int, chunk_z: int, player_uuid: uuid.UUID):
+        """
+        Add a player to a chunk's viewers, loading its blocks if needed.
+        
+        Missing sections are generated without holding the chunk lock and
+        stored under it (modified chunks stay resident after their last
+        viewer leaves, so only their untouched sections are regenerated).
+        
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            player_uuid: Player whose view now contains the chunk
+        """
+        with self.chunk_lock:
+            missing = self.block_manager.missing_sections(chunk_x, chunk_z)
+        
+        sections = {}
+        if missing:
+            use_terrain = getattr(self, 'use_terrain_generation', False)
+            for section_y in missing:
+                sections[section_y] = self.block_manager.generate_initial_chunk_section(
+                    chunk_x, chunk_z, section_y, ground_y=64, flat_world=not use_terrain, use_terrain=use_terrain
+                )
+        
+        with self.chunk_lock:
+            if sections:
+                self.block_manager.store_sections(chunk_x, chunk_z, sections)
+            self.chunk_viewers.setdefault((chunk_x, chunk_z), set()).add(player_uuid)
+    
+    def release_chunk(self, chunk_x: int, chunk_z: int, player_uuid: uuid.UUID):
+        """
+        Remove a player from a chunk's viewers, unloading it when nobody is left.
+        
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            player_uuid: Player whose view no longer contains the chunk
+        """
+        with self.chunk_lock:
+            viewers = self.chunk_viewers.get((chunk_x, chunk_z))
+            if viewers is None:
+                return
+            viewers.discard(player_uuid)
+            if not viewers:
+                del self.chunk_viewers[(chunk_x, chunk_z)]
+                self.block_manager.unload_chunk(chunk_x, chunk_z)
+    
+    def release_player_chunks(self, player_uuid: uuid.UUID):
+        """Release every chunk a (disconnecting) player was viewing."""
+        with self.chunk_lock:
+            for chunk_x, chunk_z in [chunk for chunk, viewers in self.chunk_viewers.items() if player_uuid in viewers]:
+                self.release_chunk(chunk_x, chunk_z, player_uuid)
+    
+    def get_chunk_viewers(self, chunk_x: int, chunk_z: int) -> set:
+        """UUIDs of the players viewing a chunk (a copy)."""
+        with self.chunk_lock:
+            return set(self.chunk_viewers.get((chunk_x, chunk_z), ()))
+    
+    def get_chunk_packet(self, chunk_x: int, chunk_z: int) -> Tuple[int, bytes]:
+        """
+        Chunk Data and Update Light packet for a chunk's current blocks.
+        
+        Served from the chunk packet cache while the chunk's version is
+        unchanged. Otherwise it is built from a snapshot of the chunk: the
+        chunk lock is only held to take the snapshot and, if the chunk is
+        still at the same version, to keep the section encodings and light
+        the build computed (and the packet). Lighting and encoding run without
+        it, so they never hold up the game loop's block changes.
+        
+        Args:
+            chunk_x: Chunk X coordinate
+            chunk_z: Chunk Z coordinate
+            
+        Returns:
+            (version, packet): the chunk version the packet shows, and the
+            complete uncompressed packet (including its length prefix)
+        """
+        with self.chunk_lock:
+            version = self.block_manager.chunk_version(chunk_x, chunk_z)
+            packet = self.chunk_packets.get(chunk_x, chunk_z, version)
+            if packet is not None:
+                return version, packet
+            snapshot = self.block_manager.snapshot_chunk(chunk_x, chunk_z)
+        
+        packet = bytes(PacketBuilder.build_chunk_data(chunk_x, chunk_z, snapshot))
+        
+        with self.chunk_lock:
+            if self.block_manager.chunk_version(chunk_x, chunk_z) == version:
+                self.block_manager.adopt_snapshot(snapshot, chunk_x, chunk_z)
+                self.chunk_packets.put(chunk_x, chunk_z, version, packet)
+        return version, packet
     
     def set_block(self, x: int, y: int, z: int, block_id: int):
         """
@@ -1059,46 +1208,91 @@ class World:
             block_id: Block ID to set (0 = air, 10 = dirt, 9 = grass_block, etc.)
         """
         # Delegate to BlockManager
-        self.block_manager.set_block(x, y, z, block_id)
+        with self.chunk_lock:
+            self.block_manager.set_block(x, y, z, block_id)
     
-    def _entity_update_worker(self):
+    def take_light_updates(self) -> Dict[Tuple[int, int], bytearray]:
+        """
+        Update Light packets for the light changed since the last call.
+        
+        Each packet only carries the sections of its chunk whose light changed.
+        
+        Returns:
+            Packet per (chunk_x, chunk_z)
         """
-        Background worker thread that continuously updates entities at 20 TPS (every 0.05 seconds).
-        Can be paused for step-through debugging.
+        with self.chunk_lock:
+            light = self.block_manager.light
+            sections_by_chunk = {}
+            for chunk_x, chunk_z, section_y in light.take_changed_sections():
+                sections_by_chunk.setdefault((chunk_x, chunk_z), []).append(section_y)
+            packets = {}
+            for (chunk_x, chunk_z), section_ys in sections_by_chunk.items():
+                sky_light, block_light = light.section_light(chunk_x, chunk_z, sorted(section_ys))
+                packets[(chunk_x, chunk_z)] = PacketBuilder.build_light_update(chunk_x, chunk_z, sky_light, block_light)
+            return packets
+    
+    def tick_entities(self, tick: int):
         """
-        TICK_INTERVAL = 0.05  # 20 TPS = 1 tick per 0.05 seconds
+        Entity physics phase of the game loop: advance item entities one tick.
         
-        while not self.entity_update_stop_event.is_set():
-            # Wait for pause event to be set (unpaused) or stop event
-            self.entity_update_pause_event.wait()
-            
-            if self.entity_update_stop_event.is_set():
-                break
-            
-            start_time = time.time()
-            
-            # Update all entities with fixed tick interval
-            self.update_item_entities(delta_time=TICK_INTERVAL)
-            
-            # Sleep to maintain 20 TPS
-            elapsed = time.time() - start_time
-            sleep_time = max(0, TICK_INTERVAL - elapsed)
-            if sleep_time > 0:
-                time.sleep(sleep_time)
+        Args:
+            tick: Game loop tick number
+        """
+        self.current_tick = tick
+        if self.entity_updates_paused:
+            return
+        with self.tick_lock:
+            self.update_item_entities(delta_time=0.05)
+    
+    def schedule_block_update(self, x: int, y: int, z: int, delay_ticks: int, callback):
+        """
+        Schedule a block update to run after a number of ticks.
+        
+        Args:
+            x: World X coordinate
+            y: World Y coordinate
+            z: World Z coordinate
+            delay_ticks: Ticks from now (at least 1)
+            callback: Called as callback(world, x, y, z) when due
+        """
+        with self.block_update_lock:
+            self._block_update_sequence += 1
+            heapq.heappush(self.scheduled_block_updates, (
+                self.current_tick + max(1, delay_ticks), self._block_update_sequence, (x, y, z), callback
+            ))
+    
+    def run_scheduled_block_updates(self, tick: int):
+        """
+        Block update phase of the game loop: run every update that is due.
+        
+        Args:
+            tick: Game loop tick number
+        """
+        self.current_tick = tick
+        updates = self.scheduled_block_updates
+        due = []
+        with self.block_update_lock:
+            while updates and updates[0][0] <= tick:
+                due.append(heapq.heappop(updates))
+        # A failing update must not drop the others due this tick
+        for _, _, (x, y, z), callback in due:
+            try:
+                callback(self, x, y, z)
+            except Exception as e:
+                print(f"  │  ✗ Error in scheduled block update at ({x}, {y}, {z}): {e}")
     
     def pause_entity_updates(self):
         """Pause automatic entity updates (for step-through debugging)."""
-        self.entity_update_pause_event.clear()
+        self.entity_updates_paused = True
     
     def resume_entity_updates(self):
         """Resume automatic entity updates."""
-        self.entity_update_pause_event.set()
+        self.entity_updates_paused = False
     
     def step_entity_tick(self):
         """Manually step forward one tick of entity updates."""
-        import time
-        current_time = time.time()
-        self.update_item_entities(delta_time=0.05)
+        with self.tick_lock:
+            self.update_item_entities(delta_time=0.05)
     
     def remove_item_entity(self, entity_id: int):
         """Remove an item entity from tracking."""
@@ -1285,6 +1479,40 @@ def get_block_name_from_state_id(block_state_id: int) -> Optional[str]:
     return get_block_name_from_state_id._block_name_cache.get(block_state_id)
 
 
+# Block tags (block_tags.json) whose blocks break when the block beneath them is removed
+SUPPORT_BLOCK_TAGS = ['small_flowers', 'tall_flowers', 'saplings', 'crops']
+
+# Ground plants in the "replaceable" tag that also need a block beneath them
+SUPPORT_BLOCK_NAMES = [
+    'minecraft:short_grass', 'minecraft:tall_grass', 'minecraft:fern', 'minecraft:large_fern',
+    'minecraft:dead_bush', 'minecraft:bush', 'minecraft:short_dry_grass', 'minecraft:tall_dry_grass'
+]
+
+
+def get_blocks_needing_support() -> set:
+    """
+    Get the identifiers of blocks that need a block beneath them.
+    Loads the block tags from block_tags.json.
+    
+    Returns:
+        Set of block identifiers (e.g., 'minecraft:poppy')
+    """
+    if not hasattr(get_blocks_needing_support, '_cache'):
+        blocks = set(SUPPORT_BLOCK_NAMES)
+        tags_file = os.path.join(_EXTRACTED_DATA_DIR, 'block_tags.json')
+        if os.path.exists(tags_file):
+            try:
+                with open(tags_file, 'r') as f:
+                    block_tags = json.load(f)
+                for tag in SUPPORT_BLOCK_TAGS:
+                    blocks.update(block_tags.get(tag, []))
+            except Exception as e:
+                print(f"  │  ⚠ Warning: Could not load block tags: {e}")
+        get_blocks_needing_support._cache = blocks
+    
+    return get_blocks_needing_support._cache
+
+
 def get_item_for_block(block_name: str) -> str:
     """
     Get the item name that should drop from a block using loot tables.
@@ -1394,12 +1622,12 @@ def get_item_id_for_block(block_state_id: int) -> int:
     return None
 
 
-# Global lock for packet log file access
-_packet_log_lock = threading.Lock()
-_packet_log_file = None
+# Shared packet capture (created on first use)
+_packet_capture_lock = threading.Lock()
+_packet_capture = None
 
 def log_and_send_packet(
-    client_socket: socket.socket,
+    conn: ClientConnection,
     connection_state: ConnectionState,
     packet_id: int,
     packet_data: bytes,
@@ -1419,7 +1647,22 @@ def log_and_send_packet(
         parsed_data=parsed_data,
         packet_name=packet_name
     )
-    client_socket.sendall(packet_data)
+    conn.send(packet_data)
+
+
+def get_packet_capture() -> PacketCapture:
+    """Get the shared packet capture, starting it on first use."""
+    global _packet_capture
+    
+    if _packet_capture is None:
+        with _packet_capture_lock:
+            if _packet_capture is None:
+                script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+                capture = PacketCapture(os.path.join(script_dir, 'packet_logs'))
+                capture.start()
+                _packet_capture = capture
+    
+    return _packet_capture
 
 
 def log_packet_to_file(
@@ -1431,9 +1674,12 @@ def log_packet_to_file(
     packet_name: Optional[str] = None
 ):
     """
-    Log a packet to a JSON file for test case generation.
+    Log a packet to the packet capture for test case generation.
     Logs all packets including PLAY state.
     
+    The packet is queued and written to an NDJSON capture file by a
+    background thread (see packet_capture.py), so this never blocks on disk.
+    
     Args:
         direction: "serverbound" (from client) or "clientbound" (to client)
         connection_state: Current connection state
@@ -1442,1840 +1688,1657 @@ def log_packet_to_file(
         parsed_data: Parsed packet object (optional)
         packet_name: Human-readable packet name (optional)
     """
-    
-    global _packet_log_file
-    
-    # Initialize log file on first use
-    if _packet_log_file is None:
-        script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        log_dir = os.path.join(script_dir, 'packet_logs')
-        os.makedirs(log_dir, exist_ok=True)
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        _packet_log_file = os.path.join(log_dir, f'pre_play_packets_{timestamp}.json')
-        
-        # Initialize file with empty array
-        with open(_packet_log_file, 'w') as f:
-            json.dump([], f)
-    
-    # Format packet data
     # Omit hex data for Chunk Data packets (they're very large)
     is_chunk_data = (
-        (packet_id == 0x2C and connection_state == ConnectionState.PLAY) or
+        (packet_id == clientbound_id(ConnectionState.PLAY, 'minecraft:level_chunk_with_light')
+         and connection_state == ConnectionState.PLAY) or
         (packet_name and "Chunk Data" in packet_name)
     )
     
-    packet_entry = {
-        'timestamp': datetime.now().isoformat(),
-        'direction': direction,
-        'state': connection_state.name,
-        'packet_id': packet_id,
-        'packet_id_hex': f'0x{packet_id:02x}' if packet_id is not None else None,
-        'packet_name': packet_name,
-        'packet_length': len(packet_data),
-        'packet_data_hex': None if is_chunk_data else packet_data.hex(),
-        'packet_data_base64': None,  # Can add if needed
-    }
+    get_packet_capture().record(
+        direction=direction,
+        connection_state=connection_state,
+        packet_id=packet_id,
+        packet_data=packet_data,
+        parsed_data=parsed_data,
+        packet_name=packet_name,
+        omit_hex=bool(is_chunk_data)
+    )
+
+
+# Files the configuration bundle is built from (a change triggers a rebuild)
+_EXTRACTED_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extracted_data')
+CONFIGURATION_SOURCE_FILES = [
+    os.path.join(_EXTRACTED_DATA_DIR, 'registry_data.json'),
+    os.path.join(_EXTRACTED_DATA_DIR, 'biomes.json'),
+    os.path.join(_EXTRACTED_DATA_DIR, 'damage_types.json'),
+]
+
+# Data packs the server reports (and the client must also know)
+KNOWN_PACKS = [("minecraft", "core", "1.21.10")]
+
+
+def build_configuration_packets() -> Dict[str, List[PreparedPacket]]:
+    """
+    Build every configuration-phase packet sent to joining clients.
     
-    if is_chunk_data:
-        packet_entry['packet_data_hex_omitted'] = True
-        packet_entry['packet_data_hex_note'] = 'Omitted due to large size'
-    
-    # Add parsed data if available
-    if parsed_data is not None:
-        if isinstance(parsed_data, (HandshakePacket, LoginStartPacket, ClientInformationPacket)):
-            # Convert dataclass to dict, handling bytes and other non-serializable types
-            packet_entry['parsed_data'] = {}
-            for k, v in parsed_data.__dict__.items():
-                if isinstance(v, bytes):
-                    packet_entry['parsed_data'][k] = v.hex()
-                elif isinstance(v, uuid.UUID):
-                    packet_entry['parsed_data'][k] = str(v)
-                elif isinstance(v, (int, float, bool, str, type(None))):
-                    packet_entry['parsed_data'][k] = v
-                else:
-                    packet_entry['parsed_data'][k] = str(v)
-        elif isinstance(parsed_data, dict):
-            # Convert dict, handling bytes and other non-serializable types
-            packet_entry['parsed_data'] = {}
-            for k, v in parsed_data.items():
-                if isinstance(v, bytes):
-                    packet_entry['parsed_data'][k] = v.hex()
-                elif isinstance(v, uuid.UUID):
-                    packet_entry['parsed_data'][k] = str(v)
-                elif isinstance(v, (int, float, bool, str, type(None))):
-                    packet_entry['parsed_data'][k] = v
-                else:
-                    packet_entry['parsed_data'][k] = str(v)
-        elif isinstance(parsed_data, list):
-            # Convert list, handling bytes and other non-serializable types
-            packet_entry['parsed_data'] = []
-            for item in parsed_data:
-                if isinstance(item, bytes):
-                    packet_entry['parsed_data'].append(item.hex())
-                elif isinstance(item, uuid.UUID):
-                    packet_entry['parsed_data'].append(str(item))
-                elif isinstance(item, (int, float, bool, str, type(None))):
-                    packet_entry['parsed_data'].append(item)
-                elif isinstance(item, tuple):
-                    # Handle tuples (like in Known Packs)
-                    packet_entry['parsed_data'].append(list(item))
-                else:
-                    packet_entry['parsed_data'].append(str(item))
-        elif parsed_data is None:
-            packet_entry['parsed_data'] = None
+    Returns:
+        'known_packs': the Clientbound Known Packs packet (sent on Client
+                       Information)
+        'registries': Registry Data for every required registry followed by
+                      Finish Configuration (sent on the client's Known Packs)
+    """
+    known_packs = [PreparedPacket(
+        packet_id=clientbound_id(ConnectionState.CONFIGURATION, 'minecraft:select_known_packs'),
+        name="Known Packs",
+        frame=PacketBuilder.build_known_packs(KNOWN_PACKS),
+        # Tuples as lists for JSON
+        parsed_data=[list(pack) for pack in KNOWN_PACKS]
+    )]
+    
+    # Load registry data from JSON file
+    registry_data_file = CONFIGURATION_SOURCE_FILES[0]
+    registry_json_data = {}
+    if os.path.exists(registry_data_file):
+        try:
+            with open(registry_data_file, 'r') as f:
+                registry_json_data = json.load(f)
+        except Exception as e:
+            print(f"⚠ Warning: Could not load registry_data.json: {e}")
+    
+    def load_json_list(file_path):
+        """Load a JSON list file from extracted_data/."""
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, 'r') as f:
+                    return json.load(f)
+            except Exception:
+                return []
+        return []
+    
+    def get_biome_entries():
+        """Load all biome entries from extracted_data/biomes.json."""
+        return load_json_list(CONFIGURATION_SOURCE_FILES[1])
+    
+    def get_damage_type_entries():
+        """Load all damage_type entries from extracted_data/damage_types.json."""
+        return load_json_list(CONFIGURATION_SOURCE_FILES[2])
+    
+    # Build required registries list with actual entry names
+    def get_registry_entries(registry_id):
+        """Get all entries for a registry from JSON, or return default."""
+        # Special handling for biome registry (extract from JAR)
+        if registry_id == "minecraft:worldgen/biome":
+            biome_entries = get_biome_entries()
+            if biome_entries:
+                return [(entry, None) for entry in biome_entries]
+            else:
+                # Fallback: at least include plains
+                return [("minecraft:plains", None)]
+        
+        # Special handling for damage_type registry (extract from JAR)
+        if registry_id == "minecraft:damage_type":
+            damage_entries = get_damage_type_entries()
+            if damage_entries:
+                return [(entry, None) for entry in damage_entries]
+            else:
+                # Fallback: at least include in_fire (required)
+                return [("minecraft:in_fire", None)]
+        
+        if registry_id in registry_json_data:
+            entries = list(registry_json_data[registry_id].keys())
+            return [(entry, None) for entry in entries]  # All entries, no NBT
         else:
-            packet_entry['parsed_data'] = str(parsed_data)
+            # Fallback for registries not in JSON
+            # NOTE: These entry names may not match actual Minecraft 1.21.10 entries
+            # If you get "Failed to parse local data" errors, you need to update these
+            # with the actual entry names from Minecraft's data files
+            fallbacks = {
+                "minecraft:dimension_type": [("minecraft:overworld", None)],
+                # Cat variants - these seem to work (11 entries sent successfully)
+                "minecraft:cat_variant": [("minecraft:tabby", None), ("minecraft:black", None), ("minecraft:red", None), ("minecraft:siamese", None), ("minecraft:british_shorthair", None), ("minecraft:calico", None), ("minecraft:persian", None), ("minecraft:ragdoll", None), ("minecraft:white", None), ("minecraft:jellie", None), ("minecraft:all_black", None)],
+                # Frog variants - these seem to work (3 entries sent successfully)
+                "minecraft:frog_variant": [("minecraft:temperate", None), ("minecraft:warm", None), ("minecraft:cold", None)],
+                # These registries extracted from Minecraft 1.21.10 server JAR
+                "minecraft:chicken_variant": [("minecraft:cold", None), ("minecraft:temperate", None), ("minecraft:warm", None)],
+                "minecraft:cow_variant": [("minecraft:cold", None), ("minecraft:temperate", None), ("minecraft:warm", None)],
+                "minecraft:pig_variant": [("minecraft:cold", None), ("minecraft:temperate", None), ("minecraft:warm", None)],
+                "minecraft:wolf_sound_variant": [("minecraft:angry", None), ("minecraft:big", None), ("minecraft:classic", None), ("minecraft:cute", None), ("minecraft:grumpy", None), ("minecraft:puglin", None), ("minecraft:sad", None)],
+                # Painting variants - common painting names
+                "minecraft:painting_variant": [("minecraft:kebab", None), ("minecraft:aztec", None), ("minecraft:alban", None), ("minecraft:aztec2", None), ("minecraft:bomb", None), ("minecraft:plant", None), ("minecraft:wasteland", None), ("minecraft:pool", None), ("minecraft:courbet", None), ("minecraft:sea", None), ("minecraft:sunset", None), ("minecraft:creebet", None), ("minecraft:wanderer", None), ("minecraft:graham", None), ("minecraft:match", None), ("minecraft:bust", None), ("minecraft:stage", None), ("minecraft:void", None), ("minecraft:skull_and_roses", None), ("minecraft:wither", None), ("minecraft:fighters", None), ("minecraft:pointer", None), ("minecraft:pigscene", None), ("minecraft:burning_skull", None), ("minecraft:skeleton", None), ("minecraft:donkey_kong", None)],
+                # Wolf variants - common wolf variants
+                "minecraft:wolf_variant": [("minecraft:striped", None), ("minecraft:chestnut", None), ("minecraft:rusty", None), ("minecraft:spotted", None), ("minecraft:snowy", None), ("minecraft:black", None), ("minecraft:ash", None), ("minecraft:wood", None)],
+            }
+            return fallbacks.get(registry_id, [])
+    
+    # Required non-empty registries
+    required_registry_ids = [
+        "minecraft:dimension_type",
+        "minecraft:cat_variant",
+        "minecraft:chicken_variant",
+        "minecraft:cow_variant",
+        "minecraft:frog_variant",
+        "minecraft:painting_variant",
+        "minecraft:pig_variant",
+        "minecraft:wolf_variant",
+        "minecraft:wolf_sound_variant",
+        "minecraft:worldgen/biome",  # REQUIRED - must include minecraft:plains
+        "minecraft:damage_type",  # REQUIRED - must include minecraft:in_fire and others
+    ]
+    
+    registries = []
+    for registry_id in required_registry_ids:
+        entries = get_registry_entries(registry_id)
+        if not entries:
+            print(f"⚠ Warning: No entries found for {registry_id}, skipping")
+            continue
+        registry_data = PacketBuilder.build_registry_data(
+            registry_id=registry_id,
+            entries=entries
+        )
+        # Entries tuples as lists for JSON serialization
+        entries_list = [[entry_name, nbt_data] if nbt_data is not None else [entry_name] for entry_name, nbt_data in entries]
+        registries.append(PreparedPacket(
+            packet_id=clientbound_id(ConnectionState.CONFIGURATION, 'minecraft:registry_data'),
+            name=f"Registry Data ({registry_id})",
+            frame=registry_data,
+            parsed_data={
+                "registry_id": registry_id,
+                "entry_count": len(entries),
+                "entries": entries_list
+            }
+        ))
+    
+    registries.append(PreparedPacket(
+        packet_id=clientbound_id(ConnectionState.CONFIGURATION, 'minecraft:finish_configuration'),
+        name="Finish Configuration",
+        frame=PacketBuilder.build_finish_configuration()
+    ))
     
-    # Append to log file (thread-safe)
-    with _packet_log_lock:
+    return {'known_packs': known_packs, 'registries': registries}
+
+
+configuration_bundle = ConfigurationBundle(CONFIGURATION_SOURCE_FILES, build_configuration_packets)
+
+
+def send_configuration_stage(conn: ClientConnection, stage: str) -> PacketStream:
+    """
+    Send one prebuilt configuration stage to a client in a single write.
+    
+    Args:
+        conn: Client connection (CONFIGURATION state)
+        stage: Stage name in the configuration bundle
+    
+    Returns:
+        The stream that was sent
+    """
+    stream = configuration_bundle.get(stage)
+    for packet in stream.packets:
+        log_packet_to_file(
+            direction="clientbound",
+            connection_state=conn.connection_state,
+            packet_id=packet.packet_id,
+            packet_data=packet.frame,
+            parsed_data=packet.parsed_data,
+            packet_name=packet.name
+        )
+    conn.send_prepared(stream.wire(conn.compression_threshold))
+    return stream
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.HANDSHAKING, 'minecraft:intention')
+def handle_handshake(conn: ClientConnection, parsed_packet: HandshakePacket):
+    """Handle Handshake: switch to the state the client asked for."""
+    print(f"  │  Type: Handshake")
+    print(f"  │  Protocol Version: {parsed_packet.protocol_version}")
+    print(f"  │  Server Address: {parsed_packet.server_address}")
+    print(f"  │  Server Port: {parsed_packet.server_port}")
+    intent_names = {1: "Status", 2: "Login", 3: "Transfer"}
+    intent_name = intent_names.get(parsed_packet.intent, f"Unknown ({parsed_packet.intent})")
+    print(f"  │  Intent: {parsed_packet.intent} ({intent_name})")
+    
+    # Update state based on intent
+    if parsed_packet.intent == 2:  # Login
+        conn.connection_state = ConnectionState.LOGIN
+        print(f"  │  → State transition: HANDSHAKING → LOGIN")
+    elif parsed_packet.intent == 1:  # Status
+        conn.connection_state = ConnectionState.STATUS
+        print(f"  │  → State transition: HANDSHAKING → STATUS")
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.LOGIN, 'minecraft:hello')
+def handle_login_start(conn: ClientConnection, parsed_packet: LoginStartPacket):
+    """Handle Login Start: negotiate compression and send Login Success."""
+    print(f"  │  Type: Login Start")
+    print(f"  │  Username: {parsed_packet.username}")
+    print(f"  │  Player UUID: {parsed_packet.player_uuid}")
+    
+    # Store player UUID for later use
+    conn.player_uuid = parsed_packet.player_uuid
+    
+    # Negotiate compression before Login Success; everything after
+    # Set Compression uses the compressed frame format
+    if conn.network_compression_threshold >= 0:
+        threshold = conn.network_compression_threshold
+        set_compression = PacketBuilder.build_set_compression(threshold)
+        log_and_send_packet(
+            conn,
+            connection_state=conn.connection_state,
+            packet_id=clientbound_id(ConnectionState.LOGIN, 'minecraft:login_compression'),
+            packet_data=set_compression,
+            parsed_data={"threshold": threshold},
+            packet_name="Set Compression"
+        )
+        conn.enable_compression(threshold)
+        print(f"  │  ✓ Set Compression sent (threshold: {threshold} bytes)")
+    
+    # Respond with Login Success
+    print(f"  │  → Sending Login Success response...")
+    try:
+        profile = GameProfile(
+            uuid=parsed_packet.player_uuid,  # Use UUID from client
+            username=parsed_packet.username,
+            properties=[]  # Empty for offline mode
+        )
+        login_success = PacketBuilder.build_login_success(profile)
+        
+        # Log clientbound packet
+        log_packet_to_file(
+            direction="clientbound",
+            connection_state=conn.connection_state,
+            packet_id=clientbound_id(ConnectionState.LOGIN, 'minecraft:login_finished'),
+            packet_data=login_success,
+            parsed_data={
+                "profile": {
+                    "uuid": str(profile.uuid),
+                    "username": profile.username,
+                    "properties": []
+                }
+            },
+            packet_name="Login Success"
+        )
+        
+        conn.send(login_success)
+        print(f"  │  ✓ Login Success sent ({len(login_success)} bytes)")
+        print(f"  │  → Waiting for Login Acknowledged...")
+    except Exception as send_error:
+        print(f"  │  ✗ Error sending Login Success: {send_error}")
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.LOGIN, 'minecraft:login_acknowledged')
+def handle_login_acknowledged(conn: ClientConnection, parsed_packet: None):
+    """Handle Login Acknowledged: enter CONFIGURATION state."""
+    print(f"  │  Type: Login Acknowledged")
+    
+    # Log serverbound packet (already logged above, but ensure it's captured)
+    # The packet was already logged in the main parsing section
+    
+    print(f"  │  → Login complete! Transitioning to CONFIGURATION state")
+    conn.connection_state = ConnectionState.CONFIGURATION
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.CONFIGURATION, 'minecraft:client_information')
+def handle_client_information(conn: ClientConnection, parsed_packet: ClientInformationPacket):
+    """Handle Client Information: start the configuration handshake with Known Packs."""
+    print(f"  │  Type: Client Information")
+    print(f"  │  Locale: {parsed_packet.locale}")
+    print(f"  │  View Distance: {parsed_packet.view_distance} chunks")
+    print(f"  │  Chat Mode: {parsed_packet.chat_mode}")
+    print(f"  │  Chat Colors: {parsed_packet.chat_colors}")
+    print(f"  │  Main Hand: {'Left' if parsed_packet.main_hand == 0 else 'Right'}")
+    
+    # Send Known Packs first (allows us to omit NBT data)
+    if not conn.known_packs_sent:
+        print(f"  │  → Sending Known Packs...")
         try:
-            # Try to read existing packets, or start with empty list if file is corrupted
-            packets = []
-            if os.path.exists(_packet_log_file):
-                try:
-                    with open(_packet_log_file, 'r') as f:
-                        packets = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    # File is corrupted, start fresh
-                    packets = []
-            
-            packets.append(packet_entry)
-            
-            # Write to a temporary file first, then rename (atomic write)
-            temp_file = _packet_log_file + '.tmp'
-            with open(temp_file, 'w') as f:
-                json.dump(packets, f, indent=2)
-            
-            # Atomic rename
-            os.replace(temp_file, _packet_log_file)
-        except Exception as e:
-            print(f"  │  ⚠ Warning: Could not log packet to file: {e}")
+            stream = send_configuration_stage(conn, 'known_packs')
+            conn.known_packs_sent = True
+            print(f"  │  ✓ Known Packs sent ({len(stream.wire(conn.compression_threshold))} bytes)")
+            print(f"  │  → Waiting for client's Known Packs response...")
+        except Exception as send_error:
+            print(f"  │  ✗ Error sending Known Packs: {send_error}")
             import traceback
             traceback.print_exc()
 
 
-def handle_client(client_socket, client_address):
-    """Handle a single client connection."""
-    print(f"\n{'='*60}")
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] New connection from {client_address}")
-    print(f"{'='*60}\n")
-    
-    # Track connection state
-    connection_state = ConnectionState.HANDSHAKING
-    known_packs_sent = False
-    known_packs_received = False
+@SERVERBOUND_PACKETS.handler(ConnectionState.CONFIGURATION, 'minecraft:custom_payload')
+def handle_plugin_message(conn: ClientConnection, parsed_packet: dict):
+    """Handle a configuration Plugin Message."""
+    # Plugin Message (Configuration)
+    channel = parsed_packet.get("channel", "")
+    data = parsed_packet.get("data", b"")
+    print(f"  │  Type: Plugin Message")
+    print(f"  │  Channel: {channel}")
+    if channel == "minecraft:brand":
+        try:
+            brand = data.decode('utf-8')
+            print(f"  │  Brand: {brand}")
+        except:
+            print(f"  │  Data: {len(data)} bytes")
+    else:
+        print(f"  │  Data: {len(data)} bytes")
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.CONFIGURATION, 'minecraft:select_known_packs')
+def handle_known_packs(conn: ClientConnection, parsed_packet: list):
+    """Handle Serverbound Known Packs: send registry data and Finish Configuration."""
+    # Serverbound Known Packs (parsed as list)
+    print(f"  │  Type: Serverbound Known Packs")
+    packs = parsed_packet
+    print(f"  │  Client knows {len(packs)} pack(s):")
+    for namespace, pack_id, version in packs:
+        print(f"  │    - {namespace}:{pack_id} (version {version})")
+    conn.known_packs_received = True
+    
+    # Registry Data for every registry, then Finish Configuration, in one write
+    print(f"  │  → Sending Registry Data and Finish Configuration...")
+    try:
+        stream = send_configuration_stage(conn, 'registries')
+        print(f"  │  ✓ {len(stream) - 1} registries + Finish Configuration sent "
+              f"({len(stream.wire(conn.compression_threshold))} bytes)")
+        print(f"  │  → Waiting for Acknowledge Finish Configuration...")
+    except Exception as send_error:
+        print(f"  │  ✗ Error sending configuration data: {send_error}")
+        import traceback
+        traceback.print_exc()
     
-    # Initialize world and player state
-    world = None  # Will be initialized when entering PLAY state
-    player_uuid = None  # Will be set during login
-    player = None  # Will be initialized when entering PLAY state
-    web_server_thread = None  # Web server thread for visualization
+    print(f"  └─")
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.CONFIGURATION, 'minecraft:finish_configuration')
+def handle_finish_configuration(conn: ClientConnection, parsed_packet: None):
+    """Handle Acknowledge Finish Configuration: enter PLAY state and spawn the player."""
+    print(f"  │  Type: Acknowledge Finish Configuration")
+    
+    # Log serverbound packet (already logged above, but ensure it's captured)
+    # The packet was already logged in the main parsing section
+    
+    print(f"  │  → Configuration complete! Transitioning to PLAY state")
+    conn.connection_state = ConnectionState.PLAY
+    status_responder.player_joined()
+    
+    # Join the shared server world
+    conn.world = get_server_world()
+    
+    # Create player instance
+    if conn.player_uuid is None:
+        print(f"  │  ⚠ Warning: Player UUID not set, using default UUID")
+        conn.player_uuid = uuid.uuid4()
+    
+    conn.player = Player(conn.player_uuid, view_distance=10, world=conn.world,
+                         entity_id=conn.world.allocate_entity_id())
+    conn.player.update_position(0.0, 65.0, 0.0)  # Spawn position
+    conn.world.add_player(conn.player)
+    
+    # Loot tables should already be loaded during server initialization
+    # Just verify they're available (should be instant since already cached)
+    if not hasattr(load_loot_tables, '_loot_table_cache') or not load_loot_tables._loot_table_cache:
+        print(f"  │  ⚠ Warning: Loot tables not pre-loaded, loading now...")
+        load_loot_tables()
     
-    # Keep alive tracking
-    keep_alive_thread = None
-    keep_alive_stop_event = threading.Event()
-    last_keep_alive_id = None
+    # Initialize chunk loader (background thread)
+    conn.chunk_loader = ChunkLoader(conn, conn.player, conn.keep_alive_stop_event)
+    conn.chunk_loader.start()
+    print(f"  │  ✓ Chunk loader thread started")
     
+    # Send Login (play) packet
+    print(f"  │  → Sending Login (play) packet...")
     try:
-        buffer = b''
+        login_play = PacketBuilder.build_login_play(
+            entity_id=conn.player.entity_id,
+            dimension_names=["minecraft:overworld"],
+            game_mode=0,  # Survival
+            dimension_name="minecraft:overworld"
+        )
+        conn.send(login_play)
+        print(f"  │  ✓ Login (play) sent ({len(login_play)} bytes)")
         
-        while True:
-            # Receive data
-            data = client_socket.recv(4096)
-            if not data:
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] Connection closed by client")
-                break
+        # Send Synchronize Player Position (spawn at 0, 65, 0 - on top of grass at y=64)
+        print(f"  │  → Sending Synchronize Player Position...")
+        try:
+            player_pos = PacketBuilder.build_synchronize_player_position(
+                x=0.0,
+                y=65.0,  # On top of grass at y=64
+                z=0.0,
+                yaw=0.0,
+                pitch=0.0,
+                teleport_id=0
+            )
             
-            buffer += data
+            # Log clientbound packet
+            log_packet_to_file(
+                direction="clientbound",
+                connection_state=conn.connection_state,
+                packet_id=clientbound_id(ConnectionState.PLAY, 'minecraft:player_position'),
+                packet_data=player_pos,
+                parsed_data={
+                    "x": 0.0,
+                    "y": 65.0,
+                    "z": 0.0,
+                    "yaw": 0.0,
+                    "pitch": 0.0,
+                    "teleport_id": 0
+                },
+                packet_name="Synchronize Player Position"
+            )
             
-            # Try to parse packets from buffer
-            offset = 0
-            while offset < len(buffer):
-                try:
-                    # Try to read packet length
-                    if len(buffer) - offset < 1:
-                        break  # Not enough data for even a VarInt
-                    
-                    # Read packet length (VarInt)
-                    packet_length, length_end = read_varint(buffer, offset)
-                    
-                    if packet_length < 0 or packet_length > 2097151:  # Max packet size
-                        print(f"[{datetime.now().strftime('%H:%M:%S')}] Invalid packet length: {packet_length}")
-                        offset += 1
-                        continue
-                    
-                    # Check if we have the full packet
-                    total_packet_size = length_end + packet_length
-                    if len(buffer) < total_packet_size:
-                        # Not enough data yet, wait for more
-                        break
-                    
-                    # Extract the packet (including length prefix for parser)
-                    full_packet = buffer[offset:total_packet_size]
-                    packet_data = buffer[length_end:total_packet_size]
-                    
-                    # Try to read packet ID for display
-                    packet_id = None
-                    payload = b''
-                    if len(packet_data) > 0:
-                        packet_id, id_end = read_varint(packet_data, 0)
-                        payload = packet_data[id_end:]
-                    
-                    # Print raw packet info
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Packet received:")
-                    print(f"  State: {connection_state.name}")
-                    print(f"  Length: {packet_length} bytes")
-                    if packet_id is not None:
-                        print(f"  Packet ID: {packet_id} (0x{packet_id:02x})")
-                    print(f"  Full packet (hex): {format_hex(full_packet)}")
-                    if len(payload) > 0:
-                        print(f"  Payload (hex): {format_hex(payload)}")
-                    
-                    # Try to parse using protocol parser
-                    try:
-                        # Parser expects full packet including length prefix
-                        # full_packet = buffer[offset:total_packet_size] includes the length
-                        # Ensure it's bytes
-                        if not isinstance(full_packet, bytes):
-                            raise TypeError(f"Expected bytes, got {type(full_packet)}")
-                        parsed_packet_id, parsed_packet = PacketParser.parse_packet(
-                            full_packet, connection_state
-                        )
-                        
-                        # Log serverbound packet (from client) - all states including PLAY
-                        # Log regardless of whether parsed_packet is None (some packets like Login Acknowledged return None)
-                        packet_name = None
-                        if isinstance(parsed_packet, HandshakePacket):
-                            packet_name = "Handshake"
-                        elif isinstance(parsed_packet, LoginStartPacket):
-                            packet_name = "Login Start"
-                        elif isinstance(parsed_packet, ClientInformationPacket):
-                            packet_name = "Client Information"
-                        elif connection_state == ConnectionState.CONFIGURATION and parsed_packet_id == 2:
-                            packet_name = "Plugin Message"
-                        elif connection_state == ConnectionState.CONFIGURATION and parsed_packet_id == 0x07:
-                            packet_name = "Serverbound Known Packs"
-                        elif connection_state == ConnectionState.LOGIN and parsed_packet_id == 3:
-                            packet_name = "Login Acknowledged"
-                        elif connection_state == ConnectionState.CONFIGURATION and parsed_packet_id == 3:
-                            packet_name = "Acknowledge Finish Configuration"
-                        elif connection_state == ConnectionState.PLAY:
-                            # PLAY state packet names
-                            if parsed_packet_id == 0x1D:
-                                packet_name = "Set Player Position"
-                            elif parsed_packet_id == 0x1E:
-                                packet_name = "Set Player Position and Rotation"
-                            elif parsed_packet_id == 0x1F:
-                                packet_name = "Set Player Rotation"
-                            elif parsed_packet_id == 0x1B:
-                                packet_name = "Keep Alive Response"
-                            elif parsed_packet_id == 0x28:
-                                packet_name = "Player Action"
-                            elif parsed_packet_id == 0x2E:
-                                packet_name = "Use Item"
-                            elif parsed_packet_id == 0x2F:
-                                packet_name = "Swing Arm"
-                            elif parsed_packet_id == 0x3F:
-                                packet_name = "Use Item On"
-                            elif parsed_packet_id == 0x34:
-                                packet_name = "Set Held Item"
-                            elif parsed_packet_id == 0x11:
-                                packet_name = "Click Container"
-                            elif parsed_packet_id == 0x0C:
-                                packet_name = "Pong"
-                            elif parsed_packet_id == 0x00:
-                                packet_name = "Confirm Teleport"
-                            else:
-                                packet_name = f"PLAY Packet 0x{parsed_packet_id:02x}"
-                        
-                        log_packet_to_file(
-                            direction="serverbound",
-                            connection_state=connection_state,
-                            packet_id=parsed_packet_id,
-                            packet_data=full_packet,
-                            parsed_data=parsed_packet,
-                            packet_name=packet_name
-                        )
-                        
-                        if parsed_packet is not None:
-                            print(f"  ┌─ Parsed Packet Data:")
-                            
-                            if isinstance(parsed_packet, HandshakePacket):
-                                print(f"  │  Type: Handshake")
-                                print(f"  │  Protocol Version: {parsed_packet.protocol_version}")
-                                print(f"  │  Server Address: {parsed_packet.server_address}")
-                                print(f"  │  Server Port: {parsed_packet.server_port}")
-                                intent_names = {1: "Status", 2: "Login", 3: "Transfer"}
-                                intent_name = intent_names.get(parsed_packet.intent, f"Unknown ({parsed_packet.intent})")
-                                print(f"  │  Intent: {parsed_packet.intent} ({intent_name})")
-                                
-                                # Update state based on intent
-                                if parsed_packet.intent == 2:  # Login
-                                    connection_state = ConnectionState.LOGIN
-                                    print(f"  │  → State transition: HANDSHAKING → LOGIN")
-                                elif parsed_packet.intent == 1:  # Status
-                                    connection_state = ConnectionState.STATUS
-                                    print(f"  │  → State transition: HANDSHAKING → STATUS")
-                            
-                            elif isinstance(parsed_packet, LoginStartPacket):
-                                print(f"  │  Type: Login Start")
-                                print(f"  │  Username: {parsed_packet.username}")
-                                print(f"  │  Player UUID: {parsed_packet.player_uuid}")
-                                
-                                # Store player UUID for later use
-                                player_uuid = parsed_packet.player_uuid
-                                
-                                # Respond with Login Success
-                                print(f"  │  → Sending Login Success response...")
-                                try:
-                                    profile = GameProfile(
-                                        uuid=parsed_packet.player_uuid,  # Use UUID from client
-                                        username=parsed_packet.username,
-                                        properties=[]  # Empty for offline mode
-                                    )
-                                    login_success = PacketBuilder.build_login_success(profile)
-                                    
-                                    # Log clientbound packet
-                                    log_packet_to_file(
-                                        direction="clientbound",
-                                        connection_state=connection_state,
-                                        packet_id=0x02,  # Login Success packet ID
-                                        packet_data=login_success,
-                                        parsed_data={
-                                            "profile": {
-                                                "uuid": str(profile.uuid),
-                                                "username": profile.username,
-                                                "properties": []
-                                            }
-                                        },
-                                        packet_name="Login Success"
-                                    )
-                                    
-                                    client_socket.send(login_success)
-                                    print(f"  │  ✓ Login Success sent ({len(login_success)} bytes)")
-                                    print(f"  │  → Waiting for Login Acknowledged...")
-                                except Exception as send_error:
-                                    print(f"  │  ✗ Error sending Login Success: {send_error}")
-                            
-                            elif isinstance(parsed_packet, ClientInformationPacket):
-                                print(f"  │  Type: Client Information")
-                                print(f"  │  Locale: {parsed_packet.locale}")
-                                print(f"  │  View Distance: {parsed_packet.view_distance} chunks")
-                                print(f"  │  Chat Mode: {parsed_packet.chat_mode}")
-                                print(f"  │  Chat Colors: {parsed_packet.chat_colors}")
-                                print(f"  │  Main Hand: {'Left' if parsed_packet.main_hand == 0 else 'Right'}")
-                                
-                                # Send Known Packs first (allows us to omit NBT data)
-                                if not known_packs_sent:
-                                    print(f"  │  → Sending Known Packs...")
-                                    try:
-                                        known_packs = PacketBuilder.build_known_packs([
-                                            ("minecraft", "core", "1.21.10")
-                                        ])
-                                        
-                                        # Log clientbound packet - convert tuples to lists for JSON
-                                        known_packs_list = [["minecraft", "core", "1.21.10"]]
-                                        log_packet_to_file(
-                                            direction="clientbound",
-                                            connection_state=connection_state,
-                                            packet_id=0x05,  # Known Packs packet ID
-                                            packet_data=known_packs,
-                                            parsed_data=known_packs_list,
-                                            packet_name="Known Packs"
-                                        )
-                                        
-                                        client_socket.send(known_packs)
-                                        known_packs_sent = True
-                                        print(f"  │  ✓ Known Packs sent ({len(known_packs)} bytes)")
-                                        print(f"  │  → Waiting for client's Known Packs response...")
-                                    except Exception as send_error:
-                                        print(f"  │  ✗ Error sending Known Packs: {send_error}")
-                                        import traceback
-                                        traceback.print_exc()
-                            
-                            elif isinstance(parsed_packet, dict) and connection_state == ConnectionState.CONFIGURATION and parsed_packet_id == 2:
-                                # Plugin Message (Configuration)
-                                channel = parsed_packet.get("channel", "")
-                                data = parsed_packet.get("data", b"")
-                                print(f"  │  Type: Plugin Message")
-                                print(f"  │  Channel: {channel}")
-                                if channel == "minecraft:brand":
-                                    try:
-                                        brand = data.decode('utf-8')
-                                        print(f"  │  Brand: {brand}")
-                                    except:
-                                        print(f"  │  Data: {len(data)} bytes")
-                                else:
-                                    print(f"  │  Data: {len(data)} bytes")
-                            
-                            elif isinstance(parsed_packet, list) and connection_state == ConnectionState.CONFIGURATION and parsed_packet_id == 0x07:
-                                # Serverbound Known Packs (parsed as list)
-                                print(f"  │  Type: Serverbound Known Packs")
-                                packs = parsed_packet
-                                print(f"  │  Client knows {len(packs)} pack(s):")
-                                for namespace, pack_id, version in packs:
-                                    print(f"  │    - {namespace}:{pack_id} (version {version})")
-                                known_packs_received = True
-                                
-                                # Load registry data from JSON file
-                                registry_data_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'extracted_data', 'registry_data.json')
-                                registry_json_data = {}
-                                if os.path.exists(registry_data_file):
-                                    try:
-                                        with open(registry_data_file, 'r') as f:
-                                            registry_json_data = json.load(f)
-                                    except Exception as e:
-                                        print(f"  │  ⚠ Warning: Could not load registry_data.json: {e}")
-                                
-                                def load_json_list(file_path):
-                                    """Load a JSON list file from extracted_data/."""
-                                    if os.path.exists(file_path):
-                                        try:
-                                            with open(file_path, 'r') as f:
-                                                return json.load(f)
-                                        except Exception:
-                                            return []
-                                    return []
-                                
-                                def get_biome_entries():
-                                    """Load all biome entries from extracted_data/biomes.json."""
-                                    script_dir = os.path.dirname(os.path.dirname(__file__))
-                                    biomes_file = os.path.join(script_dir, 'extracted_data', 'biomes.json')
-                                    return load_json_list(biomes_file)
-                                
-                                def get_damage_type_entries():
-                                    """Load all damage_type entries from extracted_data/damage_types.json."""
-                                    script_dir = os.path.dirname(os.path.dirname(__file__))
-                                    damage_types_file = os.path.join(script_dir, 'extracted_data', 'damage_types.json')
-                                    return load_json_list(damage_types_file)
-                                
-                                # Build required registries list with actual entry names
-                                def get_registry_entries(registry_id):
-                                    """Get all entries for a registry from JSON, or return default."""
-                                    # Special handling for biome registry (extract from JAR)
-                                    if registry_id == "minecraft:worldgen/biome":
-                                        biome_entries = get_biome_entries()
-                                        if biome_entries:
-                                            return [(entry, None) for entry in biome_entries]
-                                        else:
-                                            # Fallback: at least include plains
-                                            return [("minecraft:plains", None)]
-                                    
-                                    # Special handling for damage_type registry (extract from JAR)
-                                    if registry_id == "minecraft:damage_type":
-                                        damage_entries = get_damage_type_entries()
-                                        if damage_entries:
-                                            return [(entry, None) for entry in damage_entries]
-                                        else:
-                                            # Fallback: at least include in_fire (required)
-                                            return [("minecraft:in_fire", None)]
-                                    
-                                    if registry_id in registry_json_data:
-                                        entries = list(registry_json_data[registry_id].keys())
-                                        return [(entry, None) for entry in entries]  # All entries, no NBT
-                                    else:
-                                        # Fallback for registries not in JSON
-                                        # NOTE: These entry names may not match actual Minecraft 1.21.10 entries
-                                        # If you get "Failed to parse local data" errors, you need to update these
-                                        # with the actual entry names from Minecraft's data files
-                                        fallbacks = {
-                                            "minecraft:dimension_type": [("minecraft:overworld", None)],
-                                            # Cat variants - these seem to work (11 entries sent successfully)
-                                            "minecraft:cat_variant": [("minecraft:tabby", None), ("minecraft:black", None), ("minecraft:red", None), ("minecraft:siamese", None), ("minecraft:british_shorthair", None), ("minecraft:calico", None), ("minecraft:persian", None), ("minecraft:ragdoll", None), ("minecraft:white", None), ("minecraft:jellie", None), ("minecraft:all_black", None)],
-                                            # Frog variants - these seem to work (3 entries sent successfully)
-                                            "minecraft:frog_variant": [("minecraft:temperate", None), ("minecraft:warm", None), ("minecraft:cold", None)],
-                                            # These registries extracted from Minecraft 1.21.10 server JAR
-                                            "minecraft:chicken_variant": [("minecraft:cold", None), ("minecraft:temperate", None), ("minecraft:warm", None)],
-                                            "minecraft:cow_variant": [("minecraft:cold", None), ("minecraft:temperate", None), ("minecraft:warm", None)],
-                                            "minecraft:pig_variant": [("minecraft:cold", None), ("minecraft:temperate", None), ("minecraft:warm", None)],
-                                            "minecraft:wolf_sound_variant": [("minecraft:angry", None), ("minecraft:big", None), ("minecraft:classic", None), ("minecraft:cute", None), ("minecraft:grumpy", None), ("minecraft:puglin", None), ("minecraft:sad", None)],
-                                            # Painting variants - common painting names
-                                            "minecraft:painting_variant": [("minecraft:kebab", None), ("minecraft:aztec", None), ("minecraft:alban", None), ("minecraft:aztec2", None), ("minecraft:bomb", None), ("minecraft:plant", None), ("minecraft:wasteland", None), ("minecraft:pool", None), ("minecraft:courbet", None), ("minecraft:sea", None), ("minecraft:sunset", None), ("minecraft:creebet", None), ("minecraft:wanderer", None), ("minecraft:graham", None), ("minecraft:match", None), ("minecraft:bust", None), ("minecraft:stage", None), ("minecraft:void", None), ("minecraft:skull_and_roses", None), ("minecraft:wither", None), ("minecraft:fighters", None), ("minecraft:pointer", None), ("minecraft:pigscene", None), ("minecraft:burning_skull", None), ("minecraft:skeleton", None), ("minecraft:donkey_kong", None)],
-                                            # Wolf variants - common wolf variants
-                                            "minecraft:wolf_variant": [("minecraft:striped", None), ("minecraft:chestnut", None), ("minecraft:rusty", None), ("minecraft:spotted", None), ("minecraft:snowy", None), ("minecraft:black", None), ("minecraft:ash", None), ("minecraft:wood", None)],
-                                        }
-                                        return fallbacks.get(registry_id, [])
-                                
-                                # Required non-empty registries
-                                required_registry_ids = [
-                                    "minecraft:dimension_type",
-                                    "minecraft:cat_variant",
-                                    "minecraft:chicken_variant",
-                                    "minecraft:cow_variant",
-                                    "minecraft:frog_variant",
-                                    "minecraft:painting_variant",
-                                    "minecraft:pig_variant",
-                                    "minecraft:wolf_variant",
-                                    "minecraft:wolf_sound_variant",
-                                    "minecraft:worldgen/biome",  # REQUIRED - must include minecraft:plains
-                                    "minecraft:damage_type",  # REQUIRED - must include minecraft:in_fire and others
-                                ]
-                                
-                                print(f"  │  → Sending Registry Data for {len(required_registry_ids)} registries...")
-                                for registry_id in required_registry_ids:
-                                    entries = get_registry_entries(registry_id)
-                                    if not entries:
-                                        print(f"  │  ⚠ Warning: No entries found for {registry_id}, skipping")
-                                        continue
-                                    try:
-                                        registry_data = PacketBuilder.build_registry_data(
-                                            registry_id=registry_id,
-                                            entries=entries
-                                        )
-                                        
-                                        # Log clientbound packet with full entries data
-                                        # Convert entries tuples to lists for JSON serialization
-                                        entries_list = [[entry_name, nbt_data] if nbt_data is not None else [entry_name] for entry_name, nbt_data in entries]
-                                        log_packet_to_file(
-                                            direction="clientbound",
-                                            connection_state=connection_state,
-                                            packet_id=0x05,  # Registry Data packet ID
-                                            packet_data=registry_data,
-                                            parsed_data={
-                                                "registry_id": registry_id,
-                                                "entry_count": len(entries),
-                                                "entries": entries_list
-                                            },
-                                            packet_name=f"Registry Data ({registry_id})"
-                                        )
-                                        
-                                        client_socket.send(registry_data)
-                                        print(f"  │  ✓ {registry_id}: {len(entries)} entry(ies) ({len(registry_data)} bytes)")
-                                    except Exception as send_error:
-                                        print(f"  │  ✗ Error sending {registry_id}: {send_error}")
-                                        import traceback
-                                        traceback.print_exc()
-                                
-                                # Send Finish Configuration
-                                print(f"  │  → Sending Finish Configuration...")
-                                try:
-                                    finish_config = PacketBuilder.build_finish_configuration()
-                                    
-                                    # Log clientbound packet
-                                    log_packet_to_file(
-                                        direction="clientbound",
-                                        connection_state=connection_state,
-                                        packet_id=0x03,  # Finish Configuration packet ID
-                                        packet_data=finish_config,
-                                        parsed_data=None,
-                                        packet_name="Finish Configuration"
-                                    )
-                                    
-                                    client_socket.send(finish_config)
-                                    print(f"  │  ✓ Finish Configuration sent ({len(finish_config)} bytes)")
-                                    print(f"  │  → Waiting for Acknowledge Finish Configuration...")
-                                except Exception as send_error:
-                                    print(f"  │  ✗ Error sending Finish Configuration: {send_error}")
-                                
-                                print(f"  └─")
-                            
-                            # Handle PLAY state packets
-                            elif connection_state == ConnectionState.PLAY:
-                                if parsed_packet_id == 0x1D:  # Set Player Position
-                                    if isinstance(parsed_packet, SetPlayerPositionPacket):
-                                        print(f"  │  Type: Set Player Position")
-                                        print(f"  │  Position: ({parsed_packet.x:.2f}, {parsed_packet.y:.2f}, {parsed_packet.z:.2f})")
-                                        
-                                        # Update player state and handle chunk loading
-                                        if world and player:
-                                            chunk_change = player.update_position(
-                                                parsed_packet.x, parsed_packet.y, parsed_packet.z
-                                            )
-                                            
-                                            # Check for item pickups (entities are updated by background thread)
-                                            items_to_pickup = player.check_item_pickups(world.item_entities)
-                                            if items_to_pickup:
-                                                for item_entity in items_to_pickup:
-                                                    try:
-                                                        # Send Pickup Item packet (for animation)
-                                                        pickup_packet = PacketBuilder.build_pickup_item(
-                                                            collected_entity_id=item_entity.entity_id,
-                                                            collector_entity_id=1,  # Player entity ID is usually 1
-                                                            pickup_count=item_entity.count
-                                                        )
-                                                        client_socket.sendall(pickup_packet)
-                                                        
-                                                        # Send Destroy Entities packet (to remove from world)
-                                                        destroy_packet = PacketBuilder.build_destroy_entities([item_entity.entity_id])
-                                                        client_socket.sendall(destroy_packet)
-                                                        
-                                                        # Find a slot for the item
-                                                        slot_idx = player.find_slot_for_item(item_entity.item_id, item_entity.count)
-                                                        
-                                                        if slot_idx is not None:
-                                                            # Determine final item ID and count
-                                                            if slot_idx in player.inventory_slots:
-                                                                # Stacking with existing items
-                                                                existing_item_id, existing_count = player.inventory_slots[slot_idx]
-                                                                new_count = existing_count + item_entity.count
-                                                                # Cap at stack size of 64
-                                                                if new_count > 64:
-                                                                    new_count = 64
-                                                                final_item_id = existing_item_id
-                                                                final_count = new_count
-                                                            else:
-                                                                # New slot
-                                                                final_item_id = item_entity.item_id
-                                                                final_count = item_entity.count
-                                                            
-                                                            # Update slot tracking
-                                                            player.update_slot(slot_idx, final_item_id, final_count)
-                                                            
-                                                            # Increment state ID
-                                                            player.inventory_state_id += 1
-                                                            
-                                                            # Send Set Container Slot packet to update client inventory
-                                                            container_slot_packet = PacketBuilder.build_set_container_slot(
-                                                                window_id=0,  # 0 = player inventory
-                                                                state_id=player.inventory_state_id,
-                                                                slot=slot_idx,
-                                                                item_id=final_item_id,
-                                                                count=final_count
-                                                            )
-                                                            client_socket.sendall(container_slot_packet)
-                                                            
-                                                            # Add to server-side inventory tracking
-                                                            player.add_to_inventory(item_entity.item_id, item_entity.count)
-                                                            
-                                                            print(f"  │  ✓ Item picked up (Entity ID: {item_entity.entity_id}, Item ID: {item_entity.item_id}, Count: {item_entity.count}, Slot: {slot_idx})")
-                                                        else:
-                                                            print(f"  │  ⚠ Inventory full, item not picked up (Entity ID: {item_entity.entity_id})")
-                                                        
-                                                        # Remove from tracking
-                                                        world.remove_item_entity(item_entity.entity_id)
-                                                    except Exception as e:
-                                                        print(f"  │  ✗ Error picking up item {item_entity.entity_id}: {e}")
-                                            
-                                            if chunk_change:
-                                                old_chunk, new_chunk = chunk_change
-                                                print(f"  │  → Player crossed chunk boundary: {old_chunk} → {new_chunk}")
-                                                
-                                                # Send Set Center Chunk
-                                                try:
-                                                    center_chunk = PacketBuilder.build_set_center_chunk(
-                                                        chunk_x=new_chunk[0],
-                                                        chunk_z=new_chunk[1]
-                                                    )
-                                                    client_socket.sendall(center_chunk)
-                                                    print(f"  │  ✓ Set Center Chunk sent ({len(center_chunk)} bytes)")
-                                                except Exception as e:
-                                                    print(f"  │  ✗ Error sending Set Center Chunk: {e}")
-                                                
-                                                # Queue new chunks for async loading
-                                                chunks_to_load = player.get_chunks_to_load()
-                                                if chunks_to_load:
-                                                    print(f"  │  → Queueing {len(chunks_to_load)} new chunk(s) for async loading...")
-                                                    chunk_loader.queue_chunks(chunks_to_load, center_chunk=new_chunk)
-                                                
-                                                # Queue distant chunks for unloading
-                                                chunks_to_unload = player.get_chunks_to_unload()
-                                                if chunks_to_unload:
-                                                    print(f"  │  → Queueing {len(chunks_to_unload)} distant chunk(s) for unloading...")
-                                                    chunk_loader.queue_unload(chunks_to_unload)
-                                        
-                                        print(f"  └─")
-                                
-                                elif parsed_packet_id == 0x1B:  # Serverbound Keep Alive
-                                    if isinstance(parsed_packet, KeepAlivePacket):
-                                        print(f"  │  Type: Keep Alive Response")
-                                        print(f"  │  Keep Alive ID: {parsed_packet.keep_alive_id}")
-                                        print(f"  └─")
-                                
-                                elif parsed_packet_id == 0x28:  # Player Action
-                                    if isinstance(parsed_packet, PlayerActionPacket):
-                                        status_names = {
-                                            0: "Started digging",
-                                            1: "Cancelled digging",
-                                            2: "Finished digging",
-                                            3: "Drop item stack",
-                                            4: "Drop item",
-                                            5: "Shoot arrow / finish eating",
-                                            6: "Swap item in hand"
-                                        }
-                                        status_name = status_names.get(parsed_packet.status, f"Unknown ({parsed_packet.status})")
-                                        print(f"  │  Type: Player Action")
-                                        print(f"  │  Status: {parsed_packet.status} ({status_name})")
-                                        print(f"  │  Location: {parsed_packet.location}")
-                                        print(f"  │  Face: {parsed_packet.face}")
-                                        print(f"  │  Sequence: {parsed_packet.sequence}")
-                                        
-                                        # Handle item dropping (Status 3 = drop stack, Status 4 = drop item)
-                                        if parsed_packet.status == 3 or parsed_packet.status == 4:
-                                            if world and player:
-                                                # Determine which slot to use (selected hotbar slot)
-                                                slot_idx = 36 + player.selected_hotbar_slot
-                                                
-                                                # Get item from slot
-                                                if slot_idx in player.inventory_slots:
-                                                    item_id, count = player.inventory_slots[slot_idx]
-                                                    
-                                                    if item_id > 0 and count > 0:
-                                                        # Determine how many items to drop
-                                                        if parsed_packet.status == 3:  # Drop stack
-                                                            drop_count = count
-                                                        else:  # status == 4, drop single item
-                                                            drop_count = 1
-                                                        
-                                                        # Calculate new count
-                                                        new_count = count - drop_count
-                                                        
-                                                        # Update slot
-                                                        if new_count > 0:
-                                                            player.update_slot(slot_idx, item_id, new_count)
-                                                        else:
-                                                            # Slot is now empty
-                                                            player.update_slot(slot_idx, 0, 0)
-                                                        
-                                                        # Increment state ID
-                                                        player.inventory_state_id += 1
-                                                        
-                                                        # Send Set Container Slot to update client inventory
-                                                        container_slot_packet = PacketBuilder.build_set_container_slot(
-                                                            window_id=0,  # Player inventory
-                                                            state_id=player.inventory_state_id,
-                                                            slot=slot_idx,
-                                                            item_id=item_id if new_count > 0 else 0,
-                                                            count=new_count
-                                                        )
-                                                        log_packet_to_file(
-                                                            direction="clientbound",
-                                                            connection_state=connection_state,
-                                                            packet_id=0x16,  # Set Container Slot packet ID
-                                                            packet_data=container_slot_packet,
-                                                            parsed_data={
-                                                                "window_id": 0,
-                                                                "state_id": player.inventory_state_id,
-                                                                "slot": slot_idx,
-                                                                "item_id": item_id if new_count > 0 else 0,
-                                                                "count": new_count
-                                                            },
-                                                            packet_name="Set Container Slot"
-                                                        )
-                                                        client_socket.sendall(container_slot_packet)
-                                                        
-                                                        # Spawn item entity in the world
-                                                        try:
-                                                            # Calculate spawn position (at player's eye level)
-                                                            # Player eye level is approximately 1.52 blocks above feet (slightly below top of head)
-                                                            spawn_x = player.x + (random.random() - 0.5) * 0.3
-                                                            spawn_y = player.y + 1.52
-                                                            spawn_z = player.z + (random.random() - 0.5) * 0.3
-                                                            
-                                                            # Generate entity ID
-                                                            entity_id = world.next_entity_id
-                                                            world.next_entity_id += 1
-                                                            
-                                                            # Generate UUID
-                                                            item_uuid = uuid.uuid4()
-                                                            
-                                                            # Calculate velocity based on player's look direction
-                                                            velocity_x, velocity_y, velocity_z = player.calculate_drop_velocity()
-                                                            
-                                                            # Get entity type ID
-                                                            item_entity_type_id = get_entity_type_id('minecraft:item')
-                                                            if item_entity_type_id is None:
-                                                                item_entity_type_id = 70  # Fallback
-                                                            
-                                                            # Spawn item entity
-                                                            spawn_packet = PacketBuilder.build_spawn_entity(
-                                                                entity_id=entity_id,
-                                                                entity_uuid=item_uuid,
-                                                                entity_type=item_entity_type_id,
-                                                                x=spawn_x,
-                                                                y=spawn_y,
-                                                                z=spawn_z,
-                                                                velocity_x=velocity_x,
-                                                                velocity_y=velocity_y,
-                                                                velocity_z=velocity_z,
-                                                                pitch=0.0,
-                                                                yaw=0.0,
-                                                                head_yaw=0.0,
-                                                                is_living_entity=True,  # Required for item entities (protocol quirk)
-                                                                has_data_field=True
-                                                            )
-                                                            log_packet_to_file(
-                                                                direction="clientbound",
-                                                                connection_state=connection_state,
-                                                                packet_id=0x01,  # Spawn Entity packet ID
-                                                                packet_data=spawn_packet,
-                                                                parsed_data={
-                                                                    "entity_id": entity_id,
-                                                                    "entity_type": item_entity_type_id,
-                                                                    "x": spawn_x,
-                                                                    "y": spawn_y,
-                                                                    "z": spawn_z
-                                                                },
-                                                                packet_name="Spawn Entity"
-                                                            )
-                                                            client_socket.sendall(spawn_packet)
-                                                            
-                                                            # Send Entity Metadata to set the item stack
-                                                            metadata_packet = PacketBuilder.build_set_entity_metadata(
-                                                                entity_id=entity_id,
-                                                                metadata=[
-                                                                    (8, 7, (item_id, drop_count))  # Index 8, type 7 (Slot), (item_id, count)
-                                                                ]
-                                                            )
-                                                            log_packet_to_file(
-                                                                direction="clientbound",
-                                                                connection_state=connection_state,
-                                                                packet_id=0x52,  # Set Entity Metadata packet ID
-                                                                packet_data=metadata_packet,
-                                                                parsed_data={
-                                                                    "entity_id": entity_id,
-                                                                    "metadata": [[8, 7, [item_id, drop_count]]]
-                                                                },
-                                                                packet_name="Set Entity Metadata"
-                                                            )
-                                                            client_socket.sendall(metadata_packet)
-                                                            
-                                                            # Track the item entity
-                                                            item_entity = ItemEntity(
-                                                                entity_id=entity_id,
-                                                                uuid=item_uuid,
-                                                                x=spawn_x,
-                                                                y=spawn_y,
-                                                                z=spawn_z,
-                                                                velocity_x=velocity_x,
-                                                                velocity_y=velocity_y,
-                                                                velocity_z=velocity_z,
-                                                                item_id=item_id,
-                                                                count=drop_count,
-                                                                spawn_time=time.time(),
-                                                                last_update_time=time.time()
-                                                            )
-                                                            world.item_entities[entity_id] = item_entity
-                                                            
-                                                            print(f"  │  ✓ Item dropped: {drop_count}x item ID {item_id} from slot {slot_idx}")
-                                                            print(f"  │  ✓ Item entity spawned (ID: {entity_id}, Pos: ({spawn_x:.1f}, {spawn_y:.1f}, {spawn_z:.1f}))")
-                                                        except Exception as e:
-                                                            print(f"  │  ✗ Error spawning dropped item: {e}")
-                                                            import traceback
-                                                            traceback.print_exc()
-                                                    else:
-                                                        print(f"  │  ⚠ No item in selected slot to drop")
-                                                else:
-                                                    print(f"  │  ⚠ Selected slot {slot_idx} is empty")
-                                        
-                                        # Handle block breaking
-                                        if parsed_packet.status == 2:  # Finished digging
-                                            x, y, z = parsed_packet.location
-                                            print(f"  │  → Block broken at ({x}, {y}, {z})")
-                                            
-                                            # Get the block state ID BEFORE breaking it (for loot table lookup)
-                                            block_state_id = None
-                                            block_name = None
-                                            if world:
-                                                # Get the actual block that's being broken
-                                                block_state_id = world.get_block_at(x, y, z)
-                                                
-                                                # Get block name from block state ID
-                                                block_name = get_block_name_from_state_id(block_state_id)
-                                                
-                                                if block_name:
-                                                    print(f"  │  → Breaking block: {block_name} (state ID: {block_state_id})")
-                                                else:
-                                                    print(f"  │  ⚠ Could not find block name for state ID {block_state_id}")
-                                            
-                                            # Update block data in world (set to air)
-                                            if world:
-                                                world.set_block(x, y, z, 0)  # 0 = air
-                                            
-                                            # Send Block Update to set block to air (block state ID 0)
-                                            try:
-                                                block_update = PacketBuilder.build_block_update(
-                                                    x=x,
-                                                    y=y,
-                                                    z=z,
-                                                    block_state_id=0  # Air
-                                                )
-                                                log_packet_to_file(
-                                                    direction="clientbound",
-                                                    connection_state=connection_state,
-                                                    packet_id=0x09,  # Block Update packet ID
-                                                    packet_data=block_update,
-                                                    parsed_data={"x": x, "y": y, "z": z, "block_state_id": 0},
-                                                    packet_name="Block Update"
-                                                )
-                                                client_socket.sendall(block_update)
-                                                print(f"  │  ✓ Block Update sent (set to air)")
-                                            except Exception as e:
-                                                print(f"  │  ✗ Error sending Block Update: {e}")
-                                            
-                                            # Spawn item drop using loot tables
-                                            if world and block_name:
-                                                # Get item name from loot table
-                                                item_name = get_item_for_block(block_name)
-                                                
-                                                if item_name is None:
-                                                    print(f"  │  ⚠ No loot table entry for {block_name}, skipping item drop")
-                                                    continue
-                                                
-                                                # Get item ID from registry
-                                                item_id = get_item_id_from_name(item_name)
-                                                
-                                                if item_id is None:
-                                                    print(f"  │  ⚠ Could not find item ID for {item_name} (from {block_name}), skipping item drop")
-                                                    continue
-                                                
-                                                print(f"  │  → Block {block_name} drops {item_name} (ID: {item_id})")
-                                                
-                                                try:
-                                                    # Generate entity ID
-                                                    entity_id = world.next_entity_id
-                                                    world.next_entity_id += 1
-                                                    
-                                                    # Generate UUID for the item entity
-                                                    import uuid as uuid_module
-                                                    item_uuid = uuid_module.uuid4()
-                                                    
-                                                    # Calculate spawn position (center of block + small offset)
-                                                    spawn_x = x + 0.5
-                                                    spawn_y = y + 0.5
-                                                    spawn_z = z + 0.5
-                                                    
-                                                    # Calculate velocity for block break drops (small random spread, mostly downward)
-                                                    # Block break drops should fall straight down, not be thrown in player's look direction
-                                                    # Calculate velocity for block break drops (small random spread, mostly downward)
-                                                    # Block break drops should fall straight down, not be thrown in player's look direction
-                                                    velocity_x = (random.random() - 0.5) * 0.1  # Small random horizontal spread
-                                                    velocity_y = 0.1  # Slight upward velocity
-                                                    velocity_z = (random.random() - 0.5) * 0.1  # Small random horizontal spread
-                                                    
-                                                    # Spawn item entity
-                                                    # Get entity type ID from registries.json (extracted from server JAR)
-                                                    # For 1.21.10: minecraft:item = 70, minecraft:item_display = 71
-                                                    # NOTE: Even though item entities are NOT living entities according to the protocol,
-                                                    # they still require the Head Yaw field (client expects 54 bytes, not 53)
-                                                    # Item entities are not listed in Object data docs, so Data field should be 0
-                                                    item_entity_type_id = get_entity_type_id('minecraft:item')
-                                                    if item_entity_type_id is None:
-                                                        print(f"  │  ⚠ Warning: Could not find entity type ID for minecraft:item, using 70 as fallback")
-                                                        item_entity_type_id = 70
-                                                    
-                                                    spawn_packet = PacketBuilder.build_spawn_entity(
-                                                        entity_id=entity_id,
-                                                        entity_uuid=item_uuid,
-                                                        entity_type=item_entity_type_id,  # Item entity type (extracted from registries.json)
-                                                        x=spawn_x,
-                                                        y=spawn_y,
-                                                        z=spawn_z,
-                                                        velocity_x=velocity_x,
-                                                        velocity_y=velocity_y,
-                                                        velocity_z=velocity_z,
-                                                        pitch=0.0,
-                                                        yaw=0.0,
-                                                        head_yaw=0.0,
-                                                        is_living_entity=True,  # Include Head Yaw (required for item entities despite not being living)
-                                                        has_data_field=True  # Include Data field (will be 0)
-                                                    )
-                                                    log_packet_to_file(
-                                                        direction="clientbound",
-                                                        connection_state=connection_state,
-                                                        packet_id=0x01,  # Spawn Entity packet ID
-                                                        packet_data=spawn_packet,
-                                                        parsed_data={
-                                                            "entity_id": entity_id,
-                                                            "entity_type": item_entity_type_id,
-                                                            "x": spawn_x,
-                                                            "y": spawn_y,
-                                                            "z": spawn_z
-                                                        },
-                                                        packet_name="Spawn Entity"
-                                                    )
-                                                    client_socket.sendall(spawn_packet)
-                                                    
-                                                    # Send Entity Metadata to set the item stack
-                                                    # For item entities, index 8 is the item stack (Slot type 7)
-                                                    metadata_packet = PacketBuilder.build_set_entity_metadata(
-                                                        entity_id=entity_id,
-                                                        metadata=[
-                                                            (8, 7, (item_id, 1))  # Index 8, type 7 (Slot), (item_id, count)
-                                                        ]
-                                                    )
-                                                    log_packet_to_file(
-                                                        direction="clientbound",
-                                                        connection_state=connection_state,
-                                                        packet_id=0x52,  # Set Entity Metadata packet ID
-                                                        packet_data=metadata_packet,
-                                                        parsed_data={
-                                                            "entity_id": entity_id,
-                                                            "metadata": [[8, 7, [item_id, 1]]]
-                                                        },
-                                                        packet_name="Set Entity Metadata"
-                                                    )
-                                                    client_socket.sendall(metadata_packet)
-                                                    
-                                                    # Track the item entity
-                                                    item_entity = ItemEntity(
-                                                        entity_id=entity_id,
-                                                        uuid=item_uuid,
-                                                        x=spawn_x,
-                                                        y=spawn_y,
-                                                        z=spawn_z,
-                                                        velocity_x=velocity_x,
-                                                        velocity_y=velocity_y,
-                                                        velocity_z=velocity_z,
-                                                        item_id=item_id,
-                                                        count=1,
-                                                        spawn_time=time.time(),
-                                                        last_update_time=time.time()
-                                                    )
-                                                    world.item_entities[entity_id] = item_entity
-                                                    
-                                                    print(f"  │  ✓ Item entity spawned and tracked (ID: {entity_id}, Item: {item_id}, Pos: ({spawn_x:.1f}, {spawn_y:.1f}, {spawn_z:.1f}))")
-                                                except Exception as e:
-                                                    print(f"  │  ✗ Error spawning item: {e}")
-                                                    import traceback
-                                                    traceback.print_exc()
-                                        
-                                        print(f"  └─")
-                                
-                                elif parsed_packet_id == 0x11:  # Click Container
-                                    if isinstance(parsed_packet, ClickContainerPacket):
-                                        print(f"  │  Type: Click Container")
-                                        print(f"  │  Window ID: {parsed_packet.window_id}")
-                                        print(f"  │  State ID: {parsed_packet.state_id}")
-                                        print(f"  │  Slot: {parsed_packet.slot}")
-                                        print(f"  │  Button: {parsed_packet.button}")
-                                        print(f"  │  Mode: {parsed_packet.mode}")
-                                        print(f"  │  Changed Slots: {len(parsed_packet.changed_slots)}")
-                                        print(f"  │  Carried Item: {parsed_packet.carried_item}")
-                                        
-                                        # Handle item dropping by dragging outside inventory (Mode 0, Slot -999)
-                                        if parsed_packet.mode == 0 and parsed_packet.slot == -999 and world and parsed_packet.window_id == 0:
-                                            # Dragging item outside inventory to drop it
-                                            # When dragging out, the client sends carried_item as (0, 0) because it's already dropped
-                                            # We need to check the previous cursor state
-                                            current_carried = parsed_packet.carried_item
-                                            previous_carried = player.cursor_item
-                                            
-                                            # If previous cursor had an item and current is empty, item was dropped
-                                            if previous_carried and previous_carried[0] > 0 and previous_carried[1] > 0:
-                                                carried_item_id, carried_count = previous_carried
-                                                
-                                                # Determine how many items to drop based on button
-                                                if parsed_packet.button == 0:
-                                                    # Left click outside = drop entire stack
-                                                    drop_count = carried_count
-                                                else:  # button == 1
-                                                    # Right click outside = drop single item
-                                                    drop_count = 1
-                                                
-                                                # Cap drop_count to available count
-                                                drop_count = min(drop_count, carried_count)
-                                                
-                                                if drop_count > 0:
-                                                    # Spawn item entity in the world
-                                                    try:
-                                                        # Calculate spawn position (at player's eye level)
-                                                        # Player eye level is approximately 1.52 blocks above feet (slightly below top of head)
-                                                        spawn_x = world.x + (random.random() - 0.5) * 0.3
-                                                        spawn_y = world.y + 1.52
-                                                        spawn_z = world.z + (random.random() - 0.5) * 0.3
-                                                        
-                                                        # Generate entity ID
-                                                        entity_id = world.next_entity_id
-                                                        world.next_entity_id += 1
-                                                        
-                                                        # Generate UUID
-                                                        item_uuid = uuid.uuid4()
-                                                        
-                                                        # Calculate velocity based on player's look direction
-                                                        velocity_x, velocity_y, velocity_z = player.calculate_drop_velocity()
-                                                        
-                                                        # Get entity type ID
-                                                        item_entity_type_id = get_entity_type_id('minecraft:item')
-                                                        if item_entity_type_id is None:
-                                                            item_entity_type_id = 70  # Fallback
-                                                        
-                                                        # Spawn item entity
-                                                        spawn_packet = PacketBuilder.build_spawn_entity(
-                                                            entity_id=entity_id,
-                                                            entity_uuid=item_uuid,
-                                                            entity_type=item_entity_type_id,
-                                                            x=spawn_x,
-                                                            y=spawn_y,
-                                                            z=spawn_z,
-                                                            velocity_x=velocity_x,
-                                                            velocity_y=velocity_y,
-                                                            velocity_z=velocity_z,
-                                                            pitch=0.0,
-                                                            yaw=0.0,
-                                                            head_yaw=0.0,
-                                                            is_living_entity=True,  # Required for item entities (protocol quirk)
-                                                            has_data_field=True
-                                                        )
-                                                        client_socket.sendall(spawn_packet)
-                                                        
-                                                        # Send Entity Metadata to set the item stack
-                                                        metadata_packet = PacketBuilder.build_set_entity_metadata(
-                                                            entity_id=entity_id,
-                                                            metadata=[
-                                                                (8, 7, (carried_item_id, drop_count))  # Index 8, type 7 (Slot), (item_id, count)
-                                                            ]
-                                                        )
-                                                        client_socket.sendall(metadata_packet)
-                                                        
-                                                        # Track the item entity
-                                                        item_entity = ItemEntity(
-                                                            entity_id=entity_id,
-                                                            uuid=item_uuid,
-                                                            x=spawn_x,
-                                                            y=spawn_y,
-                                                            z=spawn_z,
-                                                            velocity_x=velocity_x,
-                                                            velocity_y=velocity_y,
-                                                            velocity_z=velocity_z,
-                                                            item_id=carried_item_id,
-                                                            count=drop_count,
-                                                            spawn_time=time.time(),
-                                                            last_update_time=time.time()
-                                                        )
-                                                        world.item_entities[entity_id] = item_entity
-                                                        
-                                                        print(f"  │  ✓ Item dropped by dragging: {drop_count}x item ID {carried_item_id}")
-                                                        print(f"  │  ✓ Item entity spawned (ID: {entity_id}, Pos: ({spawn_x:.1f}, {spawn_y:.1f}, {spawn_z:.1f}))")
-                                                    except Exception as e:
-                                                        print(f"  │  ✗ Error spawning dropped item: {e}")
-                                                        import traceback
-                                                        traceback.print_exc()
-                                            
-                                            # Update cursor item state
-                                            if current_carried[0] > 0 and current_carried[1] > 0:
-                                                player.cursor_item = current_carried
-                                            else:
-                                                player.cursor_item = None
-                                        
-                                        # Handle item dropping (Mode 4)
-                                        if parsed_packet.mode == 4 and world and parsed_packet.window_id == 0:
-                                            # Mode 4: Drop item
-                                            # Button 0: Drop key (Q) - drops 1 item
-                                            # Button 1: Control + Drop key (Q) - drops entire stack
-                                            # Slot indicates which slot the item is being dropped from
-                                            
-                                            slot_number = parsed_packet.slot
-                                            if slot_number in player.inventory_slots:
-                                                item_id, count = player.inventory_slots[slot_number]
-                                                
-                                                if item_id > 0 and count > 0:
-                                                    # Determine how many items to drop
-                                                    if parsed_packet.button == 0:
-                                                        # Drop 1 item
-                                                        drop_count = 1
-                                                    else:  # button == 1
-                                                        # Drop entire stack
-                                                        drop_count = count
-                                                    
-                                                    # Calculate new count
-                                                    new_count = count - drop_count
-                                                    
-                                                    # Update slot
-                                                    if new_count > 0:
-                                                        player.update_slot(slot_number, item_id, new_count)
-                                                    else:
-                                                        # Slot is now empty
-                                                        player.update_slot(slot_number, 0, 0)
-                                                    
-                                                    # Increment state ID
-                                                    player.inventory_state_id += 1
-                                                    
-                                                    # Send Set Container Slot to update client inventory
-                                                    container_slot_packet = PacketBuilder.build_set_container_slot(
-                                                        window_id=0,  # Player inventory
-                                                        state_id=player.inventory_state_id,
-                                                        slot=slot_number,
-                                                        item_id=item_id if new_count > 0 else 0,
-                                                        count=new_count
-                                                    )
-                                                    log_packet_to_file(
-                                                        direction="clientbound",
-                                                        connection_state=connection_state,
-                                                        packet_id=0x16,  # Set Container Slot packet ID
-                                                        packet_data=container_slot_packet,
-                                                        parsed_data={
-                                                            "window_id": 0,
-                                                            "state_id": player.inventory_state_id,
-                                                            "slot": slot_number,
-                                                            "item_id": item_id if new_count > 0 else 0,
-                                                            "count": new_count
-                                                        },
-                                                        packet_name="Set Container Slot"
-                                                    )
-                                                    client_socket.sendall(container_slot_packet)
-                                                    
-                                                    # Spawn item entity in the world
-                                                    try:
-                                                        # Calculate spawn position (at player's eye level)
-                                                        # Player eye level is approximately 1.52 blocks above feet (slightly below top of head)
-                                                        spawn_x = world.x + (random.random() - 0.5) * 0.3
-                                                        spawn_y = world.y + 1.52
-                                                        spawn_z = world.z + (random.random() - 0.5) * 0.3
-                                                        
-                                                        # Generate entity ID
-                                                        entity_id = world.next_entity_id
-                                                        world.next_entity_id += 1
-                                                        
-                                                        # Generate UUID
-                                                        item_uuid = uuid.uuid4()
-                                                        
-                                                        # Calculate velocity based on player's look direction
-                                                        velocity_x, velocity_y, velocity_z = player.calculate_drop_velocity()
-                                                        
-                                                        # Get entity type ID
-                                                        item_entity_type_id = get_entity_type_id('minecraft:item')
-                                                        if item_entity_type_id is None:
-                                                            item_entity_type_id = 70  # Fallback
-                                                        
-                                                        # Spawn item entity
-                                                        spawn_packet = PacketBuilder.build_spawn_entity(
-                                                            entity_id=entity_id,
-                                                            entity_uuid=item_uuid,
-                                                            entity_type=item_entity_type_id,
-                                                            x=spawn_x,
-                                                            y=spawn_y,
-                                                            z=spawn_z,
-                                                            velocity_x=velocity_x,
-                                                            velocity_y=velocity_y,
-                                                            velocity_z=velocity_z,
-                                                            pitch=0.0,
-                                                            yaw=0.0,
-                                                            head_yaw=0.0,
-                                                            is_living_entity=True,  # Required for item entities (protocol quirk)
-                                                            has_data_field=True
-                                                        )
-                                                        log_packet_to_file(
-                                                            direction="clientbound",
-                                                            connection_state=connection_state,
-                                                            packet_id=0x01,  # Spawn Entity packet ID
-                                                            packet_data=spawn_packet,
-                                                            parsed_data={
-                                                                "entity_id": entity_id,
-                                                                "entity_type": item_entity_type_id,
-                                                                "x": spawn_x,
-                                                                "y": spawn_y,
-                                                                "z": spawn_z
-                                                            },
-                                                            packet_name="Spawn Entity"
-                                                        )
-                                                        client_socket.sendall(spawn_packet)
-                                                        
-                                                        # Send Entity Metadata to set the item stack
-                                                        metadata_packet = PacketBuilder.build_set_entity_metadata(
-                                                            entity_id=entity_id,
-                                                            metadata=[
-                                                                (8, 7, (item_id, drop_count))  # Index 8, type 7 (Slot), (item_id, count)
-                                                            ]
-                                                        )
-                                                        log_packet_to_file(
-                                                            direction="clientbound",
-                                                            connection_state=connection_state,
-                                                            packet_id=0x52,  # Set Entity Metadata packet ID
-                                                            packet_data=metadata_packet,
-                                                            parsed_data={
-                                                                "entity_id": entity_id,
-                                                                "metadata": [[8, 7, [item_id, drop_count]]]
-                                                            },
-                                                            packet_name="Set Entity Metadata"
-                                                        )
-                                                        client_socket.sendall(metadata_packet)
-                                                        
-                                                        # Track the item entity
-                                                        item_entity = ItemEntity(
-                                                            entity_id=entity_id,
-                                                            uuid=item_uuid,
-                                                            x=spawn_x,
-                                                            y=spawn_y,
-                                                            z=spawn_z,
-                                                            velocity_x=velocity_x,
-                                                            velocity_y=velocity_y,
-                                                            velocity_z=velocity_z,
-                                                            item_id=item_id,
-                                                            count=drop_count,
-                                                            spawn_time=time.time(),
-                                                            last_update_time=time.time()
-                                                        )
-                                                        world.item_entities[entity_id] = item_entity
-                                                        
-                                                        print(f"  │  ✓ Item dropped: {drop_count}x item ID {item_id} from slot {slot_number}")
-                                                        print(f"  │  ✓ Item entity spawned (ID: {entity_id}, Pos: ({spawn_x:.1f}, {spawn_y:.1f}, {spawn_z:.1f}))")
-                                                    except Exception as e:
-                                                        print(f"  │  ✗ Error spawning dropped item: {e}")
-                                                        import traceback
-                                                        traceback.print_exc()
-                                        
-                                        # Update cursor item state (for all Click Container packets)
-                                        if world:
-                                            current_carried = parsed_packet.carried_item
-                                            if current_carried[0] > 0 and current_carried[1] > 0:
-                                                player.cursor_item = current_carried
-                                            else:
-                                                player.cursor_item = None
-                                        
-                                        # Update server-side inventory model
-                                        if world and parsed_packet.window_id == 0:  # Player inventory
-                                            # Update changed slots (for all modes, including drops)
-                                            for slot_number, item_id, count in parsed_packet.changed_slots:
-                                                if count > 0 and item_id > 0:
-                                                    player.update_slot(slot_number, item_id, count)
-                                                else:
-                                                    # Empty slot
-                                                    player.update_slot(slot_number, 0, 0)
-                                            
-                                            # Update state ID
-                                            player.inventory_state_id = parsed_packet.state_id
-                                            
-                                            if parsed_packet.mode != 4:  # Don't double-log for drops
-                                                print(f"  │  ✓ Inventory updated ({len(parsed_packet.changed_slots)} slot(s) changed)")
-                                        
-                                        print(f"  └─")
-                                
-                                elif parsed_packet_id == 0x34:  # Set Held Item (serverbound)
-                                    if isinstance(parsed_packet, SetHeldItemPacket):
-                                        print(f"  │  Type: Set Held Item")
-                                        print(f"  │  Selected Slot: {parsed_packet.slot} (hotbar slot {parsed_packet.slot}, inventory slot {36 + parsed_packet.slot})")
-                                        
-                                        # Update selected hotbar slot
-                                        if world:
-                                            player.selected_hotbar_slot = parsed_packet.slot
-                                            print(f"  │  ✓ Selected hotbar slot updated to {parsed_packet.slot}")
-                                        
-                                        print(f"  └─")
-                                
-                                elif parsed_packet_id == 0x3F:  # Use Item On
-                                    if isinstance(parsed_packet, UseItemOnPacket):
-                                        print(f"  │  Type: Use Item On")
-                                        print(f"  │  Hand: {parsed_packet.hand} ({'main hand' if parsed_packet.hand == 0 else 'off hand'})")
-                                        print(f"  │  Location: {parsed_packet.location}")
-                                        print(f"  │  Face: {parsed_packet.face}")
-                                        print(f"  │  Sequence: {parsed_packet.sequence}")
-                                        
-                                        # Handle block placement
-                                        if world:
-                                            # Determine which slot to use based on hand
-                                            if parsed_packet.hand == 0:  # Main hand
-                                                # Use currently selected hotbar slot (0-8 maps to 36-44)
-                                                slot_idx = 36 + player.selected_hotbar_slot
-                                            else:  # Off hand
-                                                slot_idx = 45  # Offhand slot
-                                            
-                                            # Get item from slot
-                                            if slot_idx in player.inventory_slots:
-                                                item_id, count = player.inventory_slots[slot_idx]
-                                                
-                                                if item_id > 0 and count > 0:
-                                                    # Decrement item count
-                                                    new_count = count - 1
-                                                    
-                                                    # Update slot
-                                                    if new_count > 0:
-                                                        player.update_slot(slot_idx, item_id, new_count)
-                                                    else:
-                                                        # Slot is now empty
-                                                        player.update_slot(slot_idx, 0, 0)
-                                                    
-                                                    # Increment state ID
-                                                    player.inventory_state_id += 1
-                                                    
-                                                    # Send Set Container Slot to update client inventory
-                                                    container_slot_packet = PacketBuilder.build_set_container_slot(
-                                                            window_id=0,  # Player inventory
-                                                            state_id=player.inventory_state_id,
-                                                        slot=slot_idx,
-                                                        item_id=item_id if new_count > 0 else 0,
-                                                        count=new_count
-                                                    )
-                                                    log_packet_to_file(
-                                                        direction="clientbound",
-                                                        connection_state=connection_state,
-                                                        packet_id=0x16,  # Set Container Slot packet ID
-                                                        packet_data=container_slot_packet,
-                                                        parsed_data={
-                                                            "window_id": 0,
-                                                            "state_id": player.inventory_state_id,
-                                                            "slot": slot_idx,
-                                                            "item_id": item_id if new_count > 0 else 0,
-                                                            "count": new_count
-                                                        },
-                                                        packet_name="Set Container Slot"
-                                                    )
-                                                    client_socket.sendall(container_slot_packet)
-                                                    
-                                                    # Calculate block placement position (adjacent to clicked face)
-                                                    x, y, z = parsed_packet.location
-                                                    face = parsed_packet.face
-                                                    # Face: 0=bottom, 1=top, 2=north, 3=south, 4=west, 5=east
-                                                    face_offsets = {
-                                                        0: (0, -1, 0),  # Bottom
-                                                        1: (0, 1, 0),   # Top
-                                                        2: (0, 0, -1),  # North
-                                                        3: (0, 0, 1),   # South
-                                                        4: (-1, 0, 0),  # West
-                                                        5: (1, 0, 0)    # East
-                                                    }
-                                                    dx, dy, dz = face_offsets.get(face, (0, 1, 0))
-                                                    place_x, place_y, place_z = x + dx, y + dy, z + dz
-                                                    
-                                                    # Map item_id to block_state_id
-                                                    block_state_id = get_block_state_id_from_item_id(item_id)
-                                                    
-                                                    if block_state_id is None:
-                                                        print(f"  │  ⚠ Could not map item ID {item_id} to block state ID, skipping block placement")
-                                                        continue
-                                                    
-                                                    # Update block data in world
-                                                    if world:
-                                                        # Determine block ID from block state ID (simplified - in reality need to map state to block)
-                                                        # For now, assume block_state_id corresponds to block ID
-                                                        world.set_block(place_x, place_y, place_z, block_state_id)
-                                                    
-                                                    # Send Block Update to place the block
-                                                    try:
-                                                        block_update = PacketBuilder.build_block_update(
-                                                            x=place_x,
-                                                            y=place_y,
-                                                            z=place_z,
-                                                            block_state_id=block_state_id
-                                                        )
-                                                        log_packet_to_file(
-                                                            direction="clientbound",
-                                                            connection_state=connection_state,
-                                                            packet_id=0x09,  # Block Update packet ID
-                                                            packet_data=block_update,
-                                                            parsed_data={
-                                                                "x": place_x,
-                                                                "y": place_y,
-                                                                "z": place_z,
-                                                                "block_state_id": block_state_id
-                                                            },
-                                                            packet_name="Block Update"
-                                                        )
-                                                        client_socket.sendall(block_update)
-                                                        print(f"  │  ✓ Block placed at ({place_x}, {place_y}, {place_z})")
-                                                        print(f"  │  ✓ Inventory updated (Item ID: {item_id}, Count: {count} → {new_count})")
-                                                    except Exception as e:
-                                                        print(f"  │  ✗ Error placing block: {e}")
-                                                else:
-                                                    print(f"  │  ⚠ No item in hand to place")
-                                            else:
-                                                print(f"  │  ⚠ Slot {slot_idx} is empty")
-                                        
-                                        print(f"  └─")
-                                
-                                elif parsed_packet_id == 0x1F:  # Set Player Rotation
-                                    if isinstance(parsed_packet, SetPlayerRotationPacket):
-                                        print(f"  │  Type: Set Player Rotation")
-                                        print(f"  │  Rotation: yaw={parsed_packet.yaw:.2f}, pitch={parsed_packet.pitch:.2f}")
-                                        
-                                        # Update player state with head rotation (this is the camera/head rotation)
-                                        if world and player:
-                                            player.yaw = parsed_packet.yaw
-                                            player.pitch = parsed_packet.pitch
-                                        
-                                        print(f"  └─")
-                                
-                                elif parsed_packet_id == 0x1E:  # Set Player Position and Rotation
-                                    if isinstance(parsed_packet, SetPlayerPositionAndRotationPacket):
-                                        print(f"  │  Type: Set Player Position and Rotation")
-                                        print(f"  │  Position: ({parsed_packet.x:.2f}, {parsed_packet.y:.2f}, {parsed_packet.z:.2f})")
-                                        print(f"  │  Rotation: yaw={parsed_packet.yaw:.2f}, pitch={parsed_packet.pitch:.2f}")
-                                        
-                                        # Update player state with position and rotation
-                                        if world:
-                                            player.x = parsed_packet.x
-                                            player.y = parsed_packet.y
-                                            player.z = parsed_packet.z
-                                            player.yaw = parsed_packet.yaw
-                                            player.pitch = parsed_packet.pitch
-                                        
-                                        # Update player state and handle chunk loading (same as position only)
-                                        if world and player:
-                                            chunk_change = player.update_position(
-                                                parsed_packet.x, parsed_packet.y, parsed_packet.z
-                                            )
-                                            
-                                            # Check for item pickups (entities are updated by background thread)
-                                            items_to_pickup = player.check_item_pickups(world.item_entities)
-                                            if items_to_pickup:
-                                                for item_entity in items_to_pickup:
-                                                    try:
-                                                        # Send Pickup Item packet (for animation)
-                                                        pickup_packet = PacketBuilder.build_pickup_item(
-                                                            collected_entity_id=item_entity.entity_id,
-                                                            collector_entity_id=1,  # Player entity ID is usually 1
-                                                            pickup_count=item_entity.count
-                                                        )
-                                                        client_socket.sendall(pickup_packet)
-                                                        
-                                                        # Send Destroy Entities packet (to remove from world)
-                                                        destroy_packet = PacketBuilder.build_destroy_entities([item_entity.entity_id])
-                                                        client_socket.sendall(destroy_packet)
-                                                        
-                                                        # Find a slot for the item
-                                                        slot_idx = player.find_slot_for_item(item_entity.item_id, item_entity.count)
-                                                        
-                                                        if slot_idx is not None:
-                                                            # Determine final item ID and count
-                                                            if slot_idx in player.inventory_slots:
-                                                                # Stacking with existing items
-                                                                existing_item_id, existing_count = player.inventory_slots[slot_idx]
-                                                                new_count = existing_count + item_entity.count
-                                                                # Cap at stack size of 64
-                                                                if new_count > 64:
-                                                                    new_count = 64
-                                                                final_item_id = existing_item_id
-                                                                final_count = new_count
-                                                            else:
-                                                                # New slot
-                                                                final_item_id = item_entity.item_id
-                                                                final_count = item_entity.count
-                                                            
-                                                            # Update slot tracking
-                                                            player.update_slot(slot_idx, final_item_id, final_count)
-                                                            
-                                                            # Increment state ID
-                                                            player.inventory_state_id += 1
-                                                            
-                                                            # Send Set Container Slot packet to update client inventory
-                                                            container_slot_packet = PacketBuilder.build_set_container_slot(
-                                                                window_id=0,  # 0 = player inventory
-                                                                state_id=player.inventory_state_id,
-                                                                slot=slot_idx,
-                                                                item_id=final_item_id,
-                                                                count=final_count
-                                                            )
-                                                            client_socket.sendall(container_slot_packet)
-                                                            
-                                                            # Add to server-side inventory tracking
-                                                            player.add_to_inventory(item_entity.item_id, item_entity.count)
-                                                            
-                                                            print(f"  │  ✓ Item picked up (Entity ID: {item_entity.entity_id}, Item ID: {item_entity.item_id}, Count: {item_entity.count}, Slot: {slot_idx})")
-                                                        else:
-                                                            print(f"  │  ⚠ Inventory full, item not picked up (Entity ID: {item_entity.entity_id})")
-                                                        
-                                                        # Remove from tracking
-                                                        world.remove_item_entity(item_entity.entity_id)
-                                                    except Exception as e:
-                                                        print(f"  │  ✗ Error picking up item {item_entity.entity_id}: {e}")
-                                            
-                                            if chunk_change:
-                                                old_chunk, new_chunk = chunk_change
-                                                print(f"  │  → Player crossed chunk boundary: {old_chunk} → {new_chunk}")
-                                                
-                                                # Send Set Center Chunk
-                                                try:
-                                                    center_chunk = PacketBuilder.build_set_center_chunk(
-                                                        chunk_x=new_chunk[0],
-                                                        chunk_z=new_chunk[1]
-                                                    )
-                                                    client_socket.sendall(center_chunk)
-                                                    print(f"  │  ✓ Set Center Chunk sent ({len(center_chunk)} bytes)")
-                                                except Exception as e:
-                                                    print(f"  │  ✗ Error sending Set Center Chunk: {e}")
-                                                
-                                                # Queue new chunks for async loading
-                                                chunks_to_load = player.get_chunks_to_load()
-                                                if chunks_to_load:
-                                                    print(f"  │  → Queueing {len(chunks_to_load)} new chunk(s) for async loading...")
-                                                    chunk_loader.queue_chunks(chunks_to_load, center_chunk=new_chunk)
-                                                
-                                                # Queue distant chunks for unloading
-                                                chunks_to_unload = player.get_chunks_to_unload()
-                                                if chunks_to_unload:
-                                                    print(f"  │  → Queueing {len(chunks_to_unload)} distant chunk(s) for unloading...")
-                                                    chunk_loader.queue_unload(chunks_to_unload)
-                                        
-                                        print(f"  └─")
-                            
-                            else:
-                                print(f"  │  Type: {type(parsed_packet).__name__}")
-                                print(f"  │  Data: {parsed_packet}")
-                            
-                            print(f"  └─")
-                        else:
-                            # Handle known packets that return None
-                            if connection_state == ConnectionState.LOGIN and parsed_packet_id == 3:
-                                print(f"  ┌─ Parsed Packet Data:")
-                                print(f"  │  Type: Login Acknowledged")
-                                
-                                # Log serverbound packet (already logged above, but ensure it's captured)
-                                # The packet was already logged in the main parsing section
-                                
-                                print(f"  │  → Login complete! Transitioning to CONFIGURATION state")
-                                connection_state = ConnectionState.CONFIGURATION
-                                print(f"  └─")
-                            elif connection_state == ConnectionState.CONFIGURATION and parsed_packet_id == 3:
-                                print(f"  ┌─ Parsed Packet Data:")
-                                print(f"  │  Type: Acknowledge Finish Configuration")
-                                
-                                # Log serverbound packet (already logged above, but ensure it's captured)
-                                # The packet was already logged in the main parsing section
-                                
-                                print(f"  │  → Configuration complete! Transitioning to PLAY state")
-                                connection_state = ConnectionState.PLAY
-                                
-                                # Initialize world state
-                                world = World(view_distance=10, use_terrain_generation=False)                                
-                                # Start web server for visualization (if not already started)
-                                if web_server_thread is None or not web_server_thread.is_alive():
-                                    web_server_thread = threading.Thread(
-                                        target=run_web_server,
-                                        args=('127.0.0.1', 5000, world),
-                                        daemon=True
-                                    )
-                                    web_server_thread.start()
-                                    print(f"  │  ✓ Web visualization server started at http://127.0.0.1:5000")
-                                
-                                # Create player instance
-                                if player_uuid is None:
-                                    print(f"  │  ⚠ Warning: Player UUID not set, using default UUID")
-                                    player_uuid = uuid.uuid4()
-                                
-                                player = Player(player_uuid, view_distance=10, world=world)
-                                player.update_position(0.0, 65.0, 0.0)  # Spawn position
-                                world.add_player(player)
-                                
-                                # Loot tables should already be loaded during server initialization
-                                # Just verify they're available (should be instant since already cached)
-                                if not hasattr(load_loot_tables, '_loot_table_cache') or not load_loot_tables._loot_table_cache:
-                                    print(f"  │  ⚠ Warning: Loot tables not pre-loaded, loading now...")
-                                    load_loot_tables()
-                                
-                                # Initialize chunk loader (background thread)
-                                chunk_loader = ChunkLoader(client_socket, player, keep_alive_stop_event)
-                                chunk_loader.start()
-                                print(f"  │  ✓ Chunk loader thread started")
-                                
-                                # Send Login (play) packet
-                                print(f"  │  → Sending Login (play) packet...")
-                                try:
-                                    login_play = PacketBuilder.build_login_play(
-                                        entity_id=1,
-                                        dimension_names=["minecraft:overworld"],
-                                        game_mode=0,  # Survival
-                                        dimension_name="minecraft:overworld"
-                                    )
-                                    client_socket.sendall(login_play)
-                                    print(f"  │  ✓ Login (play) sent ({len(login_play)} bytes)")
-                                    
-                                    # Send Synchronize Player Position (spawn at 0, 65, 0 - on top of grass at y=64)
-                                    print(f"  │  → Sending Synchronize Player Position...")
-                                    try:
-                                        player_pos = PacketBuilder.build_synchronize_player_position(
-                                            x=0.0,
-                                            y=65.0,  # On top of grass at y=64
-                                            z=0.0,
-                                            yaw=0.0,
-                                            pitch=0.0,
-                                            teleport_id=0
-                                        )
-                                        
-                                        # Log clientbound packet
-                                        log_packet_to_file(
-                                            direction="clientbound",
-                                            connection_state=connection_state,
-                                            packet_id=0x3E,  # Synchronize Player Position packet ID
-                                            packet_data=player_pos,
-                                            parsed_data={
-                                                "x": 0.0,
-                                                "y": 65.0,
-                                                "z": 0.0,
-                                                "yaw": 0.0,
-                                                "pitch": 0.0,
-                                                "teleport_id": 0
-                                            },
-                                            packet_name="Synchronize Player Position"
-                                        )
-                                        
-                                        client_socket.sendall(player_pos)
-                                        print(f"  │  ✓ Player Position sent ({len(player_pos)} bytes)")
-                                    except Exception as pos_error:
-                                        print(f"  │  ✗ Error sending Player Position: {pos_error}")
-                                        import traceback
-                                        traceback.print_exc()
-                                    
-                                    # Send Update Time
-                                    print(f"  │  → Sending Update Time...")
-                                    try:
-                                        update_time = PacketBuilder.build_update_time(
-                                            world_age=0,
-                                            time_of_day=6000,  # Noon
-                                            time_increasing=True
-                                        )
-                                        
-                                        # Log clientbound packet
-                                        log_packet_to_file(
-                                            direction="clientbound",
-                                            connection_state=connection_state,
-                                            packet_id=0x5E,  # Update Time packet ID
-                                            packet_data=update_time,
-                                            parsed_data={
-                                                "world_age": 0,
-                                                "time_of_day": 6000,
-                                                "time_increasing": True
-                                            },
-                                            packet_name="Update Time"
-                                        )
-                                        
-                                        client_socket.sendall(update_time)
-                                        print(f"  │  ✓ Update Time sent ({len(update_time)} bytes)")
-                                    except Exception as time_error:
-                                        print(f"  │  ✗ Error sending Update Time: {time_error}")
-                                        import traceback
-                                        traceback.print_exc()
-                                    
-                                    # Send Game Event (event 13: "Start waiting for level chunks")
-                                    # Required for client to spawn after receiving chunks
-                                    print(f"  │  → Sending Game Event (Start waiting for level chunks)...")
-                                    try:
-                                        game_event = PacketBuilder.build_game_event(
-                                            event=13,  # Start waiting for level chunks
-                                            value=0.0
-                                        )
-                                        
-                                        # Log clientbound packet
-                                        log_packet_to_file(
-                                            direction="clientbound",
-                                            connection_state=connection_state,
-                                            packet_id=0x1C,  # Game Event packet ID
-                                            packet_data=game_event,
-                                            parsed_data={
-                                                "event": 13,
-                                                "value": 0.0
-                                            },
-                                            packet_name="Game Event"
-                                        )
-                                        
-                                        client_socket.sendall(game_event)
-                                        print(f"  │  ✓ Game Event sent ({len(game_event)} bytes)")
-                                    except Exception as event_error:
-                                        print(f"  │  ✗ Error sending Game Event: {event_error}")
-                                        import traceback
-                                        traceback.print_exc()
-                                    
-                                    # Send Set Center Chunk (spawn chunk)
-                                    print(f"  │  → Sending Set Center Chunk...")
-                                    try:
-                                        center_chunk = PacketBuilder.build_set_center_chunk(
-                                            chunk_x=0,
-                                            chunk_z=0
-                                        )
-                                        
-                                        # Log clientbound packet
-                                        log_packet_to_file(
-                                            direction="clientbound",
-                                            connection_state=connection_state,
-                                            packet_id=0x4B,  # Set Center Chunk packet ID
-                                            packet_data=center_chunk,
-                                            parsed_data={
-                                                "chunk_x": 0,
-                                                "chunk_z": 0
-                                            },
-                                            packet_name="Set Center Chunk"
-                                        )
-                                        
-                                        client_socket.sendall(center_chunk)
-                                        print(f"  │  ✓ Set Center Chunk sent ({len(center_chunk)} bytes)")
-                                    except Exception as center_error:
-                                        print(f"  │  ✗ Error sending Set Center Chunk: {center_error}")
-                                        import traceback
-                                        traceback.print_exc()
-                                    
-                                    # Send Chunk Data based on view distance
-                                    # Load all chunks within view distance + buffer for neighbors
-                                    # Chunk loading happens asynchronously in background thread
-                                    print(f"  │  → Queueing initial chunks around spawn (view distance: {player.view_distance})...")
-                                    try:
-                                        # Get all chunks that should be loaded around spawn (chunk 0, 0)
-                                        spawn_chunk_x, spawn_chunk_z = 0, 0
-                                        chunks_to_load = player.get_chunks_in_range()
-                                        
-                                        # Queue chunks for async loading
-                                        chunk_loader.queue_chunks(chunks_to_load, center_chunk=(spawn_chunk_x, spawn_chunk_z))
-                                        print(f"  │  ✓ Queued {len(chunks_to_load)} chunks for async loading")
-                                    except Exception as chunk_error:
-                                        print(f"  │  ✗ Error queueing initial chunks: {chunk_error}")
-                                        import traceback
-                                        traceback.print_exc()
-                                    
-                                    print(f"  │  → Client should now be in world!")
-                                    
-                                    # Start keep alive thread
-                                    def keep_alive_worker():
-                                        """Send keep alive packets every 10 seconds."""
-                                        while not keep_alive_stop_event.is_set():
-                                            try:
-                                                # Generate keep alive ID (timestamp in milliseconds)
-                                                keep_alive_id = int(time.time() * 1000)
-                                                last_keep_alive_id = keep_alive_id
-                                                
-                                                keep_alive_packet = PacketBuilder.build_keep_alive(keep_alive_id)
-                                                log_packet_to_file(
-                                                    direction="clientbound",
-                                                    connection_state=ConnectionState.PLAY,
-                                                    packet_id=0x24,  # Keep Alive packet ID
-                                                    packet_data=keep_alive_packet,
-                                                    parsed_data={"keep_alive_id": keep_alive_id},
-                                                    packet_name="Keep Alive"
-                                                )
-                                                client_socket.sendall(keep_alive_packet)
-                                                print(f"  │  → Keep Alive sent (ID: {keep_alive_id})")
-                                                
-                                                # Wait 10 seconds
-                                                keep_alive_stop_event.wait(10.0)
-                                            except Exception as e:
-                                                print(f"  │  ✗ Error sending Keep Alive: {e}")
-                                                break
-                                    
-                                    keep_alive_thread = threading.Thread(target=keep_alive_worker, daemon=True)
-                                    keep_alive_thread.start()
-                                    print(f"  │  ✓ Keep Alive thread started")
-                                    
-                                except Exception as send_error:
-                                    print(f"  │  ✗ Error sending Login (play): {send_error}")
-                                    import traceback
-                                    traceback.print_exc()
-                                
-                                print(f"  └─")
-                            
-                            else:
-                                print(f"  └─ (Packet ID {parsed_packet_id} not recognized in {connection_state.name} state)")
+            conn.send(player_pos)
+            print(f"  │  ✓ Player Position sent ({len(player_pos)} bytes)")
+        except Exception as pos_error:
+            print(f"  │  ✗ Error sending Player Position: {pos_error}")
+            import traceback
+            traceback.print_exc()
+        
+        # Send Update Time
+        print(f"  │  → Sending Update Time...")
+        try:
+            update_time = PacketBuilder.build_update_time(
+                world_age=0,
+                time_of_day=6000,  # Noon
+                time_increasing=True
+            )
+            
+            # Log clientbound packet
+            log_packet_to_file(
+                direction="clientbound",
+                connection_state=conn.connection_state,
+                packet_id=clientbound_id(ConnectionState.PLAY, 'minecraft:set_time'),
+                packet_data=update_time,
+                parsed_data={
+                    "world_age": 0,
+                    "time_of_day": 6000,
+                    "time_increasing": True
+                },
+                packet_name="Update Time"
+            )
+            
+            conn.send(update_time)
+            print(f"  │  ✓ Update Time sent ({len(update_time)} bytes)")
+        except Exception as time_error:
+            print(f"  │  ✗ Error sending Update Time: {time_error}")
+            import traceback
+            traceback.print_exc()
+        
+        # Send Game Event (event 13: "Start waiting for level chunks")
+        # Required for client to spawn after receiving chunks
+        print(f"  │  → Sending Game Event (Start waiting for level chunks)...")
+        try:
+            game_event = PacketBuilder.build_game_event(
+                event=13,  # Start waiting for level chunks
+                value=0.0
+            )
+            
+            # Log clientbound packet
+            log_packet_to_file(
+                direction="clientbound",
+                connection_state=conn.connection_state,
+                packet_id=clientbound_id(ConnectionState.PLAY, 'minecraft:game_event'),
+                packet_data=game_event,
+                parsed_data={
+                    "event": 13,
+                    "value": 0.0
+                },
+                packet_name="Game Event"
+            )
+            
+            conn.send(game_event)
+            print(f"  │  ✓ Game Event sent ({len(game_event)} bytes)")
+        except Exception as event_error:
+            print(f"  │  ✗ Error sending Game Event: {event_error}")
+            import traceback
+            traceback.print_exc()
+        
+        # Send Set Center Chunk (spawn chunk)
+        print(f"  │  → Sending Set Center Chunk...")
+        try:
+            center_chunk = PacketBuilder.build_set_center_chunk(
+                chunk_x=0,
+                chunk_z=0
+            )
+            
+            # Log clientbound packet
+            log_packet_to_file(
+                direction="clientbound",
+                connection_state=conn.connection_state,
+                packet_id=clientbound_id(ConnectionState.PLAY, 'minecraft:set_chunk_cache_center'),
+                packet_data=center_chunk,
+                parsed_data={
+                    "chunk_x": 0,
+                    "chunk_z": 0
+                },
+                packet_name="Set Center Chunk"
+            )
+            
+            conn.send(center_chunk)
+            print(f"  │  ✓ Set Center Chunk sent ({len(center_chunk)} bytes)")
+        except Exception as center_error:
+            print(f"  │  ✗ Error sending Set Center Chunk: {center_error}")
+            import traceback
+            traceback.print_exc()
+        
+        # Send Chunk Data based on view distance
+        # Load all chunks within view distance + buffer for neighbors
+        # Chunk loading happens asynchronously in background thread
+        print(f"  │  → Queueing initial chunks around spawn (view distance: {conn.player.view_distance})...")
+        try:
+            # Get all chunks that should be loaded around spawn (chunk 0, 0)
+            spawn_chunk_x, spawn_chunk_z = 0, 0
+            chunks_to_load = conn.player.get_chunks_in_range()
+            
+            # Queue chunks for async loading
+            conn.chunk_loader.queue_chunks(chunks_to_load, center_chunk=(spawn_chunk_x, spawn_chunk_z))
+            print(f"  │  ✓ Queued {len(chunks_to_load)} chunks for async loading")
+        except Exception as chunk_error:
+            print(f"  │  ✗ Error queueing initial chunks: {chunk_error}")
+            import traceback
+            traceback.print_exc()
+        
+        print(f"  │  → Client should now be in world!")
+        
+        # Keep alives are sent by the shared scheduler
+        keep_alive_scheduler.register(conn)
+        print(f"  │  ✓ Registered for Keep Alive")
+        
+        # Entities, pickups and chunk streaming are driven by the game loop
+        play_connections.add(conn)
+        
+    except Exception as send_error:
+        print(f"  │  ✗ Error sending Login (play): {send_error}")
+        import traceback
+        traceback.print_exc()
+
+
+def set_block_and_broadcast(conn: ClientConnection, x: int, y: int, z: int, block_state_id: int) -> bytes:
+    """
+    Change a block in the shared world and send the Block Update to every
+    player viewing its chunk (always including the player who changed it),
+    followed by Update Light packets for the sections whose light changed.
+    
+    Args:
+        conn: Connection of the player making the change
+        x: World X coordinate
+        y: World Y coordinate
+        z: World Z coordinate
+        block_state_id: New block state ID
+        
+    Returns:
+        The Block Update packet that was sent
+    """
+    world = conn.world
+    block_update = PacketBuilder.build_block_update(x=x, y=y, z=z, block_state_id=block_state_id)
+    
+    # Under the chunk lock so a chunk packet is queued either before the
+    # change (and followed by this update) or built after it
+    with world.chunk_lock:
+        world.set_block(x, y, z, block_state_id)
+        viewers = world.get_chunk_viewers(x >> 4, z >> 4)
+        conn.send(block_update)
+        for other in play_connections:
+            if (other is not conn and other.world is world and other.player is not None
+                    and not other.closed and other.player.uuid in viewers):
+                other.send(block_update)
+        
+        # Update Light for the sections whose light changed, which may lie in
+        # neighbouring chunks
+        for chunk, light_update in world.take_light_updates().items():
+            light_viewers = viewers if chunk == (x >> 4, z >> 4) else world.get_chunk_viewers(*chunk)
+            for other in play_connections:
+                if (other.world is world and other.player is not None and not other.closed
+                        and (other is conn and chunk == (x >> 4, z >> 4) or other.player.uuid in light_viewers)):
+                    other.send(light_update)
+    
+    return block_update
+
+
+def send_to_chunk_viewers(conn: ClientConnection, chunk_x: int, chunk_z: int, packets: list):
+    """
+    Send packets to every player viewing a chunk, always including the
+    player of conn (who may not have the chunk loaded yet).
+    
+    Args:
+        conn: Connection of the player causing the packets
+        chunk_x: Chunk X coordinate
+        chunk_z: Chunk Z coordinate
+        packets: Packets to send, in order
+    """
+    world = conn.world
+    viewers = world.get_chunk_viewers(chunk_x, chunk_z)
+    for other in list(play_connections):
+        if (other.world is world and other.player is not None and not other.closed
+                and (other is conn or other.player.uuid in viewers)):
+            for packet in packets:
+                other.send(packet)
+
+
+def spawn_item_entity(conn: ClientConnection, x: float, y: float, z: float,
+                      velocity: Tuple[float, float, float], item_id: int, count: int) -> int:
+    """
+    Spawn a dropped item entity and start tracking it in the world.
+    
+    Sends Spawn Entity and the item-stack Set Entity Metadata (both built
+    from the packet templates) to every player viewing the item's chunk,
+    logs them to the packet capture, and registers the ItemEntity so
+    physics and pickups see it.
+    
+    Args:
+        conn: Connection of the player dropping the item
+        x, y, z: Spawn position
+        velocity: Initial (x, y, z) velocity in blocks per tick
+        item_id: Item protocol ID
+        count: Stack size
+        
+    Returns:
+        The new entity ID
+    """
+    world = conn.world
+    entity_id = world.allocate_entity_id()
+    item_uuid = uuid.uuid4()
+    velocity_x, velocity_y, velocity_z = velocity
+    
+    item_entity_type_id = get_entity_type_id('minecraft:item')
+    if item_entity_type_id is None:
+        item_entity_type_id = 70  # Fallback (minecraft:item in 1.21.10)
+    
+    # Item entities are not living entities, but the client still expects
+    # the Head Yaw field (protocol quirk); Data is 0
+    spawn_packet = SPAWN_ENTITY_TEMPLATES[(True, True)].build(
+        entity_id, item_uuid, item_entity_type_id, x, y, z,
+        velocity_x, velocity_y, velocity_z, 0.0, 0.0, 0.0
+    )
+    log_packet_to_file(
+        direction="clientbound",
+        connection_state=conn.connection_state,
+        packet_id=clientbound_id(ConnectionState.PLAY, 'minecraft:add_entity'),
+        packet_data=spawn_packet,
+        parsed_data={
+            "entity_id": entity_id,
+            "entity_type": item_entity_type_id,
+            "x": x,
+            "y": y,
+            "z": z
+        },
+        packet_name="Spawn Entity"
+    )
+    
+    # Set Entity Metadata: index 8 is the item stack (Slot type 7)
+    metadata_packet = ITEM_METADATA_TEMPLATE.build(entity_id, item_id, count)
+    log_packet_to_file(
+        direction="clientbound",
+        connection_state=conn.connection_state,
+        packet_id=clientbound_id(ConnectionState.PLAY, 'minecraft:set_entity_data'),
+        packet_data=metadata_packet,
+        parsed_data={
+            "entity_id": entity_id,
+            "metadata": [[8, 7, [item_id, count]]]
+        },
+        packet_name="Set Entity Metadata"
+    )
+    
+    send_to_chunk_viewers(conn, int(math.floor(x)) >> 4, int(math.floor(z)) >> 4,
+                          [spawn_packet, metadata_packet])
+    
+    now = time.time()
+    world.item_entities[entity_id] = ItemEntity(
+        entity_id=entity_id,
+        uuid=item_uuid,
+        x=x,
+        y=y,
+        z=z,
+        velocity_x=velocity_x,
+        velocity_y=velocity_y,
+        velocity_z=velocity_z,
+        item_id=item_id,
+        count=count,
+        spawn_time=now,
+        last_update_time=now
+    )
+    return entity_id
+
+
+def process_item_pickups(conn: ClientConnection):
+    """
+    Pick up item entities in range of a player (pickup phase of the game loop).
+    
+    The packets for all items collected this tick are built in batches from
+    the packet templates. The pickup animations and one Remove Entities per
+    chunk go to every player viewing that chunk; the inventory slot updates
+    only to the collector.
+    
+    Args:
+        conn: PLAY connection whose player collects items
+    """
+    items_to_pickup = conn.player.check_item_pickups(conn.world.item_entities)
+    if not items_to_pickup:
+        return
+    
+    # (chunk_x, chunk_z) -> (Pickup Item rows (collected, collector, count),
+    # entity IDs for Remove Entities)
+    removals_by_chunk: Dict[Tuple[int, int], Tuple[list, list]] = {}
+    slot_updates = []  # Set Container Slot rows: (window, state ID, slot, item ID, count)
+    for item_entity in items_to_pickup:
+        try:
+            chunk = (int(math.floor(item_entity.x)) >> 4, int(math.floor(item_entity.z)) >> 4)
+            pickups, removed_ids = removals_by_chunk.setdefault(chunk, ([], []))
+            
+            # Pickup Item (for animation), collected by this player's entity
+            pickups.append((item_entity.entity_id, conn.player.entity_id, item_entity.count))
+            
+            # Remove Entities (to remove from world)
+            removed_ids.append(item_entity.entity_id)
+            
+            # Find a slot for the item
+            slot_idx = conn.player.find_slot_for_item(item_entity.item_id, item_entity.count)
+            
+            if slot_idx is not None:
+                # Determine final item ID and count
+                if slot_idx in conn.player.inventory_slots:
+                    # Stacking with existing items
+                    existing_item_id, existing_count = conn.player.inventory_slots[slot_idx]
+                    new_count = existing_count + item_entity.count
+                    # Cap at stack size of 64
+                    if new_count > 64:
+                        new_count = 64
+                    final_item_id = existing_item_id
+                    final_count = new_count
+                else:
+                    # New slot
+                    final_item_id = item_entity.item_id
+                    final_count = item_entity.count
+                
+                # Update slot tracking
+                conn.player.update_slot(slot_idx, final_item_id, final_count)
+                
+                # Increment state ID
+                conn.player.inventory_state_id += 1
+                
+                # Set Container Slot to update client inventory (window 0 = player inventory)
+                slot_updates.append((0, conn.player.inventory_state_id, slot_idx, final_item_id, final_count))
+                
+                # Add to server-side inventory tracking
+                conn.player.add_to_inventory(item_entity.item_id, item_entity.count)
+                
+                print(f"  │  ✓ Item picked up (Entity ID: {item_entity.entity_id}, Item ID: {item_entity.item_id}, Count: {item_entity.count}, Slot: {slot_idx})")
+            else:
+                print(f"  │  ⚠ Inventory full, item not picked up (Entity ID: {item_entity.entity_id})")
+            
+            # Remove from tracking
+            conn.world.remove_item_entity(item_entity.entity_id)
+        except Exception as e:
+            print(f"  │  ✗ Error picking up item {item_entity.entity_id}: {e}")
+    
+    try:
+        for (chunk_x, chunk_z), (pickups, removed_ids) in removals_by_chunk.items():
+            packets = PICKUP_ITEM_TEMPLATE.build_many(pickups)
+            packets.append(PacketBuilder.build_destroy_entities(removed_ids))
+            send_to_chunk_viewers(conn, chunk_x, chunk_z, packets)
+        for packet in SET_CONTAINER_SLOT_TEMPLATE.build_many(slot_updates):
+            conn.send(packet)
+    except Exception as e:
+        print(f"  │  ✗ Error sending item pickups: {e}")
+
+
+def queue_chunk_change(conn: ClientConnection, chunk_change: tuple):
+    """
+    Remember that a player crossed a chunk boundary; the chunk streaming
+    phase of the next tick acts on it (several crossings collapse into one).
+    
+    Args:
+        conn: PLAY connection
+        chunk_change: (old_chunk, new_chunk) from Player.update_position
+    """
+    if conn.pending_chunk_change is not None:
+        chunk_change = (conn.pending_chunk_change[0], chunk_change[1])
+    conn.pending_chunk_change = chunk_change
+
+
+def stream_chunk_change(conn: ClientConnection, chunk_change: tuple):
+    """
+    Re-center the client's chunk view and queue chunk loads/unloads.
+    
+    Args:
+        conn: PLAY connection
+        chunk_change: (old_chunk, new_chunk)
+    """
+    old_chunk, new_chunk = chunk_change
+    print(f"  │  → Player crossed chunk boundary: {old_chunk} → {new_chunk}")
+    
+    # Send Set Center Chunk
+    try:
+        center_chunk = PacketBuilder.build_set_center_chunk(
+            chunk_x=new_chunk[0],
+            chunk_z=new_chunk[1]
+        )
+        conn.send(center_chunk)
+        print(f"  │  ✓ Set Center Chunk sent ({len(center_chunk)} bytes)")
+    except Exception as e:
+        print(f"  │  ✗ Error sending Set Center Chunk: {e}")
+    
+    # Queue new chunks for async loading
+    chunks_to_load = conn.player.get_chunks_to_load()
+    if chunks_to_load:
+        print(f"  │  → Queueing {len(chunks_to_load)} new chunk(s) for async loading...")
+        conn.chunk_loader.queue_chunks(chunks_to_load, center_chunk=new_chunk)
+    
+    # Queue distant chunks for unloading
+    chunks_to_unload = conn.player.get_chunks_to_unload()
+    if chunks_to_unload:
+        print(f"  │  → Queueing {len(chunks_to_unload)} distant chunk(s) for unloading...")
+        conn.chunk_loader.queue_unload(chunks_to_unload)
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.PLAY, 'minecraft:move_player_pos')
+def handle_set_player_position(conn: ClientConnection, parsed_packet: SetPlayerPositionPacket):
+    """Handle Set Player Position: move the player and stream chunks."""
+    print(f"  │  Type: Set Player Position")
+    print(f"  │  Position: ({parsed_packet.x:.2f}, {parsed_packet.y:.2f}, {parsed_packet.z:.2f})")
+    
+    # Update player state and handle chunk loading
+    if conn.world and conn.player:
+        chunk_change = conn.player.update_position(
+            parsed_packet.x, parsed_packet.y, parsed_packet.z
+        )
+        
+        # Item pickups and chunk streaming run in the game loop tick
+        if chunk_change:
+            queue_chunk_change(conn, chunk_change)
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.PLAY, 'minecraft:move_player_pos_rot')
+def handle_set_player_position_and_rotation(conn: ClientConnection, parsed_packet: SetPlayerPositionAndRotationPacket):
+    """Handle Set Player Position and Rotation."""
+    print(f"  │  Type: Set Player Position and Rotation")
+    print(f"  │  Position: ({parsed_packet.x:.2f}, {parsed_packet.y:.2f}, {parsed_packet.z:.2f})")
+    print(f"  │  Rotation: yaw={parsed_packet.yaw:.2f}, pitch={parsed_packet.pitch:.2f}")
+    
+    # Update player state with position and rotation
+    if conn.world:
+        conn.player.x = parsed_packet.x
+        conn.player.y = parsed_packet.y
+        conn.player.z = parsed_packet.z
+        conn.player.yaw = parsed_packet.yaw
+        conn.player.pitch = parsed_packet.pitch
+    
+    # Update player state and handle chunk loading (same as position only)
+    if conn.world and conn.player:
+        chunk_change = conn.player.update_position(
+            parsed_packet.x, parsed_packet.y, parsed_packet.z
+        )
+        
+        # Item pickups and chunk streaming run in the game loop tick
+        if chunk_change:
+            queue_chunk_change(conn, chunk_change)
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.PLAY, 'minecraft:move_player_rot')
+def handle_set_player_rotation(conn: ClientConnection, parsed_packet: SetPlayerRotationPacket):
+    """Handle Set Player Rotation."""
+    print(f"  │  Type: Set Player Rotation")
+    print(f"  │  Rotation: yaw={parsed_packet.yaw:.2f}, pitch={parsed_packet.pitch:.2f}")
+    
+    # Update player state with head rotation (this is the camera/head rotation)
+    if conn.world and conn.player:
+        conn.player.yaw = parsed_packet.yaw
+        conn.player.pitch = parsed_packet.pitch
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.PLAY, 'minecraft:keep_alive')
+def handle_keep_alive(conn: ClientConnection, parsed_packet: KeepAlivePacket):
+    """Handle a Keep Alive response."""
+    print(f"  │  Type: Keep Alive Response")
+    print(f"  │  Keep Alive ID: {parsed_packet.keep_alive_id}")
+    
+    rtt = keep_alive_scheduler.handle_response(conn, parsed_packet.keep_alive_id)
+    if rtt is not None:
+        print(f"  │  ✓ Round trip: {rtt * 1000:.1f} ms (smoothed {conn.latency_ms} ms)")
+    else:
+        print(f"  │  ⚠ Unexpected Keep Alive ID (not outstanding)")
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.PLAY, 'minecraft:player_action')
+def handle_player_action(conn: ClientConnection, parsed_packet: PlayerActionPacket):
+    """Handle Player Action (digging, dropping items)."""
+    status_names = {
+        0: "Started digging",
+        1: "Cancelled digging",
+        2: "Finished digging",
+        3: "Drop item stack",
+        4: "Drop item",
+        5: "Shoot arrow / finish eating",
+        6: "Swap item in hand"
+    }
+    status_name = status_names.get(parsed_packet.status, f"Unknown ({parsed_packet.status})")
+    print(f"  │  Type: Player Action")
+    print(f"  │  Status: {parsed_packet.status} ({status_name})")
+    print(f"  │  Location: {parsed_packet.location}")
+    print(f"  │  Face: {parsed_packet.face}")
+    print(f"  │  Sequence: {parsed_packet.sequence}")
+    
+    # Handle item dropping (Status 3 = drop stack, Status 4 = drop item)
+    if parsed_packet.status == 3 or parsed_packet.status == 4:
+        if conn.world and conn.player:
+            # Determine which slot to use (selected hotbar slot)
+            slot_idx = 36 + conn.player.selected_hotbar_slot
+            
+            # Get item from slot
+            if slot_idx in conn.player.inventory_slots:
+                item_id, count = conn.player.inventory_slots[slot_idx]
+                
+                if item_id > 0 and count > 0:
+                    # Determine how many items to drop
+                    if parsed_packet.status == 3:  # Drop stack
+                        drop_count = count
+                    else:  # status == 4, drop single item
+                        drop_count = 1
+                    
+                    # Calculate new count
+                    new_count = count - drop_count
+                    
+                    # Update slot
+                    if new_count > 0:
+                        conn.player.update_slot(slot_idx, item_id, new_count)
+                    else:
+                        # Slot is now empty
+                        conn.player.update_slot(slot_idx, 0, 0)
+                    
+                    # Increment state ID
+                    conn.player.inventory_state_id += 1
                     
-                    except Exception as parse_error:
-                        print(f"  └─ Parse error: {parse_error}")
+                    # Send Set Container Slot to update client inventory
+                    container_slot_packet = PacketBuilder.build_set_container_slot(
+                        window_id=0,  # Player inventory
+                        state_id=conn.player.inventory_state_id,
+                        slot=slot_idx,
+                        item_id=item_id if new_count > 0 else 0,
+                        count=new_count
+                    )
+                    log_packet_to_file(
+                        direction="clientbound",
+                        connection_state=conn.connection_state,
+                        packet_id=clientbound_id(ConnectionState.PLAY, 'minecraft:container_set_slot'),
+                        packet_data=container_slot_packet,
+                        parsed_data={
+                            "window_id": 0,
+                            "state_id": conn.player.inventory_state_id,
+                            "slot": slot_idx,
+                            "item_id": item_id if new_count > 0 else 0,
+                            "count": new_count
+                        },
+                        packet_name="Set Container Slot"
+                    )
+                    conn.send(container_slot_packet)
+                    
+                    # Spawn item entity in the world
+                    try:
+                        # Calculate spawn position (at player's eye level)
+                        # Player eye level is approximately 1.52 blocks above feet (slightly below top of head)
+                        spawn_x = conn.player.x + (random.random() - 0.5) * 0.3
+                        spawn_y = conn.player.y + 1.52
+                        spawn_z = conn.player.z + (random.random() - 0.5) * 0.3
+                        
+                        # Thrown in the player's look direction
+                        entity_id = spawn_item_entity(
+                            conn, spawn_x, spawn_y, spawn_z,
+                            conn.player.calculate_drop_velocity(), item_id, drop_count
+                        )
+                        
+                        print(f"  │  ✓ Item dropped: {drop_count}x item ID {item_id} from slot {slot_idx}")
+                        print(f"  │  ✓ Item entity spawned (ID: {entity_id}, Pos: ({spawn_x:.1f}, {spawn_y:.1f}, {spawn_z:.1f}))")
+                    except Exception as e:
+                        print(f"  │  ✗ Error spawning dropped item: {e}")
                         import traceback
                         traceback.print_exc()
+                else:
+                    print(f"  │  ⚠ No item in selected slot to drop")
+            else:
+                print(f"  │  ⚠ Selected slot {slot_idx} is empty")
+    
+    # Handle block breaking
+    if parsed_packet.status == 2:  # Finished digging
+        x, y, z = parsed_packet.location
+        print(f"  │  → Block broken at ({x}, {y}, {z})")
+        
+        # Get the block state ID BEFORE breaking it (for loot table lookup)
+        block_state_id = None
+        block_name = None
+        if conn.world:
+            # Get the actual block that's being broken
+            block_state_id = conn.world.get_block_at(x, y, z)
+            
+            # Get block name from block state ID
+            block_name = get_block_name_from_state_id(block_state_id)
+            
+            if block_name:
+                print(f"  │  → Breaking block: {block_name} (state ID: {block_state_id})")
+            else:
+                print(f"  │  ⚠ Could not find block name for state ID {block_state_id}")
+        
+        # Set the block to air (block state ID 0) in the shared world and
+        # send the Block Update to everyone viewing the chunk
+        try:
+            block_update = set_block_and_broadcast(conn, x, y, z, 0)  # 0 = air
+            log_packet_to_file(
+                direction="clientbound",
+                connection_state=conn.connection_state,
+                packet_id=clientbound_id(ConnectionState.PLAY, 'minecraft:block_update'),
+                packet_data=block_update,
+                parsed_data={"x": x, "y": y, "z": z, "block_state_id": 0},
+                packet_name="Block Update"
+            )
+            print(f"  │  ✓ Block Update sent (set to air)")
+        except Exception as e:
+            print(f"  │  ✗ Error sending Block Update: {e}")
+        
+        # Blocks resting on this one may have lost their support
+        if conn.world:
+            conn.world.schedule_block_update(x, y + 1, z, 1, functools.partial(update_block_support, conn))
+        
+        # Spawn item drop using loot tables
+        if conn.world and block_name:
+            spawn_block_drop(conn, block_name, x, y, z)
+
+
+def spawn_block_drop(conn: ClientConnection, block_name: str, x: int, y: int, z: int):
+    """
+    Spawn the item a broken block drops (from its loot table) at the block's center.
+    
+    Args:
+        conn: Connection of the player who broke the block
+        block_name: Identifier of the broken block
+        x: World X coordinate
+        y: World Y coordinate
+        z: World Z coordinate
+    """
+    # Get item name from loot table
+    item_name = get_item_for_block(block_name)
+    
+    if item_name is None:
+        print(f"  │  ⚠ No loot table entry for {block_name}, skipping item drop")
+        return
+    
+    # Get item ID from registry
+    item_id = get_item_id_from_name(item_name)
+    
+    if item_id is None:
+        print(f"  │  ⚠ Could not find item ID for {item_name} (from {block_name}), skipping item drop")
+        return
+    
+    print(f"  │  → Block {block_name} drops {item_name} (ID: {item_id})")
+    
+    try:
+        # Spawn at the center of the block
+        spawn_x = x + 0.5
+        spawn_y = y + 0.5
+        spawn_z = z + 0.5
+        
+        # Block break drops fall with a small random spread, not thrown
+        # in the player's look direction
+        velocity = ((random.random() - 0.5) * 0.1, 0.1, (random.random() - 0.5) * 0.1)
+        entity_id = spawn_item_entity(conn, spawn_x, spawn_y, spawn_z, velocity, item_id, 1)
+        
+        print(f"  │  ✓ Item entity spawned and tracked (ID: {entity_id}, Item: {item_id}, Pos: ({spawn_x:.1f}, {spawn_y:.1f}, {spawn_z:.1f}))")
+    except Exception as e:
+        print(f"  │  ✗ Error spawning item: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+def update_block_support(conn: ClientConnection, world: 'World', x: int, y: int, z: int):
+    """
+    Scheduled neighbour update: break a block that needs a block beneath it
+    (plants, saplings, crops) once that block is gone, dropping its item and
+    checking the block above it in turn.
+    
+    Args:
+        conn: Connection of the player whose block break caused the update
+        world: World the update runs in
+        x: World X coordinate
+        y: World Y coordinate
+        z: World Z coordinate
+    """
+    block_name = get_block_name_from_state_id(world.get_block_at(x, y, z))
+    if block_name not in get_blocks_needing_support() or world.is_block_solid(x, y - 1, z):
+        return
+    
+    print(f"  │  → {block_name} at ({x}, {y}, {z}) lost its support, breaking it")
+    set_block_and_broadcast(conn, x, y, z, 0)
+    world.schedule_block_update(x, y + 1, z, 1, functools.partial(update_block_support, conn))
+    spawn_block_drop(conn, block_name, x, y, z)
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.PLAY, 'minecraft:container_click')
+def handle_click_container(conn: ClientConnection, parsed_packet: ClickContainerPacket):
+    """Handle Click Container (inventory clicks and drops)."""
+    print(f"  │  Type: Click Container")
+    print(f"  │  Window ID: {parsed_packet.window_id}")
+    print(f"  │  State ID: {parsed_packet.state_id}")
+    print(f"  │  Slot: {parsed_packet.slot}")
+    print(f"  │  Button: {parsed_packet.button}")
+    print(f"  │  Mode: {parsed_packet.mode}")
+    print(f"  │  Changed Slots: {len(parsed_packet.changed_slots)}")
+    print(f"  │  Carried Item: {parsed_packet.carried_item}")
+    
+    # Handle item dropping by dragging outside inventory (Mode 0, Slot -999)
+    if parsed_packet.mode == 0 and parsed_packet.slot == -999 and conn.world and parsed_packet.window_id == 0:
+        # Dragging item outside inventory to drop it
+        # When dragging out, the client sends carried_item as (0, 0) because it's already dropped
+        # We need to check the previous cursor state
+        current_carried = parsed_packet.carried_item
+        previous_carried = conn.player.cursor_item
+        
+        # If previous cursor had an item and current is empty, item was dropped
+        if previous_carried and previous_carried[0] > 0 and previous_carried[1] > 0:
+            carried_item_id, carried_count = previous_carried
+            
+            # Determine how many items to drop based on button
+            if parsed_packet.button == 0:
+                # Left click outside = drop entire stack
+                drop_count = carried_count
+            else:  # button == 1
+                # Right click outside = drop single item
+                drop_count = 1
+            
+            # Cap drop_count to available count
+            drop_count = min(drop_count, carried_count)
+            
+            if drop_count > 0:
+                # Spawn item entity in the world
+                try:
+                    # Calculate spawn position (at player's eye level)
+                    # Player eye level is approximately 1.52 blocks above feet (slightly below top of head)
+                    spawn_x = conn.player.x + (random.random() - 0.5) * 0.3
+                    spawn_y = conn.player.y + 1.52
+                    spawn_z = conn.player.z + (random.random() - 0.5) * 0.3
                     
-                    print()
-                    
-                    # Move to next packet
-                    offset = total_packet_size
+                    # Thrown in the player's look direction
+                    entity_id = spawn_item_entity(
+                        conn, spawn_x, spawn_y, spawn_z,
+                        conn.player.calculate_drop_velocity(), carried_item_id, drop_count
+                    )
                     
+                    print(f"  │  ✓ Item dropped by dragging: {drop_count}x item ID {carried_item_id}")
+                    print(f"  │  ✓ Item entity spawned (ID: {entity_id}, Pos: ({spawn_x:.1f}, {spawn_y:.1f}, {spawn_z:.1f}))")
                 except Exception as e:
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Error parsing packet: {e}")
+                    print(f"  │  ✗ Error spawning dropped item: {e}")
                     import traceback
                     traceback.print_exc()
-                    print(f"  Buffer at offset {offset}: {format_hex(buffer[offset:offset+32])}")
-                    # Skip one byte and try again
-                    offset += 1
-                    if offset >= len(buffer):
-                        break
+        
+        # Update cursor item state
+        if current_carried[0] > 0 and current_carried[1] > 0:
+            conn.player.cursor_item = current_carried
+        else:
+            conn.player.cursor_item = None
+    
+    # Handle item dropping (Mode 4)
+    if parsed_packet.mode == 4 and conn.world and parsed_packet.window_id == 0:
+        # Mode 4: Drop item
+        # Button 0: Drop key (Q) - drops 1 item
+        # Button 1: Control + Drop key (Q) - drops entire stack
+        # Slot indicates which slot the item is being dropped from
+        
+        slot_number = parsed_packet.slot
+        if slot_number in conn.player.inventory_slots:
+            item_id, count = conn.player.inventory_slots[slot_number]
             
-            # Keep remaining data in buffer
-            buffer = buffer[offset:]
+            if item_id > 0 and count > 0:
+                # Determine how many items to drop
+                if parsed_packet.button == 0:
+                    # Drop 1 item
+                    drop_count = 1
+                else:  # button == 1
+                    # Drop entire stack
+                    drop_count = count
+                
+                # Calculate new count
+                new_count = count - drop_count
+                
+                # Update slot
+                if new_count > 0:
+                    conn.player.update_slot(slot_number, item_id, new_count)
+                else:
+                    # Slot is now empty
+                    conn.player.update_slot(slot_number, 0, 0)
+                
+                # Increment state ID
+                conn.player.inventory_state_id += 1
+                
+                # Send Set Container Slot to update client inventory
+                container_slot_packet = PacketBuilder.build_set_container_slot(
+                    window_id=0,  # Player inventory
+                    state_id=conn.player.inventory_state_id,
+                    slot=slot_number,
+                    item_id=item_id if new_count > 0 else 0,
+                    count=new_count
+                )
+                log_packet_to_file(
+                    direction="clientbound",
+                    connection_state=conn.connection_state,
+                    packet_id=clientbound_id(ConnectionState.PLAY, 'minecraft:container_set_slot'),
+                    packet_data=container_slot_packet,
+                    parsed_data={
+                        "window_id": 0,
+                        "state_id": conn.player.inventory_state_id,
+                        "slot": slot_number,
+                        "item_id": item_id if new_count > 0 else 0,
+                        "count": new_count
+                    },
+                    packet_name="Set Container Slot"
+                )
+                conn.send(container_slot_packet)
+                
+                # Spawn item entity in the world
+                try:
+                    # Calculate spawn position (at player's eye level)
+                    # Player eye level is approximately 1.52 blocks above feet (slightly below top of head)
+                    spawn_x = conn.player.x + (random.random() - 0.5) * 0.3
+                    spawn_y = conn.player.y + 1.52
+                    spawn_z = conn.player.z + (random.random() - 0.5) * 0.3
+                    
+                    # Thrown in the player's look direction
+                    entity_id = spawn_item_entity(
+                        conn, spawn_x, spawn_y, spawn_z,
+                        conn.player.calculate_drop_velocity(), item_id, drop_count
+                    )
+                    
+                    print(f"  │  ✓ Item dropped: {drop_count}x item ID {item_id} from slot {slot_number}")
+                    print(f"  │  ✓ Item entity spawned (ID: {entity_id}, Pos: ({spawn_x:.1f}, {spawn_y:.1f}, {spawn_z:.1f}))")
+                except Exception as e:
+                    print(f"  │  ✗ Error spawning dropped item: {e}")
+                    import traceback
+                    traceback.print_exc()
+    
+    # Update cursor item state (for all Click Container packets)
+    if conn.world:
+        current_carried = parsed_packet.carried_item
+        if current_carried[0] > 0 and current_carried[1] > 0:
+            conn.player.cursor_item = current_carried
+        else:
+            conn.player.cursor_item = None
+    
+    # Update server-side inventory model
+    if conn.world and parsed_packet.window_id == 0:  # Player inventory
+        # Update changed slots (for all modes, including drops)
+        for slot_number, item_id, count in parsed_packet.changed_slots:
+            if count > 0 and item_id > 0:
+                conn.player.update_slot(slot_number, item_id, count)
+            else:
+                # Empty slot
+                conn.player.update_slot(slot_number, 0, 0)
+        
+        # Update state ID
+        conn.player.inventory_state_id = parsed_packet.state_id
+        
+        if parsed_packet.mode != 4:  # Don't double-log for drops
+            print(f"  │  ✓ Inventory updated ({len(parsed_packet.changed_slots)} slot(s) changed)")
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.PLAY, 'minecraft:set_carried_item')
+def handle_set_held_item(conn: ClientConnection, parsed_packet: SetHeldItemPacket):
+    """Handle Set Held Item (hotbar selection)."""
+    print(f"  │  Type: Set Held Item")
+    print(f"  │  Selected Slot: {parsed_packet.slot} (hotbar slot {parsed_packet.slot}, inventory slot {36 + parsed_packet.slot})")
+    
+    # Update selected hotbar slot
+    if conn.world:
+        conn.player.selected_hotbar_slot = parsed_packet.slot
+        print(f"  │  ✓ Selected hotbar slot updated to {parsed_packet.slot}")
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.PLAY, 'minecraft:use_item_on')
+def handle_use_item_on(conn: ClientConnection, parsed_packet: UseItemOnPacket):
+    """Handle Use Item On (block placement)."""
+    print(f"  │  Type: Use Item On")
+    print(f"  │  Hand: {parsed_packet.hand} ({'main hand' if parsed_packet.hand == 0 else 'off hand'})")
+    print(f"  │  Location: {parsed_packet.location}")
+    print(f"  │  Face: {parsed_packet.face}")
+    print(f"  │  Sequence: {parsed_packet.sequence}")
+    
+    # Handle block placement
+    if conn.world:
+        # Determine which slot to use based on hand
+        if parsed_packet.hand == 0:  # Main hand
+            # Use currently selected hotbar slot (0-8 maps to 36-44)
+            slot_idx = 36 + conn.player.selected_hotbar_slot
+        else:  # Off hand
+            slot_idx = 45  # Offhand slot
+        
+        # Get item from slot
+        if slot_idx in conn.player.inventory_slots:
+            item_id, count = conn.player.inventory_slots[slot_idx]
             
-    except Exception as e:
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Error handling client: {e}")
+            if item_id > 0 and count > 0:
+                # Decrement item count
+                new_count = count - 1
+                
+                # Update slot
+                if new_count > 0:
+                    conn.player.update_slot(slot_idx, item_id, new_count)
+                else:
+                    # Slot is now empty
+                    conn.player.update_slot(slot_idx, 0, 0)
+                
+                # Increment state ID
+                conn.player.inventory_state_id += 1
+                
+                # Send Set Container Slot to update client inventory
+                container_slot_packet = PacketBuilder.build_set_container_slot(
+                        window_id=0,  # Player inventory
+                        state_id=conn.player.inventory_state_id,
+                    slot=slot_idx,
+                    item_id=item_id if new_count > 0 else 0,
+                    count=new_count
+                )
+                log_packet_to_file(
+                    direction="clientbound",
+                    connection_state=conn.connection_state,
+                    packet_id=clientbound_id(ConnectionState.PLAY, 'minecraft:container_set_slot'),
+                    packet_data=container_slot_packet,
+                    parsed_data={
+                        "window_id": 0,
+                        "state_id": conn.player.inventory_state_id,
+                        "slot": slot_idx,
+                        "item_id": item_id if new_count > 0 else 0,
+                        "count": new_count
+                    },
+                    packet_name="Set Container Slot"
+                )
+                conn.send(container_slot_packet)
+                
+                # Calculate block placement position (adjacent to clicked face)
+                x, y, z = parsed_packet.location
+                face = parsed_packet.face
+                # Face: 0=bottom, 1=top, 2=north, 3=south, 4=west, 5=east
+                face_offsets = {
+                    0: (0, -1, 0),  # Bottom
+                    1: (0, 1, 0),   # Top
+                    2: (0, 0, -1),  # North
+                    3: (0, 0, 1),   # South
+                    4: (-1, 0, 0),  # West
+                    5: (1, 0, 0)    # East
+                }
+                dx, dy, dz = face_offsets.get(face, (0, 1, 0))
+                place_x, place_y, place_z = x + dx, y + dy, z + dz
+                
+                # Map item_id to block_state_id
+                block_state_id = get_block_state_id_from_item_id(item_id)
+                
+                if block_state_id is None:
+                    print(f"  │  ⚠ Could not map item ID {item_id} to block state ID, skipping block placement")
+                    return
+                
+                # Place the block in the shared world and send the Block Update
+                # to everyone viewing the chunk
+                try:
+                    block_update = set_block_and_broadcast(conn, place_x, place_y, place_z, block_state_id)
+                    log_packet_to_file(
+                        direction="clientbound",
+                        connection_state=conn.connection_state,
+                        packet_id=clientbound_id(ConnectionState.PLAY, 'minecraft:block_update'),
+                        packet_data=block_update,
+                        parsed_data={
+                            "x": place_x,
+                            "y": place_y,
+                            "z": place_z,
+                            "block_state_id": block_state_id
+                        },
+                        packet_name="Block Update"
+                    )
+                    print(f"  │  ✓ Block placed at ({place_x}, {place_y}, {place_z})")
+                    print(f"  │  ✓ Inventory updated (Item ID: {item_id}, Count: {count} → {new_count})")
+                except Exception as e:
+                    print(f"  │  ✗ Error placing block: {e}")
+            else:
+                print(f"  │  ⚠ No item in hand to place")
+        else:
+            print(f"  │  ⚠ Slot {slot_idx} is empty")
+
+
+# Shared Server List Ping responder (caches the Status Response packet)
+status_responder = StatusResponder()
+
+
+def send_keep_alive(conn: ClientConnection, keep_alive_id: int):
+    """Build, log and send a Keep Alive (called by the keep alive scheduler)."""
+    keep_alive_packet = PacketBuilder.build_keep_alive(keep_alive_id)
+    log_packet_to_file(
+        direction="clientbound",
+        connection_state=ConnectionState.PLAY,
+        packet_id=clientbound_id(ConnectionState.PLAY, 'minecraft:keep_alive'),
+        packet_data=keep_alive_packet,
+        parsed_data={"keep_alive_id": keep_alive_id},
+        packet_name="Keep Alive"
+    )
+    conn.send(keep_alive_packet)
+    print(f"  │  → Keep Alive sent (ID: {keep_alive_id})")
+
+
+# One timer wheel sends keep-alives for every PLAY connection
+keep_alive_scheduler = KeepAliveScheduler(sender=send_keep_alive)
+
+
+# The one world shared by every connection (created on first use)
+_server_world: Optional[World] = None
+_server_world_lock = threading.Lock()
+web_server_thread: Optional[threading.Thread] = None
+
+
+def get_server_world() -> World:
+    """Get the server-wide World, creating it on first use."""
+    global _server_world
+    
+    if _server_world is None:
+        with _server_world_lock:
+            if _server_world is None:
+                _server_world = World(view_distance=10, use_terrain_generation=False)
+    
+    return _server_world
+
+
+def start_web_server():
+    """Start the visualization web server for the shared world (once)."""
+    global web_server_thread
+    
+    if web_server_thread is None or not web_server_thread.is_alive():
+        web_server_thread = threading.Thread(
+            target=run_web_server,
+            args=('127.0.0.1', 5000, get_server_world(), game_loop),
+            daemon=True
+        )
+        web_server_thread.start()
+        print(f"✓ Web visualization server started at http://127.0.0.1:5000")
+
+
+# Connections in PLAY state, ticked by the game loop
+play_connections: set = set()
+
+
+def _ticked_connections() -> list:
+    """PLAY connections with a spawned player (snapshot, safe to mutate the set)."""
+    return [conn for conn in play_connections if conn.player is not None and not conn.closed]
+
+
+def _ticked_worlds() -> list:
+    """Distinct worlds of the ticked connections."""
+    worlds = {}
+    for conn in _ticked_connections():
+        if conn.world is not None:
+            worlds[id(conn.world)] = conn.world
+    return list(worlds.values())
+
+
+def tick_entity_physics(tick: int):
+    """Game loop phase: item entity physics."""
+    for world in _ticked_worlds():
+        world.tick_entities(tick)
+
+
+def tick_pickups(tick: int):
+    """Game loop phase: players collect nearby items."""
+    for conn in _ticked_connections():
+        process_item_pickups(conn)
+
+
+def tick_block_updates(tick: int):
+    """Game loop phase: scheduled block updates."""
+    for world in _ticked_worlds():
+        world.run_scheduled_block_updates(tick)
+
+
+def tick_chunk_streaming(tick: int):
+    """Game loop phase: act on chunk boundary crossings since the last tick."""
+    for conn in _ticked_connections():
+        chunk_change = conn.pending_chunk_change
+        if chunk_change is not None:
+            conn.pending_chunk_change = None
+            stream_chunk_change(conn, chunk_change)
+
+
+def tick_outbound_flush(tick: int):
+    """Game loop phase: write everything queued during the tick."""
+    for conn in _ticked_connections():
+        conn.flush()
+
+
+# The authoritative 20 TPS tick; phases run in this order
+game_loop = GameLoop()
+game_loop.add_phase("entity_physics", tick_entity_physics)
+game_loop.add_phase("pickups", tick_pickups)
+game_loop.add_phase("block_updates", tick_block_updates)
+game_loop.add_phase("chunk_streaming", tick_chunk_streaming)
+game_loop.add_phase("outbound_flush", tick_outbound_flush)
+
+
+def handle_status_packet(conn: ClientConnection, full_packet: memoryview):
+    """
+    Answer a STATUS state packet (server list ping).
+    
+    Kept off the logging/printing path of process_packet so server-list
+    crawlers pinging many times a minute stay cheap.
+    
+    Args:
+        conn: Connection in STATUS state
+        full_packet: Packet frame including the VarInt length prefix
+    """
+    packet_id, parsed_packet = PacketParser.parse_packet(full_packet, ConnectionState.STATUS)
+    packet_type = SERVERBOUND_PACKETS.get(ConnectionState.STATUS, packet_id)
+    
+    if packet_type is not None and packet_type.handler is not None:
+        packet_type.handler(conn, parsed_packet)
+    else:
+        conn.close()
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.STATUS, 'minecraft:status_request')
+def handle_status_request(conn: ClientConnection, parsed_packet: None):
+    """Handle Status Request: send the cached Status Response."""
+    conn.send(status_responder.get_status_packet())
+
+
+@SERVERBOUND_PACKETS.handler(ConnectionState.STATUS, 'minecraft:ping_request')
+def handle_ping_request(conn: ClientConnection, parsed_packet: PingRequestPacket):
+    """Handle Ping Request: echo the payload and close."""
+    conn.send(PacketBuilder.build_pong_response(parsed_packet.payload))
+    # Ping is the last packet of a server list ping
+    conn.close()
+
+
+def connection_closed(conn: ClientConnection):
+    """
+    Clean up server-wide state when a client disconnects.
+    
+    Args:
+        conn: Connection that was closed
+    """
+    if conn.connection_state == ConnectionState.PLAY:
+        status_responder.player_left()
+    keep_alive_scheduler.unregister(conn)
+    play_connections.discard(conn)
+    
+    # Leave the shared world: drop the player and its chunk references
+    if conn.world is not None and conn.player is not None:
+        conn.world.remove_player(conn.player.uuid)
+        conn.world.release_player_chunks(conn.player.uuid)
+
+
+def process_packet(conn: ClientConnection, full_packet: memoryview):
+    """
+    Parse, log and handle a single packet received from a client.
+    
+    Args:
+        conn: Connection the packet arrived on (holds all per-connection state)
+        full_packet: Packet frame including the VarInt length prefix. This is
+                     a memoryview into the receive buffer and is only valid
+                     for the duration of this call.
+    """
+    # Server list pings take a fast path (no per-packet printing or logging)
+    if conn.connection_state == ConnectionState.STATUS:
+        handle_status_packet(conn, full_packet)
+        return
+    
+    packet_length, length_end = read_varint(full_packet, 0)
+    packet_data = full_packet[length_end:]
+    
+    # Try to read packet ID for display
+    packet_id = None
+    payload = b''
+    if len(packet_data) > 0:
+        packet_id, id_end = read_varint(packet_data, 0)
+        payload = packet_data[id_end:]
+    
+    # Print raw packet info
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Packet received:")
+    print(f"  State: {conn.connection_state.name}")
+    print(f"  Length: {packet_length} bytes")
+    if packet_id is not None:
+        print(f"  Packet ID: {packet_id} (0x{packet_id:02x})")
+    print(f"  Full packet (hex): {format_hex(full_packet)}")
+    if len(payload) > 0:
+        print(f"  Payload (hex): {format_hex(payload)}")
+    
+    # Try to parse using protocol parser
+    try:
+        # Parser expects full packet including length prefix
+        # full_packet is a memoryview frame from the framer (no copy needed)
+        parsed_packet_id, parsed_packet = PacketParser.parse_packet(
+            full_packet, conn.connection_state
+        )
+        
+        # One registry lookup gives the packet's name and handler
+        packet_type = SERVERBOUND_PACKETS.get(conn.connection_state, parsed_packet_id)
+        if packet_type is not None:
+            packet_name = packet_type.name
+        else:
+            packet_name = f"{conn.connection_state.name} Packet 0x{parsed_packet_id:02x}"
+        
+        # Log serverbound packet (from client) - all states including PLAY
+        # Log regardless of whether parsed_packet is None (some packets like Login Acknowledged return None)
+        log_packet_to_file(
+            direction="serverbound",
+            connection_state=conn.connection_state,
+            packet_id=parsed_packet_id,
+            packet_data=full_packet,
+            parsed_data=parsed_packet,
+            packet_name=packet_name
+        )
+        
+        if packet_type is not None and packet_type.handler is not None:
+            print(f"  ┌─ Parsed Packet Data:")
+            packet_type.handler(conn, parsed_packet)
+            print(f"  └─")
+        elif parsed_packet is not None:
+            print(f"  ┌─ Parsed Packet Data:")
+            print(f"  │  Type: {type(parsed_packet).__name__}")
+            print(f"  │  Data: {parsed_packet}")
+            print(f"  └─")
+        else:
+            print(f"  └─ (Packet ID {parsed_packet_id} not recognized in {conn.connection_state.name} state)")
+    
+    except Exception as parse_error:
+        print(f"  └─ Parse error: {parse_error}")
         import traceback
         traceback.print_exc()
-    finally:
-        # Stop keep alive thread
-        if keep_alive_thread:
-            keep_alive_stop_event.set()
-            keep_alive_thread.join(timeout=1.0)
-        client_socket.close()
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Connection closed\n")
+    
+    print()
+
 
 def initialize_server_data():
     """
@@ -3327,10 +3390,61 @@ def initialize_server_data():
     except Exception as e:
         print(f"⚠ Warning: Could not pre-load entity type registry: {e}")
     
+    # Step 4: Build the configuration-phase packets sent to every joining client
+    print(f"→ Building configuration bundle...")
+    try:
+        stages = configuration_bundle.prepare(-1)
+        registries = stages['registries'].packets[:-1]
+        for packet in registries:
+            print(f"  {packet.parsed_data['registry_id']}: {packet.parsed_data['entry_count']} entry(ies) ({len(packet.frame)} bytes)")
+        print(f"✓ Built {len(registries)} registries ({len(stages['registries'].wire(-1))} bytes)")
+    except Exception as e:
+        print(f"⚠ Warning: Could not build configuration bundle: {e}")
+    
     print(f"{'='*60}\n")
     return True
 
 
+async def serve(host: str, port: int, compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD):
+    """
+    Accept connections on the event loop until cancelled.
+    
+    Args:
+        host: Interface to listen on
+        port: TCP port
+        compression_threshold: Compression threshold negotiated with each
+                               client during login (-1 disables compression)
+    """
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(
+        lambda: ClientProtocol(process_packet, compression_threshold, connection_closed),
+        host, port, reuse_address=True
+    )
+    
+    print(f"{'='*60}")
+    print(f"Minecraft Packet Debug Server")
+    print(f"Listening on {host}:{port}")
+    if compression_threshold >= 0:
+        print(f"Compression threshold: {compression_threshold} bytes")
+    else:
+        print(f"Compression: disabled")
+    print(f"Waiting for connections...")
+    print(f"{'='*60}\n")
+    
+    # Compress the configuration bundle once for the threshold clients will use
+    configuration_bundle.prepare(compression_threshold)
+    
+    keep_alive_scheduler.start(loop)
+    game_loop.start(loop)
+    start_web_server()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        game_loop.stop()
+        keep_alive_scheduler.stop()
+
+
 def main():
     """Main server function."""
     # Initialize server data before starting
@@ -3338,36 +3452,19 @@ def main():
     
     host = '0.0.0.0'  # Listen on all interfaces
     port = 25565
-    
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    compression_threshold = DEFAULT_COMPRESSION_THRESHOLD  # -1 disables compression
     
     try:
-        server_socket.bind((host, port))
-        server_socket.listen(5)
-        print(f"{'='*60}")
-        print(f"Minecraft Packet Debug Server")
-        print(f"Listening on {host}:{port}")
-        print(f"Waiting for connections...")
-        print(f"{'='*60}\n")
-        
-        while True:
-            client_socket, client_address = server_socket.accept()
-            
-            # Handle each client in a separate thread
-            client_thread = threading.Thread(
-                target=handle_client,
-                args=(client_socket, client_address)
-            )
-            client_thread.daemon = True
-            client_thread.start()
-            
+        # All connections share one event loop instead of one thread each
+        asyncio.run(serve(host, port, compression_threshold))
     except KeyboardInterrupt:
         print("\n\nShutting down server...")
     except Exception as e:
         print(f"Server error: {e}")
     finally:
-        server_socket.close()
+        # Write out any packets still queued for capture
+        if _packet_capture is not None:
+            _packet_capture.close()
         print("Server closed")
 
 if __name__ == "__main__":
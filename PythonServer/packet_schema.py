@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Packet Schema - packet IDs from extracted_data/packets.json and compiled decoders.
+
+Packet IDs are looked up by resource name (e.g. "minecraft:keep_alive") per
+state and direction, so a protocol version bump is a data change: re-run
+the extractor and the new IDs are picked up at import time.
+
+Packet bodies are described declaratively as a list of (field name, type)
+pairs. compile_decoder() turns such a layout into one straight-line
+function: consecutive fixed-width fields are read with a single
+precompiled Struct, everything else with one ProtocolReader call each.
+
+Field types:
+    Fixed width: byte, unsigned_byte, bool, short, unsigned_short, int, long,
+                 float, double, uuid, position
+    Variable:    varint, string, identifier, ('string', max_length),
+                 rest (all remaining bytes), ('array', type) with a VarInt
+                 count, where type is a field type or a tuple of them
+    Custom:      any name passed in the readers mapping (called as fn(reader))
+"""
+
+import json
+import os
+import struct
+import uuid
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+
+PACKETS_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extracted_data', 'packets.json'
+)
+
+
+class PacketIds:
+    """Packet ID <-> resource name tables, per state and direction."""
+
+    def __init__(self, packets: Mapping[str, Mapping[str, Mapping[str, dict]]]):
+        """
+        Build the tables.
+
+        Args:
+            packets: packets.json contents:
+                     {state: {direction: {name: {"protocol_id": id}}}}
+        """
+        self._ids: Dict[Tuple[str, str, str], int] = {}
+        self._names: Dict[Tuple[str, str, int], str] = {}
+        for state, directions in packets.items():
+            for direction, entries in directions.items():
+                for name, entry in entries.items():
+                    packet_id = entry['protocol_id']
+                    self._ids[(state, direction, name)] = packet_id
+                    self._names[(state, direction, packet_id)] = name
+
+    @classmethod
+    def load(cls, path: str = PACKETS_FILE) -> 'PacketIds':
+        """Load packets.json (empty tables if it is missing)."""
+        if not os.path.exists(path):
+            print(f"⚠ Warning: {path} not found, packet IDs cannot be resolved by name")
+            return cls({})
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def id(self, state: str, direction: str, name: str) -> int:
+        """
+        Packet ID of a packet.
+
+        Args:
+            state: State key in packets.json ('handshake', 'status', 'login',
+                   'configuration' or 'play')
+            direction: 'clientbound' or 'serverbound'
+            name: Resource name (e.g. "minecraft:keep_alive")
+
+        Raises:
+            KeyError: If the packet does not exist in this protocol version
+        """
+        try:
+            return self._ids[(state, direction, name)]
+        except KeyError:
+            raise KeyError(f"No {direction} packet {name!r} in state {state!r}") from None
+
+    def name(self, state: str, direction: str, packet_id: int) -> Optional[str]:
+        """Resource name of a packet ID, or None if unknown."""
+        return self._names.get((state, direction, packet_id))
+
+    def names(self, state: str, direction: str) -> List[str]:
+        """Every packet name of a state and direction, ordered by ID."""
+        entries = [(packet_id, name) for (s, d, packet_id), name in self._names.items()
+                   if s == state and d == direction]
+        return [name for _, name in sorted(entries)]
+
+
+# Fixed-width field types: struct code and an optional conversion of the raw value
+_FIXED_TYPES: Dict[str, Tuple[str, Optional[str]]] = {
+    'byte': ('b', None),
+    'unsigned_byte': ('B', None),
+    'bool': ('?', None),
+    'short': ('h', None),
+    'unsigned_short': ('H', None),
+    'int': ('i', None),
+    'long': ('q', None),
+    'float': ('f', None),
+    'double': ('d', None),
+    'uuid': ('16s', '_uuid(bytes={})'),
+    'position': ('Q', '_position({})'),
+}
+
+# Expressions reading one value of a type (used for variable fields and array elements)
+_READ_EXPRESSIONS: Dict[str, str] = {
+    'byte': 'reader.read_struct(">b")[0]',
+    'unsigned_byte': 'reader.read_byte()',
+    'bool': 'reader.read_bool()',
+    'short': 'reader.read_short()',
+    'unsigned_short': 'reader.read_unsigned_short()',
+    'int': 'reader.read_int()',
+    'long': 'reader.read_long()',
+    'float': 'reader.read_float()',
+    'double': 'reader.read_double()',
+    'uuid': 'reader.read_uuid()',
+    'position': 'reader.read_position()',
+    'varint': 'reader.read_varint()',
+    'string': 'reader.read_string()',
+    'identifier': 'reader.read_identifier()',
+    'rest': 'reader.read_bytes(reader.remaining())',
+}
+
+
+def _position(value: int) -> Tuple[int, int, int]:
+    """Unpack a Position long into signed (x, y, z)."""
+    x = value >> 38
+    z = (value >> 12) & 0x3FFFFFF
+    y = value & 0xFFF
+    if x & 0x2000000:
+        x -= 0x4000000
+    if z & 0x2000000:
+        z -= 0x4000000
+    if y & 0x800:
+        y -= 0x1000
+    return (x, y, z)
+
+
+def compile_decoder(
+    name: str,
+    fields: Sequence[Tuple[str, Any]],
+    factory: Callable[..., Any],
+    readers: Optional[Mapping[str, Callable]] = None
+) -> Callable:
+    """
+    Compile a packet body layout into a straight-line decode function.
+
+    Args:
+        name: Packet name (used in the generated function's name)
+        fields: (field name, field type) pairs in wire order
+        factory: Called with the decoded fields as keyword arguments; its
+                 result is what the decoder returns
+        readers: Custom field types, called as reader_fn(reader)
+
+    Returns:
+        decode(reader) -> factory(**fields)
+    """
+    namespace: Dict[str, Any] = {
+        '_factory': factory,
+        '_uuid': uuid.UUID,
+        '_position': _position,
+    }
+    custom = {}
+    for type_name, reader_fn in (readers or {}).items():
+        custom[type_name] = f'_read_{type_name}(reader)'
+        namespace[f'_read_{type_name}'] = reader_fn
+
+    def read_expression(field_type) -> str:
+        if isinstance(field_type, tuple):
+            kind = field_type[0]
+            if kind == 'string':
+                return f'reader.read_string({int(field_type[1])})'
+            if kind == 'array':
+                element = field_type[1]
+                if isinstance(element, tuple) and element and element[0] not in ('string', 'array'):
+                    item = '(' + ', '.join(read_expression(t) for t in element) + ',)'
+                else:
+                    item = read_expression(element)
+                return f'[{item} for _ in range(reader.read_varint())]'
+            raise ValueError(f"Unknown field type {field_type!r} in {name}")
+        if field_type in custom:
+            return custom[field_type]
+        if field_type in _READ_EXPRESSIONS:
+            return _READ_EXPRESSIONS[field_type]
+        raise ValueError(f"Unknown field type {field_type!r} in {name}")
+
+    lines = []
+    run: List[Tuple[str, str]] = []  # Pending fixed-width fields: (field name, type)
+
+    def flush_run():
+        if not run:
+            return
+        layout = struct.Struct('>' + ''.join(_FIXED_TYPES[t][0] for _, t in run))
+        struct_name = f'_s{len(namespace)}'
+        namespace[struct_name] = layout
+        targets = ', '.join(field for field, _ in run)
+        lines.append(f'    {targets}, = reader.read_struct({struct_name})')
+        for field, field_type in run:
+            conversion = _FIXED_TYPES[field_type][1]
+            if conversion:
+                lines.append(f'    {field} = {conversion.format(field)}')
+        run.clear()
+
+    for field, field_type in fields:
+        if isinstance(field_type, str) and field_type in _FIXED_TYPES and field_type not in custom:
+            run.append((field, field_type))
+        else:
+            flush_run()
+            lines.append(f'    {field} = {read_expression(field_type)}')
+    flush_run()
+
+    arguments = ', '.join(f'{field}={field}' for field, _ in fields)
+    function_name = 'decode_' + ''.join(c if c.isalnum() else '_' for c in name.lower())
+    source = f'def {function_name}(reader):\n' + ''.join(line + '\n' for line in lines)
+    source += f'    return _factory({arguments})\n'
+    exec(compile(source, f'<packet decoder {name}>', 'exec'), namespace)
+    decoder = namespace[function_name]
+    decoder.source = source
+    return decoder
+
+
+# Packet IDs of the protocol version the extracted data was taken from
+PACKET_IDS = PacketIds.load()
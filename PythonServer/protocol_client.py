@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Headless Protocol Client - asyncio client side of the Minecraft protocol.
+
+A minimal client connection built on ProtocolWriter/ProtocolReader, used by
+the load-testing tools (bot swarm, capture replay). It handles framing and
+compression so callers only deal with packet IDs and bodies.
+"""
+
+import asyncio
+import time
+from typing import Optional, Tuple
+
+from .connection import MAX_PACKET_LENGTH, compress_frame, decompress_frame, encode_varint
+from .minecraft_protocol import ProtocolReader, ProtocolWriter
+
+
+class ProtocolClient:
+    """Client side of one connection: framing, compression and byte counters."""
+
+    def __init__(self, host: str, port: int):
+        """
+        Initialize the client (call connect() to open the connection).
+
+        Args:
+            host: Server host
+            port: Server port
+        """
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.compression_threshold = -1
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.connected_at = 0.0
+
+    async def connect(self, timeout: float = 10.0):
+        """Open the TCP connection."""
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout
+        )
+        self.connected_at = time.perf_counter()
+
+    def send_packet(self, packet_id: int, body: bytes = b''):
+        """
+        Send a packet given its ID and body.
+
+        Args:
+            packet_id: Packet ID
+            body: Packet fields (already encoded)
+        """
+        data = encode_varint(packet_id) + body
+        self.send_frame(encode_varint(len(data)) + data)
+
+    def send_frame(self, frame: bytes):
+        """
+        Send an uncompressed, length-prefixed packet (compressing if enabled).
+
+        Args:
+            frame: Packet including its VarInt length prefix
+        """
+        if self.compression_threshold >= 0:
+            frame = compress_frame(frame, self.compression_threshold)
+        self.bytes_sent += len(frame)
+        self.writer.write(frame)
+
+    async def drain(self):
+        """Wait for the write buffer to flush."""
+        await self.writer.drain()
+
+    async def read_frame(self) -> bytes:
+        """
+        Read the next packet as an uncompressed frame (with length prefix).
+
+        Raises:
+            asyncio.IncompleteReadError: If the server closed the connection
+        """
+        length = 0
+        shift = 0
+        prefix = bytearray()
+        while True:
+            byte = (await self.reader.readexactly(1))[0]
+            prefix.append(byte)
+            length |= (byte & 0x7F) << shift
+            if (byte & 0x80) == 0:
+                break
+            shift += 7
+            if shift >= 21:
+                raise ValueError("Packet length VarInt too long")
+
+        if length > MAX_PACKET_LENGTH:
+            raise ValueError(f"Invalid packet length: {length}")
+
+        body = await self.reader.readexactly(length)
+        self.bytes_received += len(prefix) + length
+        frame = bytes(prefix) + body
+
+        if self.compression_threshold >= 0:
+            return decompress_frame(frame, self.compression_threshold)
+        return frame
+
+    async def read_packet(self) -> Tuple[int, ProtocolReader]:
+        """
+        Read the next packet.
+
+        Returns:
+            (packet_id, reader positioned at the first field)
+        """
+        reader = ProtocolReader(await self.read_frame())
+        reader.read_varint()  # Packet length
+        packet_id = reader.read_varint()
+        return packet_id, reader
+
+    def close(self):
+        """Close the connection."""
+        if self.writer is not None:
+            self.writer.close()
+
+
+def build_handshake_body(host: str, port: int, intent: int, protocol_version: int) -> bytes:
+    """Encode the fields of a Handshake packet."""
+    writer = ProtocolWriter()
+    writer.write_varint(protocol_version)
+    writer.write_string(host, 255)
+    writer.write_unsigned_short(port)
+    writer.write_varint(intent)
+    return writer.to_bytes()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Server List Ping (STATUS state) responder.
+
+The status JSON is serialized and framed once, and only rebuilt when the
+online player count or the MOTD changes. Answering a Status Request is then
+just sending a cached bytes object, which keeps server-list crawlers cheap.
+"""
+
+import json
+import threading
+from typing import Optional
+
+from .minecraft_protocol import PacketBuilder
+
+
+# Version reported in the server list (must match what clients expect)
+GAME_VERSION = "1.21.10"
+PROTOCOL_VERSION = 773
+
+
+class StatusResponder:
+    """Caches the Status Response packet and tracks the online player count."""
+
+    def __init__(self, motd: str = "A Minecraft Server", max_players: int = 20):
+        """
+        Initialize the responder.
+
+        Args:
+            motd: Message of the day shown in the server list
+            max_players: Maximum player count shown in the server list
+        """
+        self._motd = motd
+        self.max_players = max_players
+        self._online = 0
+        self._lock = threading.Lock()
+        self._cached_packet: Optional[bytes] = None
+        self.rebuild_count = 0
+
+    @property
+    def motd(self) -> str:
+        return self._motd
+
+    @motd.setter
+    def motd(self, value: str):
+        with self._lock:
+            if value != self._motd:
+                self._motd = value
+                self._cached_packet = None
+
+    @property
+    def online_players(self) -> int:
+        return self._online
+
+    def player_joined(self):
+        """Count a player entering PLAY state."""
+        with self._lock:
+            self._online += 1
+            self._cached_packet = None
+
+    def player_left(self):
+        """Count a player leaving after PLAY state."""
+        with self._lock:
+            self._online = max(0, self._online - 1)
+            self._cached_packet = None
+
+    def get_status_packet(self) -> bytes:
+        """
+        Get the framed Status Response packet.
+
+        Returns:
+            Complete packet bytes (including length prefix), rebuilt only if
+            the player count or MOTD changed since the last call
+        """
+        packet = self._cached_packet
+        if packet is not None:
+            return packet
+
+        with self._lock:
+            if self._cached_packet is None:
+                status = {
+                    "version": {"name": GAME_VERSION, "protocol": PROTOCOL_VERSION},
+                    "players": {"max": self.max_players, "online": self._online, "sample": []},
+                    "description": {"text": self._motd},
+                    "enforcesSecureChat": False
+                }
+                self._cached_packet = PacketBuilder.build_status_response(
+                    json.dumps(status, separators=(',', ':'))
+                )
+                self.rebuild_count += 1
+            return self._cached_packet
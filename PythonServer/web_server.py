@@ -17,6 +17,7 @@ app = Flask(__name__, template_folder=template_dir)
 
 # This will be set by the main server to share world state
 world_state = None
+game_loop = None  # Server game loop, for tick timings
 
 @app.route('/')
 def index():
@@ -102,6 +103,17 @@ def step_tick():
         'entity_count_after': entity_count_after
     })
 
+@app.route('/api/tick')
+def get_tick_stats():
+    """MSPT statistics and recent tick timings from the game loop."""
+    if game_loop is None:
+        return jsonify({'error': 'Game loop not available'}), 400
+    count = request.args.get('count', default=20, type=int)
+    return jsonify({
+        'stats': game_loop.stats(),
+        'recent_ticks': game_loop.recent_ticks(count)
+    })
+
 @app.route('/api/check_line_intersection', methods=['POST'])
 def check_line_intersection():
     """Check if a line segment intersects any solid block."""
@@ -166,7 +178,7 @@ def get_heightmap():
         'use_terrain': True
     })
 
-def run_web_server(host='127.0.0.1', port=5000, world=None):
+def run_web_server(host='127.0.0.1', port=5000, world=None, loop=None):
     """
     Run the web server in a separate thread.
     
@@ -174,9 +186,11 @@ def run_web_server(host='127.0.0.1', port=5000, world=None):
         host: Host to bind to (default: 127.0.0.1)
         port: Port to bind to (default: 5000)
         world: World instance to share state
+        loop: GameLoop instance for the /api/tick endpoint
     """
-    global world_state
+    global world_state, game_loop
     world_state = world
+    game_loop = loop
     
     # Disable Flask's default request logging to reduce noise
     import logging
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark per-packet dispatch overhead (parse + name + handler lookup).
+
+Compares the original if/elif chains over (state, packet_id) with the
+SERVERBOUND_PACKETS registry, on a PLAY-state mix dominated by movement
+packets. Handlers are no-ops so only dispatch cost is measured.
+
+Usage:
+    python benchmarks/bench_dispatch.py [iterations]
+"""
+
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PythonServer.minecraft_protocol import (
+    ConnectionState, PacketParser, ProtocolReader, ProtocolWriter, SERVERBOUND_PACKETS,
+    SetPlayerPositionPacket, KeepAlivePacket
+)
+
+
+# The compiled schema decoders, bound once like the original static parse methods
+_PARSERS = {(packet_type.state, packet_type.packet_id): packet_type.parser for packet_type in SERVERBOUND_PACKETS}
+_parse_handshake = _PARSERS[(ConnectionState.HANDSHAKING, 0x00)]
+_parse_login_start = _PARSERS[(ConnectionState.LOGIN, 0x00)]
+_parse_client_information = _PARSERS[(ConnectionState.CONFIGURATION, 0x00)]
+_parse_known_packs = _PARSERS[(ConnectionState.CONFIGURATION, 0x07)]
+_parse_set_player_position = _PARSERS[(ConnectionState.PLAY, 0x1D)]
+_parse_set_player_position_and_rotation = _PARSERS[(ConnectionState.PLAY, 0x1E)]
+_parse_set_player_rotation = _PARSERS[(ConnectionState.PLAY, 0x1F)]
+_parse_keep_alive = _PARSERS[(ConnectionState.PLAY, 0x1B)]
+_parse_player_action = _PARSERS[(ConnectionState.PLAY, 0x28)]
+_parse_click_container = _PARSERS[(ConnectionState.PLAY, 0x11)]
+_parse_use_item_on = _PARSERS[(ConnectionState.PLAY, 0x3F)]
+_parse_set_held_item = _PARSERS[(ConnectionState.PLAY, 0x34)]
+
+
+def frame(packet_id: int, body: bytes) -> bytes:
+    """Frame a packet body with its ID and length prefix."""
+    writer = ProtocolWriter()
+    writer.write_varint(packet_id)
+    writer.write_bytes(body)
+    data = writer.to_bytes()
+    final_writer = ProtocolWriter()
+    final_writer.write_varint(len(data))
+    final_writer.write_bytes(data)
+    return final_writer.to_bytes()
+
+
+def legacy_dispatch(data: bytes, state: ConnectionState, handlers: dict):
+    """The original parse_packet chain followed by the name/handler chains."""
+    reader = ProtocolReader(data)
+    reader.read_varint()
+    packet_id = reader.read_varint()
+    parsed = None
+
+    if state == ConnectionState.HANDSHAKING:
+        if packet_id == 0:
+            parsed = _parse_handshake(reader)
+    elif state == ConnectionState.LOGIN:
+        if packet_id == 0:
+            parsed = _parse_login_start(reader)
+    elif state == ConnectionState.CONFIGURATION:
+        if packet_id == 0:
+            parsed = _parse_client_information(reader)
+        elif packet_id == 0x07:
+            parsed = _parse_known_packs(reader)
+    elif state == ConnectionState.PLAY:
+        if packet_id == 0x1D:
+            parsed = _parse_set_player_position(reader)
+        elif packet_id == 0x1E:
+            parsed = _parse_set_player_position_and_rotation(reader)
+        elif packet_id == 0x1F:
+            parsed = _parse_set_player_rotation(reader)
+        elif packet_id == 0x1B:
+            parsed = _parse_keep_alive(reader)
+        elif packet_id == 0x28:
+            parsed = _parse_player_action(reader)
+        elif packet_id == 0x11:
+            parsed = _parse_click_container(reader)
+        elif packet_id == 0x3F:
+            parsed = _parse_use_item_on(reader)
+        elif packet_id == 0x34:
+            parsed = _parse_set_held_item(reader)
+
+    # Naming chain (isinstance checks first, then state/id)
+    if state == ConnectionState.PLAY:
+        if packet_id == 0x1D:
+            name = "Set Player Position"
+        elif packet_id == 0x1E:
+            name = "Set Player Position and Rotation"
+        elif packet_id == 0x1F:
+            name = "Set Player Rotation"
+        elif packet_id == 0x1B:
+            name = "Keep Alive Response"
+        else:
+            name = f"PLAY Packet 0x{packet_id:02x}"
+
+    # Handler chain
+    if parsed is not None:
+        if state == ConnectionState.PLAY:
+            if packet_id == 0x1D:
+                if isinstance(parsed, SetPlayerPositionPacket):
+                    handlers[0x1D](parsed)
+            elif packet_id == 0x1B:
+                if isinstance(parsed, KeepAlivePacket):
+                    handlers[0x1B](parsed)
+    return name
+
+
+def registry_dispatch(data: bytes, state: ConnectionState):
+    """Registry dispatch as done by process_packet."""
+    packet_id, parsed = PacketParser.parse_packet(data, state)
+    packet_type = SERVERBOUND_PACKETS.get(state, packet_id)
+    packet_type.handler(None, parsed)
+    return packet_type.name
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    # Mostly movement, the occasional keep alive
+    packets = (
+        [frame(0x1D, struct.pack('>dddB', 1.0, 65.0, 1.0, 1))] * 8 +
+        [frame(0x1B, struct.pack('>q', 12345))]
+    )
+
+    # No-op handlers so only dispatch is measured
+    saved = {}
+    for packet_type in SERVERBOUND_PACKETS:
+        saved[packet_type] = packet_type.handler
+        packet_type.handler = lambda conn, parsed: None
+    legacy_handlers = {0x1D: lambda parsed: None, 0x1B: lambda parsed: None}
+
+    state = ConnectionState.PLAY
+    total = iterations * len(packets)
+
+    print(f"{'='*60}")
+    print(f"Dispatch microbenchmark: {total} PLAY packets")
+    print(f"{'='*60}")
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for data in packets:
+            legacy_dispatch(data, state, legacy_handlers)
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for data in packets:
+            registry_dispatch(data, state)
+    registry_elapsed = time.perf_counter() - start
+
+    for packet_type, handler in saved.items():
+        packet_type.handler = handler
+
+    print(f"  before (if/elif chains): {legacy_elapsed / total * 1e9:>8.0f} ns/packet")
+    print(f"  after  (registry)      : {registry_elapsed / total * 1e9:>8.0f} ns/packet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark receive-side packet framing (frames per second per connection).
+
+Compares the original handle_client receive loop (recv + buffer += data +
+re-slicing every frame) against PacketFramer (recv_into + memoryview frames).
+Both variants parse every frame with PacketParser so the numbers reflect what
+a connection actually does with a burst of movement packets.
+
+Usage:
+    python benchmarks/bench_framer.py [packet_count]
+"""
+
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PythonServer.connection import PacketFramer
+from PythonServer.minecraft_protocol import ConnectionState, PacketParser, ProtocolWriter
+
+
+def build_movement_stream(count: int) -> bytes:
+    """Build a burst of Set Player Position packets (0x1D)."""
+    stream = bytearray()
+    for i in range(count):
+        writer = ProtocolWriter()
+        writer.write_varint(0x1D)
+        writer.write_bytes(struct.pack('>ddd', 0.5 + i * 0.01, 65.0, 0.5))
+        writer.write_byte(0x01)  # Flags: on ground
+        body = writer.to_bytes()
+
+        frame = ProtocolWriter()
+        frame.write_varint(len(body))
+        frame.write_bytes(body)
+        stream += frame.to_bytes()
+    return bytes(stream)
+
+
+def read_varint(data, offset=0):
+    """Read a VarInt (same helper the server's receive loop used)."""
+    result = 0
+    shift = 0
+    pos = offset
+    while pos < len(data):
+        byte = data[pos]
+        result |= (byte & 0x7F) << shift
+        pos += 1
+        if (byte & 0x80) == 0:
+            break
+        shift += 7
+    return result, pos
+
+
+def receive_legacy(sock: socket.socket) -> int:
+    """Original loop: recv(4096), buffer += data, slice each frame."""
+    frames = 0
+    buffer = b''
+    while True:
+        data = sock.recv(4096)
+        if not data:
+            return frames
+        buffer += data
+
+        offset = 0
+        while offset < len(buffer):
+            packet_length, length_end = read_varint(buffer, offset)
+            total_packet_size = length_end + packet_length
+            if len(buffer) < total_packet_size:
+                break
+
+            full_packet = buffer[offset:total_packet_size]
+            packet_data = buffer[length_end:total_packet_size]
+            packet_id, id_end = read_varint(packet_data, 0)
+            packet_data[id_end:]  # The old loop also copied out the payload
+
+            PacketParser.parse_packet(full_packet, ConnectionState.PLAY)
+            frames += 1
+            offset = total_packet_size
+
+        buffer = buffer[offset:]
+
+
+def receive_framer(sock: socket.socket) -> int:
+    """New loop: recv_into the framer and parse memoryview frames."""
+    frames = 0
+    framer = PacketFramer()
+    while True:
+        if framer.recv_into(sock) == 0:
+            return frames
+        for frame in framer.frames():
+            PacketParser.parse_packet(frame, ConnectionState.PLAY)
+            frames += 1
+
+
+def run(receiver, stream: bytes) -> float:
+    """Send the stream over a socketpair and time the receiver."""
+    server_sock, client_sock = socket.socketpair()
+
+    def sender():
+        client_sock.sendall(stream)
+        client_sock.close()
+
+    thread = threading.Thread(target=sender, daemon=True)
+    start = time.perf_counter()
+    thread.start()
+    frames = receiver(server_sock)
+    elapsed = time.perf_counter() - start
+    thread.join()
+    server_sock.close()
+    return frames, elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    stream = build_movement_stream(count)
+
+    print(f"{'='*60}")
+    print(f"Receive framing benchmark: {count} movement packets ({len(stream)} bytes)")
+    print(f"{'='*60}")
+
+    for label, receiver in (("before (buffer += data)", receive_legacy),
+                            ("after  (PacketFramer)  ", receive_framer)):
+        frames, elapsed = run(receiver, stream)
+        assert frames == count, f"{label}: expected {count} frames, got {frames}"
+        print(f"  {label}: {frames / elapsed:>12,.0f} frames/s  ({elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
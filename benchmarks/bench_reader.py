@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark decoding of fixed-layout movement packets.
+
+Compares the original per-field reads (a slice copy plus struct.unpack for
+every double/float) with ProtocolReader.read_struct, which decodes the whole
+Set Player Position and Rotation body with one precompiled Struct in place.
+
+Usage:
+    python benchmarks/bench_reader.py [iterations]
+"""
+
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PythonServer.minecraft_protocol import ProtocolReader
+
+
+class LegacyReader:
+    """The original reader: bounds check, slice copy and struct.unpack per field."""
+
+    def __init__(self, data: bytes, offset: int = 0):
+        self.data = data
+        self.offset = offset
+
+    def read_float(self) -> float:
+        if self.offset + 4 > len(self.data):
+            raise ValueError("Not enough data for float")
+        value = struct.unpack('>f', self.data[self.offset:self.offset + 4])[0]
+        self.offset += 4
+        return value
+
+    def read_double(self) -> float:
+        if self.offset + 8 > len(self.data):
+            raise ValueError("Not enough data for double")
+        value = struct.unpack('>d', self.data[self.offset:self.offset + 8])[0]
+        self.offset += 8
+        return value
+
+
+def legacy_read(data: bytes):
+    """Per-field reads on the original reader."""
+    reader = LegacyReader(data)
+    return (reader.read_double(), reader.read_double(), reader.read_double(),
+            reader.read_float(), reader.read_float())
+
+
+def field_read(data: bytes):
+    """Per-field reads on the memoryview reader."""
+    reader = ProtocolReader(data)
+    return (reader.read_double(), reader.read_double(), reader.read_double(),
+            reader.read_float(), reader.read_float())
+
+
+def struct_read(data: bytes):
+    """One bulk read, as done by the movement packet parsers."""
+    return ProtocolReader(data).read_struct('>dddff')
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    data = struct.pack('>dddffB', 1.5, 65.0, -3.25, 90.0, 12.5, 1)
+
+    print(f"{'='*60}")
+    print(f"Reader microbenchmark: {iterations} position+rotation bodies")
+    print(f"{'='*60}")
+
+    for label, func in (
+        ("before (per-field)     ", legacy_read),
+        ("after  (per-field)     ", field_read),
+        ("after  (read_struct)   ", struct_read),
+    ):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func(data)
+        elapsed = time.perf_counter() - start
+        print(f"  {label}: {elapsed / iterations * 1e9:>8.0f} ns/packet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark outbound packet writes for bursts of small packets.
+
+Sends bursts of small clientbound packets (the size of pickup, destroy-entity
+and set-slot packets) over a real socket, comparing one transport write per
+packet with ClientConnection's outbound queue (one coalesced write per flush).
+
+Usage:
+    python benchmarks/bench_send_queue.py [bursts] [packets_per_burst]
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PythonServer.connection import ClientConnection
+from PythonServer.minecraft_protocol import PacketBuilder
+
+
+class _SinkProtocol(asyncio.Protocol):
+    """Server-side protocol that only holds the transport."""
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+
+def _drain(sock: socket.socket, total: int, done: threading.Event):
+    """Read and discard total bytes on the client side."""
+    received = 0
+    while received < total:
+        data = sock.recv(1 << 20)
+        if not data:
+            break
+        received += len(data)
+    done.set()
+
+
+async def run(mode: str, bursts: int, per_burst: int) -> tuple:
+    """Send bursts over a socketpair, returning (elapsed, writes)."""
+    server_sock, client_sock = socket.socketpair()
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.connect_accepted_socket(_SinkProtocol, server_sock)
+    conn = ClientConnection(transport)
+
+    packet = PacketBuilder.build_set_container_slot(
+        window_id=0, state_id=1, slot=36, item_id=1, count=1
+    )
+    total = bursts * per_burst * len(packet)
+
+    done = threading.Event()
+    reader = threading.Thread(target=_drain, args=(client_sock, total, done), daemon=True)
+    reader.start()
+
+    writes = 0
+    start = time.perf_counter()
+    for _ in range(bursts):
+        for _ in range(per_burst):
+            if mode == "write":
+                transport.write(packet)
+                writes += 1
+            else:
+                conn.send(packet)
+        if mode == "queue":
+            conn.flush()
+        # Let the transport push out anything it buffered
+        await asyncio.sleep(0)
+    while not done.is_set():
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+
+    if mode == "queue":
+        writes = conn.flush_count
+    transport.close()
+    client_sock.close()
+    return elapsed, writes
+
+
+def main():
+    bursts = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    per_burst = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    print(f"{'='*60}")
+    print(f"Outbound write benchmark: {bursts} bursts x {per_burst} packets")
+    print(f"{'='*60}")
+
+    for label, mode in (("before (write per packet)", "write"),
+                        ("after  (outbound queue)  ", "queue")):
+        elapsed, writes = asyncio.run(run(mode, bursts, per_burst))
+        packets = bursts * per_burst
+        print(f"  {label}: {packets / elapsed:>12,.0f} packets/s  {writes:>8} writes  ({elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
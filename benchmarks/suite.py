@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the protocol codec and chunk-encoding hot paths.
+
+Runs every registered benchmark, prints ns per operation, writes the
+results as JSON and optionally compares them against a saved baseline.
+A benchmark whose best time is slower than the baseline by more than the
+threshold counts as a regression and makes the run exit with status 1.
+
+Covered:
+    - VarInt read/write, ProtocolReader string/UUID/position reads
+    - PacketParser.parse_packet for each PLAY packet the server parses
+    - BlockManager.get_chunk_section_for_protocol (mixed and uniform) and
+      PacketBuilder._write_paletted_container_indirect
+    - PacketBuilder.build_chunk_data for flat and terrain chunks, a terrain
+      chunk with one changed block, and a chunk packet cache hit
+    - BlockManager heightmap computation from section data
+    - LightEngine initial chunk lighting and a light update for a placed block
+    - TerrainGenerator.generate_height_map
+    - World.update_item_entities with 10/100/1000 item entities
+
+Usage:
+    python benchmarks/suite.py                        # run, write results/latest.json
+    python benchmarks/suite.py --save-baseline        # ...and store them as the baseline
+    python benchmarks/suite.py --compare              # ...and compare against the baseline
+    python benchmarks/suite.py -k chunk --quick       # only matching names, shorter rounds
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import struct
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PythonServer.minecraft_protocol import (
+    ConnectionState, PacketBuilder, PacketParser, ProtocolReader, ProtocolWriter,
+    SERVERBOUND_PACKETS, encode_varint
+)
+from PythonServer.block_manager import BlockManager, TERRAIN_AVAILABLE
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, 'latest.json')
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, 'baseline.json')
+
+# A benchmark is slower than its baseline by more than this fraction -> regression
+DEFAULT_THRESHOLD = 0.10
+
+
+# name -> factory; the factory does the setup and returns (fn, operations per call)
+BENCHMARKS: Dict[str, Callable[[], Tuple[Callable[[], object], int]]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark factory under a name."""
+    def decorator(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return decorator
+
+
+def frame(packet_id: int, body: bytes) -> bytes:
+    """Frame a packet body with its ID and length prefix."""
+    data = encode_varint(packet_id) + body
+    return encode_varint(len(data)) + data
+
+
+def writer_body(build: Callable[[ProtocolWriter], object]) -> bytes:
+    """Bytes written by a ProtocolWriter callback."""
+    writer = ProtocolWriter()
+    build(writer)
+    return writer.to_bytes()
+
+
+# ---------------------------------------------------------------------------
+# Codec primitives
+# ---------------------------------------------------------------------------
+
+# Mix of 1-5 byte VarInts (entity IDs, counts, block states, negative coordinates)
+VARINT_VALUES = [0, 1, 127, 128, 300, 2098, 16383, 16384, 1000000, 2 ** 31 - 1, -1, -64]
+
+
+@benchmark('codec.read_varint')
+def bench_read_varint():
+    data = b''.join(encode_varint(value) for value in VARINT_VALUES)
+    count = len(VARINT_VALUES)
+
+    def run():
+        reader = ProtocolReader(data)
+        for _ in range(count):
+            reader.read_varint()
+    return run, count
+
+
+@benchmark('codec.write_varint')
+def bench_write_varint():
+    values = VARINT_VALUES
+
+    def run():
+        writer = ProtocolWriter()
+        for value in values:
+            writer.write_varint(value)
+    return run, len(values)
+
+
+@benchmark('codec.read_string')
+def bench_read_string():
+    data = writer_body(lambda w: w.write_string('minecraft:overworld'))
+
+    def run():
+        ProtocolReader(data).read_string()
+    return run, 1
+
+
+@benchmark('codec.read_uuid')
+def bench_read_uuid():
+    data = uuid.UUID(int=0x1234567890abcdef1234567890abcdef).bytes
+
+    def run():
+        ProtocolReader(data).read_uuid()
+    return run, 1
+
+
+@benchmark('codec.read_position')
+def bench_read_position():
+    data = writer_body(lambda w: w.write_position(-1234, -60, 5678))
+
+    def run():
+        ProtocolReader(data).read_position()
+    return run, 1
+
+
+# ---------------------------------------------------------------------------
+# PLAY packet parsing
+# ---------------------------------------------------------------------------
+
+# Representative bodies of the PLAY packets the server parses, by resource name
+PLAY_PACKET_BODIES = {
+    'minecraft:accept_teleportation': writer_body(lambda w: w.write_varint(1)),
+    'minecraft:client_tick_end': b'',
+    'minecraft:container_click': writer_body(
+        lambda w: w.write_varint(0).write_varint(5).write_short(36).write_byte(0).write_varint(0)
+        .write_varint(2)
+        .write_short(36).write_bool(True).write_varint(27).write_varint(3).write_varint(0).write_varint(0)
+        .write_short(37).write_bool(False)
+        .write_bool(False)),
+    'minecraft:keep_alive': struct.pack('>q', 1700000000000),
+    'minecraft:move_player_pos': struct.pack('>dddB', 8.5, 65.0, -3.25, 1),
+    'minecraft:move_player_pos_rot': struct.pack('>dddffB', 8.5, 65.0, -3.25, 90.0, 12.5, 1),
+    'minecraft:move_player_rot': struct.pack('>ffB', 90.0, 12.5, 1),
+    'minecraft:player_action': writer_body(
+        lambda w: w.write_varint(0).write_position(8, 63, -4).write_byte(1).write_varint(12)),
+    'minecraft:set_carried_item': struct.pack('>h', 3),
+    'minecraft:use_item_on': writer_body(
+        lambda w: w.write_varint(0).write_position(8, 63, -4).write_varint(1)
+        .write_float(0.5).write_float(1.0).write_float(0.5).write_bool(False).write_bool(False).write_varint(13)),
+    'minecraft:swing': writer_body(lambda w: w.write_varint(0)),  # No schema: UnknownPacket path
+}
+
+
+def _parse_benchmark(resource_name: str, body: bytes):
+    packet_type = next(t for t in SERVERBOUND_PACKETS
+                       if t.state == ConnectionState.PLAY and t.resource_name == resource_name)
+    data = frame(packet_type.packet_id, body)
+
+    def factory():
+        def run():
+            PacketParser.parse_packet(data, ConnectionState.PLAY)
+        return run, 1
+    return factory
+
+
+for _resource_name, _body in PLAY_PACKET_BODIES.items():
+    benchmark(f"parse.{_resource_name.split(':', 1)[1]}")(_parse_benchmark(_resource_name, _body))
+
+
+# ---------------------------------------------------------------------------
+# Chunk encoding
+# ---------------------------------------------------------------------------
+
+def flat_block_manager() -> BlockManager:
+    """A BlockManager holding one flat-world chunk at (0, 0)."""
+    block_manager = BlockManager()
+    block_manager.terrain_generator = None
+    block_manager.load_chunk(0, 0, ground_y=64, flat_world=True)
+    return block_manager
+
+
+def terrain_block_manager() -> BlockManager:
+    """A BlockManager holding one generated terrain chunk at (3, -2)."""
+    block_manager = BlockManager()
+    block_manager.load_chunk(3, -2, flat_world=False, use_terrain=True)
+    return block_manager
+
+
+# Section 8 holds y=64..79: the flat world's grass layer, or the terrain surface
+GROUND_SECTION = 8
+
+
+@benchmark('chunk.section_for_protocol.flat')
+def bench_section_flat():
+    block_manager = flat_block_manager()
+
+    def run():
+        block_manager.get_chunk_section_for_protocol(0, 0, GROUND_SECTION)
+    return run, 1
+
+
+@benchmark('chunk.section_for_protocol.uniform')
+def bench_section_uniform():
+    block_manager = flat_block_manager()
+
+    def run():
+        # An all-air section above the flat world's ground
+        block_manager.get_chunk_section_for_protocol(0, 0, GROUND_SECTION + 1)
+    return run, 1
+
+
+@benchmark('chunk.section_for_protocol.terrain')
+def bench_section_terrain():
+    block_manager = terrain_block_manager()
+
+    def run():
+        block_manager.get_chunk_section_for_protocol(3, -2, GROUND_SECTION)
+    return run, 1
+
+
+@benchmark('chunk.write_paletted_container_indirect')
+def bench_write_paletted_container():
+    _, palette, indices = terrain_block_manager().get_chunk_section_for_protocol(3, -2, GROUND_SECTION)
+    bits_per_entry = max(4, (len(palette) - 1).bit_length())
+
+    def run():
+        PacketBuilder._write_paletted_container_indirect(ProtocolWriter(), bits_per_entry, palette, indices)
+    return run, 1
+
+
+@benchmark('chunk.build_chunk_data.flat')
+def bench_build_flat():
+    block_manager = flat_block_manager()
+
+    def run():
+        # Every section is encoded and lit again, as for a freshly loaded chunk
+        block_manager.dirty_sections.update(block_manager.block_data)
+        block_manager.light.forget_chunk(0, 0)
+        PacketBuilder.build_chunk_data(0, 0, block_manager)
+    return run, 1
+
+
+@benchmark('chunk.build_chunk_data.terrain')
+def bench_build_terrain():
+    block_manager = terrain_block_manager()
+
+    def run():
+        block_manager.dirty_sections.update(block_manager.block_data)
+        block_manager.light.forget_chunk(3, -2)
+        PacketBuilder.build_chunk_data(3, -2, block_manager)
+    return run, 1
+
+
+@benchmark('chunk.build_chunk_data.terrain_one_block_changed')
+def bench_build_terrain_one_block_changed():
+    block_manager = terrain_block_manager()
+    PacketBuilder.build_chunk_data(3, -2, block_manager)
+    x, z = 3 * 16 + 5, -2 * 16 + 7
+    y = block_manager.terrain_generator.generate_height_map(3, -2)[7][5] - 1
+    blocks = [block_manager.BLOCK_STONE, block_manager.BLOCK_DIRT]
+
+    def run():
+        # One dug/placed block: only its section is encoded again
+        blocks.reverse()
+        block_manager.set_block(x, y, z, blocks[0])
+        PacketBuilder.build_chunk_data(3, -2, block_manager)
+    return run, 1
+
+
+@benchmark('chunk.compute_heightmaps.terrain')
+def bench_compute_heightmaps():
+    block_manager = terrain_block_manager()
+
+    def run():
+        block_manager._compute_heightmaps(3, -2)
+    return run, 1
+
+
+@benchmark('chunk.packet_cache_hit')
+def bench_packet_cache_hit():
+    from PythonServer.chunk_cache import ChunkPacketCache
+
+    block_manager = flat_block_manager()
+    cache = ChunkPacketCache()
+    build = lambda: PacketBuilder.build_chunk_data(0, 0, block_manager)
+    cache.get_or_build(0, 0, block_manager.chunk_version(0, 0), build)
+
+    def run():
+        cache.get_or_build(0, 0, block_manager.chunk_version(0, 0), build)
+    return run, 1
+
+
+# ---------------------------------------------------------------------------
+# Lighting
+# ---------------------------------------------------------------------------
+
+@benchmark('light.light_chunk.flat')
+def bench_light_flat():
+    block_manager = flat_block_manager()
+
+    def run():
+        block_manager.light.light_chunk(0, 0)
+    return run, 1
+
+
+@benchmark('light.light_chunk.terrain')
+def bench_light_terrain():
+    block_manager = terrain_block_manager()
+
+    def run():
+        block_manager.light.light_chunk(3, -2)
+    return run, 1
+
+
+@benchmark('light.set_block.surface')
+def bench_light_set_block():
+    block_manager = terrain_block_manager()
+    block_manager.light.light_chunk(3, -2)
+    x, z = 3 * 16 + 5, -2 * 16 + 7
+    y = block_manager.terrain_generator.generate_height_map(3, -2)[7][5] + 1
+    blocks = [block_manager.BLOCK_AIR, block_manager.BLOCK_STONE]
+
+    def run():
+        # Place/remove a block on the surface: shadows the column below it
+        blocks.reverse()
+        block_manager.set_block(x, y, z, blocks[0])
+        block_manager.light.take_changed_sections()
+    return run, 1
+
+
+@benchmark('terrain.generate_height_map')
+def bench_height_map():
+    generator = BlockManager().terrain_generator
+    cache = generator.height_map_cache
+
+    def run():
+        cache.clear()  # Measure generation, not the cache
+        generator.generate_height_map(3, -2)
+    return run, 1
+
+
+# ---------------------------------------------------------------------------
+# Entity ticking
+# ---------------------------------------------------------------------------
+
+def _item_entity_benchmark(entity_count: int):
+    def factory():
+        from PythonServer.packet_debug_server import ItemEntity, World
+
+        world = World(view_distance=2)
+        # Entities only move in chunks someone views; a stand-in viewer holds
+        # the chunks they are spread over (x/z in [-32, 32) with drift)
+        viewer = uuid.UUID(int=0)
+        for chunk_x in range(-2, 2):
+            for chunk_z in range(-2, 2):
+                world.acquire_chunk(chunk_x, chunk_z, viewer)
+        rng = random.Random(entity_count)
+        for entity_id in range(1000, 1000 + entity_count):
+            world.item_entities[entity_id] = ItemEntity(
+                entity_id=entity_id, uuid=uuid.UUID(int=entity_id),
+                x=rng.uniform(-24.0, 24.0), y=rng.uniform(65.0, 70.0), z=rng.uniform(-24.0, 24.0),
+                item_id=27,
+                velocity_x=rng.uniform(-0.1, 0.1), velocity_y=0.2, velocity_z=rng.uniform(-0.1, 0.1)
+            )
+
+        def run():
+            world.update_item_entities()
+        return run, 1
+    return factory
+
+
+for _count in (10, 100, 1000):
+    benchmark(f'world.update_item_entities.{_count}')(_item_entity_benchmark(_count))
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def measure(fn: Callable[[], object], ops: int, rounds: int, min_round_time: float) -> Dict[str, float]:
+    """
+    Time a benchmark function.
+
+    The number of calls per round is calibrated so one round takes at least
+    min_round_time; the first (calibration) calls double as warm-up.
+
+    Returns:
+        best/median ns per operation and the calls per round
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round_time:
+            break
+        # Scale towards the target round time, at most 10x per step
+        estimate = int(number * min_round_time * 1.2 / max(elapsed, 1e-9))
+        number = max(number + 1, min(number * 10, estimate))
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / (number * ops) * 1e9)
+
+    return {
+        'best_ns': min(samples),
+        'median_ns': statistics.median(samples),
+        'calls_per_round': number,
+        'rounds': rounds,
+    }
+
+
+def run_suite(pattern: Optional[str], rounds: int, min_round_time: float) -> Dict[str, Dict[str, float]]:
+    """Run the registered benchmarks whose name contains pattern (all if None)."""
+    results = {}
+    for name, factory in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        if name.startswith('terrain.') or name.endswith('.terrain'):
+            if not TERRAIN_AVAILABLE:
+                print(f"  {name:<45} skipped (terrain generation unavailable)")
+                continue
+        fn, ops = factory()
+        result = measure(fn, ops, rounds, min_round_time)
+        results[name] = result
+        print(f"  {name:<45} {result['best_ns']:>12,.0f} ns/op  (median {result['median_ns']:,.0f})")
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """
+    Print a comparison of best times against a baseline.
+
+    Returns:
+        Names of benchmarks that regressed by more than threshold
+    """
+    regressions = []
+    print(f"\n{'='*60}")
+    print(f"Comparison against baseline (threshold {threshold:.0%})")
+    print(f"{'='*60}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"  {name:<45} (new)")
+            continue
+        before = baseline[name]['best_ns']
+        after = result['best_ns']
+        change = (after - before) / before
+        if change > threshold:
+            marker = '✗ regression'
+            regressions.append(name)
+        elif change < -threshold:
+            marker = '✓ faster'
+        else:
+            marker = ''
+        print(f"  {name:<45} {before:>12,.0f} → {after:>12,.0f} ns/op  {change:>+7.1%}  {marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Codec and chunk-encoding benchmark suite")
+    parser.add_argument('-k', dest='pattern', help="only run benchmarks whose name contains this")
+    parser.add_argument('--rounds', type=int, default=5, help="timed rounds per benchmark (default 5)")
+    parser.add_argument('--min-time', type=float, default=0.2, help="minimum seconds per round (default 0.2)")
+    parser.add_argument('--quick', action='store_true', help="3 rounds of at least 0.05 s")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="results JSON path")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline JSON path")
+    parser.add_argument('--save-baseline', action='store_true', help="also write the results as the baseline")
+    parser.add_argument('--compare', action='store_true', help="compare against the baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"allowed slowdown before a regression is reported (default {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    rounds, min_time = (3, 0.05) if args.quick else (args.rounds, args.min_time)
+
+    print(f"{'='*60}")
+    print(f"Benchmark suite: {rounds} rounds of at least {min_time}s each")
+    print(f"{'='*60}")
+    results = run_suite(args.pattern, rounds, min_time)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    paths = [args.output] + ([args.baseline] if args.save_baseline else [])
+    for path in paths:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Results written to {path}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"✗ No baseline at {args.baseline} (create one with --save-baseline)")
+            sys.exit(2)
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n✗ {len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✓ No regressions")
+
+
+if __name__ == "__main__":
+    main()
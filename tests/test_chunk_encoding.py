@@ -0,0 +1,80 @@
+"""
+Tests for chunk section encoding (BlockManager.get_chunk_section_for_protocol
+plus PacketBuilder.encode_chunk_section), on both the NumPy and the plain
+Python paths, against a straightforward reference encoder.
+"""
+
+import os
+import random
+import struct
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PythonServer import block_manager as block_manager_module
+from PythonServer import minecraft_protocol
+from PythonServer.block_manager import BlockManager, ChunkSection
+from PythonServer.minecraft_protocol import PacketBuilder, encode_varint
+
+DIRECT_BITS = 15
+
+
+def reference_encode(blocks):
+    """Encode a section's 4096 block state IDs as in a Chunk Data packet."""
+    out = struct.pack('>h', sum(1 for block in blocks if block != 0))
+    palette = sorted(set(blocks))
+    if len(palette) == 1:
+        out += bytes([0]) + encode_varint(palette[0])
+    else:
+        if len(palette) > 256:
+            bits = DIRECT_BITS
+            values = blocks
+            out += bytes([bits])
+        else:
+            bits = max(4, (len(palette) - 1).bit_length())
+            lookup = {block: index for index, block in enumerate(palette)}
+            values = [lookup[block] for block in blocks]
+            out += bytes([bits]) + encode_varint(len(palette))
+            out += b''.join(encode_varint(block) for block in palette)
+        per_long = 64 // bits
+        for start in range(0, len(values), per_long):
+            long_value = 0
+            for i, value in enumerate(values[start:start + per_long]):
+                long_value |= value << (i * bits)
+            out += struct.pack('>Q', long_value)
+    # Biomes: single value (plains)
+    return out + bytes([0]) + encode_varint(0)
+
+
+def make_blocks(state_count, seed):
+    """4096 block state IDs using exactly state_count distinct states."""
+    rng = random.Random(seed)
+    states = rng.sample(range(1, 29000), state_count - 1) + [0]
+    blocks = states * (4096 // len(states)) + states[:4096 % len(states)]
+    rng.shuffle(blocks)
+    return blocks
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def numpy_path(request, monkeypatch):
+    """Run the encoder with NumPy (if installed) or with the plain Python fallback."""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(block_manager_module, 'NUMPY_AVAILABLE', False)
+        monkeypatch.setattr(minecraft_protocol, 'NUMPY_AVAILABLE', False)
+    return request.param
+
+
+@pytest.mark.parametrize('state_count', [1, 2, 16, 17, 255, 256, 257, 400, 4096])
+def test_section_matches_reference(numpy_path, state_count, monkeypatch):
+    monkeypatch.setattr(block_manager_module, 'TERRAIN_AVAILABLE', False)  # Not needed here
+    blocks = make_blocks(state_count, seed=state_count)
+    manager = BlockManager()
+    manager.block_data[(0, 0, 0)] = ChunkSection.from_blocks(list(blocks))
+
+    encoded = PacketBuilder.encode_chunk_section(*manager.get_chunk_section_for_protocol(0, 0, 0))
+
+    assert encoded == reference_encode(blocks)
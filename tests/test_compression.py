@@ -0,0 +1,60 @@
+"""
+Tests for the compressed frame format (connection.compress_frame / decompress_frame).
+"""
+
+import os
+import sys
+import zlib
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PythonServer.connection import MAX_PACKET_LENGTH, compress_frame, decompress_frame, encode_varint
+
+THRESHOLD = 256
+
+
+def build_compressed_frame(data_length: int, compressed: bytes) -> bytes:
+    """Compressed-format frame with an arbitrary Data Length and zlib payload."""
+    body = encode_varint(data_length) + compressed
+    return encode_varint(len(body)) + body
+
+
+def test_round_trip_above_threshold():
+    payload = bytes(range(256)) * 4
+    packet = encode_varint(len(payload)) + payload
+    assert decompress_frame(compress_frame(packet, THRESHOLD), THRESHOLD) == packet
+
+
+def test_round_trip_below_threshold():
+    packet = encode_varint(3) + b'\x01\x02\x03'
+    assert decompress_frame(compress_frame(packet, THRESHOLD), THRESHOLD) == packet
+
+
+def test_rejects_payload_inflating_past_data_length():
+    # ~100 KB of zlib that inflates to 100 MB, claiming a small Data Length
+    bomb = zlib.compress(b'\x00' * (100 * 1024 * 1024), 9)
+    frame = build_compressed_frame(THRESHOLD, bomb)
+    with pytest.raises(ValueError):
+        decompress_frame(frame, THRESHOLD)
+
+
+def test_rejects_payload_inflating_past_max_data_length():
+    bomb = zlib.compress(b'\x00' * (MAX_PACKET_LENGTH + 1), 9)
+    frame = build_compressed_frame(MAX_PACKET_LENGTH, bomb)
+    with pytest.raises(ValueError):
+        decompress_frame(frame, THRESHOLD)
+
+
+def test_rejects_payload_shorter_than_data_length():
+    frame = build_compressed_frame(1024, zlib.compress(b'\x00' * 512))
+    with pytest.raises(ValueError):
+        decompress_frame(frame, THRESHOLD)
+
+
+def test_rejects_truncated_stream():
+    compressed = zlib.compress(bytes(range(256)) * 4)
+    frame = build_compressed_frame(1024, compressed[:-4])
+    with pytest.raises(ValueError):
+        decompress_frame(frame, THRESHOLD)